@@ -0,0 +1 @@
+"""Benchmarks de rendimiento — se ejecutan con `python -m benchmarks.<modulo>`."""
@@ -0,0 +1,238 @@
+"""
+Backend local que sustituye a app_termostato en los benchmarks.
+Sirve /termostato/, /termostato/historial/?limite= y /comprueba/ con datos
+generados, una latencia configurable por respuesta, y comprime la
+respuesta según la cabecera Accept-Encoding del cliente.
+"""
+import gzip
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Set
+from urllib.parse import parse_qs, urlparse
+
+from webapp.services.simulador import DistribucionLatencia, generar_estado
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        from backports import zstd
+    except ImportError:
+        zstd = None
+
+# Compresores disponibles, en orden de preferencia del servidor
+COMPRESORES: Dict[str, Callable[[bytes], bytes]] = {}
+if zstd is not None:
+    COMPRESORES['zstd'] = zstd.compress
+if brotli is not None:
+    # Calidad 5: la que usan los servidores para compresión dinámica
+    COMPRESORES['br'] = lambda datos: brotli.compress(datos, quality=5)
+COMPRESORES['gzip'] = gzip.compress
+
+
+def generar_historial(limite: int, semilla: int = 42) -> dict:
+    """Generar un historial con la forma de /termostato/historial/.
+
+    Un registro por minuto, del más reciente al más antiguo, con una
+    caminata aleatoria de temperatura alrededor de 22 grados.
+
+    Args:
+        limite: Número de registros a generar.
+        semilla: Semilla del generador aleatorio (resultados reproducibles).
+
+    Returns:
+        Dict con 'historial' (lista de registros) y 'total'.
+    """
+    aleatorio = random.Random(semilla)
+    ahora = datetime(2026, 1, 1, 12, 0, 0)
+    temperatura = 22.0
+    historial = []
+    for i in range(limite):
+        temperatura = min(30.0, max(15.0, temperatura + aleatorio.uniform(-0.3, 0.3)))
+        historial.append({
+            'timestamp': (ahora - timedelta(minutes=i)).isoformat(),
+            'temperatura': round(temperatura, 1),
+        })
+    return {'historial': historial, 'total': limite}
+
+
+def _elegir_codificacion(accept_encoding: str) -> str:
+    """Elegir la codificación preferida por el servidor entre las aceptadas."""
+    aceptadas = {c.split(';')[0].strip() for c in accept_encoding.split(',')}
+    for nombre in COMPRESORES:
+        if nombre in aceptadas:
+            return nombre
+    return 'identity'
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    """Manejador HTTP/1.1 con keep-alive que contabiliza bytes enviados."""
+
+    protocol_version = 'HTTP/1.1'
+    # Cabeceras y cuerpo van en dos escrituras: con Nagle + delayed ACK del
+    # cliente cada respuesta por una conexión reutilizada esperaría ~40 ms
+    disable_nagle_algorithm = True
+    server: 'BackendLocal'
+
+    def setup(self):
+        """Registrar la conexión y simular el coste de establecerla."""
+        super().setup()
+        self.server.abrir_conexion(self.connection)
+
+    def finish(self):
+        """Dar de baja la conexión al cerrarla."""
+        try:
+            super().finish()
+        finally:
+            self.server.cerrar_conexion(self.connection)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Responder a los endpoints de app_termostato tras la latencia simulada."""
+        url = urlparse(self.path)
+        if url.path == '/termostato/historial/':
+            limite = int(parse_qs(url.query).get('limite', ['60'])[0])
+            datos = generar_historial(limite)
+        elif url.path == '/termostato/':
+            datos = generar_estado(time.time())
+        elif url.path == '/comprueba/':
+            datos = {'status': 'ok', 'version': 'backend_local'}
+        else:
+            self.send_error(404)
+            return
+        self.server.esperar_latencia(url.path)
+        cuerpo = json.dumps(datos).encode('utf-8')
+
+        codificacion = _elegir_codificacion(self.headers.get('Accept-Encoding', ''))
+        if codificacion != 'identity':
+            cuerpo = COMPRESORES[codificacion](cuerpo)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        if codificacion != 'identity':
+            self.send_header('Content-Encoding', codificacion)
+        self.end_headers()
+        self.server.registrar_envio(len(cuerpo))
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Silenciar el log por petición para no distorsionar las mediciones."""
+
+
+# Parámetros de la simulación más los contadores que leen los benchmarks
+class BackendLocal(ThreadingHTTPServer):  # pylint: disable=too-many-instance-attributes
+    """Servidor HTTP en un thread de fondo que imita a app_termostato.
+
+    Attributes:
+        bytes_enviados: Bytes de cuerpo enviados desde el último reinicio.
+        peticiones: Peticiones atendidas por ruta desde el último reinicio.
+        conexiones_abiertas: Conexiones TCP aceptadas desde el último reinicio.
+    """
+
+    daemon_threads = True
+    # Cola de conexiones pendientes: el default de socketserver (5) descarta
+    # conexiones en cuanto la carga supera unos pocos clientes
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        puerto: int = 0,
+        latencia: Optional[DistribucionLatencia] = None,
+        semilla: int = 42,
+        retardo_conexion: float = 0.0
+    ) -> None:
+        """Crear el servidor escuchando en 127.0.0.1.
+
+        Args:
+            puerto: Puerto TCP (0 = elegido por el sistema operativo).
+            latencia: Distribución de la latencia añadida a cada respuesta
+                (ver webapp/services/simulador.py). None = sin latencia.
+            semilla: Semilla para muestrear las latencias.
+            retardo_conexion: Segundos añadidos a la primera respuesta de
+                cada conexión nueva, para imitar DNS + TCP + TLS hacia un
+                backend remoto (en 127.0.0.1 ese coste es casi nulo).
+        """
+        super().__init__(('127.0.0.1', puerto), _Manejador)
+        self.latencia = latencia
+        self.bytes_enviados: int = 0
+        self.peticiones: Counter = Counter()
+        self.retardo_conexion = retardo_conexion
+        self.conexiones_abiertas: int = 0
+        self._conexiones: Set[socket.socket] = set()
+        self._aleatorio = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL base del servidor (ej: 'http://127.0.0.1:54321')."""
+        host, puerto = self.server_address[:2]
+        return f'http://{host}:{puerto}'
+
+    def registrar_envio(self, cantidad: int) -> None:
+        """Acumular bytes de cuerpo enviados (thread-safe)."""
+        with self._lock:
+            self.bytes_enviados += cantidad
+
+    def handle_error(self, request, client_address):
+        """Ignorar las desconexiones del cliente (ej: lectura cortada en limite)."""
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def abrir_conexion(self, conexion: socket.socket) -> None:
+        """Registrar una conexión nueva y esperar el retardo de conexión."""
+        with self._lock:
+            self.conexiones_abiertas += 1
+            self._conexiones.add(conexion)
+        if self.retardo_conexion:
+            time.sleep(self.retardo_conexion)
+
+    def cerrar_conexion(self, conexion: socket.socket) -> None:
+        """Dar de baja una conexión terminada."""
+        with self._lock:
+            self._conexiones.discard(conexion)
+
+    def esperar_latencia(self, ruta: str) -> None:
+        """Contar la petición y dormir la latencia simulada (thread-safe)."""
+        with self._lock:
+            self.peticiones[ruta] += 1
+            espera = self.latencia.muestra(self._aleatorio) if self.latencia else 0.0
+        if espera:
+            time.sleep(espera)
+
+    def reiniciar_contadores(self) -> None:
+        """Poner a cero los contadores de bytes, peticiones y conexiones."""
+        with self._lock:
+            self.bytes_enviados = 0
+            self.peticiones.clear()
+            self.conexiones_abiertas = 0
+
+    def iniciar(self) -> 'BackendLocal':
+        """Arrancar el servidor en un thread daemon y devolverse a sí mismo."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def detener(self) -> None:
+        """Detener el servidor, cortar las conexiones keep-alive y liberar el socket."""
+        self.shutdown()
+        with self._lock:
+            conexiones = list(self._conexiones)
+        for conexion in conexiones:
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # ya cerrada por el cliente
+        self.server_close()
@@ -0,0 +1,76 @@
+"""
+Latencia de la primera petición tras el arranque, con y sin precalentamiento.
+
+Para cada modo crea varias veces la webapp de producción contra un
+BackendLocal que añade un retardo a cada conexión nueva (imitando DNS +
+TCP + TLS hacia un backend remoto), espera el tiempo que tardaría en
+llegar el primer usuario y mide la primera y la segunda petición a
+/api/estado. Con API_PRECALENTAR la conexión ya está abierta y el estado
+en caché cuando llega el usuario.
+
+Uso:
+  python -m benchmarks.bench_arranque --retardo-conexion 0.15 --repeticiones 5
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks.backend_local import BackendLocal
+from webapp import create_app
+from webapp.config import ProductionConfig, config
+from webapp.services.simulador import LatenciaFija
+
+
+def _primeras_peticiones(url_backend: str, precalentar: bool, espera: float) -> List[float]:
+    """Arrancar una webapp nueva y medir sus dos primeras peticiones en ms."""
+    config['arranque'] = type('ArranqueConfig', (ProductionConfig,), {
+        'URL_APP_API': url_backend,
+        'API_PRECALENTAR': precalentar,
+        'API_SIMULADO': False,
+        'API_GRABACION': None,
+    })
+    app = create_app('arranque')
+    time.sleep(espera)  # tiempo hasta que llega el primer usuario
+    cliente = app.test_client()
+    duraciones = []
+    for _ in range(2):
+        inicio = time.perf_counter()
+        cliente.get('/api/estado')
+        duraciones.append((time.perf_counter() - inicio) * 1000)
+    return duraciones
+
+
+def main() -> None:
+    """Parsear argumentos, medir ambos modos y mostrar la comparación."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--retardo-conexion', type=float, default=0.1,
+                        help='Segundos de establecimiento de cada conexión nueva')
+    parser.add_argument('--latencia', type=float, default=0.01,
+                        help='Latencia del backend por respuesta en segundos')
+    parser.add_argument('--espera', type=float, default=0.5,
+                        help='Segundos entre el arranque y la primera petición')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    backend = BackendLocal(
+        latencia=LatenciaFija(args.latencia), retardo_conexion=args.retardo_conexion
+    ).iniciar()
+    resultados: Dict[str, List[List[float]]] = {'frio': [], 'precalentado': []}
+    try:
+        for _ in range(args.repeticiones):
+            for modo, medidas in resultados.items():
+                medidas.append(_primeras_peticiones(backend.url, modo == 'precalentado', args.espera))
+    finally:
+        backend.detener()
+
+    print(f"{'modo':>13} {'1a petición ms':>15} {'2a petición ms':>15}")
+    for modo, medidas in resultados.items():
+        primera = statistics.median(m[0] for m in medidas)
+        segunda = statistics.median(m[1] for m in medidas)
+        print(f"{modo:>13} {primera:>15.2f} {segunda:>15.2f}")
+    print(f"conexiones abiertas en el backend: {backend.conexiones_abiertas}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark de compresión en la descarga del historial.
+
+Compara bytes transferidos y latencia extremo a extremo de
+RequestsApiClient.get() contra el backend local para los rangos
+1h / 6h / 24h, con cada codificación disponible.
+
+Uso: python -m benchmarks.bench_compresion [--repeticiones N]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.backend_local import COMPRESORES, BackendLocal
+from webapp.services.api_client import RequestsApiClient
+
+RANGOS = {'1h': 60, '6h': 360, '24h': 1440}
+
+
+def medir(backend: BackendLocal, codificacion: str, limite: int, repeticiones: int) -> dict:
+    """Medir una combinación codificación / rango.
+
+    Returns:
+        Dict con bytes por respuesta y latencias mediana y p95 en ms.
+    """
+    cliente = RequestsApiClient(backend.url, timeout=10, accept_encoding=codificacion)
+    ruta = f'/termostato/historial/?limite={limite}'
+    cliente.get(ruta)  # calentamiento
+    backend.reiniciar_contadores()
+
+    latencias = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        datos = cliente.get(ruta)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        assert len(datos['historial']) == limite
+
+    latencias.sort()
+    return {
+        'bytes': backend.bytes_enviados // repeticiones,
+        'mediana_ms': statistics.median(latencias),
+        'p95_ms': latencias[int(0.95 * (len(latencias) - 1))],
+    }
+
+
+def main() -> None:
+    """Ejecutar el benchmark e imprimir una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--repeticiones', type=int, default=50)
+    args = parser.parse_args()
+
+    backend = BackendLocal().iniciar()
+    try:
+        print(f"{'rango':>5} {'codificacion':>12} {'bytes':>9} {'mediana ms':>11} {'p95 ms':>8}")
+        for nombre_rango, limite in RANGOS.items():
+            for codificacion in ['identity', *COMPRESORES]:
+                r = medir(backend, codificacion, limite, args.repeticiones)
+                print(f"{nombre_rango:>5} {codificacion:>12} {r['bytes']:>9} "
+                      f"{r['mediana_ms']:>11.2f} {r['p95_ms']:>8.2f}")
+    finally:
+        backend.detener()
+
+
+if __name__ == '__main__':
+    main()
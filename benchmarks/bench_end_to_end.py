@@ -0,0 +1,101 @@
+"""
+Carga HTTP de punta a punta: clientes → webapp → backend local.
+
+Arranca BackendLocal (stand-in de app_termostato con latencia configurable)
+y la webapp completa con el RequestsApiClient real sobre un servidor
+werkzeug multihilo, ambos en 127.0.0.1, y los somete a carga concurrente
+con la mezcla de rutas del dashboard. Informa latencias por ruta vistas
+por el cliente, throughput y peticiones que llegaron al backend.
+
+Uso:
+  python -m benchmarks.bench_end_to_end --clientes 16 --peticiones 200
+  python -m benchmarks.bench_end_to_end --latencia cola --mediana 0.05 --limitador --hedging
+"""
+import argparse
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List
+
+import requests
+from werkzeug.serving import make_server
+
+from benchmarks.backend_local import BackendLocal
+from benchmarks.bench_replay import MEZCLA_RUTAS
+from benchmarks.bench_simulador import _crear_latencia
+from benchmarks.carga import imprimir_latencias, lanzar_hilos
+from webapp import create_app
+from webapp.config import ProductionConfig, config
+
+
+def _crear_webapp(url_backend: str, args: argparse.Namespace):
+    """Crear la webapp de producción apuntando al backend local."""
+    config['end_to_end'] = type('EndToEndConfig', (ProductionConfig,), {
+        'URL_APP_API': url_backend,
+        'API_LIMITADOR': args.limitador,
+        'API_HEDGING': args.hedging,
+        'API_SIMULADO': False,
+        'API_GRABACION': None,
+    })
+    return create_app('end_to_end')
+
+
+def ejecutar(args: argparse.Namespace) -> None:
+    """Arrancar backend y webapp, generar la carga y mostrar el resumen."""
+    latencia = _crear_latencia(args.latencia, args.mediana) if args.mediana else None
+    backend = BackendLocal(latencia=latencia).iniciar()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # sin log por petición
+    servidor = make_server('127.0.0.1', 0, _crear_webapp(backend.url, args), threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url_webapp = f'http://127.0.0.1:{servidor.server_port}'
+
+    latencias: Dict[str, List[float]] = {ruta: [] for ruta in MEZCLA_RUTAS}
+    errores: List[str] = []
+    lock = threading.Lock()
+
+    def cliente_http(desfase: int) -> None:
+        sesion = requests.Session()
+        rutas = itertools.islice(itertools.cycle(MEZCLA_RUTAS), desfase, None)
+        for ruta in itertools.islice(rutas, args.peticiones):
+            inicio = time.perf_counter()
+            try:
+                estado = sesion.get(url_webapp + ruta, timeout=30).status_code
+            except requests.RequestException as error:
+                estado = type(error).__name__
+            duracion = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias[ruta].append(duracion)
+                if estado != 200:
+                    errores.append(f'{ruta} → {estado}')
+
+    try:
+        total = lanzar_hilos(cliente_http, args.clientes)
+    finally:
+        servidor.shutdown()
+        backend.detener()
+
+    imprimir_latencias(latencias)
+    print(f"throughput: {args.clientes * args.peticiones / total:.1f} peticiones/s")
+    print(f"respuestas no 200: {len(errores)}")
+    print("peticiones al backend: " + ', '.join(
+        f'{ruta}={cantidad}' for ruta, cantidad in sorted(backend.peticiones.items())
+    ))
+
+
+def main() -> None:
+    """Parsear argumentos y ejecutar la carga."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--peticiones', type=int, default=100,
+                        help='Peticiones por cliente')
+    parser.add_argument('--latencia', choices=['fija', 'normal', 'cola'], default='cola')
+    parser.add_argument('--mediana', type=float, default=0.02,
+                        help='Latencia del backend en segundos (0 = sin latencia)')
+    parser.add_argument('--limitador', action='store_true')
+    parser.add_argument('--hedging', action='store_true')
+    ejecutar(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Serie de estado comprimida (Gorilla) frente a una lista de dicts.
+
+Genera muestras del backend simulado cada --intervalo segundos (con
+jitter de milisegundos, como el poller) y mide, para SerieGorilla y para
+una lista de dicts por muestra: bytes por muestra (datos comprimidos y
+memoria total medida con tracemalloc), tiempo de inserción, y muestras por
+segundo al recorrer toda la serie y al leer la última hora con rango().
+
+Uso: python -m benchmarks.bench_gorilla [--horas 24] [--intervalo 5]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from webapp.services.gorilla import SerieGorilla
+from webapp.services.simulador import generar_estado
+
+# 2026-01-01T00:00:00 UTC
+INICIO = 1767225600
+
+
+def _muestras(horas: float, intervalo: float) -> list:
+    """Muestras (instante, estado) del simulador con jitter de hasta 50 ms."""
+    aleatorio = random.Random(0)
+    cantidad = int(horas * 3600 / intervalo)
+    return [
+        (instante, generar_estado(instante))
+        for instante in (INICIO + i * intervalo + aleatorio.uniform(0, 0.05) for i in range(cantidad))
+    ]
+
+
+def _medir(construir) -> tuple:
+    """Construir una estructura y devolver (estructura, segundos, bytes asignados).
+
+    El tiempo se mide en una construcción aparte: tracemalloc lo inflaría.
+    """
+    segundos = _cronometrar(construir)
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    estructura = construir()
+    asignados = tracemalloc.get_traced_memory()[0] - antes
+    tracemalloc.stop()
+    return estructura, segundos, asignados
+
+
+def _lista(muestras: list) -> list:
+    """Baseline: un dict por muestra, como guardaría el historial un cliente."""
+    return [{'instante': instante, **estado} for instante, estado in muestras]
+
+
+def _gorilla(muestras: list) -> SerieGorilla:
+    """Serie comprimida con las mismas muestras."""
+    serie = SerieGorilla()
+    for instante, estado in muestras:
+        serie.agregar(instante, estado)
+    return serie
+
+
+def _rango_lista(lista: list, inicio: float) -> list:
+    """Rango de la baseline: filtrar los dicts por instante."""
+    return [muestra for muestra in lista if muestra['instante'] >= inicio]
+
+
+def _por_segundo(funcion, muestras: int) -> float:
+    """Muestras por segundo de la mejor de 3 ejecuciones."""
+    mejor = min(_cronometrar(funcion) for _ in range(3))
+    return muestras / mejor
+
+
+def _cronometrar(funcion) -> float:
+    """Segundos de una ejecución."""
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def _imprimir(fila: tuple, n: int) -> None:
+    """Imprimir la fila de una estructura.
+
+    Args:
+        fila: (nombre, bytes asignados, bytes de datos por muestra o None,
+            segundos de inserción, recorridos/s, rangos de última hora/s).
+        n: Número de muestras.
+    """
+    nombre, asignados, datos, segundos, recorrer, rango = fila
+    datos_texto = '-' if datos is None else f'{datos:.2f}'
+    print(f'{nombre:>12} {asignados / n:>10.1f} {datos_texto:>8} {segundos / n * 1e6:>12.2f} '
+          f'{recorrer:>12,.0f} {rango:>14,.0f}')
+
+
+def main() -> None:
+    """Ejecutar el benchmark e imprimir una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--horas', type=float, default=24)
+    parser.add_argument('--intervalo', type=float, default=5)
+    args = parser.parse_args()
+
+    muestras = _muestras(args.horas, args.intervalo)
+    n = len(muestras)
+    ultima_hora = muestras[-1][0] - 3600
+    en_ultima_hora = sum(1 for instante, _ in muestras if instante >= ultima_hora)
+
+    lista, t_lista, bytes_lista = _medir(lambda: _lista(muestras))
+    serie, t_serie, bytes_serie = _medir(lambda: _gorilla(muestras))
+
+    print(f'{n} muestras cada {args.intervalo:g} s ({args.horas:g} h)\n')
+    print(f"{'estructura':>12} {'B/muestra':>10} {'B datos':>8} {'insertar us':>12} "
+          f"{'recorrer/s':>12} {'ultima hora/s':>14}")
+    filas = (
+        ('list[dict]', bytes_lista, None, t_lista,
+         _por_segundo(lambda: [m['temperatura_ambiente'] for m in lista], n),
+         _por_segundo(lambda: _rango_lista(lista, ultima_hora), en_ultima_hora)),
+        ('gorilla', bytes_serie, serie.bytes_usados() / n, t_serie,
+         _por_segundo(lambda: [m.temperatura_ambiente for m in serie], n),
+         _por_segundo(lambda: serie.rango(ultima_hora), en_ultima_hora)),
+    )
+    for fila in filas:
+        _imprimir(fila, n)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Formato de respuesta de /api/historial: registros, columnas y binario.
+
+Para cada rango del dashboard mide, con cada codec JSON disponible, el
+tiempo en el servidor de preparar y codificar la respuesta (incluida la
+conversión a columnas) y el tamaño del cuerpo sin comprimir y con gzip.
+El formato binario no usa codec JSON (columna codec '-').
+
+Uso: python -m benchmarks.bench_historial_formato [--repeticiones N]
+"""
+import argparse
+import gzip
+import timeit
+
+from benchmarks.backend_local import generar_historial
+from webapp.services.json_codec import CODECS, crear_codec
+from webapp.services.series import codificar_historial_binario, historial_columnar
+
+RANGOS = {'1h': 60, '6h': 360, '24h': 1440}
+
+FORMATOS = {
+    'registros': lambda historial: {'success': True, 'historial': historial},
+    'columnas': lambda historial: {
+        'success': True, 'formato': 'columnas', **historial_columnar(historial)
+    },
+}
+
+
+def _imprimir(rango: str, formato: str, codec: str, cuerpo: bytes, segundos: float) -> None:
+    """Imprimir una fila de la tabla de resultados."""
+    print(f"{rango:>5} {formato:>10} {codec:>7} {len(cuerpo):>7} "
+          f"{len(gzip.compress(cuerpo)):>6} {segundos * 1e6:>12.1f}")
+
+
+def main() -> None:
+    """Ejecutar el benchmark e imprimir una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--repeticiones', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'rango':>5} {'formato':>10} {'codec':>7} {'bytes':>7} {'gzip':>6} {'servidor us':>12}")
+    for rango, limite in RANGOS.items():
+        historial = generar_historial(limite)['historial']
+        for formato, preparar in FORMATOS.items():
+            for nombre_codec in sorted(CODECS):
+                codec = crear_codec(nombre_codec)
+                cuerpo = codec.dumps(preparar(historial))
+                segundos = min(timeit.repeat(
+                    lambda c=codec, p=preparar, h=historial: c.dumps(p(h)),
+                    number=args.repeticiones, repeat=5
+                )) / args.repeticiones
+                _imprimir(rango, formato, nombre_codec, cuerpo, segundos)
+        cuerpo = codificar_historial_binario(historial)
+        segundos = min(timeit.repeat(
+            lambda h=historial: codificar_historial_binario(h), number=args.repeticiones, repeat=5
+        )) / args.repeticiones
+        _imprimir(rango, 'binario', '-', cuerpo, segundos)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark de lectura incremental del historial.
+
+Compara RequestsApiClient.get() con decodificación completa (.json())
+frente a la lectura incremental (clave_flujo='historial') contra el
+backend local: latencia total y tiempo hasta el primer registro. El pico
+de memoria de la decodificación se mide fuera de la red, sobre el mismo
+cuerpo, porque el backend local corre en este proceso y tracemalloc
+contabilizaría también sus asignaciones.
+
+Uso: python -m benchmarks.bench_historial_stream [--repeticiones N]
+"""
+import argparse
+import functools
+import json
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.backend_local import BackendLocal, generar_historial
+from webapp.services.api_client import RequestsApiClient
+from webapp.services.json_stream import parsear_objeto
+
+RANGOS = {'1h': 60, '6h': 360, '24h': 1440}
+
+
+def _mediana_ms(funcion, repeticiones: int) -> float:
+    """Mediana en ms de repeticiones llamadas a funcion()."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def _pico_kib(funcion) -> float:
+    """Pico de memoria asignada (KiB) durante una llamada a funcion()."""
+    tracemalloc.start()
+    funcion()  # el resultado se descarta tras medir el pico
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico / 1024
+
+
+def _picos_kib(limite: int) -> dict:
+    """Pico de memoria (KiB) de cada modo al decodificar un historial de limite registros."""
+    cuerpo = json.dumps(generar_historial(limite)).encode('utf-8')
+    bloques = [cuerpo[i:i + 16384] for i in range(0, len(cuerpo), 16384)]
+    return {
+        'completo': _pico_kib(lambda: json.loads(cuerpo)),
+        'incremental': _pico_kib(lambda: parsear_objeto(bloques, 'historial')),
+    }
+
+
+def main() -> None:
+    """Ejecutar el benchmark e imprimir una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--repeticiones', type=int, default=30)
+    args = parser.parse_args()
+
+    backend = BackendLocal().iniciar()
+    cliente = RequestsApiClient(backend.url, timeout=10)
+    try:
+        print(f"{'rango':>5} {'modo':>12} {'total ms':>9} {'1er reg ms':>11} {'pico KiB':>9}")
+        for nombre_rango, limite in RANGOS.items():
+            ruta = f'/termostato/historial/?limite={limite}'
+            modos = {
+                'completo': {},
+                'incremental': {'clave_flujo': 'historial', 'limite_flujo': limite},
+            }
+            picos = _picos_kib(limite)
+            for modo, extra in modos.items():
+                pedir = functools.partial(cliente.get, ruta, **extra)
+                pedir()  # calentamiento
+                total = _mediana_ms(pedir, args.repeticiones)
+                if extra:
+                    primero = _mediana_ms(
+                        lambda ruta=ruta: cliente.get(ruta, clave_flujo='historial', limite_flujo=1),
+                        args.repeticiones,
+                    )
+                else:
+                    primero = total
+                print(f"{nombre_rango:>5} {modo:>12} {total:>9.2f} {primero:>11.2f} "
+                      f"{picos[modo]:>9.1f}")
+    finally:
+        backend.detener()
+
+
+if __name__ == '__main__':
+    main()
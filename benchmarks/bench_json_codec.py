@@ -0,0 +1,55 @@
+"""
+Microbenchmark de los codecs JSON disponibles.
+
+Mide loads() y dumps() de cada JsonCodec sobre payloads realistas: la
+respuesta de /api/estado y un historial de 1440 registros (rango 24h).
+
+Uso: python -m benchmarks.bench_json_codec [--repeticiones N]
+"""
+import argparse
+import timeit
+
+from benchmarks.backend_local import generar_historial
+from webapp.services.json_codec import CODECS, crear_codec
+
+PAYLOADS = {
+    'estado': {
+        'success': True,
+        'data': {
+            'temperatura_ambiente': 22.5,
+            'temperatura_deseada': 24,
+            'estado_climatizador': 'calentando',
+            'carga_bateria': 3.8,
+            'indicador': 'NORMAL',
+        },
+        'timestamp': '2026-01-01T12:00:00.123456',
+        'from_cache': False,
+    },
+    'historial_24h': {'success': True, **generar_historial(1440)},
+}
+
+
+def _us_por_llamada(funcion, repeticiones: int) -> float:
+    """Mejor tiempo en microsegundos por llamada de 5 rondas."""
+    return min(timeit.repeat(funcion, number=repeticiones, repeat=5)) / repeticiones * 1e6
+
+
+def main() -> None:
+    """Ejecutar el benchmark e imprimir una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'payload':>14} {'codec':>7} {'bytes':>7} {'dumps us':>10} {'loads us':>10}")
+    for nombre_payload, payload in PAYLOADS.items():
+        for nombre_codec in sorted(CODECS):
+            codec = crear_codec(nombre_codec)
+            cuerpo = codec.dumps(payload)
+            dumps_us = _us_por_llamada(lambda c=codec, p=payload: c.dumps(p), args.repeticiones)
+            loads_us = _us_por_llamada(lambda c=codec, b=cuerpo: c.loads(b), args.repeticiones)
+            print(f"{nombre_payload:>14} {nombre_codec:>7} {len(cuerpo):>7} "
+                  f"{dumps_us:>10.1f} {loads_us:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Reducción LTTB del historial en el servidor frente a enviarlo completo.
+
+Para cada rango largo del dashboard mide el tiempo de reducir el historial
+con reducir_historial(), los bytes de la respuesta JSON de /api/historial
+con y sin reducción, y el error de la serie reducida (interpolada sobre
+los timestamps originales) respecto a la completa.
+
+Uso: python -m benchmarks.bench_lttb [--puntos 240] [--repeticiones N]
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from benchmarks.backend_local import generar_historial
+from webapp.services.json_codec import crear_codec
+from webapp.services.series import columnas_historial, reducir_historial
+
+RANGOS = {'6h': 360, '24h': 1440}
+
+
+def _error_maximo(completo: list, reducido: list) -> float:
+    """Máxima diferencia en grados entre la serie y su reducción interpolada."""
+    x, y = columnas_historial(completo)
+    xr, yr = columnas_historial(reducido)
+    orden, orden_r = np.argsort(x), np.argsort(xr)
+    interpolada = np.interp(x[orden], xr[orden_r], yr[orden_r])
+    return float(np.max(np.abs(interpolada - y[orden])))
+
+
+def main() -> None:
+    """Ejecutar el benchmark e imprimir una tabla de resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--puntos', type=int, default=240)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    codec = crear_codec('json')
+    print(f"{'rango':>6} {'registros':>10} {'bytes':>8} {'bytes LTTB':>11} "
+          f"{'LTTB us':>9} {'error max':>10}")
+    for rango, limite in RANGOS.items():
+        historial = generar_historial(limite)['historial']
+        reducido = reducir_historial(historial, args.puntos)
+        segundos = min(timeit.repeat(
+            lambda h=historial: reducir_historial(h, args.puntos),
+            number=args.repeticiones, repeat=5
+        )) / args.repeticiones
+        completo_bytes = len(codec.dumps({'success': True, 'historial': historial}))
+        reducido_bytes = len(codec.dumps({'success': True, 'historial': reducido}))
+        print(f"{rango:>6} {limite:>10} {completo_bytes:>8} {reducido_bytes:>11} "
+              f"{segundos * 1e6:>9.1f} {_error_maximo(historial, reducido):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Grabación y reproducción de tráfico real del backend.
+
+  grabar:     consulta un backend real con el patrón del dashboard
+              (estado cada intervalo, historial y health de vez en cuando)
+              y guarda respuestas y latencias con GrabadorApiClient.
+  reproducir: monta la aplicación Flask completa con ReproductorApiClient
+              y la somete a carga concurrente con el test client,
+              informando latencias por ruta y throughput.
+
+Uso:
+  python -m benchmarks.bench_replay grabar --url http://localhost:5050 --salida trafico.jsonl.gz
+  python -m benchmarks.bench_replay reproducir --fichero trafico.jsonl.gz --clientes 8
+"""
+import argparse
+import itertools
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.carga import imprimir_latencias, lanzar_hilos
+from webapp import create_app
+from webapp.services.api_client import ApiError, RequestsApiClient
+from webapp.services.grabacion import GrabadorApiClient, ReproductorApiClient
+
+# Mezcla de rutas del dashboard: 1 carga de página, 1 historial y 1 health
+# por cada 10 actualizaciones AJAX del estado.
+MEZCLA_RUTAS = ['/api/estado'] * 10 + ['/', '/api/historial?limite=60', '/health']
+
+
+def grabar(url: str, salida: str, duracion: float, intervalo: float) -> None:
+    """Grabar tráfico contra un backend real durante duracion segundos."""
+    grabador = GrabadorApiClient(RequestsApiClient(url, timeout=10), salida)
+    rutas = itertools.cycle(
+        ['/termostato/'] * 5 + ['/termostato/historial/?limite=60', '/comprueba/']
+    )
+    fin = time.monotonic() + duracion
+    cantidad = 0
+    try:
+        while time.monotonic() < fin:
+            try:
+                grabador.get(next(rutas))
+            except ApiError:
+                pass  # el error también queda grabado
+            cantidad += 1
+            time.sleep(intervalo)
+    finally:
+        grabador.cerrar()
+    print(f"{cantidad} peticiones grabadas en {salida}")
+
+
+def reproducir(fichero: str, escala: float, clientes: int, peticiones: int) -> None:
+    """Someter la aplicación Flask completa a carga con respuestas grabadas."""
+    app = create_app('testing')
+    servicio = app.termostato_service
+    servicio._api_client = ReproductorApiClient.desde_fichero(fichero, escala)  # pylint: disable=protected-access
+    latencias: Dict[str, List[float]] = {ruta: [] for ruta in MEZCLA_RUTAS}
+    lock = threading.Lock()
+
+    def cliente_http(desfase: int) -> None:
+        test_client = app.test_client()
+        rutas = itertools.islice(itertools.cycle(MEZCLA_RUTAS), desfase, None)
+        for ruta in itertools.islice(rutas, peticiones):
+            inicio = time.perf_counter()
+            test_client.get(ruta)
+            duracion = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias[ruta].append(duracion)
+
+    total = lanzar_hilos(cliente_http, clientes)
+
+    imprimir_latencias(latencias)
+    print(f"throughput: {clientes * peticiones / total:.1f} peticiones/s")
+
+
+def main() -> None:
+    """Parsear argumentos y ejecutar el modo pedido."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    modos = parser.add_subparsers(dest='modo', required=True)
+
+    p_grabar = modos.add_parser('grabar')
+    p_grabar.add_argument('--url', required=True)
+    p_grabar.add_argument('--salida', default='trafico.jsonl.gz')
+    p_grabar.add_argument('--duracion', type=float, default=60.0)
+    p_grabar.add_argument('--intervalo', type=float, default=1.0)
+
+    p_reproducir = modos.add_parser('reproducir')
+    p_reproducir.add_argument('--fichero', required=True)
+    p_reproducir.add_argument('--escala', type=float, default=1.0)
+    p_reproducir.add_argument('--clientes', type=int, default=8)
+    p_reproducir.add_argument('--peticiones', type=int, default=200)
+
+    args = parser.parse_args()
+    if args.modo == 'grabar':
+        grabar(args.url, args.salida, args.duracion, args.intervalo)
+    else:
+        reproducir(args.fichero, args.escala, args.clientes, args.peticiones)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Prueba de carga del fallback de obtener_estado contra el backend simulado.
+
+N hilos (los workers del servidor) llaman a TermostatoService.obtener_estado
+en bucle durante un tiempo fijo sobre un SimuladorApiClient con la
+distribución de latencias y las tasas de error indicadas. Informa cuántas
+respuestas fueron frescas, de caché o sin datos, las latencias vistas por
+el llamador y cuánto tiempo pasaron los hilos bloqueados en el backend.
+Con --poller el estado se refresca en segundo plano y los hilos solo leen
+la caché: las consultas al backend dejan de depender del número de hilos.
+
+Uso:
+  python -m benchmarks.bench_simulador --latencia cola --mediana 0.05 --tasa-timeout 0.02
+  python -m benchmarks.bench_simulador --tasa-timeout 0.05 --deadline 1.0
+  python -m benchmarks.bench_simulador --hilos 64 --poller 1.0
+"""
+import argparse
+import statistics
+import threading
+import time
+from typing import List
+
+from benchmarks.carga import lanzar_hilos, percentil
+from webapp.cache.memory_cache import MemoryCache
+from webapp.services.api_client import ApiConnectionError, ApiTimeoutError
+from webapp.services.simulador import (
+    DistribucionLatencia, LatenciaColaLarga, LatenciaFija, LatenciaNormal, SimuladorApiClient
+)
+from webapp.services.termostato_service import TermostatoService
+
+
+def _crear_latencia(tipo: str, mediana: float) -> DistribucionLatencia:
+    """Construir la distribución de latencias pedida por línea de comandos."""
+    if tipo == 'fija':
+        return LatenciaFija(mediana)
+    if tipo == 'normal':
+        return LatenciaNormal(mediana, mediana / 3)
+    return LatenciaColaLarga(mediana)
+
+
+def ejecutar(args: argparse.Namespace) -> None:
+    """Lanzar los hilos contra el servicio y mostrar el resumen."""
+    simulador = SimuladorApiClient(
+        latencia=_crear_latencia(args.latencia, args.mediana),
+        tasas_error={ApiTimeoutError: args.tasa_timeout, ApiConnectionError: args.tasa_conexion},
+        semilla=42
+    )
+    servicio = TermostatoService(api_client=simulador, cache=MemoryCache())
+    servicio.obtener_estado()  # caché inicial, como tras la primera carga del dashboard
+    if args.poller:
+        servicio.iniciar_poller(args.poller)
+    simulador.call_count = 0
+    simulador.segundos_en_vuelo = 0.0
+
+    latencias: List[float] = []
+    resultados = {'frescas': 0, 'cache': 0, 'sin_datos': 0}
+    lock = threading.Lock()
+    fin = time.monotonic() + args.duracion
+
+    def worker(_: int) -> None:
+        while time.monotonic() < fin:
+            deadline = time.monotonic() + args.deadline if args.deadline else None
+            inicio = time.perf_counter()
+            datos, _, from_cache = servicio.obtener_estado(deadline=deadline)
+            duracion = (time.perf_counter() - inicio) * 1000
+            clave = 'sin_datos' if datos is None else 'cache' if from_cache else 'frescas'
+            with lock:
+                latencias.append(duracion)
+                resultados[clave] += 1
+
+    transcurrido = lanzar_hilos(worker, args.hilos)
+    servicio.detener_poller()
+
+    latencias.sort()
+    total = len(latencias)
+    ocupacion = simulador.segundos_en_vuelo / (args.hilos * transcurrido)
+    print(f"peticiones: {total} ({total / transcurrido:.1f}/s con {args.hilos} hilos)")
+    for clave, cantidad in resultados.items():
+        print(f"  {clave:>9}: {cantidad:>6} ({100 * cantidad / total:.1f}%)")
+    print(f"latencia ms  p50={statistics.median(latencias):.1f} "
+          f"p95={percentil(latencias, 0.95):.1f} p99={percentil(latencias, 0.99):.1f} "
+          f"max={latencias[-1]:.1f}")
+    print(f"consultas al backend: {simulador.call_count} ({simulador.call_count / transcurrido:.1f}/s)")
+    print(f"hilos bloqueados en el backend: {100 * ocupacion:.1f}% del tiempo, "
+          f"máximo simultáneo {simulador.max_en_vuelo}/{args.hilos}")
+
+
+def main() -> None:
+    """Parsear argumentos y ejecutar la prueba."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--latencia', choices=['fija', 'normal', 'cola'], default='cola')
+    parser.add_argument('--mediana', type=float, default=0.05,
+                        help='Latencia (fija) o mediana/media en segundos')
+    parser.add_argument('--tasa-timeout', type=float, default=0.01)
+    parser.add_argument('--tasa-conexion', type=float, default=0.01)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--duracion', type=float, default=10.0)
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='Presupuesto por petición en segundos (default: sin deadline)')
+    parser.add_argument('--poller', type=float, default=None,
+                        help='Refrescar el estado en segundo plano cada N segundos')
+    ejecutar(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Utilidades compartidas por las pruebas de carga (bench_simulador,
+bench_replay y bench_end_to_end): lanzar los hilos cliente y resumir
+las latencias observadas.
+"""
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano de una lista ordenada."""
+    return valores[max(0, int(p * len(valores) + 0.5) - 1)]
+
+
+def lanzar_hilos(worker: Callable[[int], None], cantidad: int) -> float:
+    """Ejecutar worker(i) en `cantidad` hilos y devolver los segundos hasta que terminan todos."""
+    hilos = [threading.Thread(target=worker, args=(i,)) for i in range(cantidad)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return time.perf_counter() - inicio
+
+
+def imprimir_latencias(latencias: Dict[str, List[float]]) -> None:
+    """Tabla de n, p50, p95 y p99 en ms por ruta (ordena cada lista)."""
+    print(f"{'ruta':>26} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for ruta, valores in latencias.items():
+        valores.sort()
+        print(f"{ruta:>26} {len(valores):>6} {statistics.median(valores):>8.2f} "
+              f"{percentil(valores, 0.95):>8.2f} {percentil(valores, 0.99):>8.2f}")
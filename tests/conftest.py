@@ -0,0 +1,18 @@
+"""
+Fixtures compartidas por los tests unitarios.
+"""
+import time
+
+import pytest
+
+
+@pytest.fixture
+def zona_horaria(monkeypatch):
+    """Función que fija la zona horaria del proceso (TZ) durante el test."""
+    def fijar(zona):
+        monkeypatch.setenv('TZ', zona)
+        time.tzset()
+
+    yield fijar
+    monkeypatch.undo()
+    time.tzset()
@@ -0,0 +1,118 @@
+"""
+Tests de integración del RequestsApiClient real contra el backend local.
+
+A diferencia del resto de integración (MockApiClient en proceso), aquí la
+petición atraviesa la red: TermostatoService → RequestsApiClient → HTTP →
+benchmarks.backend_local.BackendLocal en 127.0.0.1.
+"""
+import threading
+import time
+
+import pytest
+
+from benchmarks.backend_local import BackendLocal
+from webapp.cache.memory_cache import MemoryCache
+from webapp.config import TestingConfig, config
+from webapp import create_app
+from webapp.services.api_client import ApiTimeoutError, RequestsApiClient
+from webapp.services.metricas import MetricasApi
+from webapp.services.simulador import LatenciaFija
+from webapp.services.termostato_service import TermostatoService
+
+
+@pytest.fixture(name='backend')
+def fixture_backend():
+    """BackendLocal arrancado en un puerto libre, detenido al terminar."""
+    servidor = BackendLocal().iniciar()
+    yield servidor
+    servidor.detener()
+
+
+@pytest.fixture(name='servicio')
+def fixture_servicio(backend):
+    """TermostatoService con el RequestsApiClient real contra el backend local."""
+    return TermostatoService(api_client=RequestsApiClient(backend.url), cache=MemoryCache())
+
+
+class TestRequestsApiClientContraBackendLocal:
+    """Tests del camino de red real del servicio."""
+
+    def test_obtener_estado(self, servicio, backend):
+        """El estado llega por HTTP desde el backend local."""
+        datos, timestamp, from_cache = servicio.obtener_estado()
+        assert from_cache is False
+        assert timestamp is not None
+        assert 'temperatura_ambiente' in datos
+        assert backend.peticiones['/termostato/'] == 1
+
+    def test_obtener_historial_comprimido(self, servicio, backend):
+        """El historial se recibe entero a través de la red."""
+        resultado = servicio.obtener_historial(limite=30)
+        assert len(resultado['historial']) == 30
+        assert backend.bytes_enviados > 0
+
+    def test_health_check(self, servicio):
+        """El health check del backend responde ok."""
+        assert servicio.health_check()['status'] == 'ok'
+
+    def test_latencia_superior_al_deadline(self, backend):
+        """Una respuesta más lenta que el deadline corta con ApiTimeoutError."""
+        backend.latencia = LatenciaFija(0.5)
+        cliente = RequestsApiClient(backend.url)
+        with pytest.raises(ApiTimeoutError):
+            cliente.get('/termostato/', deadline=time.monotonic() + 0.1)
+
+    def test_fallback_a_cache_con_backend_caido(self, servicio, backend):
+        """Con el backend parado se sirve el último estado de la caché."""
+        servicio.obtener_estado()
+        backend.detener()
+        _, _, from_cache = servicio.obtener_estado()
+        assert from_cache is True
+
+    def test_precalentar_reutiliza_las_conexiones(self, backend):
+        """Las peticiones tras precalentar reutilizan las conexiones abiertas."""
+        cliente = RequestsApiClient(backend.url)
+        assert cliente.precalentar(3) == 3
+        assert backend.conexiones_abiertas == 3
+        cliente.get('/termostato/')
+        assert backend.conexiones_abiertas == 3
+
+    def test_metricas_por_red(self, backend):
+        """Las métricas registran estados, bytes y decodificación de peticiones reales."""
+        metricas = MetricasApi()
+        servicio = TermostatoService(
+            api_client=RequestsApiClient(backend.url, metricas=metricas), cache=MemoryCache()
+        )
+        servicio.obtener_estado()
+        servicio.obtener_historial(limite=100)
+        endpoints = metricas.instantanea()['endpoints']
+        historial = endpoints['/termostato/historial/']
+        assert endpoints['/termostato/']['estados'] == {'200': 1}
+        assert 0 < historial['bytes_recibidos'] <= backend.bytes_enviados
+        assert historial['decodificacion_media_ms'] > 0
+
+
+class TestWebappContraBackendLocal:
+    """Tests HTTP de punta a punta con la webapp de producción."""
+
+    def test_api_estado(self, backend, monkeypatch):
+        """/api/estado de la webapp consulta al backend local."""
+        monkeypatch.setitem(config, 'end_to_end', type(
+            'EndToEndConfig', (TestingConfig,), {'TESTING': False, 'URL_APP_API': backend.url}
+        ))
+        app = create_app('end_to_end')
+        respuesta = app.test_client().get('/api/estado')
+        assert respuesta.status_code == 200
+        assert backend.peticiones['/termostato/'] == 1
+
+    def test_create_app_precalienta_en_segundo_plano(self, backend, monkeypatch):
+        """Con API_PRECALENTAR create_app abre conexiones y llena la caché."""
+        monkeypatch.setitem(config, 'end_to_end', type('EndToEndConfig', (TestingConfig,), {
+            'TESTING': False, 'URL_APP_API': backend.url, 'API_PRECALENTAR': True,
+        }))
+        app = create_app('end_to_end')
+        for hilo in threading.enumerate():
+            if hilo.name == 'precalentar':
+                hilo.join(timeout=5)
+        assert app.termostato_service._cache.get('estado') is not None
+        assert backend.peticiones['/comprueba/'] == TestingConfig.API_PRECALENTAR_CONEXIONES
@@ -175,7 +175,7 @@ def llamar_obtener_estado(ctx):
 def llamar_get_conexion_rechazada(ctx):
     """Invoca get() esperando que lance ApiConnectionError."""
     try:
-        with patch('webapp.services.api_client.requests.get') as mock_get:
+        with patch('webapp.services.api_client.requests.Session.get') as mock_get:
             mock_get.side_effect = requests.exceptions.ConnectionError('sin conexión')
             ctx['api_client_real'].get('/termostato/')
     except ApiConnectionError as exc:
@@ -186,7 +186,7 @@ def llamar_get_conexion_rechazada(ctx):
 def llamar_get_timeout(ctx):
     """Invoca get() esperando que lance ApiTimeoutError."""
     try:
-        with patch('webapp.services.api_client.requests.get') as mock_get:
+        with patch('webapp.services.api_client.requests.Session.get') as mock_get:
             mock_get.side_effect = requests.exceptions.Timeout('timeout')
             ctx['api_client_real'].get('/termostato/')
     except ApiTimeoutError as exc:
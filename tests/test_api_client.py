@@ -2,18 +2,21 @@
 Tests unitarios para RequestsApiClient y MockApiClient.
 Valida el cliente HTTP de forma aislada usando mocks de requests.
 """
+import time
 from unittest.mock import patch, Mock
 
 import pytest
 import requests
 
 from webapp.services.api_client import (
+    ACCEPT_ENCODING,
     ApiConnectionError,
     ApiError,
     ApiTimeoutError,
     MockApiClient,
     RequestsApiClient,
 )
+from webapp.services.latencias import TimeoutAdaptativo
 
 
 @pytest.fixture
@@ -25,11 +28,11 @@ def cliente():
 class TestRequestsApiClientGet:
     """Tests del método get()."""
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_get_exitoso_retorna_json(self, mock_get, cliente):
         """get() retorna el JSON de la respuesta cuando el backend responde."""
         mock_response = Mock()
-        mock_response.json.return_value = {'clave': 'valor'}
+        mock_response.content = b'{"clave": "valor"}'
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -37,11 +40,11 @@ class TestRequestsApiClientGet:
 
         assert resultado == {'clave': 'valor'}
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_get_construye_url_correctamente(self, mock_get, cliente):
         """get() concatena base_url y path correctamente."""
         mock_response = Mock()
-        mock_response.json.return_value = {}
+        mock_response.content = b'{}'
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -50,11 +53,11 @@ class TestRequestsApiClientGet:
         url_llamada = mock_get.call_args[0][0]
         assert url_llamada == 'http://localhost:5050/termostato/'
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_get_usa_timeout_configurado(self, mock_get, cliente):
-        """get() pasa el timeout configurado a requests.get()."""
+        """get() pasa el timeout configurado a Session.get()."""
         mock_response = Mock()
-        mock_response.json.return_value = {}
+        mock_response.content = b'{}'
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -63,11 +66,11 @@ class TestRequestsApiClientGet:
         kwargs = mock_get.call_args[1]
         assert kwargs['timeout'] == 5
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_get_permite_override_de_timeout(self, mock_get, cliente):
         """get() acepta timeout personalizado por llamada."""
         mock_response = Mock()
-        mock_response.json.return_value = {}
+        mock_response.content = b'{}'
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -76,7 +79,186 @@ class TestRequestsApiClientGet:
         kwargs = mock_get.call_args[1]
         assert kwargs['timeout'] == 2
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_json_invalido_lanza_api_error(self, mock_get, cliente):
+        """Un cuerpo que no es JSON se relanza como ApiError."""
+        mock_response = Mock()
+        mock_response.content = b'<html>error</html>'
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        with pytest.raises(ApiError):
+            cliente.get('/termostato/')
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_negocia_compresion_soportada(self, mock_get, cliente):
+        """get() envía Accept-Encoding con todas las codificaciones soportadas."""
+        mock_response = Mock()
+        mock_response.content = b'{}'
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        cliente.get('/termostato/historial/?limite=1440')
+
+        headers = mock_get.call_args[1]['headers']
+        assert headers['Accept-Encoding'] == ACCEPT_ENCODING
+        assert 'gzip' in headers['Accept-Encoding']
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_respeta_accept_encoding_configurado(self, mock_get):
+        """accept_encoding del constructor reemplaza la negociación por defecto."""
+        cliente_identity = RequestsApiClient('http://localhost:5050', accept_encoding='identity')
+        mock_response = Mock()
+        mock_response.content = b'{}'
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        cliente_identity.get('/termostato/')
+
+        assert mock_get.call_args[1]['headers']['Accept-Encoding'] == 'identity'
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_con_clave_flujo_lee_por_bloques(self, mock_get, cliente):
+        """Con clave_flujo la respuesta se pide en streaming y se corta en limite."""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.iter_content.return_value = [
+            b'{"historial": [{"temperatura": 21}, ', b'{"temperatura": 22}], "total": 2}'
+        ]
+        mock_get.return_value = mock_response
+
+        resultado = cliente.get(
+            '/termostato/historial/?limite=1', clave_flujo='historial', limite_flujo=1
+        )
+
+        assert resultado == {'historial': [{'temperatura': 21}]}
+        assert mock_get.call_args[1]['stream'] is True
+        mock_response.json.assert_not_called()
+        mock_response.close.assert_called_once()
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_con_parar_flujo(self, mock_get, cliente):
+        """parar_flujo corta la lectura en el primer registro que lo cumple."""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.iter_content.return_value = [
+            b'{"historial": [{"temperatura": 23}, ', b'{"temperatura": 22}], "total": 2}'
+        ]
+        mock_get.return_value = mock_response
+
+        resultado = cliente.get(
+            '/termostato/historial/', clave_flujo='historial',
+            parar_flujo=lambda r: r['temperatura'] < 23
+        )
+
+        assert resultado == {'historial': [{'temperatura': 23}]}
+        assert 'parar_flujo' not in mock_get.call_args[1]
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_con_clave_flujo_json_invalido_lanza_api_error(self, mock_get, cliente):
+        """Un cuerpo inválido en modo streaming se relanza como ApiError."""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.iter_content.return_value = [b'<html>']
+        mock_get.return_value = mock_response
+
+        with pytest.raises(ApiError):
+            cliente.get('/termostato/historial/', clave_flujo='historial')
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_con_deadline_agotado_no_llama_al_backend(self, mock_get, cliente):
+        """Con el deadline vencido se lanza ApiTimeoutError sin hacer la petición."""
+        with pytest.raises(ApiTimeoutError):
+            cliente.get('/termostato/', deadline=time.monotonic() - 0.1)
+
+        mock_get.assert_not_called()
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_con_deadline_reduce_el_timeout(self, mock_get, cliente):
+        """El timeout se reduce al tiempo restante hasta el deadline."""
+        mock_response = Mock()
+        mock_response.content = b'{}'
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        cliente.get('/termostato/', deadline=time.monotonic() + 1.0)
+
+        assert 0 < mock_get.call_args[1]['timeout'] <= 1.0
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_con_deadline_lejano_conserva_el_timeout(self, mock_get, cliente):
+        """Si sobra presupuesto se mantiene el timeout configurado."""
+        mock_response = Mock()
+        mock_response.content = b'{}'
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        cliente.get('/termostato/', deadline=time.monotonic() + 60)
+
+        assert mock_get.call_args[1]['timeout'] == 5
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_get_streaming_abandona_al_superar_deadline(self, mock_get, cliente):
+        """La lectura por bloques se corta si el deadline vence a mitad."""
+        def bloques_lentos(_tamano):
+            yield b'{"historial": [{"t": 1}, '
+            time.sleep(0.06)
+            yield b'{"t": 2}]}'
+
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.iter_content.side_effect = bloques_lentos
+        mock_get.return_value = mock_response
+
+        with pytest.raises(ApiTimeoutError):
+            cliente.get(
+                '/termostato/historial/', clave_flujo='historial',
+                deadline=time.monotonic() + 0.05
+            )
+        mock_response.close.assert_called_once()
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_timeout_adaptativo_se_reduce_con_backend_rapido(self, mock_get):
+        """Tras min_muestras respuestas rápidas el timeout baja al mínimo."""
+        politica = TimeoutAdaptativo(min_muestras=3, minimo=0.5)
+        cliente_adaptativo = RequestsApiClient('http://localhost:5050', timeout_adaptativo=politica)
+        mock_response = Mock()
+        mock_response.content = b'{}'
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        for _ in range(4):
+            cliente_adaptativo.get('/termostato/')
+
+        timeouts = [llamada[1]['timeout'] for llamada in mock_get.call_args_list]
+        assert timeouts[:3] == [5, 5, 5]
+        assert timeouts[3] == 0.5
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_timeout_adaptativo_registra_timeouts_agotados(self, mock_get):
+        """Un timeout cuenta como latencia igual al timeout usado."""
+        politica = TimeoutAdaptativo(min_muestras=1, factor=1.0, minimo=0.1)
+        cliente_adaptativo = RequestsApiClient('http://localhost:5050', timeout_adaptativo=politica)
+        mock_get.side_effect = requests.exceptions.Timeout('Timeout')
+
+        with pytest.raises(ApiTimeoutError):
+            cliente_adaptativo.get('/termostato/', timeout=2)
+
+        assert politica.timeout('/termostato/', 5) == 2
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_timeout_por_deadline_no_se_registra(self, mock_get):
+        """Un timeout recortado por el deadline no alimenta la política."""
+        politica = TimeoutAdaptativo(min_muestras=1)
+        cliente_adaptativo = RequestsApiClient('http://localhost:5050', timeout_adaptativo=politica)
+        mock_get.side_effect = requests.exceptions.Timeout('Timeout')
+
+        with pytest.raises(ApiTimeoutError):
+            cliente_adaptativo.get('/termostato/', deadline=time.monotonic() + 0.2)
+
+        assert politica.timeout('/termostato/', 5) == 5
+
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_get_lanza_api_timeout_error(self, mock_get, cliente):
         """get() relanza Timeout como ApiTimeoutError."""
         mock_get.side_effect = requests.exceptions.Timeout('Timeout')
@@ -84,7 +266,7 @@ class TestRequestsApiClientGet:
         with pytest.raises(ApiTimeoutError):
             cliente.get('/termostato/')
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_get_lanza_api_connection_error(self, mock_get, cliente):
         """get() relanza ConnectionError como ApiConnectionError."""
         mock_get.side_effect = requests.exceptions.ConnectionError('Sin conexión')
@@ -92,7 +274,7 @@ class TestRequestsApiClientGet:
         with pytest.raises(ApiConnectionError):
             cliente.get('/termostato/')
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_get_lanza_api_error_en_error_http(self, mock_get, cliente):
         """get() relanza HTTPError como ApiError."""
         mock_response = Mock()
@@ -102,7 +284,7 @@ class TestRequestsApiClientGet:
         with pytest.raises(ApiError):
             cliente.get('/ruta-inexistente/')
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_api_timeout_es_subclase_de_api_error(self, mock_get, cliente):
         """ApiTimeoutError es subclase de ApiError (catcheable con except ApiError)."""
         mock_get.side_effect = requests.exceptions.Timeout('Timeout')
@@ -110,7 +292,7 @@ class TestRequestsApiClientGet:
         with pytest.raises(ApiError):
             cliente.get('/termostato/')
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_api_connection_error_es_subclase_de_api_error(self, mock_get, cliente):
         """ApiConnectionError es subclase de ApiError (catcheable con except ApiError)."""
         mock_get.side_effect = requests.exceptions.ConnectionError('Sin conexión')
@@ -118,12 +300,12 @@ class TestRequestsApiClientGet:
         with pytest.raises(ApiError):
             cliente.get('/termostato/')
 
-    @patch('webapp.services.api_client.requests.get')
+    @patch('webapp.services.api_client.requests.Session.get')
     def test_get_elimina_slash_duplicado_en_base_url(self, mock_get):
         """Base URL con slash final no genera URL con doble slash."""
         cliente_slash = RequestsApiClient(base_url='http://localhost:5050/')
         mock_response = Mock()
-        mock_response.json.return_value = {}
+        mock_response.content = b'{}'
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -133,6 +315,50 @@ class TestRequestsApiClientGet:
         assert '//' not in url_llamada.replace('http://', '')
 
 
+class TestRequestsApiClientPrecalentar:
+    """Tests del pool de conexiones y precalentar()."""
+
+    def test_reutiliza_la_misma_sesion(self, cliente):
+        """Todas las peticiones comparten la Session (y su pool keep-alive)."""
+        with patch.object(cliente._sesion, 'get') as mock_get:
+            mock_get.return_value.content = b'{}'
+            cliente.get('/termostato/')
+            cliente.get('/comprueba/')
+
+        assert mock_get.call_count == 2
+
+    def test_pool_con_el_tamano_configurado(self):
+        """pool_conexiones fija cuántas conexiones conserva el adaptador."""
+        cliente = RequestsApiClient('http://localhost:5050', pool_conexiones=3)
+
+        adaptador = cliente._sesion.get_adapter('http://localhost:5050/')
+
+        assert adaptador._pool_maxsize == 3
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_precalentar_abre_las_conexiones_pedidas(self, mock_get, cliente):
+        """precalentar() consulta /comprueba/ una vez por conexión."""
+        assert cliente.precalentar(3) == 3
+        assert mock_get.call_count == 3
+        assert mock_get.call_args[0][0] == 'http://localhost:5050/comprueba/'
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_precalentar_ignora_errores(self, mock_get, cliente):
+        """Un backend caído no rompe el arranque: devuelve 0 conexiones."""
+        mock_get.side_effect = requests.exceptions.ConnectionError()
+
+        assert cliente.precalentar(2) == 0
+
+    @pytest.mark.parametrize('conexiones, esperadas', [(0, 1), (-2, 1), (5, 3)])
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_precalentar_acota_al_pool(self, mock_get, conexiones, esperadas):
+        """Las conexiones pedidas se acotan a [1, pool_conexiones]."""
+        cliente = RequestsApiClient('http://localhost:5050', pool_conexiones=3)
+
+        assert cliente.precalentar(conexiones) == esperadas
+        assert mock_get.call_count == esperadas
+
+
 class TestMockApiClient:
     """Tests unitarios para MockApiClient."""
 
@@ -168,6 +394,13 @@ class TestMockApiClient:
         mock = MockApiClient({})
         assert mock.last_path is None
 
+    def test_precalentar_no_hace_nada(self):
+        """Sin pool de conexiones, precalentar() devuelve 0 sin llamar a get()."""
+        mock = MockApiClient({})
+
+        assert mock.precalentar(4) == 0
+        assert mock.call_count == 0
+
     def test_call_count_es_cero_al_inicio(self):
         """call_count es 0 antes de cualquier llamada."""
         mock = MockApiClient({})
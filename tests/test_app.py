@@ -7,10 +7,14 @@ via create_app('testing') o directamente sobre el servicio.
 
 pylint: disable=redefined-outer-name
 """
+import time
+
 import pytest
 
 from webapp import create_app
 from webapp.services.api_client import ApiConnectionError, ApiTimeoutError, MockApiClient
+from webapp.services.series import MIMETYPE_BINARIO, decodificar_historial_binario
+from webapp.services.simulador import generar_historial
 
 # ---------------------------------------------------------------------------
 # Datos de mock por escenario
@@ -144,6 +148,13 @@ class TestApiEstado:
         assert data['data']['temperatura_ambiente'] == 22
         assert data['from_cache'] is False
 
+    def test_api_estado_incluye_indicadores(self, client):
+        """La respuesta trae la tendencia y la diferencia calculadas en el servidor."""
+        data = client.get('/api/estado').get_json()
+
+        assert data['indicadores']['tendencia']['muestras'] == 1
+        assert data['indicadores']['diferencia']['estado'] == 'frio'
+
     def test_api_estado_con_api_caida(self, app, client):
         """Endpoint retorna 503 cuando API falla y caché está vacío."""
         app.termostato_service._api_client = MockApiClient(
@@ -224,6 +235,127 @@ class TestApiHistorial:
         assert data['success'] is False
         assert data['historial'] == []
 
+    @pytest.mark.parametrize('parametros', ['', 'desde=1766745000000', 'formato=columnas'])
+    def test_api_historial_backend_no_valido(self, app_historial, client_historial, parametros):
+        """Un timestamp del backend que no se puede interpretar devuelve 503, no 400."""
+        app_historial.termostato_service._api_client = MockApiClient(
+            {'historial': [{'timestamp': 'ayer', 'temperatura': 22}], 'total': 1}
+        )
+
+        response = client_historial.get(f'/api/historial?{parametros}')
+
+        assert response.status_code == 503
+        assert response.get_json()['success'] is False
+
+    def test_api_historial_con_puntos(self, app_historial, client_historial):
+        """El parámetro puntos reduce el historial en el servidor."""
+        app_historial.termostato_service._api_client = MockApiClient(
+            generar_historial(time.time(), 1440)
+        )
+
+        data = client_historial.get('/api/historial?limite=1440&puntos=240').get_json()
+
+        assert data['success'] is True
+        assert data['total'] == 240
+        assert len(data['historial']) == 240
+
+    def test_api_historial_con_bucket(self, app_historial, client_historial):
+        """bucket y agg agregan el historial en el servidor."""
+        app_historial.termostato_service._api_client = MockApiClient(
+            generar_historial(time.time(), 1440)
+        )
+
+        data = client_historial.get('/api/historial?limite=1440&bucket=1h&agg=p95').get_json()
+
+        assert data['success'] is True
+        assert data['total'] in (24, 25)
+        registro = data['historial'][0]
+        assert registro['min'] <= registro['temperatura'] <= registro['max']
+
+    @pytest.mark.parametrize('parametros', ['bucket=2m', 'bucket=1h&agg=mediana'])
+    def test_api_historial_agregacion_invalida(self, client_historial, parametros):
+        """Un bucket o agg no admitidos devuelven 400."""
+        response = client_historial.get(f'/api/historial?{parametros}')
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    def test_api_historial_con_desde(self, client_historial):
+        """desde devuelve solo los registros posteriores al cursor."""
+        cursor = client_historial.get('/api/historial').get_json()['cursor']
+
+        data = client_historial.get(f'/api/historial?desde={cursor - 1}').get_json()
+
+        assert data['total'] == 1
+        assert data['historial'] == [DATOS_HISTORIAL_VALIDOS['historial'][1]]
+        assert data['cursor'] == cursor
+
+        data = client_historial.get(f'/api/historial?desde={cursor}').get_json()
+
+        assert data['historial'] == []
+        assert data['cursor'] == cursor
+
+    def test_api_historial_desde_invalido(self, client_historial):
+        """Un desde no válido devuelve 400."""
+        response = client_historial.get('/api/historial?desde=ayer')
+
+        assert response.status_code == 400
+
+    def test_api_historial_formato_columnas(self, client_historial):
+        """formato=columnas devuelve timestamps y temperaturas en columnas."""
+        data = client_historial.get('/api/historial?formato=columnas').get_json()
+
+        assert data['success'] is True
+        assert data['formato'] == 'columnas'
+        assert 'historial' not in data
+        assert data['temperaturas'] == [22, 22.5]
+        assert data['timestamps'][1] - data['timestamps'][0] == 60_000
+        assert data['cursor'] == data['timestamps'][-1]
+
+    def test_api_historial_formato_binario(self, client_historial):
+        """formato=binario devuelve las columnas empaquetadas."""
+        response = client_historial.get('/api/historial?formato=binario')
+
+        assert response.status_code == 200
+        assert response.mimetype == MIMETYPE_BINARIO
+        datos = decodificar_historial_binario(response.data)
+        assert datos['temperaturas'].tolist() == [22, 22.5]
+        assert datos['cursor'] == datos['timestamps'][-1]
+
+    def test_api_historial_formato_binario_error_en_json(self, app_historial, client_historial):
+        """Si el backend falla, el error se devuelve en JSON como siempre."""
+        app_historial.termostato_service._api_client = MockApiClient(
+            {}, raise_error=ApiConnectionError
+        )
+
+        response = client_historial.get('/api/historial?formato=binario')
+
+        assert response.status_code == 503
+        assert response.get_json()['success'] is False
+
+    def test_api_historial_formato_invalido(self, client_historial):
+        """Un formato desconocido devuelve 400."""
+        response = client_historial.get('/api/historial?formato=xml')
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    def test_api_historial_puntos_invalidos(self, client_historial):
+        """Menos de 3 puntos devuelve 400."""
+        response = client_historial.get('/api/historial?puntos=1')
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    @pytest.mark.parametrize('limite', [0, -5])
+    def test_api_historial_limite_invalido(self, app_historial, client_historial, limite):
+        """Un limite menor que 1 devuelve 400 sin consultar ninguna fuente."""
+        response = client_historial.get(f'/api/historial?limite={limite}')
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+        assert app_historial.termostato_service._api_client.call_count == 0
+
 
 # ---------------------------------------------------------------------------
 # TestHealth
@@ -287,3 +419,125 @@ class TestHealth:
         data = response.get_json()
         assert data['status'] == 'degraded'
         assert data['backend']['status'] == 'unavailable'
+
+
+# ---------------------------------------------------------------------------
+# TestApiEstadisticas
+# ---------------------------------------------------------------------------
+
+
+class TestApiEstadisticas:
+    """Tests para el endpoint /api/estadisticas"""
+
+    def test_api_estadisticas_tras_obtener_estado(self, client):
+        """Cada /api/estado exitoso se acumula en las estadísticas."""
+        client.get('/api/estado')
+
+        response = client.get('/api/estadisticas')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['success'] is True
+        assert data['temperatura']['muestras'] == 1
+        assert data['temperatura']['media'] == DATOS_ESTADO_VALIDOS['temperatura_ambiente']
+        assert data['bateria']['max'] == DATOS_ESTADO_VALIDOS['carga_bateria']
+
+
+# ---------------------------------------------------------------------------
+# TestApiSerie
+# ---------------------------------------------------------------------------
+
+
+class TestApiSerie:
+    """Tests para el endpoint /api/serie"""
+
+    def test_api_serie_vacia(self, client):
+        """Sin estados obtenidos, la serie está vacía."""
+        response = client.get('/api/serie')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['success'] is True
+        assert data['total'] == 0
+        assert data['timestamps'] == []
+
+    def test_api_serie_tras_obtener_estado(self, client):
+        """Cada /api/estado exitoso queda en la serie del servidor."""
+        client.get('/api/estado')
+
+        data = client.get('/api/serie?ventana=60').get_json()
+
+        assert data['total'] == 1
+        assert data['temperatura_ambiente'] == [DATOS_ESTADO_VALIDOS['temperatura_ambiente']]
+        assert data['estado_climatizador'] == [DATOS_ESTADO_VALIDOS['estado_climatizador']]
+
+    @pytest.mark.parametrize('ventana', ['0', '-5'])
+    def test_api_serie_ventana_invalida(self, client, ventana):
+        """Una ventana no positiva devuelve 400."""
+        response = client.get(f'/api/serie?ventana={ventana}')
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+
+# ---------------------------------------------------------------------------
+# TestApiPanel
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.usefixtures('reset_cache')
+class TestApiPanel:
+    """Tests para el endpoint /api/panel"""
+
+    def test_api_panel_funcionando(self, client):
+        """Endpoint retorna las tres partes con success."""
+        response = client.get('/api/panel')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['success'] is True
+        assert data['estado']['data'] == DATOS_ESTADO_VALIDOS
+        assert data['historial']['success'] is True
+        assert data['health']['success'] is True
+
+    def test_api_panel_con_partes(self, client):
+        """El parámetro partes limita las partes consultadas."""
+        data = client.get('/api/panel?partes=estado').get_json()
+
+        assert 'estado' in data
+        assert 'historial' not in data
+        assert 'health' not in data
+
+    def test_api_panel_parte_desconocida(self, client):
+        """Una parte desconocida devuelve 400."""
+        response = client.get('/api/panel?partes=estado,clima')
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    def test_api_panel_limite_invalido(self, client):
+        """Un limite menor que 1 devuelve 400 si se pide el historial."""
+        assert client.get('/api/panel?limite=0').status_code == 400
+        assert client.get('/api/panel?partes=estado&limite=0').status_code == 200
+
+    def test_api_panel_con_api_caida(self, app, client):
+        """Devuelve 503 si fallan todas las partes."""
+        app.termostato_service._api_client = MockApiClient({}, raise_error=ApiConnectionError)
+
+        response = client.get('/api/panel')
+
+        assert response.status_code == 503
+        data = response.get_json()
+        assert data['success'] is False
+        assert data['historial']['success'] is False
+
+    def test_api_panel_historial_backend_no_valido(self, app, client):
+        """Un historial del backend que no se puede interpretar falla solo esa parte."""
+        app.termostato_service._api_client = MockApiClient(
+            {'historial': [{'timestamp': 'ayer', 'temperatura': 22}], 'total': 1}
+        )
+
+        response = client.get('/api/panel?partes=historial')
+
+        assert response.status_code == 503
+        assert response.get_json()['historial']['success'] is False
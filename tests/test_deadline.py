@@ -0,0 +1,68 @@
+"""
+Tests del deadline por petición y su propagación hasta el ApiClient.
+"""
+import time
+
+import pytest
+
+from webapp import create_app
+from webapp.deadline import deadline_actual
+
+
+class ApiClientCapturaDeadline:
+    """ApiClient falso que registra el deadline recibido en cada llamada."""
+
+    def __init__(self):
+        self.deadlines = []
+
+    def get(self, path, **kwargs):
+        self.deadlines.append(kwargs.get('deadline'))
+        if '/comprueba/' in path:
+            return {'status': 'ok'}
+        if '/historial/' in path:
+            return {'historial': [], 'total': 0}
+        return {'temperatura_ambiente': 22}
+
+
+@pytest.fixture
+def app():
+    """App de testing con un ApiClient que captura deadlines."""
+    aplicacion = create_app('testing')
+    aplicacion.termostato_service._api_client = ApiClientCapturaDeadline()
+    return aplicacion
+
+
+class TestDeadlinePeticion:
+    """Tests del hook before_request."""
+
+    def test_fija_deadline_segun_config(self, app):
+        """Cada petición recibe deadline = ahora + REQUEST_DEADLINE."""
+        app.config['REQUEST_DEADLINE'] = 3.0
+        with app.test_request_context('/api/estado'):
+            antes = time.monotonic()
+            app.preprocess_request()
+            deadline = deadline_actual()
+
+        assert antes + 3.0 <= deadline <= time.monotonic() + 3.0
+
+    def test_sin_hook_no_hay_deadline(self, app):
+        """Fuera del ciclo de petición deadline_actual() es None."""
+        with app.test_request_context('/'):
+            assert deadline_actual() is None
+
+    def test_sin_contexto_de_aplicacion_no_hay_deadline(self):
+        """Sin contexto de aplicación deadline_actual() es None, no RuntimeError."""
+        assert deadline_actual() is None
+
+
+class TestPropagacionDeadline:
+    """Las rutas propagan el deadline hasta ApiClient.get()."""
+
+    @pytest.mark.parametrize('ruta', ['/', '/api/estado', '/api/historial', '/health'])
+    def test_ruta_propaga_deadline(self, app, ruta):
+        """El ApiClient recibe un deadline en el futuro."""
+        app.test_client().get(ruta)
+
+        deadlines = app.termostato_service._api_client.deadlines
+        assert deadlines
+        assert all(d is not None and d > time.monotonic() for d in deadlines)
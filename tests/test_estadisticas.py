@@ -0,0 +1,138 @@
+"""
+Tests unitarios para las estadísticas acumuladas de estado y su uso desde
+TermostatoService.
+"""
+import statistics
+import time
+
+import pytest
+
+from webapp.cache.memory_cache import MemoryCache
+from webapp.services.api_client import ApiConnectionError, MockApiClient
+from webapp.services.estadisticas import EstadisticaOnline, EstadisticasEstado
+from webapp.services.termostato_service import TermostatoService
+
+ESTADO = {
+    'temperatura_ambiente': 22.0,
+    'temperatura_deseada': 24,
+    'carga_bateria': 3.8,
+    'estado_climatizador': 'calentando',
+}
+
+
+class TestEstadisticaOnline:
+    """Tests de Welford, EWMA, extremos y tiempo en zona."""
+
+    def test_sin_muestras(self):
+        """Sin muestras el resumen no tiene valores."""
+        resumen = EstadisticaOnline().resumen()
+
+        assert resumen['muestras'] == 0
+        assert resumen['media'] is None
+        assert resumen['varianza'] is None
+        assert resumen['fraccion_en_zona'] is None
+
+    def test_media_y_varianza_como_statistics(self):
+        """Welford coincide con el cálculo directo, incluso con media grande."""
+        valores = [1e9 + v for v in (4.0, 7.0, 13.0, 16.0)]
+        estadistica = EstadisticaOnline()
+        for i, valor in enumerate(valores):
+            estadistica.agregar(valor, float(i), en_zona=False)
+
+        assert estadistica.media == pytest.approx(statistics.mean(valores))
+        assert estadistica.varianza == pytest.approx(statistics.variance(valores))
+        assert estadistica.minimo == min(valores)
+        assert estadistica.maximo == max(valores)
+
+    def test_ewma(self):
+        """La EWMA empieza en la primera muestra y se acerca a las nuevas."""
+        estadistica = EstadisticaOnline(alfa=0.5)
+        for i, valor in enumerate([10.0, 20.0, 20.0]):
+            estadistica.agregar(valor, float(i), en_zona=False)
+
+        assert estadistica.ewma == pytest.approx(17.5)
+
+    def test_tiempo_en_zona_ponderado(self):
+        """Cada intervalo cuenta para la zona de la muestra que lo inicia."""
+        estadistica = EstadisticaOnline()
+        estadistica.agregar(1.0, 0.0, en_zona=True)
+        estadistica.agregar(1.0, 10.0, en_zona=False)
+        estadistica.agregar(1.0, 40.0, en_zona=True)
+        estadistica.agregar(1.0, 50.0, en_zona=True)
+
+        resumen = estadistica.resumen()
+        assert resumen['segundos_observados'] == 50.0
+        assert resumen['segundos_en_zona'] == 20.0
+        assert resumen['fraccion_en_zona'] == 0.4
+
+    def test_huecos_no_cuentan(self):
+        """Un intervalo mayor que hueco_maximo no suma tiempo observado."""
+        estadistica = EstadisticaOnline(hueco_maximo=60.0)
+        estadistica.agregar(1.0, 0.0, en_zona=True)
+        estadistica.agregar(1.0, 3600.0, en_zona=True)
+        estadistica.agregar(1.0, 3610.0, en_zona=True)
+
+        assert estadistica.segundos_observados == 10.0
+        assert estadistica.segundos_en_zona == 10.0
+
+
+class TestEstadisticasEstado:
+    """Tests de las zonas de confort de temperatura y batería."""
+
+    def test_zonas_de_confort(self):
+        """Temperatura cerca de la deseada y batería NORMAL están en zona."""
+        estadisticas = EstadisticasEstado(confort_temperatura=0.5, bateria_minima=3.5)
+        estadisticas.agregar(0.0, {**ESTADO, 'temperatura_ambiente': 23.8, 'carga_bateria': 3.4})
+        estadisticas.agregar(10.0, {**ESTADO, 'temperatura_ambiente': 22.0, 'carga_bateria': 3.6})
+        estadisticas.agregar(20.0, ESTADO)
+
+        instantanea = estadisticas.instantanea()
+        assert instantanea['temperatura']['fraccion_en_zona'] == 0.5
+        assert instantanea['bateria']['fraccion_en_zona'] == 0.5
+        assert instantanea['temperatura']['muestras'] == 3
+
+    def test_campos_invalidos_no_cuentan(self):
+        """Los valores no numéricos no entran en las estadísticas."""
+        estadisticas = EstadisticasEstado()
+        estadisticas.agregar(0.0, {'temperatura_ambiente': 'Error', 'carga_bateria': None})
+
+        instantanea = estadisticas.instantanea()
+        assert instantanea['temperatura']['muestras'] == 0
+        assert instantanea['bateria']['muestras'] == 0
+
+
+class TestServicioEstadisticas:
+    """Tests de TermostatoService.obtener_estadisticas."""
+
+    def test_cada_muestra_de_la_serie_cuenta(self, monkeypatch):
+        """Cada estado que la serie acepta se acumula."""
+        instante = [1000.0]
+        monkeypatch.setattr(time, 'time', lambda: instante[0])
+        servicio = TermostatoService(api_client=MockApiClient(ESTADO), cache=MemoryCache())
+        servicio.obtener_estado()
+        instante[0] += 10
+        servicio.obtener_estado()
+
+        estadisticas = servicio.obtener_estadisticas()
+        assert estadisticas['temperatura']['muestras'] == 2
+        assert estadisticas['bateria']['media'] == pytest.approx(3.8)
+
+    def test_muestras_duplicadas_no_cuentan(self, monkeypatch):
+        """Varios navegadores refrescando en el mismo instante suman una sola muestra."""
+        monkeypatch.setattr(time, 'time', lambda: 1000.0)
+        servicio = TermostatoService(api_client=MockApiClient(ESTADO), cache=MemoryCache())
+        for _ in range(5):
+            servicio.obtener_estado()
+
+        assert servicio._api_client.call_count == 5
+        assert servicio.obtener_estadisticas()['temperatura']['muestras'] == 1
+
+    def test_los_fallos_no_cuentan(self):
+        """Un backend caído no añade muestras."""
+        servicio = TermostatoService(
+            api_client=MockApiClient({}, raise_error=ApiConnectionError),
+            cache=MemoryCache()
+        )
+        servicio.obtener_estado()
+
+        assert servicio.obtener_estadisticas()['temperatura']['muestras'] == 0
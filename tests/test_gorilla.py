@@ -0,0 +1,147 @@
+"""
+Tests unitarios para SerieGorilla (compresión delta de delta y XOR).
+"""
+import math
+
+import pytest
+
+from webapp.services.gorilla import MuestraEstado, SerieGorilla
+from webapp.services.simulador import generar_estado
+
+# 2026-01-01T00:00:00 UTC
+INICIO = 1767225600
+
+ESTADO = {
+    'temperatura_ambiente': 22.5,
+    'temperatura_deseada': 24,
+    'carga_bateria': 3.8,
+    'estado_climatizador': 'calentando',
+}
+
+
+def _serie(instantes, **kwargs):
+    """Serie con una muestra del simulador en cada instante."""
+    serie = SerieGorilla(**kwargs)
+    for instante in instantes:
+        serie.agregar(instante, generar_estado(instante))
+    return serie
+
+
+class TestSerieGorilla:
+    """Tests de compresión, decodificación y rangos."""
+
+    def test_serie_vacia(self):
+        """Sin muestras no hay nada que iterar."""
+        serie = SerieGorilla()
+
+        assert len(serie) == 0
+        assert list(serie) == []
+        assert serie.rango()['timestamps'] == []
+
+    def test_ida_y_vuelta(self):
+        """Lo decodificado coincide con lo agregado, con precisión de ms."""
+        instantes = [INICIO + 5 * i + (i % 7) * 0.013 for i in range(500)]
+        serie = _serie(instantes)
+
+        muestras = list(serie)
+
+        assert len(muestras) == len(serie) == 500
+        for instante, muestra in zip(instantes, muestras):
+            esperado = generar_estado(instante)
+            assert muestra.instante == pytest.approx(instante, abs=5e-4)
+            assert muestra.temperatura_ambiente == esperado['temperatura_ambiente']
+            assert muestra.carga_bateria == esperado['carga_bateria']
+            assert muestra.estado_climatizador == esperado['estado_climatizador']
+
+    @pytest.mark.parametrize('saltos', [
+        [5, 5, 5, 5],
+        [5, 5.06, 4.7, 9, 1.2],
+        [5, 600, 5, 3600, 0.001],
+    ])
+    def test_timestamps_irregulares(self, saltos):
+        """Cada rango de delta de delta se decodifica bien."""
+        instantes = [INICIO]
+        for salto in saltos * 10:
+            instantes.append(instantes[-1] + salto)
+        serie = _serie(instantes)
+
+        assert [m.instante for m in serie] == pytest.approx(instantes, abs=5e-4)
+
+    def test_valores_sin_dato(self):
+        """Los campos ausentes o no numéricos se decodifican como None."""
+        serie = SerieGorilla()
+        serie.agregar(INICIO, ESTADO)
+        serie.agregar(INICIO + 5, {'temperatura_ambiente': 'Error', 'estado_climatizador': 'desconocido'})
+        serie.agregar(INICIO + 10, ESTADO)
+
+        muestras = list(serie)
+
+        assert muestras[1] == MuestraEstado(INICIO + 5, None, None, None, None)
+        assert muestras[2] == MuestraEstado(INICIO + 10, 22.5, 24.0, 3.8, 'calentando')
+
+    def test_descarta_muestras_que_no_avanzan(self):
+        """Una muestra con instante igual o anterior a la última se descarta."""
+        serie = SerieGorilla()
+
+        assert serie.agregar(INICIO, ESTADO) is True
+        assert serie.agregar(INICIO, ESTADO) is False
+        assert serie.agregar(INICIO - 1, ESTADO) is False
+        assert len(serie) == 1
+
+    def test_comprime_valores_repetidos(self):
+        """Muestras regulares con valores constantes ocupan unos pocos bits."""
+        serie = SerieGorilla()
+        for i in range(1000):
+            serie.agregar(INICIO + 5 * i, ESTADO)
+
+        # Primera muestra completa; después 1 bit de timestamp y 1 por campo
+        assert serie.bytes_usados() < 50 + 1000 * 5 / 8 + 1
+
+    def test_bloques_por_duracion(self):
+        """Al superar segundos_bloque se abre un bloque nuevo."""
+        serie = _serie([INICIO + 60 * i for i in range(10)], segundos_bloque=180)
+
+        assert len(serie._bloques) == 4
+        assert len(list(serie)) == 10
+
+    def test_bloques_maximos(self):
+        """Con bloques_maximos se descartan los bloques más antiguos."""
+        serie = _serie([INICIO + 60 * i for i in range(10)], segundos_bloque=180, bloques_maximos=2)
+
+        assert len(serie) == 4
+        assert [m.instante for m in serie] == [INICIO + 360, INICIO + 420, INICIO + 480, INICIO + 540]
+
+    def test_iterar_rango(self):
+        """iterar solo devuelve las muestras de [inicio, fin], entre bloques."""
+        serie = _serie([INICIO + 60 * i for i in range(10)], segundos_bloque=180)
+
+        instantes = [m.instante for m in serie.iterar(INICIO + 100, INICIO + 300)]
+
+        assert instantes == [INICIO + 120, INICIO + 180, INICIO + 240, INICIO + 300]
+
+    def test_iterar_es_perezoso(self):
+        """El iterador decodifica bajo demanda y admite agregar mientras se recorre."""
+        serie = _serie([INICIO + 5 * i for i in range(10)])
+        iterador = iter(serie)
+
+        primera = next(iterador)
+        serie.agregar(INICIO + 1000, ESTADO)
+
+        assert primera.instante == INICIO
+        assert len(list(iterador)) == 9
+
+    def test_rango_columnar(self):
+        """rango devuelve columnas como SerieEstado.ventana."""
+        serie = SerieGorilla()
+        serie.agregar(INICIO + 0.25, ESTADO)
+        serie.agregar(INICIO + 5.25, {**ESTADO, 'carga_bateria': math.nan})
+
+        ventana = serie.rango(INICIO + 5)
+
+        assert ventana == {
+            'timestamps': [(INICIO + 5) * 1000 + 250],
+            'temperatura_ambiente': [22.5],
+            'temperatura_deseada': [24.0],
+            'carga_bateria': [None],
+            'estado_climatizador': ['calentando'],
+        }
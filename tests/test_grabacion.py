@@ -0,0 +1,172 @@
+"""
+Tests unitarios para GrabadorApiClient y ReproductorApiClient.
+"""
+import gzip
+import time
+
+import pytest
+
+from webapp.services.api_client import ApiConnectionError, ApiTimeoutError, MockApiClient
+from webapp.services.grabacion import (
+    GrabadorApiClient,
+    ReproductorApiClient,
+    cargar_grabacion,
+)
+
+ESTADO = {'temperatura_ambiente': 22, 'temperatura_deseada': 24}
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    """Ruta de un fichero de grabación temporal."""
+    return str(tmp_path / 'trafico.jsonl.gz')
+
+
+def _grabar(ruta, cliente, paths):
+    """Grabar una secuencia de paths con el cliente dado."""
+    grabador = GrabadorApiClient(cliente, ruta)
+    for path in paths:
+        try:
+            grabador.get(path)
+        except ApiConnectionError:
+            pass
+    grabador.cerrar()
+
+
+class TestGrabadorApiClient:
+    """Tests de la grabación."""
+
+    def test_devuelve_la_respuesta_del_cliente(self, ruta):
+        """La grabación es transparente para el llamador."""
+        grabador = GrabadorApiClient(MockApiClient(ESTADO), ruta)
+
+        assert grabador.get('/termostato/') == ESTADO
+        grabador.cerrar()
+
+    def test_graba_path_datos_y_latencia(self, ruta):
+        """Cada petición queda grabada con path, datos, t y latencia."""
+        _grabar(ruta, MockApiClient(ESTADO), ['/termostato/', '/comprueba/'])
+
+        registros = cargar_grabacion(ruta)
+
+        assert [r['path'] for r in registros] == ['/termostato/', '/comprueba/']
+        assert registros[0]['datos'] == ESTADO
+        assert registros[0]['latencia'] >= 0
+        assert registros[1]['t'] >= registros[0]['t']
+
+    def test_graba_y_relanza_errores(self, ruta):
+        """Los errores se graban por nombre de clase y se relanzan."""
+        grabador = GrabadorApiClient(MockApiClient({}, raise_error=ApiConnectionError), ruta)
+
+        with pytest.raises(ApiConnectionError):
+            grabador.get('/termostato/')
+        grabador.cerrar()
+
+        assert cargar_grabacion(ruta)[0]['error'] == 'ApiConnectionError'
+
+    def test_fichero_es_gzip(self, ruta):
+        """El fichero es gzip con una línea JSON por registro."""
+        _grabar(ruta, MockApiClient(ESTADO), ['/termostato/'] * 3)
+
+        with gzip.open(ruta, 'rt', encoding='utf-8') as fichero:
+            assert len(fichero.readlines()) == 3
+
+    def test_grabacion_sin_cerrar_se_lee_hasta_el_ultimo_registro(self, ruta):
+        """Un fichero truncado se lee hasta el último registro completo."""
+        _grabar(ruta, MockApiClient(ESTADO), ['/termostato/'] * 50)
+        with open(ruta, 'rb') as fichero:
+            contenido = fichero.read()
+        with open(ruta, 'wb') as fichero:
+            fichero.write(contenido[:-12])
+
+        assert 0 < len(cargar_grabacion(ruta)) <= 50
+
+    def test_peticiones_tras_cerrar_no_se_graban(self, ruta):
+        """Tras cerrar() las peticiones siguen respondiendo sin escribir."""
+        grabador = GrabadorApiClient(MockApiClient(ESTADO), ruta)
+        grabador.get('/termostato/')
+        grabador.cerrar()
+
+        assert grabador.get('/termostato/') == ESTADO
+        assert len(cargar_grabacion(ruta)) == 1
+
+
+class TestReproductorApiClient:
+    """Tests de la reproducción."""
+
+    def _registro(self, path, datos=None, latencia=0.0, error=None):
+        registro = {'t': 0.0, 'path': path, 'latencia': latencia}
+        if error:
+            registro['error'] = error
+        else:
+            registro['datos'] = datos
+        return registro
+
+    def test_reproduce_en_ciclo_por_path(self):
+        """Las respuestas de un path se sirven en orden y en ciclo."""
+        reproductor = ReproductorApiClient([
+            self._registro('/termostato/', {'n': 1}),
+            self._registro('/termostato/', {'n': 2}),
+        ], escala=0)
+
+        servidos = [reproductor.get('/termostato/')['n'] for _ in range(3)]
+
+        assert servidos == [1, 2, 1]
+        assert reproductor.call_count == 3
+
+    def test_path_exacto_o_endpoint(self):
+        """Sin grabación para el path exacto se usa la de su endpoint."""
+        reproductor = ReproductorApiClient([
+            self._registro('/termostato/historial/?limite=60', {'total': 60}),
+        ], escala=0)
+
+        assert reproductor.get('/termostato/historial/?limite=1440') == {'total': 60}
+
+    def test_path_sin_grabacion_lanza_error_de_conexion(self):
+        """Un endpoint nunca grabado se comporta como backend inalcanzable."""
+        reproductor = ReproductorApiClient([self._registro('/termostato/', {})], escala=0)
+
+        with pytest.raises(ApiConnectionError):
+            reproductor.get('/comprueba/')
+
+    def test_reproduce_errores_grabados(self):
+        """Los errores grabados se relanzan con su clase original."""
+        reproductor = ReproductorApiClient([
+            self._registro('/termostato/', error='ApiTimeoutError'),
+        ], escala=0)
+
+        with pytest.raises(ApiTimeoutError):
+            reproductor.get('/termostato/')
+
+    def test_respeta_latencia_escalada(self):
+        """La respuesta se demora latencia x escala."""
+        reproductor = ReproductorApiClient([
+            self._registro('/termostato/', {}, latencia=0.2),
+        ], escala=0.25)
+
+        inicio = time.monotonic()
+        reproductor.get('/termostato/')
+
+        assert 0.04 <= time.monotonic() - inicio < 0.15
+
+    def test_deadline_menor_que_la_latencia_lanza_timeout(self):
+        """Si la latencia grabada supera el deadline se lanza ApiTimeoutError."""
+        reproductor = ReproductorApiClient([
+            self._registro('/termostato/', {}, latencia=5.0),
+        ])
+
+        with pytest.raises(ApiTimeoutError):
+            reproductor.get('/termostato/', deadline=time.monotonic() + 0.01)
+
+    def test_grabacion_vacia_lanza_value_error(self):
+        """No se puede reproducir una grabación vacía."""
+        with pytest.raises(ValueError):
+            ReproductorApiClient([])
+
+    def test_ida_y_vuelta_desde_fichero(self, ruta):
+        """Lo grabado con GrabadorApiClient se reproduce tal cual."""
+        _grabar(ruta, MockApiClient(ESTADO), ['/termostato/'])
+
+        reproductor = ReproductorApiClient.desde_fichero(ruta, escala=0)
+
+        assert reproductor.get('/termostato/') == ESTADO
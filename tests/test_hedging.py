@@ -0,0 +1,155 @@
+"""
+Tests unitarios para HedgingApiClient.
+Usa un ApiClient guionado con latencias y errores predefinidos por llamada.
+"""
+import threading
+import time
+
+import pytest
+
+from webapp import create_app
+from webapp.config import ProductionConfig
+from webapp.services.api_client import ApiConnectionError, ApiTimeoutError
+from webapp.services.hedging import HedgingApiClient
+
+RAPIDO = 0.001
+LENTO = 0.5
+
+
+class ApiClientGuionado:
+    """ApiClient falso: la llamada i duerme guion[i][0] y devuelve/lanza guion[i][1]."""
+
+    def __init__(self, guion):
+        self._guion = list(guion)
+        self._lock = threading.Lock()
+        self.llamadas = 0
+
+    def get(self, path, **kwargs):
+        with self._lock:
+            indice = self.llamadas
+            self.llamadas += 1
+        retardo, resultado = self._guion[min(indice, len(self._guion) - 1)]
+        time.sleep(retardo)
+        if isinstance(resultado, type) and issubclass(resultado, Exception):
+            raise resultado(f'Error guionado en llamada {indice}')
+        return {'llamada': indice, **resultado}
+
+
+def _calentar(cliente, veces=3):
+    """Realizar peticiones rápidas para poblar la ventana de latencias."""
+    for _ in range(veces):
+        cliente.get('/termostato/')
+
+
+def _hedging(guion, **kwargs):
+    """HedgingApiClient con parámetros agresivos para tests rápidos."""
+    opciones = {'min_muestras': 3, 'max_extra': 1.0, 'max_creditos': 5.0}
+    opciones.update(kwargs)
+    return HedgingApiClient(ApiClientGuionado(guion), **opciones)
+
+
+class TestHedgingApiClient:
+    """Tests del comportamiento de cobertura."""
+
+    def test_sin_muestras_suficientes_no_cubre(self):
+        """Hasta tener min_muestras no se lanzan coberturas."""
+        cliente = _hedging([(0.05, {})])
+
+        resultado = cliente.get('/termostato/')
+
+        assert resultado['llamada'] == 0
+        assert cliente.coberturas == 0
+
+    def test_peticion_rapida_no_se_cubre(self):
+        """Una petición dentro del percentil no genera cobertura."""
+        cliente = _hedging([(RAPIDO, {})])
+        _calentar(cliente)
+
+        cliente.get('/termostato/')
+
+        assert cliente.coberturas == 0
+        assert cliente.peticiones == 4
+
+    def test_peticion_lenta_se_cubre_y_gana_la_cobertura(self):
+        """Si la primaria se retrasa, la cobertura responde antes."""
+        guion = [(RAPIDO, {})] * 3 + [(LENTO, {}), (RAPIDO, {})]
+        cliente = _hedging(guion)
+        _calentar(cliente)
+
+        inicio = time.monotonic()
+        resultado = cliente.get('/termostato/')
+
+        assert time.monotonic() - inicio < LENTO / 2
+        assert resultado['llamada'] == 4
+        assert cliente.coberturas == 1
+        assert cliente.ganadas_por_cobertura == 1
+
+    def test_presupuesto_agotado_no_cubre(self):
+        """Con max_extra=0 nunca se lanzan coberturas."""
+        guion = [(RAPIDO, {})] * 3 + [(0.05, {})]
+        cliente = _hedging(guion, max_extra=0.0)
+        _calentar(cliente)
+
+        resultado = cliente.get('/termostato/')
+
+        assert resultado['llamada'] == 3
+        assert cliente.coberturas == 0
+
+    def test_presupuesto_acota_la_carga_extra(self):
+        """La fracción de coberturas no supera max_extra."""
+        guion = [(RAPIDO, {})] * 3 + [(0.02, {})]
+        cliente = _hedging(guion, max_extra=0.25, max_creditos=1.0)
+        _calentar(cliente)
+
+        for _ in range(8):
+            cliente.get('/termostato/')
+
+        assert cliente.coberturas <= 0.25 * cliente.peticiones
+
+    def test_error_rapido_de_la_primaria_se_propaga(self):
+        """Un error antes del retardo se propaga sin cubrir (no es un reintento)."""
+        guion = [(RAPIDO, {})] * 3 + [(0, ApiConnectionError)]
+        cliente = _hedging(guion)
+        _calentar(cliente)
+
+        with pytest.raises(ApiConnectionError):
+            cliente.get('/termostato/')
+        assert cliente.coberturas == 0
+
+    def test_cobertura_fallida_gana_la_primaria(self):
+        """Si la cobertura falla, se espera a la primaria."""
+        guion = [(RAPIDO, {})] * 3 + [(0.1, {}), (0, ApiTimeoutError)]
+        cliente = _hedging(guion)
+        _calentar(cliente)
+
+        resultado = cliente.get('/termostato/')
+
+        assert resultado['llamada'] == 3
+        assert cliente.ganadas_por_cobertura == 0
+
+    def test_ambas_fallan_lanza_error(self):
+        """Si primaria y cobertura fallan, se lanza el error."""
+        guion = [(RAPIDO, {})] * 3 + [(0.1, ApiTimeoutError), (0, ApiConnectionError)]
+        cliente = _hedging(guion)
+        _calentar(cliente)
+
+        with pytest.raises((ApiTimeoutError, ApiConnectionError)):
+            cliente.get('/termostato/')
+
+
+class TestCreateAppHedging:
+    """Tests de la integración con create_app()."""
+
+    def test_api_hedging_decora_el_cliente(self, monkeypatch):
+        """Con API_HEDGING activo el servicio usa HedgingApiClient."""
+        monkeypatch.setattr(ProductionConfig, 'API_HEDGING', True)
+
+        app = create_app('production')
+
+        assert isinstance(app.termostato_service._api_client, HedgingApiClient)
+
+    def test_testing_no_usa_hedging(self):
+        """En testing se inyecta MockApiClient sin decorar."""
+        app = create_app('testing')
+
+        assert not isinstance(app.termostato_service._api_client, HedgingApiClient)
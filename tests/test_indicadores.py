@@ -0,0 +1,170 @@
+"""
+Tests unitarios para los indicadores de tendencia y diferencia y su uso
+desde TermostatoService.
+"""
+import pytest
+
+from webapp.cache.memory_cache import MemoryCache
+from webapp.services.api_client import MockApiClient
+from webapp.services.indicadores import (
+    IndicadoresTendencia,
+    RegresionMovil,
+    calcular_diferencia,
+)
+from webapp.services.serie_estado import SerieEstado
+from webapp.services.termostato_service import TermostatoService
+
+ESTADO = {
+    'temperatura_ambiente': 22.0,
+    'temperatura_deseada': 24,
+    'carga_bateria': 3.8,
+    'estado_climatizador': 'calentando',
+}
+
+
+def _indicadores(temperaturas, ventana=6, paso=10.0):
+    """Indicadores alimentados con una muestra cada `paso` segundos."""
+    indicadores = IndicadoresTendencia(ventana=ventana)
+    for i, temperatura in enumerate(temperaturas):
+        indicadores.agregar(1_700_000_000 + i * paso, {**ESTADO, 'temperatura_ambiente': temperatura})
+    return indicadores
+
+
+class TestRegresionMovil:
+    """Tests de la pendiente por mínimos cuadrados incremental."""
+
+    def test_sin_muestras_suficientes(self):
+        """Con menos de 2 muestras no hay pendiente."""
+        regresion = RegresionMovil(3)
+        assert regresion.pendiente() is None
+        regresion.agregar(0.0, 1.0)
+        assert regresion.pendiente() is None
+
+    def test_recta_exacta(self):
+        """Sobre una recta la pendiente es la de la recta."""
+        regresion = RegresionMovil(5)
+        for x in range(5):
+            regresion.agregar(float(x), 2.0 * x + 1)
+        assert regresion.pendiente() == pytest.approx(2.0)
+
+    def test_ventana_descarta_las_mas_antiguas(self):
+        """Solo cuentan las últimas `ventana` muestras."""
+        regresion = RegresionMovil(3)
+        for x, y in [(0, 100.0), (1, 0.0), (2, 1.0), (3, 2.0)]:
+            regresion.agregar(float(x), y)
+
+        assert len(regresion) == 3
+        assert regresion.primera == (1.0, 0.0)
+        assert regresion.pendiente() == pytest.approx(1.0)
+
+    def test_reajuste_de_origen(self):
+        """Tras alejarse del origen la pendiente sigue siendo exacta."""
+        regresion = RegresionMovil(4)
+        for x in range(0, 400_000, 50_000):
+            regresion.agregar(1_700_000_000.0 + x, x / 1000)
+
+        assert regresion.pendiente() == pytest.approx(0.001)
+        assert regresion.primera == (1_700_000_000.0 + 200_000, 200.0)
+
+
+class TestIndicadoresTendencia:
+    """Tests de dirección y acercamiento a la temperatura deseada."""
+
+    def test_sin_muestras_estable(self):
+        """Sin historial la tendencia es estable y sin acercamiento."""
+        tendencia = IndicadoresTendencia().tendencia(22.0, 24.0)
+        assert tendencia == {'direccion': 'estable', 'pendiente': None, 'acercando': None, 'muestras': 0}
+
+    def test_subiendo_hacia_la_deseada(self):
+        """0.3 °C cada 10 s son 1.8 °C/min: subiendo y acercándose."""
+        tendencia = _indicadores([20.0, 20.3, 20.6, 20.9]).tendencia(20.9, 24.0)
+
+        assert tendencia['direccion'] == 'subiendo'
+        assert tendencia['pendiente'] == pytest.approx(1.8)
+        assert tendencia['acercando'] is True
+        assert tendencia['muestras'] == 4
+
+    def test_bajando_alejandose(self):
+        """Bajar estando por debajo de la deseada es alejarse."""
+        tendencia = _indicadores([22.0, 21.7, 21.4]).tendencia(21.4, 24.0)
+
+        assert tendencia['direccion'] == 'bajando'
+        assert tendencia['acercando'] is False
+
+    def test_cambios_pequenos_son_estables(self):
+        """Por debajo del umbral la dirección es estable."""
+        tendencia = _indicadores([22.0, 22.04, 22.08]).tendencia(22.08, 24.0)
+
+        assert tendencia['direccion'] == 'estable'
+        assert tendencia['acercando'] is None
+
+    def test_ignora_temperaturas_no_numericas(self):
+        """Las muestras sin temperatura numérica no entran en la regresión."""
+        indicadores = _indicadores([22.0, 22.5])
+        indicadores.agregar(1_800_000_000, {**ESTADO, 'temperatura_ambiente': 'Error'})
+
+        assert indicadores.tendencia(22.5, 24.0)['muestras'] == 2
+
+
+class TestCalcularDiferencia:
+    """Tests de la diferencia con la temperatura deseada (WT-11)."""
+
+    @pytest.mark.parametrize('actual, estado, porcentaje', [
+        (24.3, 'ok', 94.0),
+        (22.0, 'frio', 60.0),
+        (27.0, 'calor', 40.0),
+        (10.0, 'frio', 0.0),
+    ])
+    def test_estado_y_porcentaje(self, actual, estado, porcentaje):
+        """El estado y la barra siguen la distancia a la deseada."""
+        diferencia = calcular_diferencia(actual, 24.0)
+
+        assert diferencia['estado'] == estado
+        assert diferencia['porcentaje'] == pytest.approx(porcentaje)
+        assert diferencia['diferencia'] == pytest.approx(actual - 24.0)
+        assert diferencia['absoluta'] == pytest.approx(abs(actual - 24.0))
+
+
+class TestServicioIndicadores:
+    """Tests de TermostatoService.obtener_indicadores."""
+
+    def _servicio(self, datos=None):
+        return TermostatoService(
+            api_client=MockApiClient(datos or ESTADO),
+            cache=MemoryCache(),
+            serie=SerieEstado(intervalo_minimo=0.0),
+            indicadores=IndicadoresTendencia(ventana=3)
+        )
+
+    def test_sin_estado(self):
+        """Sin estado en caché no hay indicadores."""
+        assert self._servicio().obtener_indicadores() is None
+
+    def test_tras_obtener_estado(self):
+        """Cada estado obtenido alimenta la tendencia."""
+        servicio = self._servicio()
+        servicio.obtener_estado()
+
+        indicadores = servicio.obtener_indicadores()
+
+        assert indicadores['tendencia']['muestras'] == 1
+        assert indicadores['diferencia']['estado'] == 'frio'
+
+    def test_muestras_descartadas_por_la_serie(self):
+        """Las muestras que la serie descarta tampoco entran en la tendencia."""
+        servicio = TermostatoService(
+            api_client=MockApiClient(ESTADO),
+            cache=MemoryCache(),
+            serie=SerieEstado(intervalo_minimo=3600.0)
+        )
+        servicio.obtener_estado()
+        servicio.obtener_estado()
+
+        assert servicio.obtener_indicadores()['tendencia']['muestras'] == 1
+
+    def test_temperaturas_no_numericas(self):
+        """Con temperaturas inválidas no se calculan indicadores."""
+        servicio = self._servicio({**ESTADO, 'temperatura_ambiente': 'Error'})
+        servicio.obtener_estado()
+
+        assert servicio.obtener_indicadores() is None
@@ -0,0 +1,132 @@
+"""
+Tests unitarios para el codec JSON intercambiable y su proveedor Flask.
+Los tests de codec se ejecutan con cada implementación disponible.
+"""
+from datetime import datetime
+
+import pytest
+from flask import jsonify
+
+from webapp import create_app
+from webapp.json_provider import CodecJSONProvider
+from webapp.services.json_codec import CODECS, StdlibJsonCodec, crear_codec
+
+ESTADO = {
+    'temperatura_ambiente': 22.5,
+    'temperatura_deseada': 24,
+    'estado_climatizador': 'calefacción',
+    'carga_bateria': 3.8,
+    'indicador': 'NORMAL',
+}
+
+
+@pytest.fixture(params=sorted(CODECS))
+def codec(request):
+    """Cada codec disponible en el entorno."""
+    return crear_codec(request.param)
+
+
+class TestJsonCodec:
+    """Tests comunes a todas las implementaciones de JsonCodec."""
+
+    def test_ida_y_vuelta(self, codec):
+        """dumps() seguido de loads() devuelve el objeto original."""
+        assert codec.loads(codec.dumps(ESTADO)) == ESTADO
+
+    def test_dumps_devuelve_bytes_utf8_compactos(self, codec):
+        """dumps() devuelve bytes UTF-8 sin espacios ni escapes ASCII."""
+        cuerpo = codec.dumps({'estado': 'calefacción', 'n': [1, 2]})
+
+        assert cuerpo == '{"estado":"calefacción","n":[1,2]}'.encode('utf-8')
+
+    def test_loads_acepta_str_y_bytes(self, codec):
+        """loads() decodifica tanto str como bytes."""
+        assert codec.loads('{"a": 1}') == codec.loads(b'{"a": 1}') == {'a': 1}
+
+    def test_sort_keys(self, codec):
+        """sort_keys=True ordena las claves."""
+        assert codec.dumps({'b': 1, 'a': 2}, sort_keys=True) == b'{"a":2,"b":1}'
+
+    def test_default_para_tipos_no_nativos(self, codec):
+        """Los tipos no serializables se delegan en default."""
+        cuerpo = codec.dumps({'s': {3}}, default=sorted)
+
+        assert codec.loads(cuerpo) == {'s': [3]}
+
+    def test_datetime_se_delega_en_default(self, codec):
+        """datetime pasa por default para respetar el formato del llamador."""
+        cuerpo = codec.dumps({'t': datetime(2026, 1, 1)}, default=lambda o: 'fecha')
+
+        assert codec.loads(cuerpo) == {'t': 'fecha'}
+
+    def test_entero_grande(self, codec):
+        """Enteros de más de 64 bits se serializan correctamente."""
+        assert codec.loads(codec.dumps({'n': 2 ** 70})) == {'n': 2 ** 70}
+
+    def test_loads_invalido_lanza_value_error(self, codec):
+        """Un documento inválido lanza ValueError."""
+        with pytest.raises(ValueError):
+            codec.loads(b'<html>')
+
+    def test_tipo_no_serializable_lanza_type_error(self, codec):
+        """Sin default, un tipo no serializable lanza TypeError."""
+        with pytest.raises(TypeError):
+            codec.dumps({'x': object()})
+
+
+class TestCrearCodec:
+    """Tests de crear_codec()."""
+
+    def test_por_defecto_elige_el_mas_rapido(self):
+        """Sin nombre se usa orjson si está instalado."""
+        esperado = 'orjson' if 'orjson' in CODECS else 'json'
+        assert crear_codec().nombre == esperado
+
+    def test_por_nombre(self):
+        """Con nombre se crea esa implementación."""
+        assert isinstance(crear_codec('json'), StdlibJsonCodec)
+
+    def test_codec_desconocido_lanza_value_error(self):
+        """Un codec no disponible lanza ValueError."""
+        with pytest.raises(ValueError):
+            crear_codec('simdjson')
+
+
+class TestCodecJSONProvider:
+    """Tests del proveedor JSON de Flask."""
+
+    @pytest.fixture
+    def app(self):
+        """App Flask de testing."""
+        return create_app('testing')
+
+    def test_create_app_instala_el_proveedor(self, app):
+        """create_app() reemplaza el proveedor JSON por CodecJSONProvider."""
+        assert isinstance(app.json, CodecJSONProvider)
+
+    def test_json_codec_configurable(self):
+        """JSON_CODEC fuerza la implementación del proveedor."""
+        app = create_app('testing')
+        app.config['JSON_CODEC'] = 'json'
+
+        assert CodecJSONProvider(app).codec.nombre == 'json'
+
+    def test_jsonify_usa_el_codec(self, app):
+        """jsonify() produce JSON compacto con salto de línea final."""
+        with app.app_context():
+            respuesta = jsonify(ESTADO)
+
+        assert respuesta.mimetype == 'application/json'
+        assert respuesta.data.endswith(b'}\n')
+        assert app.json.loads(respuesta.data) == ESTADO
+
+    def test_jsonify_conserva_formato_de_fecha_flask(self, app):
+        """Las fechas se serializan en formato HTTP como en DefaultJSONProvider."""
+        with app.app_context():
+            respuesta = jsonify({'t': datetime(2026, 1, 1, 10, 0, 0)})
+
+        assert respuesta.get_json() == {'t': 'Thu, 01 Jan 2026 10:00:00 GMT'}
+
+    def test_dumps_con_indent_delega_en_stdlib(self, app):
+        """kwargs no soportados por el codec se delegan en la librería estándar."""
+        assert app.json.dumps({'a': 1}, indent=2) == '{\n  "a": 1\n}'
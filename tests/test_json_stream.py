@@ -0,0 +1,132 @@
+"""
+Tests unitarios para el parser JSON incremental.
+Valida parsear_objeto() con el cuerpo partido en bloques arbitrarios.
+"""
+import json
+
+import pytest
+
+from webapp.services.json_stream import parsear_objeto
+
+HISTORIAL = {
+    'historial': [
+        {'timestamp': f'2026-01-01T10:{i:02d}:00', 'temperatura': 21.5 + i / 10}
+        for i in range(30)
+    ],
+    'total': 30,
+}
+
+
+def _bloques(datos, tamano):
+    """Serializar datos a JSON y partir los bytes en bloques de tamano."""
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+    return [cuerpo[i:i + tamano] for i in range(0, len(cuerpo), tamano)]
+
+
+class TestParsearObjeto:
+    """Tests de parsear_objeto()."""
+
+    @pytest.mark.parametrize('tamano', [1, 2, 7, 64, 100000])
+    def test_resultado_igual_a_json_loads(self, tamano):
+        """El resultado coincide con json.loads para cualquier tamaño de bloque."""
+        resultado = parsear_objeto(_bloques(HISTORIAL, tamano), 'historial')
+
+        assert resultado == HISTORIAL
+
+    def test_numero_partido_entre_bloques(self):
+        """Un número cortado al final de un bloque no se decodifica a medias."""
+        resultado = parsear_objeto([b'{"total": 14', b'40}'], 'historial')
+
+        assert resultado == {'total': 1440}
+
+    @pytest.mark.parametrize('cuerpo', [
+        b'{"historial": [-2.5, 1], "total": 2}',
+        b'{"historial": [1e5, 1.5E-3, -0.25e+2, 0], "total": 4}',
+        b'{"historial": [ 12 , 3.0 ], "total": 1e2 }',
+    ])
+    def test_numeros_partidos_en_cualquier_posicion(self, cuerpo):
+        """Con cualquier tamaño de bloque los números se decodifican enteros."""
+        esperado = json.loads(cuerpo)
+
+        for tamano in range(1, len(cuerpo) + 1):
+            bloques = [cuerpo[i:i + tamano] for i in range(0, len(cuerpo), tamano)]
+            assert parsear_objeto(bloques, 'historial') == esperado, tamano
+
+    def test_numero_cortado_tras_el_punto(self):
+        """'-2.' al final de un bloque continúa en el siguiente."""
+        resultado = parsear_objeto([b'{"historial": [-', b'2.', b'5, 1]}'], 'historial')
+
+        assert resultado == {'historial': [-2.5, 1]}
+
+    def test_utf8_multibyte_partido_entre_bloques(self):
+        """Caracteres multibyte partidos entre bloques se decodifican bien."""
+        datos = {'historial': [{'estado': 'calefacción'}], 'total': 1}
+
+        resultado = parsear_objeto(_bloques(datos, 1), 'historial')
+
+        assert resultado == datos
+
+    def test_limite_corta_la_lectura(self):
+        """Con limite se devuelven solo los primeros registros."""
+        resultado = parsear_objeto(_bloques(HISTORIAL, 16), 'historial', limite=5)
+
+        assert resultado['historial'] == HISTORIAL['historial'][:5]
+        assert 'total' not in resultado
+
+    def test_limite_no_consume_el_resto_del_flujo(self):
+        """Tras alcanzar limite no se piden más bloques al iterador."""
+        bloques = iter(_bloques(HISTORIAL, 32))
+
+        parsear_objeto(bloques, 'historial', limite=1)
+
+        assert next(bloques, None) is not None
+
+    def test_parar_corta_antes_del_registro(self):
+        """parar() corta la lectura sin incluir el registro que lo cumple."""
+        bloques = iter(_bloques(HISTORIAL, 32))
+
+        resultado = parsear_objeto(
+            bloques, 'historial', parar=lambda r: r['timestamp'] >= '2026-01-01T10:03:00'
+        )
+
+        assert resultado == {'historial': HISTORIAL['historial'][:3]}
+        assert next(bloques, None) is not None
+
+    def test_limite_cero_devuelve_lista_vacia(self):
+        """limite=0 devuelve un array vacío sin leer registros."""
+        resultado = parsear_objeto(_bloques(HISTORIAL, 64), 'historial', limite=0)
+
+        assert resultado == {'historial': []}
+
+    def test_claves_antes_del_array_se_conservan(self):
+        """Las claves previas al array aparecen aunque se corte la lectura."""
+        datos = {'total': 30, 'historial': HISTORIAL['historial']}
+
+        resultado = parsear_objeto(_bloques(datos, 10), 'historial', limite=2)
+
+        assert resultado['total'] == 30
+        assert len(resultado['historial']) == 2
+
+    def test_array_vacio_y_objeto_vacio(self):
+        """Arrays y objetos vacíos se parsean correctamente."""
+        assert parsear_objeto([b'{}'], 'historial') == {}
+        assert parsear_objeto([b'{"historial": [ ]}'], 'historial') == {'historial': []}
+
+    def test_registros_comparten_claves(self):
+        """Las claves de los registros son la misma instancia de str."""
+        resultado = parsear_objeto(_bloques(HISTORIAL, 50), 'historial')
+
+        claves = [next(iter(registro)) for registro in resultado['historial']]
+        assert all(clave is claves[0] for clave in claves)
+
+    def test_cuerpo_truncado_lanza_error(self):
+        """Un cuerpo incompleto lanza JSONDecodeError."""
+        cuerpo = json.dumps(HISTORIAL).encode('utf-8')[:-20]
+
+        with pytest.raises(json.JSONDecodeError):
+            parsear_objeto([cuerpo], 'historial')
+
+    def test_cuerpo_invalido_lanza_error(self):
+        """Un cuerpo que no es un objeto JSON lanza JSONDecodeError."""
+        with pytest.raises(json.JSONDecodeError):
+            parsear_objeto([b'<html>error</html>'], 'historial')
@@ -0,0 +1,103 @@
+"""
+Tests unitarios para VentanaLatencias.
+"""
+import pytest
+
+from webapp.services.latencias import TimeoutAdaptativo, VentanaLatencias, clave_endpoint
+
+
+class TestClaveEndpoint:
+    """Tests de clave_endpoint()."""
+
+    def test_descarta_query_string(self):
+        """La query string no forma parte del endpoint."""
+        assert clave_endpoint('/termostato/historial/?limite=60') == '/termostato/historial/'
+
+    def test_path_sin_query_no_cambia(self):
+        """Un path sin query se devuelve tal cual."""
+        assert clave_endpoint('/termostato/') == '/termostato/'
+
+
+class TestVentanaLatencias:
+    """Tests de registro y percentiles."""
+
+    def test_percentil_sin_muestras_es_none(self):
+        """Sin muestras no hay percentil."""
+        assert VentanaLatencias().percentil('/termostato/', 0.95) is None
+
+    def test_percentil_exige_min_muestras(self):
+        """Con menos de min_muestras el percentil es None."""
+        ventana = VentanaLatencias()
+        ventana.registrar('/termostato/', 0.1)
+
+        assert ventana.percentil('/termostato/', 0.5, min_muestras=2) is None
+
+    def test_percentil_rango_mas_cercano(self):
+        """El percentil usa el método de rango más cercano."""
+        ventana = VentanaLatencias()
+        for ms in range(1, 101):
+            ventana.registrar('/termostato/', ms / 1000)
+
+        assert ventana.percentil('/termostato/', 0.95) == 0.095
+        assert ventana.percentil('/termostato/', 0.5) == 0.05
+        assert ventana.percentil('/termostato/', 1.0) == 0.1
+
+    def test_endpoints_independientes_y_sin_query(self):
+        """Cada endpoint tiene su ventana; la query no separa ventanas."""
+        ventana = VentanaLatencias()
+        ventana.registrar('/termostato/historial/?limite=60', 1.0)
+        ventana.registrar('/termostato/historial/?limite=1440', 2.0)
+        ventana.registrar('/comprueba/', 0.01)
+
+        assert ventana.cantidad('/termostato/historial/') == 2
+        assert ventana.cantidad('/comprueba/') == 1
+
+    def test_ventana_descarta_muestras_antiguas(self):
+        """Solo se conservan las últimas tamano muestras."""
+        ventana = VentanaLatencias(tamano=3)
+        for segundos in (10.0, 1.0, 2.0, 3.0):
+            ventana.registrar('/termostato/', segundos)
+
+        assert ventana.cantidad('/termostato/') == 3
+        assert ventana.percentil('/termostato/', 1.0) == 3.0
+
+
+class TestTimeoutAdaptativo:
+    """Tests de la política de timeouts adaptativos."""
+
+    def _politica_con_muestras(self, segundos, cantidad=20, **kwargs):
+        politica = TimeoutAdaptativo(min_muestras=cantidad, **kwargs)
+        for _ in range(cantidad):
+            politica.registrar('/termostato/', segundos)
+        return politica
+
+    def test_sin_muestras_usa_el_maximo(self):
+        """Sin historial suficiente se usa el timeout máximo."""
+        assert TimeoutAdaptativo().timeout('/termostato/', 5) == 5
+
+    def test_percentil_por_factor(self):
+        """Con muestras, el timeout es percentil x factor."""
+        politica = self._politica_con_muestras(0.2, factor=3.0)
+
+        assert politica.timeout('/termostato/', 5) == pytest.approx(0.6)
+
+    def test_acotado_por_el_minimo(self):
+        """Un backend muy rápido no baja el timeout del mínimo."""
+        politica = self._politica_con_muestras(0.01, minimo=0.5)
+
+        assert politica.timeout('/termostato/', 5) == 0.5
+
+    def test_acotado_por_el_maximo(self):
+        """Un backend lento no sube el timeout por encima del máximo."""
+        politica = self._politica_con_muestras(4.0)
+
+        assert politica.timeout('/termostato/', 5) == 5
+
+    def test_por_endpoint(self):
+        """Cada endpoint tiene su propio timeout."""
+        politica = self._politica_con_muestras(0.08)
+        for _ in range(20):
+            politica.registrar('/termostato/historial/?limite=1440', 2.0)
+
+        assert politica.timeout('/termostato/', 10) == 0.5
+        assert politica.timeout('/termostato/historial/?limite=60', 10) == 6.0
@@ -0,0 +1,204 @@
+"""
+Tests unitarios para LimitadorApiClient y CuboTokens.
+"""
+import threading
+import time
+
+import pytest
+
+from webapp import create_app
+from webapp.config import ProductionConfig
+from webapp.services.api_client import ApiError, ApiSaturadaError, MockApiClient
+from webapp.services.limitador import CuboTokens, LimitadorApiClient
+
+
+class ApiClientLento:
+    """ApiClient falso que tarda un tiempo fijo y cuenta la concurrencia máxima."""
+
+    def __init__(self, retardo):
+        self._retardo = retardo
+        self._lock = threading.Lock()
+        self._en_vuelo = 0
+        self.max_en_vuelo = 0
+
+    def get(self, path, **kwargs):
+        with self._lock:
+            self._en_vuelo += 1
+            self.max_en_vuelo = max(self.max_en_vuelo, self._en_vuelo)
+        time.sleep(self._retardo)
+        with self._lock:
+            self._en_vuelo -= 1
+        return {'ok': True}
+
+
+def _en_paralelo(funcion, cantidad):
+    """Ejecutar funcion en cantidad threads y devolver resultados o excepciones."""
+    resultados = []
+    lock = threading.Lock()
+
+    def ejecutar():
+        try:
+            resultado = funcion()
+        except ApiError as exc:  # pylint: disable=broad-except
+            resultado = exc
+        with lock:
+            resultados.append(resultado)
+
+    hilos = [threading.Thread(target=ejecutar) for _ in range(cantidad)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+
+class TestCuboTokens:
+    """Tests del token bucket."""
+
+    def test_rafaga_inicial_sin_espera(self):
+        """Mientras haya tokens la reserva no espera."""
+        cubo = CuboTokens(tasa=10, capacidad=3)
+
+        assert [cubo.reservar(0) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    def test_sin_tokens_rechaza_si_no_puede_esperar(self):
+        """Con el cubo vacío y espera 0 se rechaza."""
+        cubo = CuboTokens(tasa=10, capacidad=1)
+        cubo.reservar(0)
+
+        assert cubo.reservar(0) is None
+
+    def test_reserva_en_orden_de_llegada(self):
+        """Las reservas sucesivas esperan turnos crecientes de 1/tasa."""
+        cubo = CuboTokens(tasa=10, capacidad=1)
+        cubo.reservar(0)
+
+        primera = cubo.reservar(1.0)
+        segunda = cubo.reservar(1.0)
+
+        assert primera == pytest.approx(0.1, abs=0.01)
+        assert segunda == pytest.approx(0.2, abs=0.01)
+
+    def test_devolver_repone_el_token_hasta_la_capacidad(self):
+        """Un token devuelto vuelve a estar disponible, sin superar la capacidad."""
+        cubo = CuboTokens(tasa=0.1, capacidad=1)
+        cubo.reservar(0)
+        cubo.devolver()
+        cubo.devolver()
+
+        assert cubo.reservar(0) == 0.0
+        assert cubo.reservar(0) is None
+
+
+class TestLimitadorApiClient:
+    """Tests del decorador limitador."""
+
+    def test_delega_en_el_cliente(self):
+        """Dentro de los límites devuelve la respuesta del cliente decorado."""
+        limitador = LimitadorApiClient(MockApiClient({'temperatura_ambiente': 22}))
+
+        assert limitador.get('/termostato/') == {'temperatura_ambiente': 22}
+
+    def test_acota_peticiones_en_vuelo(self):
+        """Nunca hay más de max_en_vuelo peticiones simultáneas."""
+        cliente = ApiClientLento(0.05)
+        limitador = LimitadorApiClient(cliente, max_en_vuelo=2, qps=1000, espera_maxima=5)
+
+        resultados = _en_paralelo(lambda: limitador.get('/termostato/'), 6)
+
+        assert all(r == {'ok': True} for r in resultados)
+        assert cliente.max_en_vuelo == 2
+        assert limitador.metricas()['max_en_vuelo_observado'] == 2
+
+    def test_rechaza_si_la_cola_supera_la_espera_maxima(self):
+        """Sin turno de concurrencia dentro de espera_maxima se lanza ApiSaturadaError."""
+        limitador = LimitadorApiClient(ApiClientLento(0.2), max_en_vuelo=1, qps=1000, espera_maxima=0.01)
+
+        resultados = _en_paralelo(lambda: limitador.get('/termostato/'), 3)
+
+        rechazos = [r for r in resultados if isinstance(r, ApiSaturadaError)]
+        assert len(rechazos) == 2
+        assert limitador.metricas()['endpoints']['/termostato/']['rechazadas_concurrencia'] == 2
+
+    def test_rechazo_por_concurrencia_no_consume_cuota(self):
+        """El token de una petición rechazada en cola se devuelve al cubo."""
+        limitador = LimitadorApiClient(MockApiClient({}), max_en_vuelo=1, qps=0.01, espera_maxima=0)
+        limitador._semaforo.acquire()
+        with pytest.raises(ApiSaturadaError):
+            limitador.get('/termostato/')
+        limitador._semaforo.release()
+
+        assert limitador.get('/termostato/') == {}
+
+    def test_rechaza_al_agotar_la_cuota_por_endpoint(self):
+        """Superar el QPS del endpoint sin margen de espera se rechaza."""
+        limitador = LimitadorApiClient(MockApiClient({}), qps=1, espera_maxima=0)
+
+        limitador.get('/termostato/')
+        with pytest.raises(ApiSaturadaError):
+            limitador.get('/termostato/')
+
+        assert limitador.metricas()['endpoints']['/termostato/']['rechazadas_qps'] == 1
+
+    def test_cuota_independiente_por_endpoint(self):
+        """Cada endpoint tiene su propio token bucket."""
+        limitador = LimitadorApiClient(MockApiClient({}), qps=1, espera_maxima=0)
+
+        limitador.get('/termostato/')
+        limitador.get('/termostato/historial/?limite=60')
+        limitador.get('/comprueba/')
+
+    def test_qps_especifico_por_endpoint(self):
+        """qps_por_endpoint reemplaza el límite por defecto."""
+        limitador = LimitadorApiClient(
+            MockApiClient({}), qps=1, qps_por_endpoint={'/termostato/': 3}, espera_maxima=0
+        )
+
+        for _ in range(3):
+            limitador.get('/termostato/')
+
+    def test_espera_en_cola_y_registra_metricas(self):
+        """Una petición que espera turno se admite y su espera queda registrada."""
+        limitador = LimitadorApiClient(MockApiClient({}), qps=4, espera_maxima=1)
+        for _ in range(4):  # agotar la ráfaga
+            limitador.get('/termostato/')
+
+        limitador.get('/termostato/')
+
+        metricas = limitador.metricas()['endpoints']['/termostato/']
+        assert metricas['admitidas'] == 5
+        # Un token cada 250 ms: holgura para la recarga durante el bucle
+        assert metricas['espera_max_ms'] >= 100
+
+    def test_deadline_acota_la_espera(self):
+        """Un deadline cercano reduce la espera máxima en cola."""
+        limitador = LimitadorApiClient(MockApiClient({}), qps=1, espera_maxima=5)
+        limitador.get('/termostato/')
+
+        with pytest.raises(ApiSaturadaError):
+            limitador.get('/termostato/', deadline=time.monotonic() + 0.05)
+
+    def test_precalentar_delega_sin_consumir_cupo(self):
+        """precalentar() llega al cliente decorado sin pasar por el limitador."""
+        cliente = MockApiClient({})
+        cliente.precalentar = lambda conexiones: conexiones
+        limitador = LimitadorApiClient(cliente, qps=1)
+
+        assert limitador.precalentar(3) == 3
+        assert limitador.metricas()['endpoints'] == {}
+
+    def test_saturada_es_api_error(self):
+        """ApiSaturadaError es subclase de ApiError (activa el fallback a caché)."""
+        assert issubclass(ApiSaturadaError, ApiError)
+
+
+class TestCreateAppLimitador:
+    """Tests de la integración con create_app()."""
+
+    def test_api_limitador_decora_el_cliente(self, monkeypatch):
+        """Con API_LIMITADOR activo el servicio usa LimitadorApiClient."""
+        monkeypatch.setattr(ProductionConfig, 'API_LIMITADOR', True)
+
+        app = create_app('production')
+
+        assert isinstance(app.termostato_service._api_client, LimitadorApiClient)
@@ -0,0 +1,128 @@
+"""
+Tests unitarios para MetricasApi y su registro desde RequestsApiClient.
+"""
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from webapp import create_app
+from webapp.services.api_client import ApiConnectionError, ApiError, RequestsApiClient
+from webapp.services.metricas import MetricasApi
+
+
+@pytest.fixture(name='metricas')
+def fixture_metricas():
+    """MetricasApi con tres buckets de latencia: 10 ms, 100 ms y 1 s."""
+    return MetricasApi(limites=(0.01, 0.1, 1.0))
+
+
+class TestMetricasApi:
+    """Tests de la acumulación y la instantánea."""
+
+    def test_agrega_por_endpoint_sin_query(self, metricas):
+        """Las peticiones se agregan por path sin query string."""
+        metricas.registrar('/termostato/historial/?limite=60', 0.05, estado=200)
+        metricas.registrar('/termostato/historial/?limite=1440', 0.05, estado=200)
+        endpoints = metricas.instantanea()['endpoints']
+        assert list(endpoints) == ['/termostato/historial/']
+        assert endpoints['/termostato/historial/']['peticiones'] == 2
+
+    def test_histograma_de_latencia(self, metricas):
+        """Cada latencia cae en su bucket y los percentiles salen del histograma."""
+        for latencia in (0.005, 0.01, 0.05, 0.5, 3.0):
+            metricas.registrar('/termostato/', latencia)
+        latencia_ms = metricas.instantanea()['endpoints']['/termostato/']['latencia_ms']
+        assert latencia_ms['buckets'] == {'10': 2, '100': 1, '1000': 1, '+Inf': 1}
+        assert latencia_ms['max'] == 3000.0
+        assert latencia_ms['p50'] == 100.0
+        assert latencia_ms['p99'] is None
+
+    def test_estados_bytes_decodificacion_y_excepciones(self, metricas):
+        """Se acumulan códigos de estado, bytes, decodificación y excepciones."""
+        metricas.registrar('/termostato/', 0.02, estado=200, bytes_recibidos=100, decodificacion=0.001)
+        metricas.registrar('/termostato/', 0.02, estado=200, bytes_recibidos=50, decodificacion=0.003)
+        metricas.registrar('/termostato/', 0.02, estado=503, excepcion='ApiError')
+        metricas.registrar('/termostato/', 5.0, excepcion='ApiTimeoutError')
+        resumen = metricas.instantanea()['endpoints']['/termostato/']
+        assert resumen['estados'] == {'200': 2, '503': 1}
+        assert resumen['bytes_recibidos'] == 150
+        assert resumen['decodificacion_media_ms'] == 2.0
+        assert resumen['excepciones'] == {'ApiError': 1, 'ApiTimeoutError': 1}
+
+    def test_incluye_fuentes_agregadas(self, metricas):
+        """La instantánea incluye las métricas de las fuentes agregadas."""
+        metricas.agregar_fuente('limitador', lambda: {'en_vuelo': 0})
+        assert metricas.instantanea()['limitador'] == {'en_vuelo': 0}
+
+    def test_reiniciar(self, metricas):
+        """reiniciar vacía los contadores."""
+        metricas.registrar('/termostato/', 0.01)
+        metricas.reiniciar()
+        assert metricas.instantanea()['endpoints'] == {}
+
+
+class TestRequestsApiClientMetricas:
+    """Tests del registro de métricas desde el cliente HTTP."""
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_registra_peticion_exitosa(self, mock_get, metricas):
+        """Una respuesta 200 registra su estado y los bytes recibidos."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = b'{"a": 1}'
+        mock_response.raw.tell.return_value = 42
+        mock_get.return_value = mock_response
+        RequestsApiClient('http://localhost:5050', metricas=metricas).get('/termostato/')
+
+        resumen = metricas.instantanea()['endpoints']['/termostato/']
+        assert resumen['peticiones'] == 1
+        assert resumen['estados'] == {'200': 1}
+        assert resumen['bytes_recibidos'] == 42
+        assert resumen['excepciones'] == {}
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_registra_error_http_con_su_estado(self, mock_get, metricas):
+        """Un error HTTP registra su código y la excepción."""
+        mock_response = Mock()
+        mock_response.status_code = 500
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError('500')
+        mock_get.return_value = mock_response
+        with pytest.raises(ApiError):
+            RequestsApiClient('http://localhost:5050', metricas=metricas).get('/termostato/')
+
+        resumen = metricas.instantanea()['endpoints']['/termostato/']
+        assert resumen['estados'] == {'500': 1}
+        assert resumen['excepciones'] == {'ApiError': 1}
+
+    @patch('webapp.services.api_client.requests.Session.get')
+    def test_registra_error_de_conexion_sin_estado(self, mock_get, metricas):
+        """Un error de conexión registra la excepción sin código de estado."""
+        mock_get.side_effect = requests.exceptions.ConnectionError()
+        with pytest.raises(ApiConnectionError):
+            RequestsApiClient('http://localhost:5050', metricas=metricas).get('/comprueba/')
+
+        resumen = metricas.instantanea()['endpoints']['/comprueba/']
+        assert resumen['estados'] == {}
+        assert resumen['excepciones'] == {'ApiConnectionError': 1}
+
+
+class TestRutaMetricas:
+    """Tests de GET /api/metricas."""
+
+    def test_devuelve_metricas(self):
+        """/api/metricas devuelve la instantánea de las métricas."""
+        app = create_app('testing')
+        app.metricas_api.registrar('/termostato/', 0.01, estado=200)
+        respuesta = app.test_client().get('/api/metricas')
+        assert respuesta.status_code == 200
+        datos = respuesta.get_json()
+        assert datos['success'] is True
+        assert datos['endpoints']['/termostato/']['peticiones'] == 1
+
+    def test_metricas_desactivadas(self):
+        """Sin métricas configuradas /api/metricas devuelve 404."""
+        app = create_app('testing')
+        app.metricas_api = None
+        respuesta = app.test_client().get('/api/metricas')
+        assert respuesta.status_code == 404
@@ -0,0 +1,167 @@
+"""
+Tests unitarios para Poller y el modo poller de TermostatoService.
+"""
+import threading
+import time
+
+import pytest
+
+from webapp import create_app
+from webapp.cache.memory_cache import MemoryCache
+from webapp.config import ProductionConfig
+from webapp.services.api_client import ApiConnectionError, MockApiClient
+from webapp.services.poller import Poller
+from webapp.services.termostato_service import TermostatoService
+
+DATOS_ESTADO = {'temperatura_ambiente': 22, 'temperatura_deseada': 24}
+
+
+def _esperar(condicion, timeout=2.0):
+    """Esperar hasta que condicion() sea verdadera o venza el timeout."""
+    fin = time.monotonic() + timeout
+    while not condicion():
+        if time.monotonic() > fin:
+            raise AssertionError('Condición no alcanzada')
+        time.sleep(0.01)
+
+
+class TestPoller:
+    """Tests del thread de ejecución periódica."""
+
+    def test_primera_ejecucion_inmediata_y_periodica(self):
+        """Ejecuta la tarea al arrancar y luego cada intervalo."""
+        llamadas = []
+        poller = Poller(lambda: llamadas.append(time.monotonic()), intervalo=0.05).iniciar()
+        try:
+            _esperar(lambda: len(llamadas) >= 4)
+        finally:
+            poller.detener()
+        assert llamadas[3] - llamadas[0] >= 0.14
+
+    def test_detener_para_el_thread(self):
+        """Tras detener() el thread termina y no hay más ejecuciones."""
+        poller = Poller(lambda: None, intervalo=0.01).iniciar()
+        poller.detener()
+        ejecuciones = poller.ejecuciones
+
+        time.sleep(0.05)
+
+        assert not poller.activo
+        assert poller.ejecuciones == ejecuciones
+
+    def test_excepcion_no_mata_el_thread(self):
+        """Un fallo de la tarea se cuenta y el poller sigue."""
+        def tarea():
+            raise RuntimeError('fallo')
+
+        poller = Poller(tarea, intervalo=0.01).iniciar()
+        try:
+            _esperar(lambda: poller.errores >= 3)
+            assert poller.activo
+        finally:
+            poller.detener()
+
+    def test_nombre_del_thread(self):
+        """El thread lleva el nombre indicado."""
+        evento = threading.Event()
+        nombres = []
+
+        def tarea():
+            nombres.append(threading.current_thread().name)
+            evento.set()
+
+        poller = Poller(tarea, intervalo=1, nombre='poller-test').iniciar()
+        evento.wait(1)
+        poller.detener()
+        assert nombres == ['poller-test']
+
+
+class TestServicioConPoller:
+    """Tests de obtener_estado() con el poller activo."""
+
+    @pytest.fixture
+    def api_client(self):
+        return MockApiClient(DATOS_ESTADO)
+
+    @pytest.fixture
+    def servicio(self, api_client):
+        servicio = TermostatoService(api_client, MemoryCache())
+        yield servicio
+        servicio.detener_poller()
+
+    def test_obtener_estado_no_consulta_al_backend(self, servicio, api_client):
+        """Con el poller activo, las lecturas solo usan la caché."""
+        servicio.iniciar_poller(intervalo=60)
+        _esperar(lambda: servicio._cache.get('estado') is not None)
+
+        for _ in range(100):
+            datos, timestamp, from_cache = servicio.obtener_estado()
+
+        assert api_client.call_count == 1
+        assert datos == DATOS_ESTADO
+        assert timestamp is not None
+        assert from_cache is False
+
+    def test_from_cache_si_el_ultimo_refresco_fallo(self, servicio, api_client):
+        """Si el backend cae, se sirve el último estado marcado como caché."""
+        servicio.iniciar_poller(intervalo=0.02)
+        _esperar(lambda: api_client.call_count >= 1)
+        api_client.raise_error = ApiConnectionError
+        llamadas = api_client.call_count
+        _esperar(lambda: api_client.call_count > llamadas + 1)
+
+        datos, _, from_cache = servicio.obtener_estado()
+
+        assert datos == DATOS_ESTADO
+        assert from_cache is True
+
+    def test_sin_datos_si_el_backend_nunca_respondio(self, api_client):
+        """Sin ningún refresco exitoso no hay datos que servir."""
+        api_client.raise_error = ApiConnectionError
+        servicio = TermostatoService(api_client, MemoryCache())
+        servicio.iniciar_poller(intervalo=60)
+        try:
+            _esperar(lambda: api_client.call_count == 1)
+            assert servicio.obtener_estado() == (None, None, False)
+        finally:
+            servicio.detener_poller()
+
+    def test_backend_caido_cuenta_como_error(self, api_client):
+        """Cada refresco fallido cuenta en errores aunque no lance excepción."""
+        api_client.raise_error = ApiConnectionError
+        servicio = TermostatoService(api_client, MemoryCache())
+        poller = servicio.iniciar_poller(intervalo=0.02)
+        try:
+            _esperar(lambda: poller.ejecuciones >= 3)
+        finally:
+            servicio.detener_poller()
+
+        metricas = poller.metricas()
+        assert metricas['errores'] == metricas['ejecuciones'] >= 3
+
+    def test_detener_poller_vuelve_a_consultar_por_peticion(self, servicio, api_client):
+        """Sin poller, cada obtener_estado() vuelve a ir al backend."""
+        servicio.iniciar_poller(intervalo=60)
+        _esperar(lambda: api_client.call_count == 1)
+        servicio.detener_poller()
+
+        servicio.obtener_estado()
+
+        assert api_client.call_count == 2
+
+
+class TestCreateAppPoller:
+    """Tests de la integración con create_app()."""
+
+    def test_api_poller_arranca_el_poller(self, monkeypatch):
+        """Con API_POLLER activo el servicio refresca en segundo plano."""
+        monkeypatch.setattr(ProductionConfig, 'API_POLLER', True)
+        monkeypatch.setattr(ProductionConfig, 'API_SIMULADO', True)
+
+        app = create_app('production')
+        servicio = app.termostato_service
+        try:
+            assert servicio._poller.activo
+            assert app.metricas_api.instantanea()['poller']['intervalo'] == ProductionConfig.API_POLLER_INTERVALO
+        finally:
+            servicio.detener_poller()
@@ -0,0 +1,291 @@
+"""
+Tests unitarios para RegistroDisco y su uso desde TermostatoService.
+"""
+import random
+import time
+
+import pytest
+
+from webapp import create_app
+from webapp.cache.memory_cache import MemoryCache
+from webapp.config import TestingConfig
+from webapp.services.api_client import ApiConnectionError, MockApiClient
+from webapp.services.registro_disco import DTYPE_REGISTRO, RegistroDisco
+from webapp.services.rollups import NIVELES, RollupsTemperatura
+from webapp.services.termostato_service import TermostatoService
+
+ESTADO = {
+    'temperatura_ambiente': 22.5,
+    'temperatura_deseada': 24,
+    'carga_bateria': 3.8,
+    'estado_climatizador': 'calentando',
+}
+
+# 2026-01-01T00:00:00 UTC
+INICIO = 1767225600
+
+
+def _registro(ruta, cantidad, intervalo=60.0, inicio=INICIO):
+    """Registro con `cantidad` muestras por minuto y temperatura = 20 + i."""
+    registro = RegistroDisco(str(ruta), intervalo=intervalo)
+    for i in range(cantidad):
+        registro.agregar(inicio + 60 * i + 0.25, {**ESTADO, 'temperatura_ambiente': 20.0 + i})
+    return registro
+
+
+def _registro_reciente(ruta, cantidad):
+    """Registro cuya última muestra es de hace un segundo; devuelve (registro, inicio)."""
+    inicio = int(time.time()) - 60 * (cantidad - 1) - 1
+    return _registro(ruta, cantidad, inicio=inicio), inicio
+
+
+@pytest.fixture(autouse=True)
+def _utc(zona_horaria):
+    """Las horas esperadas están en UTC, que es también la hora de reloj."""
+    zona_horaria('UTC')
+
+
+class TestRegistroDisco:
+    """Tests del log append-only y su lectura con mmap."""
+
+    def test_registros_de_ancho_fijo(self, tmp_path):
+        """Cabecera de 16 bytes y 24 bytes por registro."""
+        ruta = tmp_path / 'estado.log'
+        _registro(ruta, 3).cerrar()
+
+        assert DTYPE_REGISTRO.itemsize == 24
+        assert ruta.stat().st_size == 16 + 3 * 24
+
+    def test_leer_columnas(self, tmp_path):
+        """leer devuelve los últimos registros en orden cronológico."""
+        columnas = _registro(tmp_path / 'estado.log', 5).leer(limite=2)
+
+        assert columnas['instante'].tolist() == [INICIO + 180.25, INICIO + 240.25]
+        assert columnas['temperatura_ambiente'].tolist() == [23.0, 24.0]
+        assert columnas['climatizador'].tolist() == [3, 3]
+
+    def test_descarta_muestras_antes_del_intervalo(self, tmp_path):
+        """Las muestras más cercanas que intervalo a la última se descartan."""
+        registro = RegistroDisco(str(tmp_path / 'estado.log'), intervalo=60.0)
+
+        assert registro.agregar(INICIO, ESTADO) is True
+        assert registro.agregar(INICIO + 30, ESTADO) is False
+        assert len(registro) == 1
+
+    def test_sobrevive_al_reinicio(self, tmp_path):
+        """Al reabrir se conservan las muestras y el intervalo con la última."""
+        ruta = tmp_path / 'estado.log'
+        _registro(ruta, 3).cerrar()
+
+        registro = RegistroDisco(str(ruta))
+
+        assert len(registro) == 3
+        assert registro.agregar(INICIO + 150, ESTADO) is False
+        assert registro.agregar(INICIO + 181, ESTADO) is True
+        assert len(registro.leer()['instante']) == 4
+
+    def test_trunca_registro_incompleto(self, tmp_path):
+        """Un registro a medias (caída durante la escritura) se descarta."""
+        ruta = tmp_path / 'estado.log'
+        _registro(ruta, 2).cerrar()
+        with open(ruta, 'ab') as fichero:
+            fichero.write(b'\x00' * 10)
+
+        registro = RegistroDisco(str(ruta))
+
+        assert len(registro) == 2
+        assert ruta.stat().st_size == 16 + 2 * 24
+
+    def test_fichero_no_valido(self, tmp_path):
+        """Un fichero que no es un registro de estado se rechaza."""
+        ruta = tmp_path / 'otro.bin'
+        ruta.write_bytes(b'no es un registro de estado')
+
+        with pytest.raises(ValueError):
+            RegistroDisco(str(ruta))
+
+    def test_columnas_del_historial(self, tmp_path):
+        """columnas devuelve timestamps en epoch ms y temperaturas en orden cronológico."""
+        columnas, cursor = _registro(tmp_path / 'estado.log', 3).columnas(2)
+
+        assert columnas['timestamps'].tolist() == [(INICIO + 60) * 1000, (INICIO + 120) * 1000]
+        assert columnas['temperaturas'].tolist() == [21.0, 22.0]
+        assert cursor == (INICIO + 120) * 1000
+
+    def test_columnas_desde_cursor(self, tmp_path):
+        """Con desde solo se devuelven los registros posteriores al cursor."""
+        registro = _registro(tmp_path / 'estado.log', 4)
+
+        columnas, cursor = registro.columnas(10, desde=(INICIO + 60) * 1000)
+        assert columnas['temperaturas'].tolist() == [22.0, 23.0]
+        assert cursor == (INICIO + 180) * 1000
+
+        columnas, siguiente = registro.columnas(10, desde=cursor)
+        assert len(columnas['timestamps']) == 0
+        assert siguiente == cursor
+
+    def test_columnas_en_hora_de_reloj(self, tmp_path, zona_horaria):
+        """Timestamps y cursor siguen la convención del backend: hora de reloj sin zona."""
+        zona_horaria('Europe/Madrid')
+        registro = _registro(tmp_path / 'estado.log', 3)
+
+        columnas, cursor = registro.columnas(2)
+        assert columnas['timestamps'].tolist() == [(INICIO + 3660) * 1000, (INICIO + 3720) * 1000]
+
+        columnas, _ = registro.columnas(10, desde=cursor - 60_000)
+        assert columnas['temperaturas'].tolist() == [22.0]
+
+    def test_registro_vacio(self, tmp_path):
+        """Un registro sin muestras devuelve columnas vacías y sin cursor."""
+        registro = RegistroDisco(str(tmp_path / 'estado.log'))
+
+        columnas, cursor = registro.columnas(60)
+
+        assert len(registro.leer()['instante']) == 0
+        assert len(columnas['timestamps']) == 0
+        assert cursor is None
+        assert registro.cubre(3600) is False
+
+    def test_cubre_segun_el_tiempo(self, tmp_path):
+        """cubre mira los huecos entre muestras, desde el inicio del rango hasta ahora."""
+        registro = _registro(tmp_path / 'estado.log', 5)
+        ahora = INICIO + 240.25
+
+        assert registro.cubre(300, ahora=ahora) is True
+        assert registro.cubre(360, ahora=ahora) is True
+        assert registro.cubre(400, ahora=ahora) is False
+        assert registro.cubre(300, ahora=ahora + 120) is True
+        assert registro.cubre(300, ahora=ahora + 121) is False
+
+    def test_cubre_con_separacion_irregular(self, tmp_path):
+        """Con un poller cada 5 s y jitter, las muestras guardadas cubren 1 y 6 horas."""
+        azar = random.Random(0)
+        registro = RegistroDisco(str(tmp_path / 'estado.log'))
+        instante = INICIO
+        while instante < INICIO + 8 * 3600:
+            registro.agregar(instante, ESTADO)
+            instante += 5 + azar.uniform(-1, 1.5)
+
+        assert len(registro) < 8 * 60
+        assert registro.cubre(3600, ahora=instante) is True
+        assert registro.cubre(6 * 3600, ahora=instante) is True
+
+    def test_no_cubre_tras_una_parada(self, tmp_path):
+        """Un hueco entre reinicios deja el rango sin cubrir."""
+        registro = _registro(tmp_path / 'estado.log', 3)
+        registro.agregar(INICIO + 86400, ESTADO)
+
+        assert registro.cubre(180, ahora=INICIO + 86400) is False
+        assert registro.cubre(60, ahora=INICIO + 86400) is True
+
+    def test_columnas_desde_inicio(self, tmp_path):
+        """Con inicio solo se devuelven los registros del rango."""
+        columnas, _ = _registro(tmp_path / 'estado.log', 5).columnas(10, inicio=INICIO + 120)
+
+        assert columnas['temperaturas'].tolist() == [22.0, 23.0, 24.0]
+
+
+class TestServicioRegistro:
+    """Tests del historial servido desde el registro en disco."""
+
+    def test_cada_estado_obtenido_se_registra(self, tmp_path):
+        """refrescar_estado añade la muestra al registro."""
+        registro = RegistroDisco(str(tmp_path / 'estado.log'))
+        servicio = TermostatoService(api_client=MockApiClient(ESTADO), cache=MemoryCache(), registro=registro)
+
+        servicio.obtener_estado()
+
+        assert len(registro) == 1
+
+    def test_historial_sin_llamar_al_backend(self, tmp_path):
+        """Con suficientes muestras en disco el backend no se consulta."""
+        registro, inicio = _registro_reciente(tmp_path / 'estado.log', 5)
+        servicio = TermostatoService(
+            api_client=MockApiClient({}, raise_error=ApiConnectionError),
+            cache=MemoryCache(),
+            registro=registro
+        )
+
+        datos = servicio.obtener_historial(limite=5)
+
+        assert servicio._api_client.call_count == 0
+        assert datos['total'] == 5
+        assert datos['historial'][0]['temperatura'] == 24.0
+        assert datos['cursor'] == (inicio + 240) * 1000
+
+    def test_historial_en_columnas_desde_el_registro(self, tmp_path):
+        """Con columnas=True se devuelven los arrays del registro, sin registros intermedios."""
+        registro, inicio = _registro_reciente(tmp_path / 'estado.log', 5)
+        servicio = TermostatoService(
+            api_client=MockApiClient({}, raise_error=ApiConnectionError),
+            cache=MemoryCache(),
+            registro=registro,
+            # Rollups de un bucket por nivel: nunca cubren el rango
+            rollups=RollupsTemperatura({nombre: 1 for nombre, _, _ in NIVELES})
+        )
+
+        datos = servicio.obtener_historial(limite=3, columnas=True)
+
+        assert servicio._api_client.call_count == 0
+        assert datos['columnas']['timestamps'].tolist() == [(inicio + 60 * i) * 1000 for i in (2, 3, 4)]
+        assert datos['columnas']['temperaturas'].tolist() == [22.0, 23.0, 24.0]
+        assert datos['total'] == 3
+
+    def test_historial_con_separacion_irregular(self, tmp_path):
+        """Muestras guardadas cada 60-66 s sirven la última hora sin llamar al backend."""
+        azar = random.Random(0)
+        ahora = time.time()
+        registro = RegistroDisco(str(tmp_path / 'estado.log'))
+        instante = ahora - 2 * 3600
+        while instante < ahora:
+            registro.agregar(instante, ESTADO)
+            instante += 60 + azar.uniform(0, 6)
+        servicio = TermostatoService(
+            api_client=MockApiClient({}, raise_error=ApiConnectionError),
+            cache=MemoryCache(),
+            registro=registro,
+            rollups=RollupsTemperatura({nombre: 1 for nombre, _, _ in NIVELES})
+        )
+
+        datos = servicio.obtener_historial(limite=60, columnas=True)
+
+        assert servicio._api_client.call_count == 0
+        assert 54 <= datos['total'] < 60
+        assert datos['columnas']['timestamps'][0] >= (ahora - 3600) * 1000 - 1000
+
+    def test_historial_del_backend_si_el_registro_es_antiguo(self, tmp_path):
+        """Si las muestras del registro no llegan hasta ahora se pide al backend."""
+        api_client = MockApiClient({'historial': [], 'total': 0})
+        servicio = TermostatoService(
+            api_client=api_client,
+            cache=MemoryCache(),
+            registro=_registro(tmp_path / 'estado.log', 60)
+        )
+
+        servicio.obtener_historial(limite=60)
+
+        assert api_client.last_path == '/termostato/historial/?limite=60'
+
+    def test_historial_del_backend_si_el_registro_no_cubre_el_limite(self, tmp_path):
+        """Con muestras recientes que no abarcan el rango se sigue pidiendo al backend."""
+        api_client = MockApiClient({'historial': [], 'total': 0})
+        servicio = TermostatoService(
+            api_client=api_client,
+            cache=MemoryCache(),
+            registro=_registro_reciente(tmp_path / 'estado.log', 5)[0]
+        )
+
+        servicio.obtener_historial(limite=60)
+
+        assert api_client.last_path == '/termostato/historial/?limite=60'
+
+    def test_create_app_abre_el_registro(self, tmp_path, monkeypatch):
+        """REGISTRO_DISCO activa el registro en la aplicación."""
+        ruta = tmp_path / 'estado.log'
+        monkeypatch.setattr(TestingConfig, 'REGISTRO_DISCO', str(ruta))
+
+        app = create_app('testing')
+        app.test_client().get('/api/estado')
+
+        assert len(app.termostato_service._registro) == 1
+        app.termostato_service._registro.cerrar()
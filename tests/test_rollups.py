@@ -0,0 +1,320 @@
+"""
+Tests unitarios para RollupsTemperatura y su uso desde TermostatoService.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from webapp.cache.memory_cache import MemoryCache
+from webapp.services.api_client import ApiConnectionError, MockApiClient
+from webapp.services.registro_disco import RegistroDisco
+from webapp.services.rollups import RollupsTemperatura
+from webapp.services.simulador import generar_historial
+from webapp.services.termostato_service import TermostatoService
+
+# 2026-01-01T00:00:00 UTC
+INICIO = 1767225600
+
+
+def _rollups(minutos, paso=10, capacidades=None):
+    """Rollups con una muestra cada `paso` s durante `minutos`; temperatura = minuto."""
+    rollups = RollupsTemperatura(capacidades)
+    for t in range(0, minutos * 60, paso):
+        rollups.agregar(INICIO + t, {'temperatura_ambiente': 20.0 + t // 60})
+    return rollups
+
+
+@pytest.fixture(autouse=True)
+def _utc(zona_horaria):
+    """Las horas esperadas están en UTC, que es también la hora de reloj."""
+    zona_horaria('UTC')
+
+
+class TestRollupsTemperatura:
+    """Tests de los niveles de agregación incrementales."""
+
+    def test_buckets_de_un_minuto(self):
+        """Cada bucket de 1m agrega sus muestras; el abierto no se devuelve."""
+        historial, cursor = _rollups(3).historial('1m', 3600)
+
+        assert historial == [
+            {'timestamp': '2026-01-01T00:01:00', 'temperatura': 21.0, 'min': 21.0, 'max': 21.0, 'muestras': 6},
+            {'timestamp': '2026-01-01T00:00:00', 'temperatura': 20.0, 'min': 20.0, 'max': 20.0, 'muestras': 6},
+        ]
+        assert cursor == (INICIO + 60) * 1000
+
+    def test_avg_min_max_del_bucket(self):
+        """Con varias temperaturas por bucket se componen media, mínimo y máximo."""
+        historial, _ = _rollups(11).historial('5m', 3600, agg='max')
+
+        assert [r['temperatura'] for r in historial] == [29.0, 24.0]
+        assert historial[0]['min'] == 25.0
+        historial, _ = _rollups(11).historial('5m', 3600)
+        assert historial[1]['temperatura'] == pytest.approx(22.0)
+
+    def test_sin_banda(self):
+        """banda=False devuelve registros {timestamp, temperatura} como el backend."""
+        historial, _ = _rollups(3).historial('1m', 3600, banda=False)
+
+        assert historial[0] == {'timestamp': '2026-01-01T00:01:00', 'temperatura': 21.0}
+
+    def test_desde_cursor(self):
+        """Con desde solo se devuelven los buckets posteriores."""
+        historial, cursor = _rollups(5).historial('1m', 3600, desde=(INICIO + 120) * 1000)
+
+        assert [r['timestamp'] for r in historial] == ['2026-01-01T00:03:00']
+        assert _rollups(5).historial('1m', 3600, desde=cursor) == ([], cursor)
+
+    def test_timestamps_en_hora_de_reloj(self, zona_horaria):
+        """Los timestamps siguen la convención del backend: hora de reloj sin zona."""
+        zona_horaria('Europe/Madrid')
+
+        historial, cursor = _rollups(3).historial('1m', 3600)
+
+        assert historial[0]['timestamp'] == '2026-01-01T01:01:00'
+        assert cursor == (INICIO + 3600 + 60) * 1000
+
+    def test_rango_limita_los_buckets(self):
+        """Solo se devuelven los buckets del rango hasta el último cerrado."""
+        historial, _ = _rollups(10).historial('1m', 180)
+
+        assert len(historial) == 3
+
+    def test_capacidad_descarta_los_mas_antiguos(self):
+        """Un nivel lleno sobrescribe sus buckets más antiguos."""
+        historial, _ = _rollups(10, capacidades={'1m': 4}).historial('1m', 3600)
+
+        assert [r['temperatura'] for r in historial] == [28.0, 27.0, 26.0, 25.0]
+
+    def test_elegir_nivel_mas_grueso(self):
+        """Se elige el nivel más grueso con resolución suficiente que cubre el rango."""
+        rollups = _rollups(130)
+        ahora = INICIO + 130 * 60
+
+        assert rollups.elegir_nivel(3600, 60, ahora) == '1m'
+        assert rollups.elegir_nivel(3600, 400, ahora) == '5m'
+        assert rollups.elegir_nivel(3600, 3600, ahora) == '1h'
+
+    def test_resolucion_menor_que_un_minuto(self):
+        """Sin nivel con buckets de resolucion o menos no se elige ninguno."""
+        rollups = _rollups(130)
+
+        assert rollups.elegir_nivel(3600, 30) is None
+        assert rollups.elegir_nivel(60, 0) is None
+
+    def test_elegir_nivel_sin_cobertura(self):
+        """Si ningún nivel abarca el rango no se elige ninguno."""
+        rollups = _rollups(30)
+
+        assert rollups.elegir_nivel(3600, 60) is None
+        assert RollupsTemperatura().elegir_nivel(60, 60) is None
+
+    def test_hueco_en_el_rango_no_cubre(self):
+        """Buckets antiguos no cubren un rango con un hueco en medio."""
+        rollups = _rollups(2)
+        rollups.agregar(INICIO + 3600, {'temperatura_ambiente': 21.0})
+        rollups.agregar(INICIO + 3700, {'temperatura_ambiente': 21.0})
+
+        assert rollups.elegir_nivel(3600, 60) is None
+
+    def test_cubre_con_buffer_lleno(self):
+        """Con el buffer circular lleno se cuentan los buckets del rango."""
+        rollups = _rollups(10, capacidades={'1m': 4})
+
+        assert rollups.elegir_nivel(240, 60, INICIO + 600) == '1m'
+        assert rollups.elegir_nivel(300, 60, INICIO + 600) is None
+
+    def test_sin_muestras_recientes_no_cubre(self):
+        """Tras un periodo sin muestras los buckets cerrados no son el rango actual."""
+        rollups = _rollups(130)
+        fin = INICIO + 130 * 60
+
+        assert rollups.elegir_nivel(3600, 60, fin) == '1m'
+        assert rollups.elegir_nivel(3600, 60, fin + 1) is None
+        assert rollups.elegir_nivel(3600, 3600, fin + 7 * 3600) is None
+
+    def test_ignora_muestras_invalidas_o_desordenadas(self):
+        """Las muestras sin temperatura o anteriores a la última no cuentan."""
+        rollups = _rollups(2)
+        rollups.agregar(INICIO, {'temperatura_ambiente': 99.0})
+        rollups.agregar(INICIO + 200, {'temperatura_ambiente': 'Error'})
+
+        historial, _ = rollups.historial('1m', 3600)
+        assert [r['muestras'] for r in historial] == [6]
+
+    def test_cargar(self):
+        """cargar equivale a agregar las muestras una a una, omitiendo NaN."""
+        rollups = RollupsTemperatura()
+        instantes = INICIO + np.arange(0, 180, 10, dtype=np.float64)
+        temperaturas = np.full(len(instantes), 21.5)
+        temperaturas[0] = np.nan
+
+        rollups.cargar(instantes, temperaturas)
+
+        historial, _ = rollups.historial('1m', 3600)
+        assert [r['muestras'] for r in historial] == [6, 5]
+
+    @pytest.mark.parametrize('nivel, agg', [('2m', 'avg'), ('1m', 'p95')])
+    def test_parametros_invalidos(self, nivel, agg):
+        """Un nivel o una agregación no soportados lanzan ValueError."""
+        with pytest.raises(ValueError):
+            _rollups(3).historial(nivel, 3600, agg=agg)
+
+
+class TestServicioRollups:
+    """Tests del historial servido desde los rollups."""
+
+    @pytest.fixture(autouse=True)
+    def reloj(self, monkeypatch):
+        """time.time() fijo al final de las muestras de _rollups(130)."""
+        ahora = [INICIO + 130 * 60]
+        monkeypatch.setattr(time, 'time', lambda: ahora[0])
+        return ahora
+
+    def _servicio(self, minutos):
+        return TermostatoService(
+            api_client=MockApiClient({}, raise_error=ApiConnectionError),
+            cache=MemoryCache(),
+            rollups=_rollups(minutos)
+        )
+
+    def test_historial_por_minuto_sin_backend(self):
+        """Sin bucket ni puntos se sirve el nivel 1m con la forma del backend."""
+        servicio = self._servicio(130)
+
+        datos = servicio.obtener_historial(limite=60)
+
+        assert servicio._api_client.call_count == 0
+        assert datos['total'] == 60
+        assert set(datos['historial'][0]) == {'timestamp', 'temperatura'}
+        assert datos['cursor'] == (INICIO + 128 * 60) * 1000
+
+    def test_historial_con_bucket(self):
+        """Con bucket se sirve el nivel del mismo tamaño, con banda."""
+        datos = self._servicio(130).obtener_historial(limite=60, bucket='5m', agg='min')
+
+        assert datos['total'] == 12
+        assert datos['historial'][0]['temperatura'] == datos['historial'][0]['min']
+        assert datos['historial'][0]['muestras'] == 30
+
+    def test_historial_con_puntos_usa_nivel_mas_grueso(self):
+        """Con puntos la resolución es el rango entre puntos."""
+        datos = self._servicio(130).obtener_historial(limite=120, puntos=24)
+
+        assert datos['total'] == 24
+        assert datos['historial'][0]['timestamp'] == '2026-01-01T02:00:00'
+
+    def test_hueco_usa_el_backend(self):
+        """Dos minutos de muestras, una hora sin ellas y una más: se pide al backend."""
+        rollups = _rollups(2)
+        rollups.agregar(INICIO + 3720, {'temperatura_ambiente': 21.0})
+        api_client = MockApiClient({'historial': [], 'total': 0})
+        servicio = TermostatoService(api_client=api_client, cache=MemoryCache(), rollups=rollups)
+
+        servicio.obtener_historial(limite=60)
+
+        assert api_client.call_count == 1
+
+    def test_inicio_no_alineado_respeta_el_limite(self, reloj):
+        """Con muestras cada 2 s desde un instante no alineado no se sirven más de limite registros."""
+        reloj[0] = INICIO + 3630
+        rollups = RollupsTemperatura()
+        for t in range(0, 3610, 2):
+            rollups.agregar(INICIO + 17 + t, {'temperatura_ambiente': 21.0})
+        servicio = TermostatoService(
+            api_client=MockApiClient({}, raise_error=ApiConnectionError),
+            cache=MemoryCache(),
+            rollups=rollups
+        )
+
+        datos = servicio.obtener_historial(limite=60)
+
+        assert datos['total'] == 60
+        assert servicio._api_client.call_count == 0
+
+    def test_mas_puntos_que_limite(self):
+        """Con puntos por encima de limite la resolución sigue siendo un minuto."""
+        datos = self._servicio(130).obtener_historial(limite=60, puntos=600)
+
+        assert datos['total'] == 60
+
+    def test_columnas_sin_registros_intermedios(self):
+        """Con columnas=True se devuelven los arrays del nivel en orden cronológico."""
+        datos = self._servicio(130).obtener_historial(limite=60, columnas=True)
+
+        timestamps = datos['columnas']['timestamps']
+        assert timestamps.dtype == np.int64
+        assert len(timestamps) == 60
+        assert timestamps[-1] == (INICIO + 128 * 60) * 1000
+
+    @pytest.mark.parametrize('limite, bucket, minutos', [(60, None, 120), (1440, '5m', 1500)])
+    def test_periodo_sin_muestras_usa_el_backend(self, reloj, limite, bucket, minutos):
+        """Rollups que acabaron hace 7 horas no se sirven como el rango actual."""
+        reloj[0] = INICIO + minutos * 60 + 7 * 3600
+        api_client = MockApiClient({'historial': [], 'total': 0})
+        servicio = TermostatoService(api_client=api_client, cache=MemoryCache(), rollups=_rollups(minutos))
+
+        servicio.obtener_historial(limite=limite, bucket=bucket, columnas=True)
+
+        assert api_client.call_count == 1
+
+    def test_cursor_de_los_rollups_vale_para_el_backend(self, reloj, zona_horaria):
+        """Un cursor emitido desde los rollups filtra bien el historial del backend."""
+        zona_horaria('Europe/Madrid')
+        servicio = TermostatoService(
+            api_client=MockApiClient(generar_historial(INICIO + 132 * 60, 60)),
+            cache=MemoryCache(),
+            rollups=_rollups(130)
+        )
+        cursor = servicio.obtener_historial(limite=60)['cursor']
+        reloj[0] = INICIO + 132 * 60
+
+        datos = servicio.obtener_historial(limite=60, desde=str(cursor))
+
+        assert servicio._api_client.call_count == 1
+        assert [r['timestamp'] for r in datos['historial']] == [
+            f'2026-01-01T03:{minuto:02}:00' for minuto in (12, 11, 10, 9)
+        ]
+
+    def test_p95_o_sin_cobertura_usa_el_backend(self):
+        """p95 no se compone y un rango sin cubrir va al backend."""
+        servicio = self._servicio(30)
+
+        with pytest.raises(ApiConnectionError):
+            servicio.obtener_historial(limite=60)
+        with pytest.raises(ApiConnectionError):
+            self._servicio(130).obtener_historial(limite=60, bucket='5m', agg='p95')
+
+    def test_estados_obtenidos_alimentan_los_rollups(self, monkeypatch):
+        """Cada estado guardado en la serie llega también a los rollups."""
+        rollups = RollupsTemperatura()
+        servicio = TermostatoService(
+            api_client=MockApiClient({'temperatura_ambiente': 22.0}),
+            cache=MemoryCache(),
+            rollups=rollups
+        )
+        ahora = [1_700_000_000.0]
+        monkeypatch.setattr(time, 'time', lambda: ahora[0])
+
+        servicio.obtener_estado()
+        ahora[0] += 60
+        servicio.obtener_estado()
+
+        assert rollups.historial('1m', 60)[0][0]['temperatura'] == 22.0
+
+    def test_se_cargan_desde_el_registro_al_arrancar(self, tmp_path):
+        """Con registro en disco, los rollups arrancan con sus muestras."""
+        registro = RegistroDisco(str(tmp_path / 'estado.log'))
+        ahora = time.time()
+        for minuto in range(70, -1, -1):
+            registro.agregar(ahora - 60 * minuto, {'temperatura_ambiente': 21.0})
+
+        servicio = TermostatoService(
+            api_client=MockApiClient({}, raise_error=ApiConnectionError),
+            cache=MemoryCache(),
+            registro=registro
+        )
+
+        assert servicio._rollups.elegir_nivel(3600, 60) == '1m'
+        registro.cerrar()
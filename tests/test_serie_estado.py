@@ -0,0 +1,132 @@
+"""
+Tests unitarios para SerieEstado y su uso desde TermostatoService.
+"""
+from webapp.cache.memory_cache import MemoryCache
+from webapp.services.api_client import ApiConnectionError, MockApiClient
+from webapp.services.serie_estado import SerieEstado
+from webapp.services.termostato_service import TermostatoService
+
+ESTADO = {
+    'temperatura_ambiente': 22.5,
+    'temperatura_deseada': 24,
+    'carga_bateria': 3.8,
+    'estado_climatizador': 'calentando',
+}
+
+
+def _serie_llena(cantidad, capacidad=5, intervalo=1.0):
+    """Serie con `cantidad` muestras en t = 0, 1, 2... y temperatura = t."""
+    serie = SerieEstado(capacidad=capacidad, intervalo_minimo=intervalo)
+    for t in range(cantidad):
+        serie.agregar(float(t), {**ESTADO, 'temperatura_ambiente': float(t)})
+    return serie
+
+
+class TestSerieEstado:
+    """Tests del buffer circular columnar."""
+
+    def test_serie_vacia(self):
+        """Sin muestras, todas las columnas están vacías."""
+        ventana = SerieEstado().ventana(300)
+
+        assert len(SerieEstado()) == 0
+        assert ventana == {
+            'timestamps': [],
+            'temperatura_ambiente': [],
+            'temperatura_deseada': [],
+            'carga_bateria': [],
+            'estado_climatizador': [],
+        }
+
+    def test_columnas_y_timestamps_en_ms(self):
+        """Cada campo se devuelve en su columna, timestamps en epoch ms."""
+        serie = SerieEstado()
+        serie.agregar(1700000000.25, ESTADO)
+
+        ventana = serie.ventana()
+
+        assert ventana['timestamps'] == [1700000000250]
+        assert ventana['temperatura_ambiente'] == [22.5]
+        assert ventana['temperatura_deseada'] == [24.0]
+        assert ventana['carga_bateria'] == [3.8]
+        assert ventana['estado_climatizador'] == ['calentando']
+
+    def test_sobrescribe_las_mas_antiguas(self):
+        """Al superar la capacidad se conservan las últimas muestras en orden."""
+        serie = _serie_llena(8, capacidad=5)
+
+        ventana = serie.ventana()
+
+        assert len(serie) == 5
+        assert ventana['temperatura_ambiente'] == [3.0, 4.0, 5.0, 6.0, 7.0]
+        assert ventana['timestamps'] == [3000, 4000, 5000, 6000, 7000]
+
+    def test_ventana_por_segundos_con_vuelta(self):
+        """La ventana se mide desde la última muestra, también tras dar la vuelta."""
+        serie = _serie_llena(8, capacidad=5)
+
+        assert serie.ventana(2)['temperatura_ambiente'] == [5.0, 6.0, 7.0]
+        assert serie.ventana(100)['temperatura_ambiente'] == [3.0, 4.0, 5.0, 6.0, 7.0]
+
+    def test_ventana_hasta(self):
+        """hasta fija el final de la ventana en lugar de la última muestra."""
+        serie = _serie_llena(8, capacidad=5)
+
+        assert serie.ventana(1, hasta=5)['temperatura_ambiente'] == [4.0, 5.0]
+        assert serie.ventana(hasta=1)['temperatura_ambiente'] == []
+
+    def test_descarta_muestras_antes_del_intervalo_minimo(self):
+        """Las muestras demasiado seguidas no ocupan capacidad."""
+        serie = SerieEstado(capacidad=10, intervalo_minimo=2.0)
+
+        assert serie.agregar(100.0, ESTADO) is True
+        assert serie.agregar(101.0, ESTADO) is False
+        assert serie.agregar(102.0, ESTADO) is True
+        assert len(serie) == 2
+
+    def test_campos_ausentes_o_invalidos_son_none(self):
+        """Campos ausentes, no numéricos o estados desconocidos se guardan sin dato."""
+        serie = SerieEstado()
+        serie.agregar(1.0, {'temperatura_ambiente': 'Error', 'carga_bateria': True,
+                            'estado_climatizador': 'desconocido'})
+
+        ventana = serie.ventana()
+
+        assert ventana['temperatura_ambiente'] == [None]
+        assert ventana['temperatura_deseada'] == [None]
+        assert ventana['carga_bateria'] == [None]
+        assert ventana['estado_climatizador'] == [None]
+
+
+class TestServicioSerie:
+    """Tests de la serie alimentada por TermostatoService."""
+
+    def test_cada_estado_obtenido_se_guarda(self):
+        """Un obtener_estado() exitoso añade una muestra a la serie."""
+        servicio = TermostatoService(MockApiClient(ESTADO), MemoryCache())
+
+        servicio.obtener_estado()
+
+        serie = servicio.obtener_serie()
+        assert serie['temperatura_ambiente'] == [22.5]
+        assert serie['estado_climatizador'] == ['calentando']
+
+    def test_los_fallos_no_se_guardan(self):
+        """Si el backend falla no se añade ninguna muestra."""
+        servicio = TermostatoService(
+            MockApiClient({}, raise_error=ApiConnectionError), MemoryCache()
+        )
+
+        servicio.obtener_estado()
+
+        assert servicio.obtener_serie()['timestamps'] == []
+
+    def test_serie_inyectada(self):
+        """Se usa la SerieEstado recibida en el constructor."""
+        serie = SerieEstado(capacidad=3, intervalo_minimo=0)
+        servicio = TermostatoService(MockApiClient(ESTADO), MemoryCache(), serie=serie)
+
+        for _ in range(5):
+            servicio.obtener_estado()
+
+        assert len(serie) == 3
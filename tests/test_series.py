@@ -0,0 +1,405 @@
+"""
+Tests unitarios para las operaciones vectorizadas de series del historial.
+"""
+import json
+import os
+import shutil
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from webapp.services.series import (
+    agregar_historial,
+    agregar_por_bucket,
+    anterior_a,
+    codificar_columnas_binario,
+    codificar_historial_binario,
+    columnas_historial,
+    columnas_json,
+    decodificar_historial_binario,
+    epoch_ms,
+    epoch_ms_reloj,
+    filtrar_desde,
+    historial_a_columnas,
+    historial_columnar,
+    lttb,
+    reducir_historial,
+    ultimo_cursor,
+)
+
+
+def _historial(temperaturas):
+    """Registros por minuto, del más reciente al más antiguo, como el backend."""
+    n = len(temperaturas)
+    return [
+        {'timestamp': f'2026-01-01T{(n - 1 - i) // 60:02d}:{(n - 1 - i) % 60:02d}:00',
+         'temperatura': temperaturas[n - 1 - i]}
+        for i in range(n)
+    ]
+
+
+class TestColumnasHistorial:
+    """Tests de la conversión de registros a columnas."""
+
+    def test_timestamps_en_epoch_ms(self):
+        """Los timestamps ISO se convierten a epoch en milisegundos."""
+        timestamps, temperaturas = columnas_historial([
+            {'timestamp': '1970-01-01T00:00:01.5', 'temperatura': 21},
+            {'timestamp': '2026-01-01T00:00:00', 'temperatura': 22.5},
+        ])
+
+        assert timestamps.dtype == np.int64
+        assert timestamps.tolist() == [1500, 1767225600000]
+        assert temperaturas.tolist() == [21.0, 22.5]
+
+    def test_zona_horaria_se_normaliza_a_utc(self):
+        """Un timestamp con desplazamiento se convierte a UTC."""
+        timestamps, _ = columnas_historial([{'timestamp': '1970-01-01T01:00:00+01:00'}])
+
+        assert timestamps.tolist() == [0]
+
+    def test_temperatura_no_numerica_es_nan(self):
+        """Temperaturas ausentes o no numéricas se marcan como NaN."""
+        _, temperaturas = columnas_historial([
+            {'timestamp': '2026-01-01T00:00:00', 'temperatura': 'Error'},
+            {'timestamp': '2026-01-01T00:01:00'},
+        ])
+
+        assert np.isnan(temperaturas).all()
+
+
+class TestEpochMsReloj:
+    """Tests de la conversión de instantes locales a la convención del backend."""
+
+    def test_coincide_con_los_timestamps_del_backend(self, zona_horaria):
+        """Un instante da el mismo epoch que su hora de reloj sin zona pasada por epoch_ms."""
+        zona_horaria('Europe/Madrid')
+        instantes = np.array([1767225600.75, 1767225660.0])
+
+        esperado = [epoch_ms(datetime.fromtimestamp(int(t)).isoformat()) for t in instantes]
+        assert epoch_ms_reloj(instantes).tolist() == esperado == [1767229200000, 1767229260000]
+
+    def test_cambio_de_hora_en_el_rango(self, zona_horaria):
+        """Si el rango cruza un cambio de hora cada instante usa su desfase."""
+        zona_horaria('Europe/Madrid')
+        # 2026-03-29T01:00:00 UTC: de UTC+1 a UTC+2
+        cambio = 1774746000
+
+        resultado = epoch_ms_reloj(np.array([cambio - 60, cambio + 60]))
+
+        assert resultado.tolist() == [(cambio - 60 + 3600) * 1000, (cambio + 60 + 7200) * 1000]
+
+    def test_sin_instantes(self):
+        """Sin instantes devuelve un array int64 vacío."""
+        resultado = epoch_ms_reloj(np.empty(0))
+
+        assert resultado.dtype == np.int64
+        assert resultado.size == 0
+
+
+class TestLttb:
+    """Tests del algoritmo Largest-Triangle-Three-Buckets."""
+
+    def test_serie_corta_se_devuelve_entera(self):
+        """Con menos registros que puntos no se reduce nada."""
+        assert lttb(np.arange(5), np.zeros(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+    def test_conserva_extremos_y_numero_de_puntos(self):
+        """El resultado tiene puntos índices crecientes con el primero y el último."""
+        x = np.arange(1000)
+        indices = lttb(x, np.sin(x / 50), 100)
+
+        assert len(indices) == 100
+        assert indices[0] == 0 and indices[-1] == 999
+        assert (np.diff(indices) > 0).all()
+
+    def test_conserva_picos(self):
+        """Un pico aislado sobrevive a la reducción."""
+        y = np.zeros(1000)
+        y[437] = 10.0
+
+        indices = lttb(np.arange(1000), y, 20)
+
+        assert 437 in indices
+
+    def test_puntos_insuficientes(self):
+        """Menos de 3 puntos no es una reducción válida."""
+        with pytest.raises(ValueError):
+            lttb(np.arange(10), np.zeros(10), 2)
+
+
+class TestReducirHistorial:
+    """Tests de la reducción de registros del backend."""
+
+    def test_devuelve_registros_originales_en_el_mismo_orden(self):
+        """Se eligen registros originales, del más reciente al más antiguo."""
+        historial = _historial([float(i % 7) for i in range(600)])
+
+        reducido = reducir_historial(historial, 50)
+
+        assert len(reducido) == 50
+        assert all(registro in historial for registro in reducido)
+        assert reducido[0] is historial[0] and reducido[-1] is historial[-1]
+        timestamps = [registro['timestamp'] for registro in reducido]
+        assert timestamps == sorted(timestamps, reverse=True)
+
+    def test_ignora_registros_sin_temperatura(self):
+        """Los registros con temperatura no numérica no se eligen."""
+        historial = _historial([20.0] * 100)
+        historial[10]['temperatura'] = None
+
+        reducido = reducir_historial(historial, 10)
+
+        assert all(registro['temperatura'] is not None for registro in reducido)
+
+    def test_historial_corto_sin_cambios(self):
+        """Si no supera puntos, se devuelve tal cual."""
+        historial = _historial([20.0, 21.0])
+
+        assert reducir_historial(historial, 10) is historial
+
+
+class TestAgregarPorBucket:
+    """Tests de la agregación vectorizada por buckets de tiempo."""
+
+    @pytest.fixture
+    def serie(self):
+        """Tres horas de valores aleatorios, uno por minuto, desordenados."""
+        aleatorio = np.random.default_rng(7)
+        timestamps = np.arange(180, dtype=np.int64) * 60_000
+        valores = aleatorio.normal(22, 2, 180)
+        orden = aleatorio.permutation(180)
+        return timestamps[orden], valores[orden]
+
+    def test_coincide_con_numpy_por_bucket(self, serie):
+        """Cada agregación coincide con la función NumPy sobre el bucket."""
+        timestamps, valores = serie
+
+        cubos = agregar_por_bucket(timestamps, valores, 3600)
+
+        assert cubos['timestamps'].tolist() == [0, 3_600_000, 7_200_000]
+        assert cubos['muestras'].tolist() == [60, 60, 60]
+        for i, inicio in enumerate(cubos['timestamps']):
+            del_bucket = valores[(timestamps >= inicio) & (timestamps < inicio + 3_600_000)]
+            assert cubos['avg'][i] == pytest.approx(del_bucket.mean())
+            assert cubos['min'][i] == del_bucket.min()
+            assert cubos['max'][i] == del_bucket.max()
+            assert cubos['p95'][i] == pytest.approx(np.percentile(del_bucket, 95))
+
+    def test_ignora_nan_y_buckets_vacios(self):
+        """Los NaN no cuentan y un bucket sin valores no aparece."""
+        timestamps = np.array([0, 30_000, 60_000, 120_000], dtype=np.int64)
+        valores = np.array([20.0, np.nan, np.nan, 22.0])
+
+        cubos = agregar_por_bucket(timestamps, valores, 60, ['avg'])
+
+        assert cubos['timestamps'].tolist() == [0, 120_000]
+        assert cubos['avg'].tolist() == [20.0, 22.0]
+        assert 'min' not in cubos
+
+    def test_agregacion_desconocida(self):
+        """Una agregación no soportada lanza ValueError."""
+        with pytest.raises(ValueError):
+            agregar_por_bucket(np.zeros(1, dtype=np.int64), np.zeros(1), 60, ['mediana'])
+
+
+class TestAgregarHistorial:
+    """Tests de la agregación de registros del backend."""
+
+    def test_registros_por_bucket_con_banda(self):
+        """Un registro por bucket con la agregación, la banda y el número de muestras."""
+        historial = _historial([20.0, 21.0, 22.0, 23.0, 24.0, 25.0, 26.0])
+
+        agregado = agregar_historial(historial, '5m', 'max')
+
+        assert agregado == [
+            {'timestamp': '2026-01-01T00:05:00', 'temperatura': 26.0,
+             'min': 25.0, 'max': 26.0, 'muestras': 2},
+            {'timestamp': '2026-01-01T00:00:00', 'temperatura': 24.0,
+             'min': 20.0, 'max': 24.0, 'muestras': 5},
+        ]
+
+    @pytest.mark.parametrize('bucket, agg', [('2m', 'avg'), ('1h', 'mediana')])
+    def test_parametros_invalidos(self, bucket, agg):
+        """bucket o agg fuera de los admitidos lanzan ValueError."""
+        with pytest.raises(ValueError):
+            agregar_historial([], bucket, agg)
+
+
+class TestCursor:
+    """Tests de los cursores para pedir solo registros nuevos."""
+
+    @pytest.mark.parametrize('timestamp, esperado', [
+        ('1767225600000', 1767225600000),
+        ('2026-01-01T00:00:00', 1767225600000),
+        ('2026-01-01T01:00:00+01:00', 1767225600000),
+    ])
+    def test_epoch_ms(self, timestamp, esperado):
+        """Acepta el cursor en ms o un timestamp ISO 8601."""
+        assert epoch_ms(timestamp) == esperado
+
+    @pytest.mark.parametrize('timestamp', ['', 'ayer', '2026-13-01'])
+    def test_epoch_ms_invalido(self, timestamp):
+        """Un timestamp no válido lanza ValueError."""
+        with pytest.raises(ValueError):
+            epoch_ms(timestamp)
+
+    def test_filtrar_desde(self):
+        """Solo quedan los registros posteriores y el cursor avanza al más reciente."""
+        historial = _historial([20.0, 21.0, 22.0, 23.0])
+        cursor = epoch_ms('2026-01-01T00:01:00')
+
+        nuevos, siguiente = filtrar_desde(historial, cursor)
+
+        assert [r['temperatura'] for r in nuevos] == [23.0, 22.0]
+        assert siguiente == epoch_ms('2026-01-01T00:03:00')
+
+    def test_filtrar_desde_sin_novedades(self):
+        """Sin registros nuevos el cursor no cambia."""
+        historial = _historial([20.0, 21.0])
+
+        assert filtrar_desde(historial, epoch_ms('2026-01-01T00:05:00')) == (
+            [], epoch_ms('2026-01-01T00:05:00')
+        )
+
+    def test_anterior_a(self):
+        """Predicado de corte: el registro no es posterior al cursor."""
+        cursor = epoch_ms('2026-01-01T00:01:00')
+
+        assert anterior_a({'timestamp': '2026-01-01T00:01:00'}, cursor) is True
+        assert anterior_a({'timestamp': '2026-01-01T00:02:00'}, cursor) is False
+        assert anterior_a({'temperatura': 20}, cursor) is False
+
+    def test_ultimo_cursor(self):
+        """El cursor de una lectura completa es el registro más reciente."""
+        assert ultimo_cursor(_historial([20.0, 21.0])) == epoch_ms('2026-01-01T00:01:00')
+        assert ultimo_cursor([]) is None
+
+
+class TestHistorialColumnar:
+    """Tests del formato columnar de /api/historial."""
+
+    def test_columnas_en_orden_cronologico(self):
+        """Timestamps en epoch ms y temperaturas, del más antiguo al más reciente."""
+        historial = _historial([20.0, 21.5, 22.0])
+        historial[1]['temperatura'] = 'Error'
+
+        columnas = historial_columnar(historial)
+
+        base = epoch_ms('2026-01-01T00:00:00')
+        assert columnas == {
+            'timestamps': [base, base + 60_000, base + 120_000],
+            'temperaturas': [20.0, None, 22.0],
+        }
+
+    def test_registros_agregados_incluyen_banda(self):
+        """Los registros por bucket añaden las columnas min, max y muestras."""
+        agregado = agregar_historial(_historial([20.0, 22.0, 24.0]), '1m')
+
+        columnas = historial_columnar(agregado)
+
+        assert columnas['min'] == [20.0, 22.0, 24.0]
+        assert columnas['muestras'] == [1, 1, 1]
+
+    def test_historial_vacio(self):
+        """Sin registros las columnas están vacías."""
+        assert historial_columnar([]) == {'timestamps': [], 'temperaturas': []}
+
+    @pytest.mark.skipif(shutil.which('node') is None, reason='requiere node')
+    def test_etiqueta_de_timestamp_sin_zona_es_la_hora_de_reloj(self):
+        """El navegador muestra la hora enviada por el backend, en cualquier zona."""
+        ms = historial_columnar([{'timestamp': '2025-12-22T10:30:00', 'temperatura': 21.0}])['timestamps'][0]
+        historial_js = os.path.join(os.path.dirname(__file__), '..', 'webapp', 'static', 'js', 'historial.js')
+        script = (
+            f"import({json.dumps('file://' + os.path.abspath(historial_js))})"
+            f".then(m => process.stdout.write(m.etiquetaHora({ms})))"
+        )
+
+        for zona in ('UTC', 'America/New_York', 'Asia/Tokyo'):
+            etiqueta = subprocess.run(
+                ['node', '--no-warnings', '--input-type=module', '-e', script],
+                env={**os.environ, 'TZ': zona}, capture_output=True, text=True, check=True
+            ).stdout
+            assert etiqueta == '10:30', zona
+
+
+class TestHistorialBinario:
+    """Tests del formato binario de /api/historial."""
+
+    def test_ida_y_vuelta(self):
+        """Las columnas decodificadas coinciden con las del formato columnar."""
+        historial = _historial([20.5, 21.25, 22.0])
+        historial[-1]['temperatura'] = None  # el más antiguo
+
+        datos = codificar_historial_binario(historial, cursor=1767225720000)
+        decodificado = decodificar_historial_binario(datos)
+
+        columnas = historial_columnar(historial)
+        assert len(datos) == 16 + 3 * (8 + 4)
+        assert decodificado['cursor'] == 1767225720000
+        assert decodificado['timestamps'].tolist() == columnas['timestamps']
+        assert decodificado['temperaturas'][1:].tolist() == [21.25, 22.0]
+        assert np.isnan(decodificado['temperaturas'][0])
+        assert 'min' not in decodificado
+
+    def test_cabecera_little_endian_y_alineacion(self):
+        """Cabecera fija de 16 bytes; timestamps float64 alineados a 8."""
+        datos = codificar_historial_binario(_historial([20.0, 21.0]))
+
+        assert datos[:4] == b'TH\x01\x00'
+        assert int.from_bytes(datos[4:8], 'little') == 2
+        assert np.isnan(np.frombuffer(datos, '<f8', count=1, offset=8)[0])
+        assert np.frombuffer(datos, '<f8', count=2, offset=16).tolist() == [
+            1767225600000.0, 1767225660000.0
+        ]
+
+    def test_con_banda(self):
+        """Los registros por bucket añaden min, max y muestras."""
+        agregado = agregar_historial(_historial([20.0, 22.0, 24.0, 26.0]), '5m')
+
+        decodificado = decodificar_historial_binario(codificar_historial_binario(agregado))
+
+        assert decodificado['temperaturas'].tolist() == [23.0]
+        assert decodificado['min'].tolist() == [20.0]
+        assert decodificado['max'].tolist() == [26.0]
+        assert decodificado['muestras'].tolist() == [4]
+
+    def test_desde_columnas_numpy(self):
+        """Las columnas NumPy se codifican sin pasar por registros."""
+        columnas = {
+            'timestamps': np.array([1767225600000, 1767225660000], dtype=np.int64),
+            'temperaturas': np.array([20.5, np.nan], dtype=np.float32),
+            'min': np.array([20.0, np.nan]),
+            'max': np.array([21.0, np.nan]),
+            'muestras': np.array([6, 0], dtype=np.int64),
+        }
+
+        decodificado = decodificar_historial_binario(codificar_columnas_binario(columnas, 1767225660000))
+
+        assert decodificado['timestamps'].tolist() == [1767225600000.0, 1767225660000.0]
+        assert decodificado['temperaturas'][0] == 20.5
+        assert decodificado['muestras'].tolist() == [6, 0]
+        assert columnas_json(columnas)['temperaturas'] == [20.5, None]
+
+    def test_registros_y_columnas_dan_el_mismo_cuerpo(self):
+        """codificar_historial_binario equivale a codificar sus columnas."""
+        historial = agregar_historial(_historial([20.0, 22.0, 24.0, 26.0]), '1m')
+
+        assert codificar_historial_binario(historial, 1) == codificar_columnas_binario(
+            historial_a_columnas(historial), 1
+        )
+
+    @pytest.mark.parametrize('datos', [b'', b'XX\x01\x00' + bytes(12)])
+    def test_cabecera_invalida(self, datos):
+        """Un cuerpo sin cabecera válida lanza ValueError."""
+        with pytest.raises(ValueError):
+            decodificar_historial_binario(datos)
+
+    def test_cuerpo_truncado(self):
+        """Un cuerpo más corto que lo que indica la cabecera lanza ValueError."""
+        datos = codificar_historial_binario(_historial([20.0, 21.0]))
+
+        with pytest.raises(ValueError):
+            decodificar_historial_binario(datos[:-1])
@@ -3,6 +3,8 @@ Tests unitarios para TermostatoService.
 Usa mocks inyectados directamente (sin @patch) para validar la lógica
 de negocio de forma aislada de la infraestructura.
 """
+import time
+
 import pytest
 
 from webapp.cache.memory_cache import MemoryCache
@@ -143,6 +145,61 @@ class TestObtenerEstado:
         assert from_cache is True
 
 
+class TestPropagacionDeadline:
+    """El deadline recibido por el servicio llega a ApiClient.get()."""
+
+    @pytest.mark.parametrize('metodo', ['obtener_estado', 'obtener_historial', 'health_check'])
+    def test_pasa_deadline_al_api_client(self, metodo):
+        """Cada operación reenvía el deadline al cliente."""
+        deadlines = []
+
+        class MockApiCapturaDeadline(MockApiClientExitoso):
+            def get(self, path, **kwargs):
+                deadlines.append(kwargs.get('deadline'))
+                return super().get(path, **kwargs)
+
+        servicio = TermostatoService(MockApiCapturaDeadline(), MemoryCache())
+        getattr(servicio, metodo)(deadline=123.0)
+
+        assert deadlines == [123.0]
+
+    def test_deadline_agotado_usa_cache(self, cache):
+        """Un timeout por deadline activa el fallback al caché como cualquier otro."""
+        TermostatoService(MockApiClientExitoso(), cache).obtener_estado()
+
+        datos, _, from_cache = TermostatoService(
+            MockApiClientTimeout(), cache
+        ).obtener_estado(deadline=0.0)
+
+        assert datos is not None
+        assert from_cache is True
+
+
+class TestPrecalentar:
+    """Tests de precalentar()."""
+
+    def test_precalienta_el_cliente_y_deja_el_estado_en_cache(self, cache):
+        """Abre las conexiones pedidas y guarda el estado en caché."""
+        api_client = MockApiClientExitoso()
+        api_client.precalentar = lambda conexiones: setattr(api_client, 'conexiones', conexiones)
+        servicio = TermostatoService(api_client, cache)
+
+        servicio.precalentar(4)
+
+        assert api_client.conexiones == 4
+        assert cache.get('estado')[0] == DATOS_ESTADO
+
+    def test_backend_caido_no_lanza(self, cache):
+        """Con el backend caído el precalentamiento termina sin error."""
+        api_client = MockApiClientFallido()
+        api_client.precalentar = lambda conexiones: 0
+        servicio = TermostatoService(api_client, cache)
+
+        servicio.precalentar()
+
+        assert cache.get('estado') is None
+
+
 class TestObtenerHistorial:
     """Tests de obtener_historial()."""
 
@@ -168,11 +225,119 @@ class TestObtenerHistorial:
 
         assert any('limite=100' in ruta for ruta in rutas_llamadas)
 
+    def test_sin_desde_no_pide_lectura_incremental(self):
+        """Sin cursor no hay corte anticipado: la respuesta se decodifica entera."""
+        kwargs_llamada = {}
+
+        class MockApiCapturaKwargs:
+            def get(self, path, **kwargs):
+                kwargs_llamada.update(kwargs)
+                return DATOS_HISTORIAL
+
+        servicio = TermostatoService(MockApiCapturaKwargs(), MemoryCache())
+        servicio.obtener_historial(limite=1440)
+
+        assert 'clave_flujo' not in kwargs_llamada
+
+    def test_recorta_a_limite(self):
+        """Si el backend envía más de limite registros, se recortan."""
+
+        class MockApiHistorial:
+            def get(self, path, **kwargs):
+                return DATOS_HISTORIAL
+
+        resultado = TermostatoService(MockApiHistorial(), MemoryCache()).obtener_historial(limite=1)
+
+        assert resultado['historial'] == DATOS_HISTORIAL['historial'][:1]
+        assert resultado['total'] == 1
+
+    def test_completa_total_si_la_lectura_se_corto(self):
+        """Si la respuesta no trae 'total', se usa el número de registros."""
+
+        class MockApiSinTotal:
+            def get(self, path, **kwargs):
+                return {'historial': DATOS_HISTORIAL['historial']}
+
+        resultado = TermostatoService(MockApiSinTotal(), MemoryCache()).obtener_historial()
+
+        assert resultado['total'] == 2
+
     def test_lanza_excepcion_cuando_api_falla(self, servicio_caido):
         """Lanza ApiConnectionError si el backend no responde."""
         with pytest.raises(ApiConnectionError):
             servicio_caido.obtener_historial()
 
+    def test_reduce_con_puntos(self):
+        """Con puntos se reduce el historial con LTTB y se ajusta total."""
+        historial = [
+            {'timestamp': f'2026-01-01T10:{59 - i:02d}:00', 'temperatura': 20 + i % 5}
+            for i in range(60)
+        ]
+
+        class MockApiHistorialLargo:
+            def get(self, path, **kwargs):
+                return {'historial': historial, 'total': 60}
+
+        resultado = TermostatoService(MockApiHistorialLargo(), MemoryCache()).obtener_historial(
+            limite=60, puntos=12
+        )
+
+        assert resultado['total'] == 12
+        assert len(resultado['historial']) == 12
+
+    def test_agrega_con_bucket(self, servicio_ok):
+        """Con bucket se devuelve un registro por bucket y total de buckets."""
+        resultado = servicio_ok.obtener_historial(bucket='1h', agg='min')
+
+        assert resultado['total'] == 1
+        assert resultado['historial'][0]['temperatura'] == 21
+        assert resultado['historial'][0]['muestras'] == 2
+
+    def test_desde_devuelve_solo_registros_nuevos(self):
+        """Con desde se filtran los registros y se pide cortar la lectura."""
+        kwargs_llamada = {}
+
+        class MockApiCapturaKwargs:
+            def get(self, path, **kwargs):
+                kwargs_llamada.update(kwargs)
+                return DATOS_HISTORIAL
+
+        resultado = TermostatoService(MockApiCapturaKwargs(), MemoryCache()).obtener_historial(
+            desde='2026-01-01T10:00:00'
+        )
+
+        assert resultado['historial'] == [DATOS_HISTORIAL['historial'][1]]
+        assert resultado['total'] == 1
+        assert resultado['cursor'] == 1767261660000
+        assert kwargs_llamada['parar_flujo']({'timestamp': '2026-01-01T10:00:00'}) is True
+        assert kwargs_llamada['clave_flujo'] == 'historial'
+        assert kwargs_llamada['limite_flujo'] == 60
+
+    def test_columnas_en_orden_cronologico(self, servicio_ok):
+        """Con columnas=True se devuelven arrays en lugar de registros."""
+        resultado = servicio_ok.obtener_historial(columnas=True)
+
+        assert 'historial' not in resultado
+        assert resultado['columnas']['timestamps'].tolist() == [1767261600000, 1767261660000]
+        assert resultado['columnas']['temperaturas'].tolist() == [21.0, 21.5]
+        assert resultado['total'] == 2
+
+    def test_cursor_sin_desde(self, servicio_ok):
+        """Sin desde, el cursor es el registro más reciente leído."""
+        assert servicio_ok.obtener_historial()['cursor'] == 1767261660000
+
+    def test_desde_invalido(self, servicio_caido):
+        """Un desde no válido lanza ValueError antes de ir al backend."""
+        with pytest.raises(ValueError):
+            servicio_caido.obtener_historial(desde='ayer')
+
+    def test_puntos_invalidos_no_consultan_al_backend(self, cache):
+        """Con menos de 3 puntos se lanza ValueError antes de ir al backend."""
+        servicio = TermostatoService(MockApiClientFallido(), cache)
+
+        with pytest.raises(ValueError):
+            servicio.obtener_historial(puntos=2)
+
 
 class TestHealthCheck:
     """Tests de health_check()."""
@@ -196,3 +361,74 @@ class TestHealthCheck:
 
         with pytest.raises(ApiTimeoutError):
             servicio.health_check()
+
+
+class MockApiClientLento:
+    """Mock de ApiClient que tarda `espera` segundos en cada respuesta."""
+
+    def __init__(self, espera, fallar_historial=False):
+        self.espera = espera
+        self.fallar_historial = fallar_historial
+
+    def get(self, path, **kwargs):
+        time.sleep(self.espera)
+        if self.fallar_historial and '/termostato/historial/' in path:
+            raise ApiConnectionError('Historial caído')
+        return MockApiClientExitoso().get(path)
+
+
+class TestObtenerPanel:
+    """Tests de obtener_panel()."""
+
+    def test_combina_las_tres_partes(self, servicio_ok):
+        """Devuelve estado, historial y health con su propio success."""
+        panel = servicio_ok.obtener_panel()
+
+        assert list(panel) == ['estado', 'historial', 'health']
+        assert panel['estado']['data'] == DATOS_ESTADO
+        assert panel['estado']['from_cache'] is False
+        assert panel['historial']['total'] == 2
+        assert panel['health']['backend'] == DATOS_HEALTH
+        assert all(parte['success'] for parte in panel.values())
+
+    def test_solo_las_partes_pedidas(self, servicio_ok):
+        """Con partes se consulta solo ese subconjunto."""
+        assert list(servicio_ok.obtener_panel(partes=['health'])) == ['health']
+
+    def test_parte_desconocida_lanza_value_error(self, servicio_ok):
+        """Una parte que no está en PARTES_PANEL es un error del llamador."""
+        with pytest.raises(ValueError):
+            servicio_ok.obtener_panel(partes=['estado', 'clima'])
+
+    def test_fallo_de_una_parte_no_afecta_a_las_demas(self, cache):
+        """Si el historial falla, estado y health siguen con success."""
+        servicio = TermostatoService(MockApiClientLento(0, fallar_historial=True), cache)
+
+        panel = servicio.obtener_panel()
+
+        assert panel['estado']['success'] is True
+        assert panel['health']['success'] is True
+        assert panel['historial'] == {'success': False, 'error': 'Historial caído'}
+
+    def test_api_caida_sin_cache(self, servicio_caido):
+        """Todas las partes fallan si el backend está caído y no hay caché."""
+        panel = servicio_caido.obtener_panel()
+
+        assert not any(parte['success'] for parte in panel.values())
+
+    def test_latencia_total_es_la_maxima_no_la_suma(self, cache):
+        """Las tres consultas de 0.2 s se solapan."""
+        servicio = TermostatoService(MockApiClientLento(0.2), cache)
+
+        inicio = time.monotonic()
+        servicio.obtener_panel()
+
+        assert time.monotonic() - inicio < 0.45
+
+    def test_deadline_devuelve_las_partes_pendientes_como_fallidas(self, cache):
+        """Lo que no termina antes del deadline se marca como fallido."""
+        servicio = TermostatoService(MockApiClientLento(0.5), cache)
+
+        panel = servicio.obtener_panel(partes=['health'], deadline=time.monotonic() + 0.05)
+
+        assert panel['health'] == {'success': False, 'error': 'Deadline superado'}
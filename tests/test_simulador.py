@@ -0,0 +1,188 @@
+"""
+Tests unitarios para SimuladorApiClient y sus distribuciones de latencia.
+"""
+import random
+import time
+
+import pytest
+
+from webapp.cache.memory_cache import MemoryCache
+from webapp.services.api_client import ApiConnectionError, ApiTimeoutError, MockApiClient
+from webapp.services.simulador import (
+    LatenciaColaLarga,
+    LatenciaFija,
+    LatenciaNormal,
+    SimuladorApiClient,
+    generar_estado,
+    generar_historial,
+)
+from webapp.services.termostato_service import TermostatoService
+
+_INSTANTE = 1767268800.0  # 2026-01-01 12:00:00 UTC
+
+
+class _Esperas:
+    """Sustituto de time.sleep que solo registra las esperas pedidas."""
+
+    def __init__(self):
+        """Empezar sin esperas."""
+        self.esperas = []
+
+    def __call__(self, segundos):
+        """Registrar la espera en lugar de dormir."""
+        self.esperas.append(segundos)
+
+
+@pytest.fixture(name='esperas')
+def fixture_esperas():
+    """Función de espera para el simulador que no duerme."""
+    return _Esperas()
+
+
+class TestDistribuciones:
+    """Tests de las distribuciones de latencia."""
+
+    def test_fija(self):
+        """La latencia fija siempre devuelve el mismo valor."""
+        assert LatenciaFija(0.2).muestra(random.Random(1)) == 0.2
+
+    def test_normal_nunca_negativa(self):
+        """Las muestras de la normal se recortan a cero."""
+        aleatorio = random.Random(1)
+        muestras = [LatenciaNormal(0.01, 0.1).muestra(aleatorio) for _ in range(500)]
+        assert min(muestras) >= 0.0
+
+    def test_cola_larga_mediana_y_cola(self):
+        """La cola larga respeta la mediana y tiene un p99 muy por encima."""
+        aleatorio = random.Random(1)
+        muestras = sorted(LatenciaColaLarga(0.05).muestra(aleatorio) for _ in range(2000))
+        assert muestras[1000] == pytest.approx(0.05, rel=0.15)
+        assert muestras[1980] > 5 * muestras[1000]
+
+
+class TestDatosSimulados:
+    """Tests de los generadores de estado e historial."""
+
+    def test_estado_tiene_los_campos_del_backend(self):
+        """El estado simulado tiene los mismos campos que /termostato/."""
+        estado = generar_estado(_INSTANTE)
+        assert set(estado) == {
+            'temperatura_ambiente', 'temperatura_deseada',
+            'estado_climatizador', 'carga_bateria', 'indicador'
+        }
+
+    def test_estado_varia_con_el_tiempo(self):
+        """La temperatura cambia a lo largo del día."""
+        temperaturas = {generar_estado(_INSTANTE + h * 3600)['temperatura_ambiente'] for h in range(24)}
+        assert len(temperaturas) > 10
+
+    def test_climatizador_coherente_con_la_temperatura(self):
+        """Con la temperatura por debajo de la deseada el climatizador calienta."""
+        for h in range(24):
+            estado = generar_estado(_INSTANTE + h * 3600)
+            if estado['temperatura_ambiente'] < estado['temperatura_deseada'] - 0.5:
+                assert estado['estado_climatizador'] == 'calentando'
+
+    def test_historial_coherente_con_estado(self):
+        """El historial empieza en el estado del instante y va hacia atrás."""
+        historial = generar_historial(_INSTANTE, 3)
+        assert historial['total'] == 3
+        assert historial['historial'][0]['temperatura'] == generar_estado(_INSTANTE)['temperatura_ambiente']
+        assert historial['historial'][1]['timestamp'] < historial['historial'][0]['timestamp']
+
+
+class TestSimuladorApiClient:
+    """Tests del cliente simulado."""
+
+    def test_es_un_mock_api_client(self):
+        """El simulador sustituye a MockApiClient allí donde se use."""
+        assert isinstance(SimuladorApiClient(), MockApiClient)
+
+    def test_responde_segun_el_endpoint(self, esperas):
+        """Cada endpoint devuelve datos con su forma y se cuentan las llamadas."""
+        simulador = SimuladorApiClient(dormir=esperas, reloj=lambda: _INSTANTE)
+        assert simulador.get('/termostato/') == generar_estado(_INSTANTE)
+        assert len(simulador.get('/termostato/historial/?limite=5')['historial']) == 5
+        assert simulador.get('/comprueba/')['status'] == 'ok'
+        assert simulador.call_count == 3
+        assert simulador.last_path == '/comprueba/'
+
+    def test_aplica_la_latencia(self, esperas):
+        """Cada petición espera la latencia de la distribución."""
+        simulador = SimuladorApiClient(latencia=LatenciaFija(0.3), dormir=esperas)
+        simulador.get('/termostato/')
+        assert esperas.esperas == [0.3]
+
+    def test_tasas_de_error_por_tipo(self, esperas):
+        """Cada excepción aparece con su probabilidad configurada."""
+        simulador = SimuladorApiClient(
+            tasas_error={ApiTimeoutError: 0.2, ApiConnectionError: 0.3},
+            semilla=7, dormir=esperas
+        )
+        errores = {ApiTimeoutError: 0, ApiConnectionError: 0}
+        for _ in range(2000):
+            try:
+                simulador.get('/termostato/')
+            except (ApiTimeoutError, ApiConnectionError) as error:
+                errores[type(error)] += 1
+        assert errores[ApiTimeoutError] == pytest.approx(400, rel=0.2)
+        assert errores[ApiConnectionError] == pytest.approx(600, rel=0.2)
+
+    def test_timeout_retiene_el_timeout_completo(self, esperas):
+        """Un timeout simulado retiene al llamador el timeout de la petición."""
+        simulador = SimuladorApiClient(tasas_error={ApiTimeoutError: 1.0}, dormir=esperas)
+        with pytest.raises(ApiTimeoutError):
+            simulador.get('/termostato/', timeout=2)
+        assert esperas.esperas == [2]
+
+    def test_deadline_corta_la_espera(self, esperas):
+        """La espera no pasa del deadline de la petición entrante."""
+        simulador = SimuladorApiClient(latencia=LatenciaFija(5.0), dormir=esperas)
+        with pytest.raises(ApiTimeoutError):
+            simulador.get('/termostato/', deadline=time.monotonic() + 0.5)
+        assert esperas.esperas[0] == pytest.approx(0.5, abs=0.05)
+
+    def test_misma_semilla_mismos_resultados(self, esperas):
+        """Con la misma semilla se repiten latencias y fallos."""
+        def secuencia():
+            """Resultados de 50 peticiones con un simulador nuevo."""
+            simulador = SimuladorApiClient(
+                latencia=LatenciaColaLarga(0.05), tasas_error={ApiConnectionError: 0.3},
+                semilla=3, dormir=esperas
+            )
+            resultado = []
+            for _ in range(50):
+                try:
+                    simulador.get('/termostato/')
+                    resultado.append(True)
+                except ApiConnectionError:
+                    resultado.append(False)
+            return resultado
+        assert secuencia() == secuencia()
+
+    def test_raise_error_se_mantiene(self, esperas):
+        """raise_error de MockApiClient sigue funcionando."""
+        simulador = SimuladorApiClient(dormir=esperas)
+        simulador.raise_error = ApiConnectionError
+        with pytest.raises(ApiConnectionError):
+            simulador.get('/termostato/')
+
+    def test_en_vuelo_vuelve_a_cero(self, esperas):
+        """Una petición fallida no deja el contador en vuelo incrementado."""
+        simulador = SimuladorApiClient(tasas_error={ApiConnectionError: 1.0}, dormir=esperas)
+        with pytest.raises(ApiConnectionError):
+            simulador.get('/termostato/')
+        assert simulador.en_vuelo == 0
+        assert simulador.max_en_vuelo == 1
+
+    def test_fallback_de_obtener_estado(self, esperas):
+        """Si el simulador falla, obtener_estado sirve el estado de la caché."""
+        simulador = SimuladorApiClient(dormir=esperas, reloj=lambda: _INSTANTE)
+        servicio = TermostatoService(api_client=simulador, cache=MemoryCache())
+        datos, _, from_cache = servicio.obtener_estado()
+        assert from_cache is False
+
+        simulador.tasas_error = {ApiConnectionError: 1.0}
+        datos_cache, _, from_cache = servicio.obtener_estado()
+        assert from_cache is True
+        assert datos_cache == datos
@@ -2,13 +2,30 @@
 Aplicacion web Flask para visualizacion de datos del termostato.
 Application Factory — ensambla capas, extensiones y blueprints.
 """
+import threading
+from typing import Optional
+
 from flask import Flask
 from flask_bootstrap import Bootstrap
 from flask_moment import Moment
 
 from webapp.config import config
+from webapp.deadline import registrar_deadline
+from webapp.json_provider import CodecJSONProvider
 from webapp.cache.memory_cache import MemoryCache
-from webapp.services.api_client import MockApiClient, RequestsApiClient
+from webapp.services.api_client import (
+    ApiClient, ApiConnectionError, ApiTimeoutError, MockApiClient, RequestsApiClient
+)
+from webapp.services.estadisticas import EstadisticasEstado
+from webapp.services.grabacion import GrabadorApiClient
+from webapp.services.hedging import HedgingApiClient
+from webapp.services.indicadores import IndicadoresTendencia
+from webapp.services.latencias import TimeoutAdaptativo
+from webapp.services.limitador import LimitadorApiClient
+from webapp.services.metricas import MetricasApi
+from webapp.services.registro_disco import RegistroDisco
+from webapp.services.serie_estado import SerieEstado
+from webapp.services.simulador import LatenciaColaLarga, SimuladorApiClient
 from webapp.services.termostato_service import TermostatoService
 
 # Datos fijos usados por MockApiClient en entorno testing
@@ -21,14 +38,100 @@ _DATOS_MOCK_TESTING = {
 }
 
 
+def _crear_api_client(app: Flask, metricas: Optional[MetricasApi] = None) -> ApiClient:
+    """Construir el ApiClient según la configuración de la aplicación.
+
+    En testing devuelve un MockApiClient; en el resto de entornos un
+    RequestsApiClient con timeouts adaptativos (API_TIMEOUT_ADAPTATIVO), o
+    un SimuladorApiClient si API_SIMULADO está activo, decorado con el
+    limitador (API_LIMITADOR) y con hedging (API_HEDGING).
+
+    El limitador va por dentro para que también acote las coberturas; la
+    grabación (API_GRABACION) va por fuera y registra lo que ve el servicio.
+
+    Args:
+        app: Aplicación Flask ya configurada.
+        metricas: Métricas donde el cliente HTTP registra cada petición y
+            el limitador / hedging exponen sus contadores. None = sin métricas.
+
+    Returns:
+        ApiClient listo para inyectar en TermostatoService.
+    """
+    if app.config.get('TESTING'):
+        return MockApiClient(_DATOS_MOCK_TESTING)
+
+    api_client: ApiClient
+    if app.config['API_SIMULADO']:
+        api_client = SimuladorApiClient(
+            latencia=LatenciaColaLarga(app.config['API_SIMULADO_LATENCIA']),
+            tasas_error={
+                ApiTimeoutError: app.config['API_SIMULADO_TASA_TIMEOUT'],
+                ApiConnectionError: app.config['API_SIMULADO_TASA_CONEXION'],
+            }
+        )
+    else:
+        timeout_adaptativo = None
+        if app.config['API_TIMEOUT_ADAPTATIVO']:
+            timeout_adaptativo = TimeoutAdaptativo(
+                factor=app.config['API_TIMEOUT_FACTOR'],
+                minimo=app.config['API_TIMEOUT_MINIMO']
+            )
+        api_client = RequestsApiClient(
+            base_url=app.config['URL_APP_API'],
+            timeout=app.config['API_TIMEOUT'],
+            accept_encoding=app.config['API_ACCEPT_ENCODING'],
+            codec=app.json.codec,
+            timeout_adaptativo=timeout_adaptativo,
+            metricas=metricas,
+            pool_conexiones=app.config['API_POOL_CONEXIONES']
+        )
+    if app.config['API_LIMITADOR']:
+        limitador = LimitadorApiClient(
+            api_client,
+            max_en_vuelo=app.config['API_MAX_EN_VUELO'],
+            qps=app.config['API_QPS_POR_ENDPOINT'],
+            espera_maxima=app.config['API_ESPERA_MAXIMA']
+        )
+        if metricas is not None:
+            metricas.agregar_fuente('limitador', limitador.metricas)
+        api_client = limitador
+    if app.config['API_HEDGING']:
+        hedging = HedgingApiClient(
+            api_client,
+            percentil=app.config['API_HEDGING_PERCENTIL'],
+            max_extra=app.config['API_HEDGING_MAX_EXTRA']
+        )
+        if metricas is not None:
+            metricas.agregar_fuente('hedging', hedging.metricas)
+        api_client = hedging
+    if app.config['API_GRABACION']:
+        api_client = GrabadorApiClient(api_client, app.config['API_GRABACION'], codec=app.json.codec)
+    return api_client
+
+
+def _crear_registro(app: Flask) -> Optional[RegistroDisco]:
+    """Abrir el log en disco de estados si REGISTRO_DISCO está configurado.
+
+    Args:
+        app: Aplicación Flask ya configurada.
+
+    Returns:
+        RegistroDisco sobre REGISTRO_DISCO, o None si no está configurado.
+    """
+    if not app.config['REGISTRO_DISCO']:
+        return None
+    return RegistroDisco(app.config['REGISTRO_DISCO'], intervalo=app.config['REGISTRO_INTERVALO'])
+
+
 def create_app(config_name: str = 'default') -> Flask:
     """Crear y configurar la aplicación Flask.
 
     Ensambla todas las capas:
     - Configuración según entorno
-    - Extensiones Flask (Bootstrap, Moment)
+    - Extensiones Flask (Bootstrap, Moment), proveedor JSON y deadline
     - Infraestructura (MemoryCache)
     - Servicios (RequestsApiClient, TermostatoService)
+    - Precalentamiento (API_PRECALENTAR) y poller del estado (API_POLLER)
     - Blueprints (main, api, health)
 
     Args:
@@ -40,6 +143,8 @@ def create_app(config_name: str = 'default') -> Flask:
     """
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.json = CodecJSONProvider(app)
+    registrar_deadline(app)
 
     # Inicializar extensiones
     Bootstrap(app)
@@ -47,20 +152,45 @@ def create_app(config_name: str = 'default') -> Flask:
 
     # Crear infraestructura
     cache = MemoryCache()
-    if app.config.get('TESTING'):
-        api_client = MockApiClient(_DATOS_MOCK_TESTING)
-    else:
-        api_client = RequestsApiClient(
-            base_url=app.config['URL_APP_API'],
-            timeout=app.config['API_TIMEOUT']
-        )
+    metricas = MetricasApi() if app.config['API_METRICAS'] else None
+    app.metricas_api = metricas  # type: ignore[attr-defined]
+    api_client = _crear_api_client(app, metricas)
 
     # Crear servicio e inyectar dependencias
     app.termostato_service = TermostatoService(  # type: ignore[attr-defined]
         api_client=api_client,
-        cache=cache
+        cache=cache,
+        serie=SerieEstado(
+            capacidad=app.config['SERIE_CAPACIDAD'],
+            intervalo_minimo=app.config['SERIE_INTERVALO_MINIMO']
+        ),
+        indicadores=IndicadoresTendencia(
+            ventana=app.config['TENDENCIA_VENTANA'],
+            umbral=app.config['TENDENCIA_UMBRAL']
+        ),
+        estadisticas=EstadisticasEstado(
+            alfa=app.config['ESTADISTICAS_ALFA'],
+            confort_temperatura=app.config['ESTADISTICAS_CONFORT_TEMPERATURA'],
+            bateria_minima=app.config['ESTADISTICAS_BATERIA_MINIMA'],
+            hueco_maximo=app.config['ESTADISTICAS_HUECO_MAXIMO']
+        ),
+        registro=_crear_registro(app)
     )
 
+    if app.config['API_POLLER']:
+        poller = app.termostato_service.iniciar_poller(  # type: ignore[attr-defined]
+            app.config['API_POLLER_INTERVALO']
+        )
+        if metricas is not None:
+            metricas.agregar_fuente('poller', poller.metricas)
+    if app.config['API_PRECALENTAR']:
+        # En segundo plano: el arranque no espera al backend
+        threading.Thread(
+            target=app.termostato_service.precalentar,  # type: ignore[attr-defined]
+            args=(app.config['API_PRECALENTAR_CONEXIONES'],),
+            name='precalentar', daemon=True
+        ).start()
+
     # Registrar blueprints
     from webapp.routes import main_bp, api_bp, health_bp  # pylint: disable=import-outside-toplevel
     app.register_blueprint(main_bp)
@@ -3,6 +3,7 @@ Configuración de la aplicación webapp_termostato.
 Jerarquía de objetos de configuración para diferentes entornos.
 """
 import os
+from typing import Optional
 
 
 class Config:
@@ -12,6 +13,59 @@ class Config:
     URL_APP_API: str = os.environ.get('API_URL', os.environ.get('URL_APP_API', 'http://localhost:5050'))
     API_TIMEOUT: int = 5
     API_TIMEOUT_HEALTH: int = 2
+    # Timeouts adaptativos: p99 observado x factor, entre el minimo y el timeout fijo
+    API_TIMEOUT_ADAPTATIVO: bool = True
+    API_TIMEOUT_FACTOR: float = 3.0
+    API_TIMEOUT_MINIMO: float = 0.5
+    # Presupuesto total en segundos de cada petición entrante (ver webapp/deadline.py)
+    REQUEST_DEADLINE: float = 10.0
+    # None = negociar todas las codificaciones soportadas (gzip, br, zstd)
+    API_ACCEPT_ENCODING: Optional[str] = os.environ.get('API_ACCEPT_ENCODING')
+    # None = el codec más rápido instalado ('orjson' si está, si no 'json')
+    JSON_CODEC: Optional[str] = os.environ.get('JSON_CODEC')
+    # Hedged requests: segunda petición si la primera supera el percentil observado
+    API_HEDGING: bool = os.environ.get('API_HEDGING', '0') == '1'
+    API_HEDGING_PERCENTIL: float = 0.95
+    API_HEDGING_MAX_EXTRA: float = 0.05
+    # Limitador: peticiones en vuelo y QPS por endpoint hacia el backend
+    API_LIMITADOR: bool = os.environ.get('API_LIMITADOR', '0') == '1'
+    API_MAX_EN_VUELO: int = 8
+    API_QPS_POR_ENDPOINT: float = 10.0
+    API_ESPERA_MAXIMA: float = 1.0
+    # Fichero donde grabar las respuestas del backend (*.jsonl.gz). None = sin grabar
+    API_GRABACION: Optional[str] = os.environ.get('API_GRABACION')
+    # Conexiones keep-alive que conserva el pool de RequestsApiClient
+    API_POOL_CONEXIONES: int = 10
+    # Precalentar al arrancar: abrir conexiones y dejar el estado en caché
+    API_PRECALENTAR: bool = os.environ.get('API_PRECALENTAR', '0') == '1'
+    API_PRECALENTAR_CONEXIONES: int = 4
+    # Poller: refrescar el estado en caché cada intervalo en lugar de por petición
+    API_POLLER: bool = os.environ.get('API_POLLER', '0') == '1'
+    API_POLLER_INTERVALO: float = float(os.environ.get('API_POLLER_INTERVALO', '5'))
+    # Serie en memoria de estados (GET /api/serie): capacidad y separación mínima
+    SERIE_CAPACIDAD: int = 1800
+    SERIE_INTERVALO_MINIMO: float = 2.0
+    # Tendencia en /api/estado: muestras de la regresión y pendiente (°C/min)
+    # a partir de la cual la temperatura sube o baja
+    TENDENCIA_VENTANA: int = 6
+    TENDENCIA_UMBRAL: float = 1.2
+    # Estadísticas acumuladas (GET /api/estadisticas): peso de la EWMA, zonas
+    # de confort y hueco máximo (s) entre muestras para contar tiempo
+    ESTADISTICAS_ALFA: float = 0.1
+    ESTADISTICAS_CONFORT_TEMPERATURA: float = 0.5
+    ESTADISTICAS_BATERIA_MINIMA: float = 3.5
+    ESTADISTICAS_HUECO_MAXIMO: float = 60.0
+    # Log en disco de estados (una muestra cada REGISTRO_INTERVALO s) desde el
+    # que se sirve /api/historial. None = historial siempre del backend
+    REGISTRO_DISCO: Optional[str] = os.environ.get('REGISTRO_DISCO')
+    REGISTRO_INTERVALO: float = 60.0
+    # Métricas por endpoint de las peticiones al backend (GET /api/metricas)
+    API_METRICAS: bool = os.environ.get('API_METRICAS', '1') == '1'
+    # Backend simulado (webapp/services/simulador.py) en lugar de app_termostato
+    API_SIMULADO: bool = os.environ.get('API_SIMULADO', '0') == '1'
+    API_SIMULADO_LATENCIA: float = 0.05
+    API_SIMULADO_TASA_TIMEOUT: float = float(os.environ.get('API_SIMULADO_TASA_TIMEOUT', '0'))
+    API_SIMULADO_TASA_CONEXION: float = float(os.environ.get('API_SIMULADO_TASA_CONEXION', '0'))
 
 
 class DevelopmentConfig(Config):
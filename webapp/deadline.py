@@ -0,0 +1,37 @@
+"""
+Deadline por petición entrante.
+Cada petición Flask recibe un instante límite (time.monotonic()) que las
+rutas propagan a TermostatoService y de ahí a ApiClient.get(), de modo que
+las llamadas al backend usan solo el presupuesto de tiempo restante.
+"""
+import time
+from typing import Optional
+
+from flask import Flask, current_app, g, has_app_context
+
+
+def _fijar_deadline() -> None:
+    """Fijar g.deadline al inicio de cada petición según REQUEST_DEADLINE."""
+    g.deadline = time.monotonic() + current_app.config['REQUEST_DEADLINE']
+
+
+def registrar_deadline(app: Flask) -> None:
+    """Registrar el hook que fija el deadline de cada petición.
+
+    Args:
+        app: Aplicación Flask donde registrar el before_request.
+    """
+    app.before_request(_fijar_deadline)
+
+
+def deadline_actual() -> Optional[float]:
+    """Deadline de la petición en curso, o None fuera de una petición.
+
+    También es None sin contexto de aplicación (ej: threads de fondo).
+
+    Returns:
+        Instante límite en segundos de time.monotonic(), o None.
+    """
+    if not has_app_context():
+        return None
+    return g.get('deadline')
@@ -0,0 +1,53 @@
+"""
+Proveedor JSON de Flask respaldado por el JsonCodec de la capa de servicios.
+Sustituye al DefaultJSONProvider para que jsonify() use el codec más rápido
+disponible (orjson si está instalado).
+"""
+from typing import Any
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+from webapp.services.json_codec import JsonCodec, crear_codec
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """JSONProvider que serializa y deserializa con un JsonCodec.
+
+    Los casos que el codec no cubre (indentación en modo debug, kwargs
+    específicos de json.dumps) se delegan en DefaultJSONProvider.
+
+    Attributes:
+        codec: Codec JSON usado para serializar y deserializar.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        """Crear el proveedor con el codec configurado en JSON_CODEC.
+
+        Args:
+            app: Aplicación Flask a la que pertenece el proveedor.
+        """
+        super().__init__(app)
+        self.codec: JsonCodec = crear_codec(app.config.get('JSON_CODEC'))
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serializar a str con el codec, salvo kwargs que no admite."""
+        kwargs.pop('separators', None)
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        if kwargs:
+            return super().dumps(obj, sort_keys=sort_keys, **kwargs)
+        return self.codec.dumps(obj, default=self.default, sort_keys=sort_keys).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        """Deserializar con el codec, salvo kwargs que no admite."""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self.codec.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """Construir la respuesta JSON escribiendo bytes sin pasar por str."""
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        cuerpo = self.codec.dumps(obj, default=self.default, sort_keys=self.sort_keys)
+        return self._app.response_class(cuerpo + b'\n', mimetype=self.mimetype)
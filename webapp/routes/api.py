@@ -1,11 +1,20 @@
 """
 Blueprint para los endpoints JSON de la API interna del frontend.
 Prefijo: /api
-Rutas: GET /api/estado, GET /api/historial
+Rutas: GET /api/estado, GET /api/historial, GET /api/serie,
+       GET /api/estadisticas, GET /api/panel, GET /api/metricas
 """
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app
 
+from webapp.deadline import deadline_actual
 from webapp.services.api_client import ApiError
+from webapp.services.series import (
+    FORMATOS_HISTORIAL,
+    MIMETYPE_BINARIO,
+    codificar_columnas_binario,
+    columnas_json,
+)
+from webapp.services.termostato_service import PARTES_PANEL
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -18,18 +27,20 @@ def api_estado():
     Devuelve from_cache=True si los datos provienen del caché local.
 
     Returns:
-        200: JSON con success=True y los datos del termostato.
+        200: JSON con success=True, los datos del termostato e indicadores
+            (tendencia y diferencia calculadas en el servidor, o None).
         503: JSON con success=False si no hay conexión ni caché.
     """
     servicio = current_app.termostato_service
-    datos, timestamp, from_cache = servicio.obtener_estado()
+    datos, timestamp, from_cache = servicio.obtener_estado(deadline=deadline_actual())
 
     if datos:
         return jsonify({
             'success': True,
             'data': datos,
             'timestamp': timestamp,
-            'from_cache': from_cache
+            'from_cache': from_cache,
+            'indicadores': servicio.obtener_indicadores()
         })
 
     return jsonify({
@@ -44,25 +55,158 @@ def api_historial():
     """Endpoint para obtener el historial de temperaturas (WT-15).
 
     Query params:
-        limite: Número máximo de registros (default: 60).
+        limite: Número máximo de registros (default: 60, mínimo 1).
+        puntos: Reducir el historial a este número de registros con LTTB
+            (opcional, mínimo 3). Para rangos largos con más registros
+            que píxeles tiene la gráfica.
+        bucket: Agregar en buckets de 1m, 5m o 1h (opcional). Cada
+            registro añade min, max y muestras del bucket.
+        agg: Agregación de cada bucket: avg (default), min, max o p95.
+        desde: Cursor de una respuesta anterior (epoch en ms) o timestamp
+            ISO 8601; solo se devuelven los registros posteriores.
+        formato: 'registros' (default, lista historial), 'columnas'
+            (timestamps en epoch ms y temperaturas, del más antiguo al
+            más reciente; ver series.columnas_json) o 'binario' (las
+            mismas columnas empaquetadas; ver
+            series.codificar_columnas_binario).
 
     Returns:
-        200: JSON con success=True, historial y total.
+        200: JSON con success=True, historial (o las columnas), total y
+            cursor (a enviar como desde en la siguiente petición). Con
+            formato=binario, el cuerpo binario (MIMETYPE_BINARIO).
+        400: JSON con success=False si limite, puntos, bucket, agg, desde
+            o formato no son válidos.
         503: JSON con success=False si el backend no responde.
     """
     limite = request.args.get('limite', 60, type=int)
+    puntos = request.args.get('puntos', type=int)
+    formato = request.args.get('formato', 'registros')
+    if formato not in FORMATOS_HISTORIAL:
+        return jsonify({
+            'success': False,
+            'error': f"formato debe ser uno de: {', '.join(FORMATOS_HISTORIAL)}",
+            'historial': []
+        }), 400
     servicio = current_app.termostato_service
 
     try:
-        datos = servicio.obtener_historial(limite=limite)
+        datos = servicio.obtener_historial(
+            limite=limite,
+            deadline=deadline_actual(),
+            puntos=puntos,
+            bucket=request.args.get('bucket'),
+            agg=request.args.get('agg', 'avg'),
+            desde=request.args.get('desde'),
+            columnas=formato != 'registros'
+        )
+        if formato == 'binario':
+            return Response(
+                codificar_columnas_binario(datos['columnas'], datos.get('cursor')),
+                mimetype=MIMETYPE_BINARIO
+            )
+        if formato == 'columnas':
+            cuerpo = {'formato': formato, **columnas_json(datos['columnas'])}
+        else:
+            cuerpo = {'historial': datos.get('historial', [])}
         return jsonify({
             'success': True,
-            'historial': datos.get('historial', []),
-            'total': datos.get('total', 0)
+            **cuerpo,
+            'total': datos.get('total', 0),
+            'cursor': datos.get('cursor')
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e), 'historial': []}), 400
     except ApiError as e:
         return jsonify({
             'success': False,
             'error': f'No se pudo obtener historial: {str(e)}',
             'historial': []
         }), 503
+
+
+@api_bp.route('/serie')
+def api_serie():
+    """Endpoint con las muestras de estado recientes guardadas en el servidor.
+
+    Sustituye al histórico de 5 minutos que cada navegador reconstruía en
+    localStorage: una pestaña nueva recibe la serie completa al cargar.
+
+    Query params:
+        ventana: Segundos hacia atrás desde la última muestra (default: 300).
+
+    Returns:
+        200: JSON con success=True, total y columnas timestamps (epoch ms),
+            temperatura_ambiente, temperatura_deseada, carga_bateria y
+            estado_climatizador.
+        400: JSON con success=False si ventana no es un número positivo.
+    """
+    ventana = request.args.get('ventana', 300, type=float)
+    if ventana is None or ventana <= 0:
+        return jsonify({'success': False, 'error': 'ventana debe ser un número positivo'}), 400
+
+    serie = current_app.termostato_service.obtener_serie(ventana)
+    return jsonify({'success': True, 'total': len(serie['timestamps']), **serie})
+
+
+@api_bp.route('/estadisticas')
+def api_estadisticas():
+    """Endpoint con estadísticas acumuladas de temperatura y batería.
+
+    Se actualizan con cada muestra que guarda la serie (espaciadas al
+    menos SERIE_INTERVALO_MINIMO, sin importar cuántos navegadores
+    consultan), en memoria constante: media, varianza, EWMA, mínimo,
+    máximo y tiempo en zona de confort desde el arranque.
+
+    Returns:
+        200: JSON con success=True, 'temperatura' y 'bateria'.
+    """
+    return jsonify({'success': True, **current_app.termostato_service.obtener_estadisticas()})
+
+
+@api_bp.route('/panel')
+def api_panel():
+    """Endpoint que combina estado, historial y health en una sola petición.
+
+    Las partes se consultan al backend en paralelo; cada una indica su
+    propio success, así un historial lento o caído no impide mostrar el
+    estado.
+
+    Query params:
+        partes: Lista separada por comas (default: estado,historial,health).
+        limite: Registros de historial (default: 60, mínimo 1).
+
+    Returns:
+        200: JSON con success=True y una clave por parte.
+        400: JSON con success=False si alguna parte no existe o limite no
+            es válido.
+        503: JSON con success=False si fallaron todas las partes.
+    """
+    partes = request.args.get('partes', ','.join(PARTES_PANEL)).split(',')
+    limite = request.args.get('limite', 60, type=int)
+    servicio = current_app.termostato_service
+
+    try:
+        panel = servicio.obtener_panel(partes=partes, limite=limite, deadline=deadline_actual())
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    exito = any(parte['success'] for parte in panel.values())
+    return jsonify({'success': exito, **panel}), 200 if exito else 503
+
+
+@api_bp.route('/metricas')
+def api_metricas():
+    """Endpoint con las métricas de las peticiones al backend.
+
+    Latencia (histograma y percentiles), códigos de estado, bytes
+    recibidos, tiempo de decodificación y excepciones por endpoint, más
+    los contadores del limitador y del hedging si están activos.
+
+    Returns:
+        200: JSON con success=True y las métricas.
+        404: JSON con success=False si API_METRICAS está desactivado.
+    """
+    metricas = current_app.metricas_api
+    if metricas is None:
+        return jsonify({'success': False, 'error': 'Métricas desactivadas'}), 404
+    return jsonify({'success': True, **metricas.instantanea()})
@@ -6,6 +6,7 @@ from datetime import datetime
 
 from flask import Blueprint, jsonify, current_app
 
+from webapp.deadline import deadline_actual
 from webapp.services.api_client import ApiError
 
 # Versión del frontend — debe coincidir con webapp/__init__.py
@@ -29,7 +30,7 @@ def health():
     servicio = current_app.termostato_service
 
     try:
-        datos_backend = servicio.health_check()
+        datos_backend = servicio.health_check(deadline=deadline_actual())
 
         return jsonify({
             'status': 'ok',
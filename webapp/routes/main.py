@@ -4,6 +4,7 @@ Ruta: GET / — renderiza el dashboard con SSR.
 """
 from flask import Blueprint, render_template, current_app
 
+from webapp.deadline import deadline_actual
 from webapp.forms import TermostatoForm
 
 main_bp = Blueprint('main', __name__)
@@ -22,7 +23,7 @@ def index():
     formulario = TermostatoForm()
     servicio = current_app.termostato_service
 
-    datos, timestamp, _ = servicio.obtener_estado()
+    datos, timestamp, _ = servicio.obtener_estado(deadline=deadline_actual())
 
     if datos:
         formulario.temperatura_ambiente = datos.get('temperatura_ambiente', 'N/A')
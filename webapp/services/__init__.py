@@ -1,20 +1,53 @@
 """Capa de servicios — lógica de negocio y cliente HTTP."""
 from .api_client import (
+    ACCEPT_ENCODING,
     ApiClient,
     ApiError,
     ApiConnectionError,
+    ApiSaturadaError,
     ApiTimeoutError,
     MockApiClient,
     RequestsApiClient,
 )
+from .estadisticas import EstadisticaOnline, EstadisticasEstado
+from .gorilla import MuestraEstado, SerieGorilla
+from .grabacion import GrabadorApiClient, ReproductorApiClient
+from .hedging import HedgingApiClient
+from .indicadores import IndicadoresTendencia, calcular_diferencia
+from .json_codec import JsonCodec, crear_codec
+from .limitador import LimitadorApiClient
+from .metricas import MetricasApi
+from .registro_disco import RegistroDisco
+from .rollups import RollupsTemperatura
+from .serie_estado import SerieEstado
+from .simulador import SimuladorApiClient
 from .termostato_service import TermostatoService
 
 __all__ = [
+    'ACCEPT_ENCODING',
     'ApiClient',
     'ApiError',
     'ApiConnectionError',
+    'ApiSaturadaError',
     'ApiTimeoutError',
+    'EstadisticaOnline',
+    'EstadisticasEstado',
+    'GrabadorApiClient',
+    'HedgingApiClient',
+    'IndicadoresTendencia',
+    'JsonCodec',
+    'LimitadorApiClient',
+    'MetricasApi',
     'MockApiClient',
+    'MuestraEstado',
+    'RegistroDisco',
+    'ReproductorApiClient',
     'RequestsApiClient',
+    'RollupsTemperatura',
+    'SerieEstado',
+    'SerieGorilla',
+    'SimuladorApiClient',
     'TermostatoService',
+    'calcular_diferencia',
+    'crear_codec',
 ]
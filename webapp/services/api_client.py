@@ -2,10 +2,30 @@
 Cliente HTTP para comunicación con la API backend del termostato.
 Abstracción que permite sustituir el cliente real por un mock en tests (DIP).
 """
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from webapp.services.json_codec import JsonCodec, crear_codec
+from webapp.services.json_stream import parsear_objeto
+from webapp.services.latencias import TimeoutAdaptativo
+from webapp.services.metricas import MetricasApi
+
+# Accept-Encoding por defecto: el mismo que envía requests (las codificaciones
+# que urllib3 sabe decodificar; 'br' y 'zstd' solo si brotli / backports.zstd
+# están instalados). API_ACCEPT_ENCODING permite sustituirlo.
+ACCEPT_ENCODING: str = requests.utils.DEFAULT_ACCEPT_ENCODING
+
+# Tamaño de bloque para la lectura incremental del cuerpo de la respuesta
+_TAMANO_BLOQUE = 16 * 1024
+
+# Opciones de get() para la lectura incremental (ver parsear_objeto)
+_OPCIONES_FLUJO = ('clave_flujo', 'limite_flujo', 'parar_flujo')
 
 
 class ApiError(Exception):
@@ -20,6 +40,17 @@ class ApiTimeoutError(ApiError):
     """La petición superó el timeout configurado."""
 
 
+class ApiSaturadaError(ApiError):
+    """El limitador local rechazó la petición para proteger al backend."""
+
+
+def tiempo_restante(deadline: Optional[float]) -> Optional[float]:
+    """Segundos que faltan hasta deadline (time.monotonic()), o None sin deadline."""
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
 class ApiClient(ABC):
     """Interfaz abstracta para cliente HTTP.
 
@@ -33,7 +64,10 @@ class ApiClient(ABC):
 
         Args:
             path: Ruta relativa del endpoint (ej: '/termostato/').
-            **kwargs: Argumentos adicionales para la petición.
+            **kwargs: Argumentos adicionales para la petición. Las
+                implementaciones pueden honrar clave_flujo / limite_flujo /
+                parar_flujo (lectura incremental de un array) o ignorarlos. deadline
+                (instante de time.monotonic()) acota el tiempo total.
 
         Returns:
             Dict con la respuesta JSON del backend.
@@ -44,52 +78,316 @@ class ApiClient(ABC):
             ApiError: Para cualquier otro error HTTP.
         """
 
+    def precalentar(self, conexiones: int = 1) -> int:
+        """Abrir por adelantado conexiones con el backend.
+
+        Las implementaciones sin pool de conexiones no hacen nada.
+
+        Args:
+            conexiones: Número de conexiones a dejar abiertas en el pool.
+
+        Returns:
+            Conexiones abiertas con éxito.
+        """
+        del conexiones
+        return 0
 
-class RequestsApiClient(ApiClient):
+
+# Cada opción del constructor es una dependencia inyectada desde create_app
+class RequestsApiClient(ApiClient):  # pylint: disable=too-many-instance-attributes
     """Implementación real del cliente HTTP usando la librería requests.
 
+    Negocia compresión con el backend via Accept-Encoding. urllib3
+    decodifica el cuerpo por bloques a medida que llega, sin materializar
+    nunca el payload comprimido completo.
+
+    Las peticiones comparten una requests.Session con un pool de
+    conexiones keep-alive: solo la primera petición de cada conexión paga
+    DNS + TCP + TLS. El pool de urllib3 es thread-safe y la sesión no
+    guarda estado entre peticiones (el backend no usa cookies).
+
     Attributes:
         _base_url: URL base de la API backend.
         _timeout: Timeout en segundos para las peticiones.
+        _accept_encoding: Valor de la cabecera Accept-Encoding enviada.
+        _codec: Codec JSON usado para decodificar las respuestas.
+        _timeout_adaptativo: Política de timeouts por endpoint, o None.
+        _metricas: Métricas donde registrar cada petición, o None.
+        _pool_conexiones: Conexiones keep-alive que conserva el pool.
+        _sesion: Sesión HTTP con el pool de conexiones al backend.
     """
 
-    def __init__(self, base_url: str, timeout: int = 5) -> None:
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        base_url: str,
+        timeout: int = 5,
+        accept_encoding: Optional[str] = None,
+        codec: Optional[JsonCodec] = None,
+        timeout_adaptativo: Optional[TimeoutAdaptativo] = None,
+        metricas: Optional[MetricasApi] = None,
+        pool_conexiones: int = 10
+    ) -> None:
         """Inicializar cliente con URL base y timeout.
 
         Args:
             base_url: URL base del backend (ej: 'http://localhost:5050').
             timeout: Timeout en segundos (default: 5).
+            accept_encoding: Codificaciones aceptadas (ej: 'gzip' o
+                'identity'). None = todas las soportadas (ACCEPT_ENCODING).
+            codec: Codec JSON inyectado. None = el más rápido disponible.
+            timeout_adaptativo: Si se indica, el timeout de cada petición
+                se deriva de la latencia observada en su endpoint, con el
+                timeout configurado (o el de la llamada) como máximo.
+            metricas: Si se indica, cada petición registra latencia, código
+                de estado, bytes recibidos, decodificación y excepción.
+            pool_conexiones: Conexiones keep-alive que el pool conserva
+                abiertas (default: 10). Con más threads concurrentes, las
+                conexiones extra se abren y cierran en cada petición.
         """
         self._base_url = base_url.rstrip('/')
         self._timeout = timeout
+        self._accept_encoding = accept_encoding or ACCEPT_ENCODING
+        self._codec = codec or crear_codec()
+        self._timeout_adaptativo = timeout_adaptativo
+        self._metricas = metricas
+        self._pool_conexiones = pool_conexiones
+        self._sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=pool_conexiones)
+        self._sesion.mount('http://', adaptador)
+        self._sesion.mount('https://', adaptador)
 
     def get(self, path: str, **kwargs: Any) -> dict:
         """Realizar petición GET al backend.
 
+        Si se indica clave_flujo, el cuerpo se lee por bloques y el array
+        de esa clave se parsea registro a registro, cortando la descarga al
+        alcanzar limite_flujo registros o el primero que cumpla parar_flujo.
+
+        Con deadline, el timeout se reduce al tiempo restante y la petición
+        no se envía si ya no queda presupuesto.
+
         Args:
             path: Ruta relativa del endpoint (ej: '/termostato/').
-            **kwargs: Argumentos adicionales pasados a requests.get().
+            **kwargs: Argumentos adicionales pasados a Session.get(), más:
+                clave_flujo: Clave del array a leer incrementalmente.
+                limite_flujo: Máximo de registros a leer de ese array.
+                parar_flujo: Predicado sobre cada registro que corta la
+                    lectura (el registro no se incluye).
+                deadline: Instante límite en segundos de time.monotonic().
 
         Returns:
             Dict con el JSON de la respuesta.
 
         Raises:
             ApiConnectionError: Si hay error de red o conexión rechazada.
-            ApiTimeoutError: Si la petición supera el timeout.
+            ApiTimeoutError: Si la petición supera el timeout o el deadline.
             ApiError: Para cualquier otro error HTTP o de requests.
         """
         url = self._base_url + path
-        timeout = kwargs.pop('timeout', self._timeout)
+        deadline = kwargs.pop('deadline', None)
+        timeout, limitado_por_deadline = self._calcular_timeout(
+            path, kwargs.pop('timeout', self._timeout), deadline
+        )
+        headers = {'Accept-Encoding': self._accept_encoding}
+        headers.update(kwargs.pop('headers', {}))
+        flujo = {clave: kwargs.pop(clave, None) for clave in _OPCIONES_FLUJO}
+        medicion = _Medicion()
+        inicio = time.monotonic()
+        try:
+            try:
+                datos = self._pedir(url, flujo, deadline, medicion, timeout=timeout, headers=headers, **kwargs)
+            except requests.exceptions.Timeout as exc:
+                if not limitado_por_deadline:
+                    # La latencia real fue al menos el timeout agotado
+                    self._registrar_latencia(path, timeout)
+                raise ApiTimeoutError(f"Timeout accediendo a {url}") from exc
+            except requests.exceptions.ConnectionError as exc:
+                raise ApiConnectionError(f"Error de conexión a {url}") from exc
+            except requests.exceptions.RequestException as exc:
+                raise ApiError(f"Error de API: {exc}") from exc
+            except ValueError as exc:
+                raise ApiError(f"Respuesta JSON inválida de {url}: {exc}") from exc
+        except ApiError as error:
+            self._registrar_metricas(path, time.monotonic() - inicio, medicion, error)
+            raise
+        latencia = time.monotonic() - inicio
+        self._registrar_latencia(path, latencia)
+        self._registrar_metricas(path, latencia, medicion)
+        return datos
+
+    def _calcular_timeout(self, path: str, timeout: float, deadline: Optional[float]) -> Tuple[float, bool]:
+        """Timeout de la petición: el adaptativo del endpoint, acotado por el deadline.
+
+        Returns:
+            Tupla (timeout, limitado_por_deadline).
+
+        Raises:
+            ApiTimeoutError: Si el deadline ya se agotó.
+        """
+        if self._timeout_adaptativo is not None:
+            timeout = self._timeout_adaptativo.timeout(path, timeout)
+        restante = tiempo_restante(deadline)
+        if restante is not None and restante <= 0:
+            raise ApiTimeoutError(f"Deadline agotado antes de acceder a {self._base_url + path}")
+        if restante is not None and restante < timeout:
+            return restante, True
+        return timeout, False
+
+    def _pedir(
+        self,
+        url: str,
+        flujo: Dict[str, Any],
+        deadline: Optional[float],
+        medicion: '_Medicion',
+        **opciones: Any
+    ) -> dict:
+        """Ejecutar la petición y decodificar el cuerpo, completo o en streaming.
+
+        flujo tiene las opciones clave_flujo, limite_flujo y parar_flujo de
+        get(); sin clave_flujo el cuerpo se decodifica completo.
+        """
+        if flujo['clave_flujo'] is None:
+            respuesta = self._sesion.get(url, **opciones)
+            medicion.estado = respuesta.status_code
+            respuesta.raise_for_status()
+            contenido = respuesta.content
+            medicion.bytes_recibidos = _bytes_recibidos(respuesta, len(contenido))
+            inicio = time.perf_counter()
+            datos = self._codec.loads(contenido)
+            medicion.decodificacion = time.perf_counter() - inicio
+            return datos
+        respuesta = self._sesion.get(url, stream=True, **opciones)
         try:
-            respuesta = requests.get(url, timeout=timeout, **kwargs)
+            medicion.estado = respuesta.status_code
             respuesta.raise_for_status()
-            return respuesta.json()
-        except requests.exceptions.Timeout as exc:
-            raise ApiTimeoutError(f"Timeout accediendo a {url}") from exc
-        except requests.exceptions.ConnectionError as exc:
-            raise ApiConnectionError(f"Error de conexión a {url}") from exc
-        except requests.exceptions.RequestException as exc:
-            raise ApiError(f"Error de API: {exc}") from exc
+            bloques = medicion.cronometrar_lectura(respuesta.iter_content(_TAMANO_BLOQUE))
+            if deadline is not None:
+                bloques = _hasta_deadline(bloques, deadline, url)
+            inicio = time.perf_counter()
+            datos = parsear_objeto(bloques, flujo['clave_flujo'], flujo['limite_flujo'], flujo['parar_flujo'])
+            medicion.decodificacion = time.perf_counter() - inicio - medicion.espera_lectura
+            return datos
+        finally:
+            medicion.bytes_recibidos = _bytes_recibidos(respuesta, 0)
+            respuesta.close()
+
+    def precalentar(self, conexiones: int = 1) -> int:
+        """Abrir conexiones keep-alive con el backend antes de necesitarlas.
+
+        Lanza a la vez `conexiones` peticiones a /comprueba/ y cada una
+        retiene su conexión hasta que todas tienen respuesta, así ninguna
+        reutiliza la de otra aunque el backend responda muy rápido; al
+        terminar quedan libres en el pool. Los errores se ignoran: el
+        precalentamiento es una optimización.
+
+        Args:
+            conexiones: Conexiones a abrir, acotado a [1, pool_conexiones].
+
+        Returns:
+            Conexiones abiertas con éxito.
+        """
+        conexiones = max(1, min(conexiones, self._pool_conexiones))
+        barrera = threading.Barrier(conexiones, timeout=self._timeout)
+
+        def abrir(_: int) -> bool:
+            try:
+                respuesta = self._sesion.get(
+                    self._base_url + '/comprueba/', timeout=self._timeout, stream=True,
+                    headers={'Accept-Encoding': self._accept_encoding}
+                )
+            except requests.exceptions.RequestException:
+                barrera.abort()
+                return False
+            try:
+                barrera.wait()
+            except threading.BrokenBarrierError:
+                pass
+            try:
+                # Leer el cuerpo devuelve la conexión al pool sin cerrarla
+                _ = respuesta.content
+            except requests.exceptions.RequestException:
+                return False
+            return True
+
+        with ThreadPoolExecutor(max_workers=conexiones) as executor:
+            return sum(executor.map(abrir, range(conexiones)))
+
+    def _registrar_latencia(self, path: str, segundos: float) -> None:
+        """Alimentar la política de timeouts adaptativos, si la hay."""
+        if self._timeout_adaptativo is not None:
+            self._timeout_adaptativo.registrar(path, segundos)
+
+    def _registrar_metricas(
+        self,
+        path: str,
+        segundos: float,
+        medicion: '_Medicion',
+        error: Optional[ApiError] = None
+    ) -> None:
+        """Registrar la petición en las métricas, si las hay."""
+        if self._metricas is not None:
+            self._metricas.registrar(
+                path, segundos,
+                estado=medicion.estado,
+                bytes_recibidos=medicion.bytes_recibidos,
+                decodificacion=medicion.decodificacion,
+                excepcion=type(error).__name__ if error is not None else None
+            )
+
+
+class _Medicion:
+    """Datos de una petición recogidos mientras se ejecuta.
+
+    Attributes:
+        estado: Código de estado HTTP, o None si no hubo respuesta.
+        bytes_recibidos: Bytes del cuerpo leídos de la red.
+        decodificacion: Segundos de decodificación del JSON, o None.
+        espera_lectura: Segundos esperando bloques del socket (streaming).
+    """
+
+    __slots__ = ('estado', 'bytes_recibidos', 'decodificacion', 'espera_lectura')
+
+    def __init__(self) -> None:
+        """Inicializar sin datos."""
+        self.estado: Optional[int] = None
+        self.bytes_recibidos: int = 0
+        self.decodificacion: Optional[float] = None
+        self.espera_lectura: float = 0.0
+
+    def cronometrar_lectura(self, bloques: Iterable[bytes]) -> Iterator[bytes]:
+        """Iterar bloques acumulando el tiempo de espera de la red.
+
+        En streaming el parseo se intercala con la descarga; restando esta
+        espera al tiempo total queda el tiempo de decodificación.
+        """
+        iterador = iter(bloques)
+        while True:
+            inicio = time.perf_counter()
+            bloque = next(iterador, None)
+            self.espera_lectura += time.perf_counter() - inicio
+            if bloque is None:
+                return
+            yield bloque
+
+
+def _bytes_recibidos(respuesta: requests.Response, por_defecto: int) -> int:
+    """Bytes del cuerpo leídos de la red (comprimidos si hubo Content-Encoding)."""
+    try:
+        return int(respuesta.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return por_defecto
+
+
+def _hasta_deadline(bloques: Iterable[bytes], deadline: float, url: str) -> Iterator[bytes]:
+    """Iterar bloques abandonando la lectura si se supera el deadline.
+
+    El timeout de requests acota cada lectura de socket, no la descarga
+    completa; esta comprobación acota el total.
+    """
+    for bloque in bloques:
+        if time.monotonic() > deadline:
+            raise ApiTimeoutError(f"Deadline superado leyendo {url}")
+        yield bloque
 
 
 class MockApiClient(ApiClient):
@@ -0,0 +1,184 @@
+"""
+Estadísticas acumuladas de las muestras de estado del termostato.
+Media y varianza (Welford), media móvil exponencial, mínimo, máximo y
+tiempo en zona de confort de temperatura y batería, actualizadas en O(1)
+por muestra y sin guardar el histórico.
+"""
+import math
+import threading
+from typing import Optional
+
+from webapp.services.indicadores import DIFERENCIA_EN_OBJETIVO
+from webapp.services.serie_estado import numero_opcional
+
+# Tensión (V) a partir de la cual la batería está en nivel NORMAL
+BATERIA_MINIMA = 3.5
+
+
+# Un slot por acumulador: Welford, EWMA, extremos y tiempo en zona
+class EstadisticaOnline:  # pylint: disable=too-many-instance-attributes
+    """Resumen acumulado de una variable muestreada en el tiempo.
+
+    La media y la varianza usan el algoritmo de Welford, estable aunque la
+    media sea grande frente a la dispersión. El tiempo en zona es ponderado
+    por tiempo: el intervalo hasta la muestra siguiente se atribuye a la
+    zona de la anterior, salvo huecos mayores que hueco_maximo (ej: backend
+    caído), que no cuentan.
+
+    Attributes:
+        alfa: Peso de cada muestra nueva en la media exponencial.
+        hueco_maximo: Segundos máximos entre muestras para contar el intervalo.
+    """
+
+    __slots__ = (
+        'alfa', 'hueco_maximo', 'muestras', '_media', '_m2', 'ewma', 'minimo', 'maximo',
+        'segundos_observados', 'segundos_en_zona', '_ultimo_instante', '_ultimo_en_zona'
+    )
+
+    def __init__(self, alfa: float = 0.1, hueco_maximo: float = 60.0) -> None:
+        """Inicializar sin muestras.
+
+        Args:
+            alfa: Peso de la muestra nueva en la EWMA, en (0, 1].
+            hueco_maximo: Segundos máximos entre dos muestras consecutivas
+                para sumar el intervalo al tiempo observado.
+        """
+        self.alfa = alfa
+        self.hueco_maximo = hueco_maximo
+        self.muestras = 0
+        self._media = 0.0
+        self._m2 = 0.0
+        self.ewma: Optional[float] = None
+        self.minimo: Optional[float] = None
+        self.maximo: Optional[float] = None
+        self.segundos_observados = 0.0
+        self.segundos_en_zona = 0.0
+        self._ultimo_instante: Optional[float] = None
+        self._ultimo_en_zona = False
+
+    def agregar(self, valor: float, instante: float, en_zona: bool) -> None:
+        """Incorporar una muestra.
+
+        Args:
+            valor: Valor de la variable.
+            instante: Segundos desde epoch, creciente.
+            en_zona: Si la muestra está dentro de la zona de confort.
+        """
+        self.muestras += 1
+        delta = valor - self._media
+        self._media += delta / self.muestras
+        self._m2 += delta * (valor - self._media)
+        self.ewma = valor if self.ewma is None else self.ewma + self.alfa * (valor - self.ewma)
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+        if self._ultimo_instante is not None:
+            intervalo = instante - self._ultimo_instante
+            if 0 < intervalo <= self.hueco_maximo:
+                self.segundos_observados += intervalo
+                if self._ultimo_en_zona:
+                    self.segundos_en_zona += intervalo
+        self._ultimo_instante = instante
+        self._ultimo_en_zona = en_zona
+
+    @property
+    def media(self) -> Optional[float]:
+        """Media de las muestras, o None sin muestras."""
+        return self._media if self.muestras else None
+
+    @property
+    def varianza(self) -> Optional[float]:
+        """Varianza muestral, o None con menos de 2 muestras."""
+        return self._m2 / (self.muestras - 1) if self.muestras > 1 else None
+
+    def resumen(self) -> dict:
+        """Resumen serializable a JSON.
+
+        Returns:
+            Dict con muestras, media, varianza, desviacion, ewma, min, max,
+            segundos_observados, segundos_en_zona y fraccion_en_zona (None
+            sin tiempo observado).
+        """
+        varianza = self.varianza
+        return {
+            'muestras': self.muestras,
+            'media': _redondear(self.media),
+            'varianza': _redondear(varianza),
+            'desviacion': _redondear(None if varianza is None else math.sqrt(varianza)),
+            'ewma': _redondear(self.ewma),
+            'min': self.minimo,
+            'max': self.maximo,
+            'segundos_observados': round(self.segundos_observados, 1),
+            'segundos_en_zona': round(self.segundos_en_zona, 1),
+            'fraccion_en_zona': (
+                round(self.segundos_en_zona / self.segundos_observados, 4)
+                if self.segundos_observados else None
+            ),
+        }
+
+
+class EstadisticasEstado:
+    """Estadísticas de temperatura ambiente y batería del termostato.
+
+    La temperatura está en zona de confort si difiere de la deseada como
+    mucho confort_temperatura; la batería, si su tensión es al menos
+    bateria_minima. La memoria es constante sea cual sea el uptime.
+    """
+
+    def __init__(
+        self,
+        alfa: float = 0.1,
+        confort_temperatura: float = DIFERENCIA_EN_OBJETIVO,
+        bateria_minima: float = BATERIA_MINIMA,
+        hueco_maximo: float = 60.0
+    ) -> None:
+        """Inicializar sin muestras.
+
+        Args:
+            alfa: Peso de la muestra nueva en las medias exponenciales.
+            confort_temperatura: Diferencia máxima (°C) con la deseada para
+                estar en zona de confort.
+            bateria_minima: Tensión mínima (V) de la zona de confort.
+            hueco_maximo: Segundos máximos entre muestras para contar el
+                intervalo en el tiempo observado.
+        """
+        self.confort_temperatura = confort_temperatura
+        self.bateria_minima = bateria_minima
+        self._temperatura = EstadisticaOnline(alfa, hueco_maximo)
+        self._bateria = EstadisticaOnline(alfa, hueco_maximo)
+        self._lock = threading.Lock()
+
+    def agregar(self, instante: float, estado: dict) -> None:
+        """Incorporar una muestra de estado.
+
+        Args:
+            instante: Segundos desde epoch de la muestra.
+            estado: Dict de /termostato/; los campos ausentes o no
+                numéricos no se cuentan.
+        """
+        temperatura = numero_opcional(estado.get('temperatura_ambiente'))
+        deseada = numero_opcional(estado.get('temperatura_deseada'))
+        bateria = numero_opcional(estado.get('carga_bateria'))
+        with self._lock:
+            if temperatura is not None:
+                en_confort = deseada is not None and abs(temperatura - deseada) <= self.confort_temperatura
+                self._temperatura.agregar(temperatura, instante, en_confort)
+            if bateria is not None:
+                self._bateria.agregar(bateria, instante, bateria >= self.bateria_minima)
+
+    def instantanea(self) -> dict:
+        """Estadísticas actuales.
+
+        Returns:
+            Dict con 'temperatura' y 'bateria' (ver EstadisticaOnline.resumen).
+        """
+        with self._lock:
+            return {
+                'temperatura': self._temperatura.resumen(),
+                'bateria': self._bateria.resumen(),
+            }
+
+
+def _redondear(valor: Optional[float]) -> Optional[float]:
+    """Redondear a 4 decimales, conservando None."""
+    return None if valor is None else round(valor, 4)
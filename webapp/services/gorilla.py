@@ -0,0 +1,362 @@
+"""
+Almacén comprimido en memoria de muestras de estado (compresión Gorilla).
+Los timestamps se codifican como delta de delta y cada campo como el XOR
+con su valor anterior, en bloques de bits de hasta dos horas. Los datos del
+termostato cambian poco entre muestras: la mayoría de los valores ocupan
+un bit y la mayoría de los timestamps, un byte o menos.
+"""
+import math
+import struct
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from webapp.services.serie_estado import CAMPOS_NUMERICOS, ESTADOS_CLIMATIZADOR, numero
+
+# Duración máxima de un bloque: acota los delta de delta a 32 bits y lo que
+# hay que decodificar para leer un rango
+SEGUNDOS_BLOQUE = 7200
+
+# Prefijo, bits y rango (complemento a dos) de cada delta de delta en ms
+_RANGOS_DELTA = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12), (0b1111, 4, 32))
+
+_CODIGO_CLIMATIZADOR = {estado: codigo for codigo, estado in enumerate(ESTADOS_CLIMATIZADOR)}
+_DOBLE = struct.Struct('<d')
+
+
+class MuestraEstado(NamedTuple):
+    """Muestra decodificada; los campos sin dato son None."""
+
+    instante: float
+    temperatura_ambiente: Optional[float]
+    temperatura_deseada: Optional[float]
+    carga_bateria: Optional[float]
+    estado_climatizador: Optional[str]
+
+
+class _EscritorBits:
+    """Bits escritos de más significativo a menos en un bytearray."""
+
+    __slots__ = ('datos', '_pendiente', '_bits')
+
+    def __init__(self) -> None:
+        self.datos = bytearray()
+        self._pendiente = 0
+        self._bits = 0
+
+    def escribir(self, valor: int, bits: int) -> None:
+        """Añadir los `bits` bits bajos de valor."""
+        self._pendiente = (self._pendiente << bits) | (valor & ((1 << bits) - 1))
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.datos.append((self._pendiente >> self._bits) & 0xFF)
+        self._pendiente &= (1 << self._bits) - 1
+
+    def volcar(self) -> bytes:
+        """Bytes escritos, con el último completado con ceros."""
+        if not self._bits:
+            return bytes(self.datos)
+        return bytes(self.datos) + bytes([(self._pendiente << (8 - self._bits)) & 0xFF])
+
+    def __len__(self) -> int:
+        """Bytes ocupados, incluido el último incompleto."""
+        return len(self.datos) + (1 if self._bits else 0)
+
+
+class _LectorBits:
+    """Lectura secuencial de bits de un buffer escrito por _EscritorBits."""
+
+    __slots__ = ('_datos', '_posicion')
+
+    def __init__(self, datos: bytes) -> None:
+        self._datos = datos
+        self._posicion = 0
+
+    def leer(self, bits: int) -> int:
+        """Leer los siguientes `bits` bits (hasta 64) como entero sin signo."""
+        byte, desfase = divmod(self._posicion, 8)
+        ventana = self._datos[byte:byte + 9]
+        valor = int.from_bytes(ventana, 'big') >> (8 * len(ventana) - desfase - bits)
+        self._posicion += bits
+        return valor & ((1 << bits) - 1)
+
+    def bit(self) -> int:
+        """Leer un bit."""
+        byte, desfase = divmod(self._posicion, 8)
+        self._posicion += 1
+        return (self._datos[byte] >> (7 - desfase)) & 1
+
+
+class _CodificadorValor:
+    """Compresión XOR de una columna float64 (estado entre muestras)."""
+
+    __slots__ = ('anterior', 'ceros_izquierda', 'significativos')
+
+    def __init__(self) -> None:
+        self.anterior: Optional[int] = None
+        self.ceros_izquierda = 0
+        self.significativos = 0
+
+    def codificar(self, escritor: _EscritorBits, bits_valor: int) -> None:
+        """Escribir un valor (sus 64 bits IEEE 754 como entero)."""
+        if self.anterior is None:
+            escritor.escribir(bits_valor, 64)
+            self.anterior = bits_valor
+            return
+        xor = bits_valor ^ self.anterior
+        self.anterior = bits_valor
+        if not xor:
+            escritor.escribir(0, 1)
+            return
+        izquierda = min(64 - xor.bit_length(), 31)
+        derecha = (xor & -xor).bit_length() - 1
+        derecha_anterior = 64 - self.ceros_izquierda - self.significativos
+        if self.significativos and izquierda >= self.ceros_izquierda and derecha >= derecha_anterior:
+            # Cabe en la ventana de bits significativos anterior
+            escritor.escribir(0b10, 2)
+            escritor.escribir(xor >> derecha_anterior, self.significativos)
+            return
+        significativos = 64 - izquierda - derecha
+        escritor.escribir(0b11, 2)
+        escritor.escribir(izquierda, 5)
+        escritor.escribir(significativos - 1, 6)
+        escritor.escribir(xor >> derecha, significativos)
+        self.ceros_izquierda = izquierda
+        self.significativos = significativos
+
+    def decodificar(self, lector: _LectorBits) -> int:
+        """Leer el siguiente valor como entero de 64 bits."""
+        if self.anterior is None:
+            self.anterior = lector.leer(64)
+            return self.anterior
+        if lector.bit():
+            if lector.bit():
+                self.ceros_izquierda = lector.leer(5)
+                self.significativos = lector.leer(6) + 1
+            derecha = 64 - self.ceros_izquierda - self.significativos
+            self.anterior ^= lector.leer(self.significativos) << derecha
+        return self.anterior
+
+
+class _Bloque:
+    """Bloque de muestras: timestamps (ms) y una columna XOR por campo."""
+
+    __slots__ = ('inicio', 'fin', 'cantidad', 'escritor', 'datos', '_delta', '_columnas')
+
+    def __init__(self, columnas: int) -> None:
+        self.inicio: Optional[int] = None
+        self.fin: Optional[int] = None
+        self.cantidad = 0
+        self.escritor: Optional[_EscritorBits] = _EscritorBits()
+        self.datos = b''
+        self._delta = 0
+        self._columnas = [_CodificadorValor() for _ in range(columnas)]
+
+    def agregar(self, instante_ms: int, valores: Tuple[float, ...]) -> None:
+        """Codificar una muestra al final del bloque abierto."""
+        escritor = self.escritor
+        if self.inicio is None:
+            escritor.escribir(instante_ms, 64)
+            self.inicio = instante_ms
+        elif self.cantidad == 1:
+            self._delta = instante_ms - self.fin
+            escritor.escribir(self._delta, 32)
+        else:
+            delta = instante_ms - self.fin
+            _escribir_delta(escritor, delta - self._delta)
+            self._delta = delta
+        for codificador, valor in zip(self._columnas, valores):
+            codificador.codificar(escritor, int.from_bytes(_DOBLE.pack(valor), 'little'))
+        self.fin = instante_ms
+        self.cantidad += 1
+
+    def cerrar(self) -> None:
+        """Congelar el bloque y liberar el estado de codificación."""
+        self.datos = self.escritor.volcar()
+        self.escritor = None
+        self._columnas = []
+
+    def bytes_usados(self) -> int:
+        """Bytes de datos comprimidos del bloque."""
+        return len(self.escritor) if self.escritor is not None else len(self.datos)
+
+
+def _decodificar(datos: bytes, cantidad: int, columnas: int) -> Iterator[Tuple[int, List[float]]]:
+    """Iterar las muestras (instante en ms, valores) de los bytes de un bloque."""
+    lector = _LectorBits(datos)
+    decodificadores = [_CodificadorValor() for _ in range(columnas)]
+    instante = delta = 0
+    for i in range(cantidad):
+        if i == 0:
+            instante = lector.leer(64)
+        elif i == 1:
+            delta = lector.leer(32)
+            instante += delta
+        else:
+            delta += _leer_delta(lector)
+            instante += delta
+        yield instante, [
+            _DOBLE.unpack(d.decodificar(lector).to_bytes(8, 'little'))[0] for d in decodificadores
+        ]
+
+
+def _escribir_delta(escritor: _EscritorBits, delta: int) -> None:
+    """Escribir un delta de delta con el prefijo del menor rango que lo contiene."""
+    if delta == 0:
+        escritor.escribir(0, 1)
+        return
+    for prefijo, bits_prefijo, bits in _RANGOS_DELTA:
+        if -(1 << (bits - 1)) <= delta < (1 << (bits - 1)):
+            escritor.escribir(prefijo, bits_prefijo)
+            escritor.escribir(delta, bits)
+            return
+    raise ValueError(f'Delta de delta fuera de rango: {delta}')
+
+
+def _leer_delta(lector: _LectorBits) -> int:
+    """Leer un delta de delta escrito por _escribir_delta."""
+    if not lector.bit():
+        return 0
+    bits = _RANGOS_DELTA[-1][2]
+    for _, _, bits_rango in _RANGOS_DELTA[:-1]:
+        if not lector.bit():
+            bits = bits_rango
+            break
+    valor = lector.leer(bits)
+    return valor - (1 << bits) if valor >= 1 << (bits - 1) else valor
+
+
+class SerieGorilla:
+    """Serie de muestras de estado comprimida en bloques.
+
+    Cada bloque cubre hasta segundos_bloque; al superarlo se cierra (sus
+    bytes quedan inmutables) y se abre otro. Los rangos solo decodifican
+    los bloques que se solapan con ellos. Las muestras deben llegar en
+    orden temporal; las que no avanzan el instante se descartan.
+
+    Attributes:
+        segundos_bloque: Duración máxima de un bloque.
+        bloques_maximos: Bloques retenidos; los más antiguos se descartan.
+            None = sin límite.
+    """
+
+    CAMPOS = CAMPOS_NUMERICOS + ('estado_climatizador',)
+
+    def __init__(self, segundos_bloque: float = SEGUNDOS_BLOQUE, bloques_maximos: Optional[int] = None) -> None:
+        """Inicializar la serie vacía.
+
+        Args:
+            segundos_bloque: Duración máxima de un bloque (hasta ~24 días,
+                el rango de un delta de 32 bits en ms).
+            bloques_maximos: Bloques retenidos, o None para no descartar.
+        """
+        self.segundos_bloque = segundos_bloque
+        self.bloques_maximos = bloques_maximos
+        self._bloques: List[_Bloque] = []
+        self._cantidad = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Número de muestras retenidas."""
+        return self._cantidad
+
+    def agregar(self, instante: float, estado: dict) -> bool:
+        """Comprimir una muestra de estado.
+
+        Args:
+            instante: Segundos desde epoch (se guarda con precisión de ms).
+            estado: Dict de /termostato/ (los campos ausentes o no numéricos
+                se guardan como sin dato).
+
+        Returns:
+            True si se guardó, False si no es posterior a la última muestra.
+        """
+        instante_ms = round(instante * 1000)
+        valores = tuple(numero(estado.get(campo)) for campo in CAMPOS_NUMERICOS) + (
+            float(_CODIGO_CLIMATIZADOR.get(estado.get('estado_climatizador'), -1)),
+        )
+        with self._lock:
+            bloque = self._bloques[-1] if self._bloques else None
+            if bloque is not None and instante_ms <= bloque.fin:
+                return False
+            if bloque is None or instante_ms - bloque.inicio >= self.segundos_bloque * 1000:
+                if bloque is not None:
+                    bloque.cerrar()
+                bloque = _Bloque(len(self.CAMPOS))
+                self._bloques.append(bloque)
+                if self.bloques_maximos is not None and len(self._bloques) > self.bloques_maximos:
+                    self._cantidad -= self._bloques.pop(0).cantidad
+            bloque.agregar(instante_ms, valores)
+            self._cantidad += 1
+            return True
+
+    def iterar(self, inicio: Optional[float] = None, fin: Optional[float] = None) -> Iterator[MuestraEstado]:
+        """Decodificar las muestras de [inicio, fin] a medida que se consumen.
+
+        Args:
+            inicio: Segundos desde epoch. None = desde la primera.
+            fin: Segundos desde epoch (incluido). None = hasta la última.
+
+        Yields:
+            MuestraEstado en orden temporal.
+        """
+        inicio_ms = -math.inf if inicio is None else inicio * 1000
+        fin_ms = math.inf if fin is None else fin * 1000
+        for datos, cantidad in self._instantanea(inicio_ms, fin_ms):
+            for instante_ms, valores in _decodificar(datos, cantidad, len(self.CAMPOS)):
+                if instante_ms < inicio_ms:
+                    continue
+                if instante_ms > fin_ms:
+                    return
+                yield _muestra(instante_ms, valores)
+
+    def __iter__(self) -> Iterator[MuestraEstado]:
+        """Decodificar todas las muestras en orden temporal."""
+        return self.iterar()
+
+    def rango(self, inicio: Optional[float] = None, fin: Optional[float] = None) -> Dict[str, list]:
+        """Muestras de [inicio, fin] en formato columnar.
+
+        Args:
+            inicio: Segundos desde epoch. None = desde la primera.
+            fin: Segundos desde epoch (incluido). None = hasta la última.
+
+        Returns:
+            Dict con 'timestamps' (epoch en ms) y una lista por campo, como
+            SerieEstado.ventana. Los valores sin dato son None.
+        """
+        resultado: Dict[str, list] = {'timestamps': [], **{campo: [] for campo in self.CAMPOS}}
+        columnas = [resultado[campo] for campo in self.CAMPOS]
+        for muestra in self.iterar(inicio, fin):
+            resultado['timestamps'].append(round(muestra.instante * 1000))
+            for columna, valor in zip(columnas, muestra[1:]):
+                columna.append(valor)
+        return resultado
+
+    def bytes_usados(self) -> int:
+        """Bytes de datos comprimidos (sin la sobrecarga de los objetos Python)."""
+        with self._lock:
+            return sum(bloque.bytes_usados() for bloque in self._bloques)
+
+    def _instantanea(self, inicio_ms: float, fin_ms: float) -> List[Tuple[bytes, int]]:
+        """Bytes y cantidad de muestras de los bloques que se solapan con el rango.
+
+        El bloque abierto se sigue escribiendo: sus bytes se vuelcan bajo
+        el lock para decodificarlo sin él.
+        """
+        with self._lock:
+            return [
+                (bloque.datos if bloque.escritor is None else bloque.escritor.volcar(), bloque.cantidad)
+                for bloque in self._bloques
+                if bloque.fin >= inicio_ms and bloque.inicio <= fin_ms
+            ]
+
+
+def _muestra(instante_ms: int, valores: List[float]) -> MuestraEstado:
+    """Construir una MuestraEstado a partir de los valores decodificados."""
+    *numericos, climatizador = valores
+    return MuestraEstado(
+        instante_ms / 1000,
+        *(None if math.isnan(v) else v for v in numericos),
+        ESTADOS_CLIMATIZADOR[int(climatizador)] if climatizador >= 0 else None
+    )
@@ -0,0 +1,204 @@
+"""
+Grabación y reproducción de respuestas del backend.
+GrabadorApiClient captura cada respuesta real con su latencia en un
+fichero JSON Lines comprimido con gzip; ReproductorApiClient las sirve de
+nuevo con la temporización original o escalada, para medir la aplicación
+completa sin backend y con tráfico de forma realista.
+"""
+import atexit
+import gzip
+import itertools
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from webapp.services.api_client import (
+    ApiClient,
+    ApiConnectionError,
+    ApiError,
+    ApiSaturadaError,
+    ApiTimeoutError,
+    tiempo_restante,
+)
+from webapp.services.json_codec import JsonCodec, crear_codec
+from webapp.services.latencias import clave_endpoint
+
+# Errores reproducibles, por nombre de clase
+_ERRORES: Dict[str, type] = {
+    cls.__name__: cls
+    for cls in (ApiError, ApiConnectionError, ApiTimeoutError, ApiSaturadaError)
+}
+
+
+class GrabadorApiClient(ApiClient):
+    """ApiClient que registra cada petición del cliente decorado.
+
+    Cada línea del fichero es un objeto JSON con: t (segundos desde el
+    inicio de la grabación), path, latencia (segundos) y datos o error
+    (nombre de la clase ApiError lanzada).
+
+    Attributes:
+        _cliente: ApiClient decorado que realiza las peticiones reales.
+        _fichero: Fichero gzip abierto en modo texto para añadir líneas.
+        _codec: Codec JSON usado para serializar las líneas.
+    """
+
+    def __init__(self, cliente: ApiClient, ruta: str, codec: Optional[JsonCodec] = None) -> None:
+        """Abrir la grabación en ruta (se añade si ya existe).
+
+        Args:
+            cliente: ApiClient a decorar.
+            ruta: Fichero de salida (convención: *.jsonl.gz).
+            codec: Codec JSON. None = el más rápido disponible.
+        """
+        self._cliente = cliente
+        self._codec = codec or crear_codec()
+        self._fichero = gzip.open(ruta, 'ab')
+        self._lock = threading.Lock()
+        self._inicio = time.monotonic()
+        atexit.register(self.cerrar)
+
+    def precalentar(self, conexiones: int = 1) -> int:
+        """Delegar el precalentamiento en el cliente decorado."""
+        return self._cliente.precalentar(conexiones)
+
+    def get(self, path: str, **kwargs: Any) -> dict:
+        """Delegar la petición y grabar su resultado y latencia.
+
+        Raises:
+            ApiError (o subclase): Los errores del cliente se graban y relanzan.
+        """
+        inicio = time.monotonic()
+        registro: Dict[str, Any] = {'t': round(inicio - self._inicio, 6), 'path': path}
+        try:
+            datos = self._cliente.get(path, **kwargs)
+        except ApiError as exc:
+            registro['error'] = type(exc).__name__
+            self._escribir(registro, inicio)
+            raise
+        registro['datos'] = datos
+        self._escribir(registro, inicio)
+        return datos
+
+    def cerrar(self) -> None:
+        """Volcar y cerrar el fichero de grabación."""
+        with self._lock:
+            self._fichero.close()
+
+    def _escribir(self, registro: Dict[str, Any], inicio: float) -> None:
+        """Añadir la latencia al registro y escribirlo como una línea.
+
+        Tras cerrar() (ej: peticiones en vuelo durante atexit) el registro
+        se descarta.
+        """
+        registro['latencia'] = round(time.monotonic() - inicio, 6)
+        linea = self._codec.dumps(registro) + b'\n'
+        with self._lock:
+            if not self._fichero.closed:
+                self._fichero.write(linea)
+
+
+def cargar_grabacion(ruta: str, codec: Optional[JsonCodec] = None) -> List[dict]:
+    """Leer todos los registros de una grabación.
+
+    Una grabación cortada sin cerrar (ej: proceso terminado) se lee hasta
+    el último registro completo.
+
+    Args:
+        ruta: Fichero generado por GrabadorApiClient.
+        codec: Codec JSON. None = el más rápido disponible.
+
+    Returns:
+        Lista de registros en orden de grabación.
+    """
+    codec = codec or crear_codec()
+    registros = []
+    with gzip.open(ruta, 'rb') as fichero:
+        try:
+            for linea in fichero:
+                if linea.endswith(b'\n'):
+                    registros.append(codec.loads(linea))
+        except EOFError:
+            pass
+    return registros
+
+
+class ReproductorApiClient(ApiClient):
+    """ApiClient que reproduce una grabación.
+
+    Para cada path se sirven en ciclo los registros grabados con ese path
+    exacto o, si no hay, los de su endpoint (path sin query). Cada
+    respuesta se demora su latencia grabada multiplicada por escala.
+
+    Attributes:
+        escala: Factor aplicado a las latencias (0 = sin espera).
+        call_count: Número de veces que se llamó a get().
+    """
+
+    def __init__(self, registros: List[dict], escala: float = 1.0) -> None:
+        """Inicializar con los registros de una grabación.
+
+        Args:
+            registros: Registros de cargar_grabacion().
+            escala: Factor de tiempo (1 = original, 0.5 = el doble de rápido).
+
+        Raises:
+            ValueError: Si la grabación está vacía.
+        """
+        if not registros:
+            raise ValueError("La grabación no contiene registros")
+        self.escala = escala
+        self.call_count: int = 0
+        self._lock = threading.Lock()
+        self._ciclos: Dict[str, Iterator[dict]] = {}
+        por_clave: Dict[str, List[dict]] = {}
+        for registro in registros:
+            path = registro['path']
+            por_clave.setdefault(path, []).append(registro)
+            if clave_endpoint(path) != path:
+                por_clave.setdefault(clave_endpoint(path), []).append(registro)
+        self._por_clave = por_clave
+
+    @classmethod
+    def desde_fichero(cls, ruta: str, escala: float = 1.0) -> 'ReproductorApiClient':
+        """Crear un reproductor a partir de un fichero de grabación."""
+        return cls(cargar_grabacion(ruta), escala=escala)
+
+    def get(self, path: str, **kwargs: Any) -> dict:
+        """Servir la siguiente respuesta grabada para path.
+
+        Args:
+            path: Ruta consultada.
+            **kwargs: Solo se usa deadline; el resto se ignora.
+
+        Returns:
+            Dict grabado para esa petición.
+
+        Raises:
+            ApiConnectionError: Si no hay grabación para el path.
+            ApiTimeoutError: Si la latencia escalada supera el deadline.
+            ApiError (o subclase): El error grabado, si la petición falló.
+        """
+        registro = self._siguiente(path)
+        espera = registro['latencia'] * self.escala
+        restante = tiempo_restante(kwargs.get('deadline'))
+        if restante is not None and espera > restante:
+            time.sleep(max(0.0, restante))
+            raise ApiTimeoutError(f"Deadline superado reproduciendo {path}")
+        if espera > 0:
+            time.sleep(espera)
+        if 'error' in registro:
+            raise _ERRORES.get(registro['error'], ApiError)(f"Error grabado para {path}")
+        return registro['datos']
+
+    def _siguiente(self, path: str) -> dict:
+        """Siguiente registro del ciclo correspondiente a path."""
+        with self._lock:
+            self.call_count += 1
+            clave = path if path in self._por_clave else clave_endpoint(path)
+            if clave not in self._por_clave:
+                raise ApiConnectionError(f"Sin grabación para {path}")
+            ciclo = self._ciclos.get(clave)
+            if ciclo is None:
+                ciclo = self._ciclos[clave] = itertools.cycle(self._por_clave[clave])
+            return next(ciclo)
@@ -0,0 +1,142 @@
+"""
+Decorador de ApiClient con peticiones cubiertas (hedged requests).
+Si la primera petición no respondió al alcanzar el percentil configurado
+de la latencia observada, lanza una segunda idéntica y devuelve la primera
+que termine con éxito. La carga extra se acota con un presupuesto.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+from webapp.services.api_client import ApiClient
+from webapp.services.latencias import VentanaLatencias
+
+
+# Parámetros de la política de cobertura más su estado (créditos, contadores)
+class HedgingApiClient(ApiClient):  # pylint: disable=too-many-instance-attributes
+    """ApiClient que cubre las peticiones lentas con una segunda petición.
+
+    Cada petición suma max_extra créditos (hasta max_creditos) y cada
+    petición de cobertura consume uno, de modo que las coberturas nunca
+    superan la fracción max_extra de las peticiones a largo plazo.
+
+    Attributes:
+        _cliente: ApiClient decorado que realiza las peticiones reales.
+        _percentil: Percentil de latencia a partir del cual se cubre.
+        _min_muestras: Muestras mínimas por endpoint antes de cubrir.
+        _max_extra: Fracción máxima de peticiones extra (ej: 0.05 = 5%).
+        _latencias: Ventana de latencias observadas por endpoint.
+        _executor: Pool de threads donde se ejecutan las peticiones.
+    """
+
+    # Todo salvo cliente es un ajuste de la política con valor por defecto
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        cliente: ApiClient,
+        percentil: float = 0.95,
+        max_extra: float = 0.05,
+        min_muestras: int = 20,
+        max_creditos: float = 5.0,
+        max_workers: int = 16
+    ) -> None:
+        """Inicializar el decorador sobre un ApiClient existente.
+
+        Args:
+            cliente: ApiClient a decorar.
+            percentil: Percentil de latencia que dispara la cobertura.
+            max_extra: Fracción máxima de peticiones de cobertura.
+            min_muestras: Muestras por endpoint necesarias para cubrir.
+            max_creditos: Ráfaga máxima de coberturas acumulables.
+            max_workers: Threads del pool (peticiones en vuelo simultáneas).
+        """
+        self._cliente = cliente
+        self._percentil = percentil
+        self._max_extra = max_extra
+        self._min_muestras = min_muestras
+        self._max_creditos = max_creditos
+        self._latencias = VentanaLatencias()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedging')
+        self._lock = threading.Lock()
+        self._creditos = 0.0
+        self.peticiones: int = 0
+        self.coberturas: int = 0
+        self.ganadas_por_cobertura: int = 0
+
+    def precalentar(self, conexiones: int = 1) -> int:
+        """Delegar el precalentamiento en el cliente decorado."""
+        return self._cliente.precalentar(conexiones)
+
+    def get(self, path: str, **kwargs: Any) -> dict:
+        """Realizar GET cubriendo la petición si tarda más de lo habitual.
+
+        Args:
+            path: Ruta relativa del endpoint (ej: '/termostato/').
+            **kwargs: Argumentos pasados al cliente decorado.
+
+        Returns:
+            Dict con la respuesta de la primera petición exitosa.
+
+        Raises:
+            ApiError (o subclase): Si todas las peticiones lanzadas fallan.
+        """
+        retardo = self._latencias.percentil(path, self._percentil, self._min_muestras)
+        with self._lock:
+            self.peticiones += 1
+            self._creditos = min(self._max_creditos, self._creditos + self._max_extra)
+
+        primaria = self._lanzar(path, kwargs)
+        if retardo is None or wait([primaria], timeout=retardo).done:
+            return primaria.result()
+        if not self._consumir_credito():
+            return primaria.result()
+
+        cobertura = self._lanzar(path, kwargs)
+        pendientes = {primaria, cobertura}
+        error: Optional[BaseException] = None
+        while pendientes:
+            terminadas, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                if futuro.exception() is None:
+                    if futuro is cobertura:
+                        with self._lock:
+                            self.ganadas_por_cobertura += 1
+                    return futuro.result()
+                error = futuro.exception()
+        raise error  # type: ignore[misc]
+
+    def _lanzar(self, path: str, kwargs: dict) -> Future:
+        """Enviar una petición al pool registrando su latencia si tiene éxito."""
+        inicio = time.monotonic()
+        futuro = self._executor.submit(self._cliente.get, path, **kwargs)
+
+        def registrar(f: Future) -> None:
+            if not f.cancelled() and f.exception() is None:
+                self._latencias.registrar(path, time.monotonic() - inicio)
+
+        futuro.add_done_callback(registrar)
+        return futuro
+
+    def _consumir_credito(self) -> bool:
+        """Consumir un crédito de cobertura si hay disponible."""
+        with self._lock:
+            if self._creditos < 1.0:
+                return False
+            self._creditos -= 1.0
+            self.coberturas += 1
+            return True
+
+    def metricas(self) -> dict:
+        """Instantánea de los contadores de cobertura.
+
+        Returns:
+            Dict con peticiones, coberturas lanzadas, ganadas por la
+            cobertura y créditos disponibles.
+        """
+        with self._lock:
+            return {
+                'peticiones': self.peticiones,
+                'coberturas': self.coberturas,
+                'ganadas_por_cobertura': self.ganadas_por_cobertura,
+                'creditos': round(self._creditos, 3),
+            }
@@ -0,0 +1,221 @@
+"""
+Indicadores derivados del estado: tendencia y diferencia con la deseada.
+Se mantienen de forma incremental al llegar cada muestra, así el navegador
+no recalcula nada a partir de su histórico local en cada actualización.
+"""
+import threading
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from webapp.services.serie_estado import numero_opcional
+
+# Diferencia (°C) por debajo de la cual la temperatura está en objetivo
+DIFERENCIA_EN_OBJETIVO = 0.5
+
+# Diferencia (°C) que vacía la barra de progreso del indicador
+DIFERENCIA_MAXIMA = 5.0
+
+# Margen (°C) para considerar que la temperatura se acerca o se aleja
+_HISTERESIS_ACERCANDO = 0.1
+
+
+class RegresionMovil:
+    """Pendiente por mínimos cuadrados de las últimas `ventana` muestras.
+
+    Mantiene las sumas Σx, Σy, Σxy y Σx² y las actualiza al entrar y salir
+    cada muestra: agregar y pendiente son O(1). x se guarda relativo a un
+    origen que se reajusta cuando se aleja, para que Σx² no pierda
+    precisión con el tiempo.
+
+    Attributes:
+        ventana: Número máximo de muestras de la regresión.
+    """
+
+    # Distancia al origen (en unidades de x) a partir de la cual se reajusta
+    _REAJUSTE = 1e5
+
+    def __init__(self, ventana: int) -> None:
+        """Inicializar la regresión vacía.
+
+        Args:
+            ventana: Número máximo de muestras (al menos 2).
+        """
+        self.ventana = ventana
+        self._muestras: Deque[Tuple[float, float]] = deque()
+        self._origen: Optional[float] = None
+        self._sx = self._sy = self._sxy = self._sxx = 0.0
+
+    def __len__(self) -> int:
+        """Número de muestras en la ventana."""
+        return len(self._muestras)
+
+    @property
+    def primera(self) -> Optional[Tuple[float, float]]:
+        """Muestra (x, y) más antigua de la ventana, o None si está vacía."""
+        if not self._muestras:
+            return None
+        x, y = self._muestras[0]
+        return x + self._origen, y
+
+    def agregar(self, x: float, y: float) -> None:
+        """Incorporar una muestra, descartando la más antigua si hace falta.
+
+        Args:
+            x: Abscisa (ej: segundos desde epoch), creciente.
+            y: Valor.
+        """
+        if self._origen is None:
+            self._origen = x
+        elif x - self._origen > self._REAJUSTE:
+            self._reajustar(x)
+        if len(self._muestras) == self.ventana:
+            self._sumar(*self._muestras.popleft(), signo=-1.0)
+        muestra = (x - self._origen, y)
+        self._muestras.append(muestra)
+        self._sumar(*muestra, signo=1.0)
+
+    def pendiente(self) -> Optional[float]:
+        """Pendiente de la recta ajustada (unidades de y por unidad de x).
+
+        Returns:
+            La pendiente, o None con menos de 2 muestras o todas en el mismo x.
+        """
+        n = len(self._muestras)
+        if n < 2:
+            return None
+        denominador = n * self._sxx - self._sx * self._sx
+        if denominador <= 0:
+            return None
+        return (n * self._sxy - self._sx * self._sy) / denominador
+
+    def _sumar(self, x: float, y: float, signo: float) -> None:
+        """Sumar (signo=1) o restar (signo=-1) una muestra de los acumulados."""
+        self._sx += signo * x
+        self._sy += signo * y
+        self._sxy += signo * x * y
+        self._sxx += signo * x * x
+
+    def _reajustar(self, origen: float) -> None:
+        """Mover el origen de x y recalcular las sumas desde la ventana (O(ventana))."""
+        desplazamiento = origen - self._origen
+        self._origen = origen
+        self._muestras = deque((x - desplazamiento, y) for x, y in self._muestras)
+        self._sx = self._sy = self._sxy = self._sxx = 0.0
+        for x, y in self._muestras:
+            self._sumar(x, y, signo=1.0)
+
+
+class IndicadoresTendencia:
+    """Tendencia de la temperatura ambiente calculada al llegar cada muestra.
+
+    Attributes:
+        umbral: Pendiente (°C/min) a partir de la cual la temperatura se
+            considera subiendo o bajando.
+    """
+
+    def __init__(self, ventana: int = 6, umbral: float = 1.2) -> None:
+        """Inicializar sin muestras.
+
+        Args:
+            ventana: Muestras de la regresión (default: 6).
+            umbral: Pendiente mínima en °C/min para dejar de ser 'estable'
+                (default: 1.2, los 0.2 °C por lectura de 10 s que usaba
+                tendencia.js).
+        """
+        self.umbral = umbral
+        self._regresion = RegresionMovil(ventana)
+        self._lock = threading.Lock()
+
+    def agregar(self, instante: float, estado: dict) -> None:
+        """Incorporar una muestra de estado.
+
+        Args:
+            instante: Segundos desde epoch de la muestra.
+            estado: Dict de /termostato/; sin temperatura_ambiente numérica
+                se ignora.
+        """
+        temperatura = numero_opcional(estado.get('temperatura_ambiente'))
+        if temperatura is None:
+            return
+        with self._lock:
+            self._regresion.agregar(instante, temperatura)
+
+    def tendencia(self, temp_actual: Optional[float], temp_deseada: Optional[float]) -> dict:
+        """Tendencia actual respecto a la temperatura deseada.
+
+        Args:
+            temp_actual: Temperatura ambiente actual.
+            temp_deseada: Temperatura objetivo.
+
+        Returns:
+            Dict con 'direccion' ('subiendo' / 'bajando' / 'estable'),
+            'pendiente' (°C/min, None con menos de 2 muestras), 'acercando'
+            (True / False / None si no cambia la distancia a la deseada
+            respecto a la muestra más antigua) y 'muestras'.
+        """
+        with self._lock:
+            pendiente = self._regresion.pendiente()
+            primera = self._regresion.primera
+            muestras = len(self._regresion)
+        if pendiente is not None:
+            pendiente *= 60
+
+        acercando = None
+        if muestras >= 2 and temp_actual is not None and temp_deseada is not None:
+            acercando = _acercando(temp_actual, primera[1], temp_deseada)
+
+        return {
+            'direccion': _direccion(pendiente, self.umbral),
+            'pendiente': None if pendiente is None else round(pendiente, 3),
+            'acercando': acercando,
+            'muestras': muestras,
+        }
+
+
+def _direccion(pendiente: Optional[float], umbral: float) -> str:
+    """'subiendo' / 'bajando' si la pendiente (°C/min) supera el umbral, si no 'estable'."""
+    if pendiente is not None and pendiente > umbral:
+        return 'subiendo'
+    if pendiente is not None and pendiente < -umbral:
+        return 'bajando'
+    return 'estable'
+
+
+def _acercando(actual: float, anterior: float, deseada: float) -> Optional[bool]:
+    """True / False si la distancia a la deseada baja / sube más que la histéresis, si no None."""
+    distancia_actual = abs(actual - deseada)
+    distancia_anterior = abs(anterior - deseada)
+    if distancia_actual < distancia_anterior - _HISTERESIS_ACERCANDO:
+        return True
+    if distancia_actual > distancia_anterior + _HISTERESIS_ACERCANDO:
+        return False
+    return None
+
+
+def calcular_diferencia(temp_actual: float, temp_deseada: float) -> dict:
+    """Diferencia entre temperatura ambiente y deseada (WT-11).
+
+    Args:
+        temp_actual: Temperatura ambiente.
+        temp_deseada: Temperatura objetivo.
+
+    Returns:
+        Dict con 'diferencia' (actual - deseada), 'absoluta', 'estado'
+        ('ok' / 'frio' / 'calor') y 'porcentaje' de la barra (100 en
+        objetivo, 0 a DIFERENCIA_MAXIMA o más).
+    """
+    diferencia = temp_actual - temp_deseada
+    absoluta = abs(diferencia)
+    if absoluta <= DIFERENCIA_EN_OBJETIVO:
+        estado = 'ok'
+    elif diferencia < 0:
+        estado = 'frio'
+    else:
+        estado = 'calor'
+    porcentaje = max(0.0, min(100.0, (1 - absoluta / DIFERENCIA_MAXIMA) * 100))
+    return {
+        'diferencia': round(diferencia, 3),
+        'absoluta': round(absoluta, 3),
+        'estado': estado,
+        'porcentaje': round(porcentaje, 1),
+    }
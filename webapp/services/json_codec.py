@@ -0,0 +1,137 @@
+"""
+Codec JSON intercambiable para el cliente HTTP y las respuestas Flask.
+Usa orjson si está instalado y la librería estándar en caso contrario.
+"""
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+class JsonCodec(ABC):
+    """Interfaz abstracta para codificar y decodificar JSON.
+
+    Attributes:
+        nombre: Identificador del codec (ej: 'json', 'orjson').
+    """
+
+    nombre: str = ''
+
+    @abstractmethod
+    def loads(self, datos: Union[bytes, str]) -> Any:
+        """Decodificar un documento JSON.
+
+        Args:
+            datos: Documento JSON en bytes UTF-8 o str.
+
+        Returns:
+            Objeto Python decodificado.
+
+        Raises:
+            ValueError: Si el documento no es JSON válido.
+        """
+
+    @abstractmethod
+    def dumps(
+        self,
+        obj: Any,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False
+    ) -> bytes:
+        """Codificar un objeto a JSON compacto en bytes UTF-8.
+
+        Args:
+            obj: Objeto a serializar.
+            default: Función para tipos no serializables de forma nativa.
+            sort_keys: Si True, ordena las claves de los objetos.
+
+        Returns:
+            Documento JSON en bytes UTF-8.
+
+        Raises:
+            TypeError: Si obj contiene tipos no serializables.
+        """
+
+
+class StdlibJsonCodec(JsonCodec):
+    """Codec basado en el módulo json de la librería estándar."""
+
+    nombre = 'json'
+
+    def loads(self, datos: Union[bytes, str]) -> Any:
+        """Decodificar con json.loads()."""
+        return json.loads(datos)
+
+    def dumps(
+        self,
+        obj: Any,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False
+    ) -> bytes:
+        """Codificar con json.dumps() en formato compacto."""
+        return json.dumps(
+            obj, default=default, sort_keys=sort_keys,
+            ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+
+
+class OrjsonJsonCodec(JsonCodec):
+    """Codec basado en orjson (extensión nativa).
+
+    datetime se delega en default para conservar el formato del llamador
+    (Flask usa fechas HTTP). Lo que orjson no admite (ej: enteros de más
+    de 64 bits) se reintenta con la librería estándar.
+    """
+
+    nombre = 'orjson'
+
+    def __init__(self) -> None:
+        """Inicializar el codec de respaldo."""
+        self._respaldo = StdlibJsonCodec()
+
+    def loads(self, datos: Union[bytes, str]) -> Any:
+        """Decodificar con orjson.loads()."""
+        return orjson.loads(datos)
+
+    def dumps(
+        self,
+        obj: Any,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False
+    ) -> bytes:
+        """Codificar con orjson.dumps(), con respaldo en la librería estándar."""
+        opciones = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            opciones |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=opciones)
+        except orjson.JSONEncodeError:
+            return self._respaldo.dumps(obj, default=default, sort_keys=sort_keys)
+
+
+CODECS: Dict[str, Callable[[], JsonCodec]] = {'json': StdlibJsonCodec}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonJsonCodec
+
+
+def crear_codec(nombre: Optional[str] = None) -> JsonCodec:
+    """Crear el codec indicado o el más rápido disponible.
+
+    Args:
+        nombre: Clave de CODECS ('json', 'orjson'). None = el más rápido.
+
+    Returns:
+        Instancia de JsonCodec.
+
+    Raises:
+        ValueError: Si el codec pedido no está disponible.
+    """
+    if nombre is None:
+        nombre = 'orjson' if 'orjson' in CODECS else 'json'
+    if nombre not in CODECS:
+        raise ValueError(f"Codec JSON no disponible: {nombre}")
+    return CODECS[nombre]()
@@ -0,0 +1,192 @@
+"""
+Parser JSON incremental para respuestas grandes del backend.
+Decodifica un objeto JSON a partir de bloques de bytes y lee registro a
+registro el array indicado, pudiendo detenerse tras un número máximo de
+registros sin descargar ni parsear el resto del cuerpo.
+"""
+import codecs
+import json
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+_ESPACIOS = ' \t\n\r'
+# Caracteres con los que un número JSON puede continuar
+_CONTINUA_NUMERO = frozenset('.eE+-0123456789')
+
+# Claves de objeto compartidas entre registros (acotado: el backend usa pocas)
+_CLAVES: dict = {}
+_MAX_CLAVES = 256
+
+
+def _compactar_objeto(pares: List[Tuple[str, Any]]) -> dict:
+    """Construir un dict reutilizando una única instancia de cada clave.
+
+    raw_decode() no comparte las claves entre llamadas: sin esto cada uno
+    de los 1440 registros del historial tendría sus propios strings de clave.
+    """
+    if len(_CLAVES) >= _MAX_CLAVES:
+        return dict(pares)
+    return {_CLAVES.setdefault(clave, clave): valor for clave, valor in pares}
+
+
+_DECODER = json.JSONDecoder(object_pairs_hook=_compactar_objeto)
+
+
+class _Lector:
+    """Buffer de texto alimentado bajo demanda desde un iterador de bloques.
+
+    Attributes:
+        texto: Texto decodificado pendiente de consumir.
+        pos: Posición de lectura dentro de texto.
+    """
+
+    def __init__(self, bloques: Iterable[bytes]) -> None:
+        """Inicializar el lector sobre un iterable de bloques de bytes."""
+        self._bloques = iter(bloques)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._agotado = False
+        self.texto = ''
+        self.pos = 0
+
+    def cargar(self) -> bool:
+        """Añadir el siguiente bloque al buffer descartando lo ya consumido.
+
+        Returns:
+            True si se añadió texto, False si el flujo está agotado.
+        """
+        if self._agotado:
+            return False
+        fragmento = ''
+        for bloque in self._bloques:
+            fragmento = self._utf8.decode(bloque)
+            if fragmento:
+                break
+        else:
+            fragmento = self._utf8.decode(b'', final=True)
+            self._agotado = True
+        self.texto = self.texto[self.pos:] + fragmento
+        self.pos = 0
+        return bool(fragmento)
+
+    def siguiente(self) -> str:
+        """Saltar espacios y devolver el siguiente carácter sin consumirlo.
+
+        Raises:
+            json.JSONDecodeError: Si el flujo termina antes de tiempo.
+        """
+        while True:
+            while self.pos < len(self.texto) and self.texto[self.pos] in _ESPACIOS:
+                self.pos += 1
+            if self.pos < len(self.texto):
+                return self.texto[self.pos]
+            if not self.cargar():
+                raise json.JSONDecodeError('Fin inesperado del flujo', self.texto, self.pos)
+
+    def consumir(self, esperado: str) -> None:
+        """Consumir el carácter esperado o lanzar JSONDecodeError."""
+        if self.siguiente() != esperado:
+            raise json.JSONDecodeError(f'Se esperaba {esperado!r}', self.texto, self.pos)
+        self.pos += 1
+
+    def valor(self) -> Any:
+        """Decodificar el siguiente valor JSON completo del flujo."""
+        self.siguiente()
+        while True:
+            try:
+                valor, fin = _DECODER.raw_decode(self.texto, self.pos)
+            except json.JSONDecodeError:
+                if self.cargar():
+                    continue
+                raise
+            # Un número al final del buffer, o cortado tras '.' o 'e', puede
+            # continuar en el siguiente bloque
+            if self._numero_abierto(valor, fin) and self.cargar():
+                continue
+            self.pos = fin
+            return valor
+
+    def _numero_abierto(self, valor: Any, fin: int) -> bool:
+        """True si valor es un número que podría seguir tras la posición fin."""
+        if not isinstance(valor, (int, float)) or isinstance(valor, bool):
+            return False
+        return fin == len(self.texto) or self.texto[fin] in _CONTINUA_NUMERO
+
+    def elementos(self) -> Iterator[Any]:
+        """Iterar los elementos del array que comienza en la posición actual."""
+        self.consumir('[')
+        if self.siguiente() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.valor()
+            if self.siguiente() == ']':
+                self.pos += 1
+                return
+            self.consumir(',')
+
+
+def parsear_objeto(
+    bloques: Iterable[bytes],
+    clave_flujo: str,
+    limite: Optional[int] = None,
+    parar: Optional[Callable[[Any], bool]] = None
+) -> dict:
+    """Parsear un objeto JSON leyendo incrementalmente uno de sus arrays.
+
+    Los valores del resto de claves se decodifican completos. El array de
+    clave_flujo se lee registro a registro; al alcanzar limite, o al leer
+    un registro para el que parar() es verdadero (que no se incluye), se
+    deja de leer el flujo y las claves posteriores no aparecen en el
+    resultado.
+
+    Args:
+        bloques: Bloques de bytes UTF-8 del cuerpo (ej: iter_content()).
+        clave_flujo: Clave del array a leer incrementalmente (ej: 'historial').
+        limite: Número máximo de registros del array. None = todos.
+        parar: Predicado sobre cada registro que corta la lectura. None =
+            solo se corta por limite.
+
+    Returns:
+        Dict con las claves leídas del objeto.
+
+    Raises:
+        json.JSONDecodeError: Si el cuerpo no es JSON válido o está truncado.
+    """
+    lector = _Lector(bloques)
+    resultado: dict = {}
+    lector.consumir('{')
+    if lector.siguiente() == '}':
+        return resultado
+    while True:
+        clave = lector.valor()
+        lector.consumir(':')
+        if clave == clave_flujo and lector.siguiente() == '[':
+            resultado[clave] = []
+            if not _leer_registros(lector, resultado[clave], limite, parar):
+                return resultado
+        else:
+            resultado[clave] = lector.valor()
+        if lector.siguiente() == '}':
+            return resultado
+        lector.consumir(',')
+
+
+def _leer_registros(
+    lector: _Lector,
+    registros: list,
+    limite: Optional[int],
+    parar: Optional[Callable[[Any], bool]]
+) -> bool:
+    """Añadir a registros los elementos del array hasta limite o parar.
+
+    Returns:
+        True si se leyó el array completo, False si la lectura se cortó.
+    """
+    if limite is not None and limite <= 0:
+        return False
+    for registro in lector.elementos():
+        if parar is not None and parar(registro):
+            return False
+        registros.append(registro)
+        if limite is not None and len(registros) >= limite:
+            return False
+    return True
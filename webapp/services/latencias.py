@@ -0,0 +1,137 @@
+"""
+Ventana deslizante de latencias observadas por endpoint del backend.
+Base para decisiones que dependen de la distribución reciente de
+latencias (hedging, timeouts adaptativos).
+"""
+import math
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+def clave_endpoint(path: str) -> str:
+    """Normalizar un path a su endpoint, descartando la query string.
+
+    Args:
+        path: Ruta consultada (ej: '/termostato/historial/?limite=60').
+
+    Returns:
+        Ruta sin query (ej: '/termostato/historial/').
+    """
+    return path.split('?', 1)[0]
+
+
+class VentanaLatencias:
+    """Últimas N latencias por endpoint, thread-safe.
+
+    Attributes:
+        _tamano: Número máximo de muestras conservadas por endpoint.
+        _muestras: Dict endpoint -> deque de latencias en segundos.
+        _lock: Lock para acceso thread-safe.
+    """
+
+    def __init__(self, tamano: int = 200) -> None:
+        """Inicializar ventanas vacías.
+
+        Args:
+            tamano: Muestras conservadas por endpoint (default: 200).
+        """
+        self._tamano = tamano
+        self._muestras: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, path: str, segundos: float) -> None:
+        """Añadir una latencia observada para el endpoint de path.
+
+        Args:
+            path: Ruta consultada (se normaliza con clave_endpoint()).
+            segundos: Latencia observada en segundos.
+        """
+        clave = clave_endpoint(path)
+        with self._lock:
+            ventana = self._muestras.get(clave)
+            if ventana is None:
+                ventana = self._muestras[clave] = deque(maxlen=self._tamano)
+            ventana.append(segundos)
+
+    def cantidad(self, path: str) -> int:
+        """Número de muestras disponibles para el endpoint de path."""
+        with self._lock:
+            return len(self._muestras.get(clave_endpoint(path), ()))
+
+    def percentil(self, path: str, p: float, min_muestras: int = 1) -> Optional[float]:
+        """Percentil p (0-1) de las latencias del endpoint, por rango más cercano.
+
+        Args:
+            path: Ruta consultada (se normaliza con clave_endpoint()).
+            p: Percentil en el intervalo (0, 1] (ej: 0.95).
+            min_muestras: Muestras mínimas para que el valor sea fiable.
+
+        Returns:
+            Latencia en segundos, o None si hay menos de min_muestras.
+        """
+        with self._lock:
+            muestras = sorted(self._muestras.get(clave_endpoint(path), ()))
+        if not muestras or len(muestras) < min_muestras:
+            return None
+        indice = max(0, math.ceil(p * len(muestras)) - 1)
+        return muestras[indice]
+
+
+class TimeoutAdaptativo:
+    """Timeouts por endpoint derivados de la latencia observada.
+
+    El timeout es percentil x factor, acotado entre minimo y el máximo
+    que indique el llamador. Mientras un endpoint no tenga min_muestras
+    se usa el máximo. Los timeouts se registran como latencias iguales
+    al timeout usado, para que un backend que se ralentiza empuje el
+    percentil hacia arriba en lugar de provocar timeouts en cadena.
+
+    Attributes:
+        percentil: Percentil de latencia de referencia (ej: 0.99).
+        factor: Multiplicador aplicado al percentil.
+        minimo: Timeout mínimo en segundos.
+        min_muestras: Muestras necesarias para adaptar el timeout.
+    """
+
+    def __init__(
+        self,
+        percentil: float = 0.99,
+        factor: float = 3.0,
+        minimo: float = 0.5,
+        min_muestras: int = 20,
+        tamano: int = 200
+    ) -> None:
+        """Inicializar la política con una ventana vacía.
+
+        Args:
+            percentil: Percentil de latencia de referencia (default: p99).
+            factor: Multiplicador aplicado al percentil (default: 3).
+            minimo: Timeout mínimo en segundos (default: 0.5).
+            min_muestras: Muestras necesarias por endpoint (default: 20).
+            tamano: Muestras conservadas por endpoint (default: 200).
+        """
+        self.percentil = percentil
+        self.factor = factor
+        self.minimo = minimo
+        self.min_muestras = min_muestras
+        self._latencias = VentanaLatencias(tamano)
+
+    def registrar(self, path: str, segundos: float) -> None:
+        """Registrar la duración de una petición (o el timeout agotado)."""
+        self._latencias.registrar(path, segundos)
+
+    def timeout(self, path: str, maximo: float) -> float:
+        """Timeout a usar para path, nunca superior a maximo.
+
+        Args:
+            path: Ruta a consultar (se normaliza con clave_endpoint()).
+            maximo: Timeout máximo admitido por el llamador.
+
+        Returns:
+            Timeout en segundos.
+        """
+        referencia = self._latencias.percentil(path, self.percentil, self.min_muestras)
+        if referencia is None:
+            return maximo
+        return min(maximo, max(self.minimo, referencia * self.factor))
@@ -0,0 +1,205 @@
+"""
+Decorador de ApiClient que limita la carga enviada al backend.
+Combina un máximo de peticiones en vuelo (semáforo) con un límite de
+peticiones por segundo por endpoint (token bucket). Las peticiones que
+no obtienen turno dentro de la espera máxima se rechazan con
+ApiSaturadaError, que el servicio trata como cualquier otro ApiError.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from webapp.services.api_client import ApiClient, ApiSaturadaError, tiempo_restante
+from webapp.services.latencias import clave_endpoint
+
+
+class CuboTokens:
+    """Token bucket thread-safe con reserva de turno.
+
+    Cada petición reserva un token aunque el cubo esté vacío (el saldo
+    queda negativo) y espera el tiempo necesario para que se repague,
+    de modo que las peticiones en cola se atienden en orden de llegada.
+
+    Attributes:
+        tasa: Tokens repuestos por segundo (peticiones por segundo).
+        capacidad: Tokens máximos acumulables (ráfaga admitida).
+    """
+
+    def __init__(self, tasa: float, capacidad: Optional[float] = None) -> None:
+        """Inicializar el cubo lleno.
+
+        Args:
+            tasa: Peticiones por segundo sostenidas.
+            capacidad: Ráfaga máxima. None = igual a tasa (mínimo 1).
+        """
+        self.tasa = tasa
+        self.capacidad = capacidad if capacidad is not None else max(1.0, tasa)
+        self._tokens = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self, espera_maxima: float) -> Optional[float]:
+        """Reservar un token si el turno llega dentro de espera_maxima.
+
+        Args:
+            espera_maxima: Segundos máximos que el llamador puede esperar.
+
+        Returns:
+            Segundos a esperar antes de usar el token, o None si se rechaza.
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            espera = 0.0 if self._tokens >= 1.0 else (1.0 - self._tokens) / self.tasa
+            if espera > espera_maxima:
+                return None
+            self._tokens -= 1.0
+            return espera
+
+    def devolver(self) -> None:
+        """Devolver un token reservado que no llegó a usarse."""
+        with self._lock:
+            self._tokens = min(self.capacidad, self._tokens + 1.0)
+
+
+# Límites configurados más los contadores que expone metricas()
+class LimitadorApiClient(ApiClient):  # pylint: disable=too-many-instance-attributes
+    """ApiClient que acota concurrencia y QPS por endpoint hacia el backend.
+
+    Attributes:
+        _cliente: ApiClient decorado que realiza las peticiones reales.
+        _espera_maxima: Segundos máximos de cola antes de rechazar.
+        _qps: Peticiones por segundo por defecto para cada endpoint.
+        _qps_por_endpoint: Límites específicos por endpoint.
+        _semaforo: Semáforo de peticiones en vuelo.
+        _cubos: Token bucket por endpoint, creados bajo demanda.
+    """
+
+    def __init__(
+        self,
+        cliente: ApiClient,
+        max_en_vuelo: int = 8,
+        qps: float = 10.0,
+        qps_por_endpoint: Optional[Dict[str, float]] = None,
+        espera_maxima: float = 1.0
+    ) -> None:
+        """Inicializar el limitador sobre un ApiClient existente.
+
+        Args:
+            cliente: ApiClient a decorar.
+            max_en_vuelo: Peticiones simultáneas máximas al backend.
+            qps: Peticiones por segundo por endpoint (default: 10).
+            qps_por_endpoint: Límites específicos, ej: {'/comprueba/': 1}.
+            espera_maxima: Segundos máximos de cola (default: 1).
+        """
+        self._cliente = cliente
+        self._max_en_vuelo = max_en_vuelo
+        self._espera_maxima = espera_maxima
+        self._qps = qps
+        self._qps_por_endpoint = qps_por_endpoint or {}
+        self._semaforo = threading.BoundedSemaphore(max_en_vuelo)
+        self._cubos: Dict[str, CuboTokens] = {}
+        self._lock = threading.Lock()
+        self._en_vuelo = 0
+        self._max_en_vuelo_observado = 0
+        self._contadores: Dict[str, Dict[str, float]] = {}
+
+    def precalentar(self, conexiones: int = 1) -> int:
+        """Delegar el precalentamiento en el cliente decorado."""
+        return self._cliente.precalentar(conexiones)
+
+    def get(self, path: str, **kwargs: Any) -> dict:
+        """Realizar GET respetando los límites de concurrencia y QPS.
+
+        La espera en cola se acota por espera_maxima y por el deadline
+        recibido en kwargs, si lo hay.
+
+        Args:
+            path: Ruta relativa del endpoint (ej: '/termostato/').
+            **kwargs: Argumentos pasados al cliente decorado.
+
+        Returns:
+            Dict con la respuesta del cliente decorado.
+
+        Raises:
+            ApiSaturadaError: Si no hay turno dentro de la espera máxima.
+            ApiError (o subclase): Errores del cliente decorado.
+        """
+        endpoint = clave_endpoint(path)
+        inicio = time.monotonic()
+        espera_maxima = self._espera_maxima
+        restante = tiempo_restante(kwargs.get('deadline'))
+        if restante is not None:
+            espera_maxima = max(0.0, min(espera_maxima, restante))
+
+        espera = self._cubo(endpoint).reservar(espera_maxima)
+        if espera is None:
+            self._contar(endpoint, 'rechazadas_qps')
+            raise ApiSaturadaError(f"Cuota de peticiones agotada para {endpoint}")
+        if espera > 0:
+            time.sleep(espera)
+
+        restante_cola = max(0.0, espera_maxima - (time.monotonic() - inicio))
+        if not self._semaforo.acquire(timeout=restante_cola):  # pylint: disable=consider-using-with
+            # La petición no llega al backend: no debe consumir cuota
+            self._cubo(endpoint).devolver()
+            self._contar(endpoint, 'rechazadas_concurrencia')
+            raise ApiSaturadaError(f"Demasiadas peticiones en vuelo hacia {endpoint}")
+        self._contar(endpoint, 'admitidas', espera=time.monotonic() - inicio)
+        with self._lock:
+            self._en_vuelo += 1
+            self._max_en_vuelo_observado = max(self._max_en_vuelo_observado, self._en_vuelo)
+        try:
+            return self._cliente.get(path, **kwargs)
+        finally:
+            with self._lock:
+                self._en_vuelo -= 1
+            self._semaforo.release()
+
+    def metricas(self) -> dict:
+        """Instantánea de las métricas del limitador.
+
+        Returns:
+            Dict con en_vuelo, max_en_vuelo (límite y observado) y, por
+            endpoint, admitidas, rechazos y espera media / máxima en ms.
+        """
+        with self._lock:
+            endpoints = {}
+            for endpoint, c in self._contadores.items():
+                endpoints[endpoint] = {
+                    'admitidas': int(c['admitidas']),
+                    'rechazadas_qps': int(c['rechazadas_qps']),
+                    'rechazadas_concurrencia': int(c['rechazadas_concurrencia']),
+                    'espera_media_ms': round(c['espera_total'] / c['admitidas'] * 1000, 3)
+                    if c['admitidas'] else 0.0,
+                    'espera_max_ms': round(c['espera_max'] * 1000, 3),
+                }
+            return {
+                'en_vuelo': self._en_vuelo,
+                'max_en_vuelo': self._max_en_vuelo,
+                'max_en_vuelo_observado': self._max_en_vuelo_observado,
+                'endpoints': endpoints,
+            }
+
+    def _cubo(self, endpoint: str) -> CuboTokens:
+        """Token bucket del endpoint, creado en el primer uso."""
+        with self._lock:
+            cubo = self._cubos.get(endpoint)
+            if cubo is None:
+                tasa = self._qps_por_endpoint.get(endpoint, self._qps)
+                cubo = self._cubos[endpoint] = CuboTokens(tasa)
+            return cubo
+
+    def _contar(self, endpoint: str, contador: str, espera: float = 0.0) -> None:
+        """Incrementar un contador del endpoint y acumular la espera."""
+        with self._lock:
+            c = self._contadores.get(endpoint)
+            if c is None:
+                c = self._contadores[endpoint] = {
+                    'admitidas': 0, 'rechazadas_qps': 0, 'rechazadas_concurrencia': 0,
+                    'espera_total': 0.0, 'espera_max': 0.0,
+                }
+            c[contador] += 1
+            c['espera_total'] += espera
+            c['espera_max'] = max(c['espera_max'], espera)
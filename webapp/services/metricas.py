@@ -0,0 +1,161 @@
+"""
+Métricas de las peticiones al backend por endpoint.
+MetricasApi acumula histogramas de latencia, códigos de estado, bytes
+recibidos, tiempo de decodificación y excepciones. Cada registro es una
+búsqueda binaria y unos incrementos bajo un lock, sin guardar muestras.
+"""
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence
+
+from webapp.services.latencias import clave_endpoint
+
+# Límites superiores (segundos) de los buckets del histograma de latencia
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Un contador por métrica exportada en la instantánea
+class _Contadores:  # pylint: disable=too-many-instance-attributes
+    """Contadores acumulados de un endpoint."""
+
+    __slots__ = (
+        'buckets', 'peticiones', 'latencia_total', 'latencia_max',
+        'estados', 'bytes_recibidos', 'decodificacion_total', 'decodificaciones',
+        'excepciones'
+    )
+
+    def __init__(self, num_buckets: int) -> None:
+        """Inicializar a cero; num_buckets incluye el bucket +Inf."""
+        self.buckets: List[int] = [0] * num_buckets
+        self.peticiones = 0
+        self.latencia_total = 0.0
+        self.latencia_max = 0.0
+        self.estados: Dict[int, int] = {}
+        self.bytes_recibidos = 0
+        self.decodificacion_total = 0.0
+        self.decodificaciones = 0
+        self.excepciones: Dict[str, int] = {}
+
+
+class MetricasApi:
+    """Métricas acumuladas de las peticiones al backend, por endpoint.
+
+    El endpoint es el path sin query string (ver clave_endpoint), así
+    '/termostato/historial/?limite=60' y '?limite=1440' se agregan juntos.
+
+    Además de lo registrado por el cliente HTTP, la instantánea incluye las
+    métricas de las fuentes agregadas (ej: el limitador o el hedging).
+    """
+
+    def __init__(self, limites: Sequence[float] = LIMITES_LATENCIA) -> None:
+        """Inicializar las métricas vacías.
+
+        Args:
+            limites: Límites superiores crecientes de los buckets de
+                latencia en segundos. Se añade un bucket final +Inf.
+        """
+        self._limites = tuple(limites)
+        self._contadores: Dict[str, _Contadores] = {}
+        self._fuentes: Dict[str, Callable[[], dict]] = {}
+        self._lock = threading.Lock()
+
+    # Un argumento por dato de la petición; el cliente los pasa por nombre
+    def registrar(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        path: str,
+        latencia: float,
+        estado: Optional[int] = None,
+        bytes_recibidos: int = 0,
+        decodificacion: Optional[float] = None,
+        excepcion: Optional[str] = None
+    ) -> None:
+        """Registrar una petición terminada (con éxito o con error).
+
+        Args:
+            path: Ruta consultada (se agrega por endpoint).
+            latencia: Duración total de la petición en segundos.
+            estado: Código de estado HTTP, o None si no hubo respuesta.
+            bytes_recibidos: Bytes del cuerpo leídos de la red.
+            decodificacion: Segundos dedicados a decodificar el JSON, o
+                None si no llegó a decodificarse.
+            excepcion: Nombre de la excepción lanzada al llamador, o None.
+        """
+        bucket = bisect_left(self._limites, latencia)
+        endpoint = clave_endpoint(path)
+        with self._lock:
+            c = self._contadores.get(endpoint)
+            if c is None:
+                c = self._contadores[endpoint] = _Contadores(len(self._limites) + 1)
+            c.buckets[bucket] += 1
+            c.peticiones += 1
+            c.latencia_total += latencia
+            c.latencia_max = max(c.latencia_max, latencia)
+            if estado is not None:
+                c.estados[estado] = c.estados.get(estado, 0) + 1
+            c.bytes_recibidos += bytes_recibidos
+            if decodificacion is not None:
+                c.decodificacion_total += decodificacion
+                c.decodificaciones += 1
+            if excepcion is not None:
+                c.excepciones[excepcion] = c.excepciones.get(excepcion, 0) + 1
+
+    def agregar_fuente(self, nombre: str, fuente: Callable[[], dict]) -> None:
+        """Incluir en la instantánea las métricas de otro componente.
+
+        Args:
+            nombre: Clave bajo la que aparecen (ej: 'limitador').
+            fuente: Función sin argumentos que devuelve un dict serializable.
+        """
+        self._fuentes[nombre] = fuente
+
+    def instantanea(self) -> dict:
+        """Instantánea serializable a JSON de todas las métricas.
+
+        Los percentiles se estiman con el límite superior del bucket donde
+        caen, así que son cotas superiores con la resolución de los buckets.
+
+        Returns:
+            Dict con 'endpoints' (métricas por endpoint) y una clave por
+            cada fuente agregada.
+        """
+        with self._lock:
+            endpoints = {endpoint: self._resumir(c) for endpoint, c in self._contadores.items()}
+        resultado: dict = {'endpoints': endpoints}
+        for nombre, fuente in self._fuentes.items():
+            resultado[nombre] = fuente()
+        return resultado
+
+    def reiniciar(self) -> None:
+        """Descartar todo lo registrado (las fuentes se mantienen)."""
+        with self._lock:
+            self._contadores.clear()
+
+    def _resumir(self, c: _Contadores) -> dict:
+        """Resumen de los contadores de un endpoint (con el lock tomado)."""
+        etiquetas = [f'{limite * 1000:g}' for limite in self._limites] + ['+Inf']
+        return {
+            'peticiones': c.peticiones,
+            'latencia_ms': {
+                'media': round(c.latencia_total / c.peticiones * 1000, 3),
+                'max': round(c.latencia_max * 1000, 3),
+                'p50': self._percentil(c, 0.50),
+                'p95': self._percentil(c, 0.95),
+                'p99': self._percentil(c, 0.99),
+                'buckets': dict(zip(etiquetas, c.buckets)),
+            },
+            'estados': {str(estado): cantidad for estado, cantidad in sorted(c.estados.items())},
+            'bytes_recibidos': c.bytes_recibidos,
+            'decodificacion_media_ms': round(c.decodificacion_total / c.decodificaciones * 1000, 3)
+            if c.decodificaciones else 0.0,
+            'excepciones': dict(c.excepciones),
+        }
+
+    def _percentil(self, c: _Contadores, p: float) -> Optional[float]:
+        """Cota superior en ms del percentil p, o None si cae en +Inf."""
+        objetivo = p * c.peticiones
+        acumulado = 0
+        for limite, cantidad in zip(self._limites, c.buckets):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                return limite * 1000
+        return None
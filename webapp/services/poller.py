@@ -0,0 +1,88 @@
+"""
+Poller en segundo plano que ejecuta una tarea a intervalo fijo.
+Permite refrescar el estado del backend en caché con una cadencia
+independiente del número de navegadores conectados.
+"""
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class Poller:
+    """Thread daemon que ejecuta una tarea cada `intervalo` segundos.
+
+    La cadencia es fija respecto al arranque (sin deriva): si una ejecución
+    tarda, la siguiente espera menos; si tarda más de un intervalo, se
+    salta el turno perdido en lugar de encadenar ejecuciones.
+
+    Attributes:
+        intervalo: Segundos entre ejecuciones.
+        ejecuciones: Veces que se ejecutó la tarea.
+        errores: Ejecuciones que lanzaron una excepción o devolvieron False.
+    """
+
+    def __init__(self, tarea: Callable[[], Any], intervalo: float, nombre: str = 'poller') -> None:
+        """Inicializar el poller sin arrancarlo.
+
+        Args:
+            tarea: Función sin argumentos a ejecutar en cada ciclo. Si
+                devuelve False (ej: refrescar_estado con el backend caído)
+                el ciclo cuenta como error.
+            intervalo: Segundos entre ejecuciones.
+            nombre: Nombre del thread (visible en volcados de threads).
+        """
+        self.intervalo = intervalo
+        self.ejecuciones: int = 0
+        self.errores: int = 0
+        self._tarea = tarea
+        self._nombre = nombre
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def activo(self) -> bool:
+        """True si el thread del poller está en marcha."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self) -> 'Poller':
+        """Arrancar el thread (la primera ejecución es inmediata)."""
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._bucle, name=self._nombre, daemon=True)
+        self._thread.start()
+        return self
+
+    def detener(self, timeout: Optional[float] = None) -> None:
+        """Pedir la parada y esperar a que termine la ejecución en curso.
+
+        Args:
+            timeout: Segundos máximos de espera. None = sin límite.
+        """
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def metricas(self) -> dict:
+        """Instantánea de los contadores del poller."""
+        return {
+            'activo': self.activo,
+            'intervalo': self.intervalo,
+            'ejecuciones': self.ejecuciones,
+            'errores': self.errores,
+        }
+
+    def _bucle(self) -> None:
+        """Ejecutar la tarea en cada múltiplo del intervalo hasta detener()."""
+        inicio = time.monotonic()
+        while True:
+            try:
+                if self._tarea() is False:
+                    self.errores += 1
+            except Exception:  # pylint: disable=broad-except
+                # Un fallo puntual no debe matar el thread: se reintenta
+                # en el siguiente ciclo
+                self.errores += 1
+            self.ejecuciones += 1
+            transcurrido = time.monotonic() - inicio
+            espera = self.intervalo - transcurrido % self.intervalo
+            if self._parar.wait(espera):
+                return
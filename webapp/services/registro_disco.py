@@ -0,0 +1,218 @@
+"""
+Registro en disco de las muestras de estado del termostato.
+Fichero append-only de registros de ancho fijo: se escribe una muestra por
+intervalo y se lee con mmap como un array NumPy estructurado, sin parsear
+registro a registro. El histórico sobrevive a los reinicios y el historial
+se sirve sin llamar al backend.
+"""
+import atexit
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from webapp.services.serie_estado import ESTADOS_CLIMATIZADOR, numero
+from webapp.services.series import epoch_ms_reloj
+
+# Cabecera: firma, versión y tamaño de registro (16 bytes)
+FIRMA = b'TERMOLOG'
+VERSION = 1
+_CABECERA = struct.Struct('<8sII')
+
+# Registro: instante (s desde epoch), temperatura ambiente, deseada,
+# batería (NaN = sin dato) y climatizador (-1 = desconocido), 24 bytes
+_REGISTRO = struct.Struct('<dfffb3x')
+DTYPE_REGISTRO = np.dtype({
+    'names': ['instante', 'temperatura_ambiente', 'temperatura_deseada', 'carga_bateria', 'climatizador'],
+    'formats': ['<f8', '<f4', '<f4', '<f4', 'i1'],
+    'offsets': [0, 8, 12, 16, 20],
+    'itemsize': _REGISTRO.size,
+})
+
+_CODIGO_CLIMATIZADOR = {estado: codigo for codigo, estado in enumerate(ESTADOS_CLIMATIZADOR)}
+
+
+class RegistroDisco:
+    """Log binario append-only de muestras de estado.
+
+    Las muestras que llegan antes de `intervalo` desde la última guardada
+    se descartan: con el intervalo por defecto hay un registro por minuto,
+    como en /termostato/historial/, y un día ocupa 34 KB.
+
+    Cada escritura es un único write() sin fsync; tras una caída el sistema
+    puede perder las últimas muestras y un registro a medias se trunca al
+    abrir el fichero.
+
+    Attributes:
+        ruta: Ruta del fichero.
+        intervalo: Segundos mínimos entre muestras guardadas.
+    """
+
+    def __init__(self, ruta: str, intervalo: float = 60.0) -> None:
+        """Abrir (o crear) el registro.
+
+        Args:
+            ruta: Ruta del fichero; el directorio debe existir.
+            intervalo: Segundos mínimos entre muestras guardadas.
+
+        Raises:
+            ValueError: Si el fichero existe y no es un registro válido.
+        """
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._fichero = open(ruta, 'a+b')  # pylint: disable=consider-using-with
+        try:
+            self._cantidad, self._ultimo = self._abrir()
+        except ValueError:
+            self._fichero.close()
+            raise
+        atexit.register(self.cerrar)
+
+    def _abrir(self) -> Tuple[int, Optional[float]]:
+        """Validar o escribir la cabecera y descartar un registro incompleto.
+
+        Returns:
+            Tupla (cantidad de registros, instante del último o None).
+        """
+        tamano = os.fstat(self._fichero.fileno()).st_size
+        if tamano == 0:
+            self._fichero.write(_CABECERA.pack(FIRMA, VERSION, _REGISTRO.size))
+            self._fichero.flush()
+            return 0, None
+        self._fichero.seek(0)
+        cabecera = self._fichero.read(_CABECERA.size)
+        if len(cabecera) < _CABECERA.size or _CABECERA.unpack(cabecera) != (FIRMA, VERSION, _REGISTRO.size):
+            raise ValueError(f'{self.ruta} no es un registro de estado válido')
+        cantidad, sobrante = divmod(tamano - _CABECERA.size, _REGISTRO.size)
+        if sobrante:
+            self._fichero.truncate(tamano - sobrante)
+        if not cantidad:
+            return 0, None
+        self._fichero.seek(_CABECERA.size + (cantidad - 1) * _REGISTRO.size)
+        return cantidad, _REGISTRO.unpack(self._fichero.read(_REGISTRO.size))[0]
+
+    def __len__(self) -> int:
+        """Número de registros guardados."""
+        return self._cantidad
+
+    def agregar(self, instante: float, estado: dict) -> bool:
+        """Añadir una muestra al final del fichero.
+
+        Args:
+            instante: Segundos desde epoch de la muestra.
+            estado: Dict de /termostato/ (los campos ausentes o no numéricos
+                se guardan como sin dato).
+
+        Returns:
+            True si se guardó, False si se descartó por llegar antes de
+            intervalo desde la última muestra.
+        """
+        registro = _REGISTRO.pack(
+            instante,
+            numero(estado.get('temperatura_ambiente')),
+            numero(estado.get('temperatura_deseada')),
+            numero(estado.get('carga_bateria')),
+            _CODIGO_CLIMATIZADOR.get(estado.get('estado_climatizador'), -1),
+        )
+        with self._lock:
+            if self._ultimo is not None and instante - self._ultimo < self.intervalo:
+                return False
+            # En modo 'a' cada write() va al final aunque se haya leído antes
+            self._fichero.write(registro)
+            self._fichero.flush()
+            self._cantidad += 1
+            self._ultimo = instante
+            return True
+
+    def leer(self, limite: Optional[int] = None, desde: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Últimos registros, en columnas.
+
+        Args:
+            limite: Número máximo de registros (los más recientes). None =
+                todos.
+            desde: Si se indica (segundos desde epoch), solo los registros
+                con instante igual o posterior, dentro de los `limite` últimos.
+
+        Returns:
+            Dict con un array por campo de DTYPE_REGISTRO, en orden
+            cronológico. Son copias: no dependen del mapeo del fichero.
+        """
+        with self._lock:
+            cantidad = self._cantidad
+        if not cantidad:
+            return {campo: np.empty(0, DTYPE_REGISTRO[campo]) for campo in DTYPE_REGISTRO.names}
+        with open(self.ruta, 'rb') as fichero, \
+                mmap.mmap(fichero.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            registros = np.frombuffer(mapa, DTYPE_REGISTRO, count=cantidad, offset=_CABECERA.size)
+            inicio = cantidad - min(limite, cantidad) if limite is not None else 0
+            if desde is not None:
+                inicio = max(inicio, int(np.searchsorted(registros['instante'], desde)))
+            columnas = {campo: registros[campo][inicio:].copy() for campo in DTYPE_REGISTRO.names}
+            # El mapa no se puede cerrar mientras queden vistas sobre él
+            del registros
+        return columnas
+
+    def cubre(self, segundos: float, ahora: Optional[float] = None) -> bool:
+        """True si las muestras de los últimos `segundos` no dejan huecos.
+
+        Una muestra se guarda con la primera que llega pasado el intervalo,
+        así que la separación real es el intervalo más la cadencia del
+        poller o de los navegadores: se mide el tiempo cubierto, no el
+        número de registros. Se admiten huecos de hasta dos intervalos,
+        también desde el inicio del rango y hasta `ahora`; tras una parada
+        o con el backend caído el historial no se sirve desde aquí.
+
+        Args:
+            segundos: Duración del rango pedido, hasta `ahora`.
+            ahora: Segundos desde epoch de referencia. None = time.time().
+        """
+        ahora = time.time() if ahora is None else ahora
+        inicio = ahora - segundos
+        instantes = self.leer(desde=inicio)['instante']
+        if not instantes.size:
+            return False
+        bordes = np.concatenate(([inicio], instantes, [ahora]))
+        return bool(np.diff(bordes).max() <= 2 * self.intervalo)
+
+    def columnas(
+        self,
+        limite: int,
+        desde: Optional[int] = None,
+        inicio: Optional[float] = None
+    ) -> Tuple[Dict[str, np.ndarray], Optional[int]]:
+        """Últimos registros como columnas del historial (ver series.historial_a_columnas).
+
+        Los arrays de leer() se pasan tal cual a los codificadores, sin
+        construir un registro por muestra.
+
+        Args:
+            limite: Número máximo de registros.
+            desde: Cursor en epoch ms; solo registros posteriores.
+            inicio: Segundos desde epoch; solo registros desde ese instante
+                (el inicio del rango que se comprobó con cubre()).
+
+        Returns:
+            Tupla (columnas, cursor): 'timestamps' (epoch ms de la hora de
+            reloj, como los del backend; ver series.epoch_ms_reloj) y
+            'temperaturas' en orden cronológico, y el epoch en ms del más
+            reciente (el mismo desde, o None, si no hay ninguno).
+        """
+        columnas = self.leer(limite, inicio)
+        timestamps = epoch_ms_reloj(columnas['instante'])
+        temperaturas = columnas['temperatura_ambiente'].astype(np.float64).round(2)
+        if desde is not None:
+            # El cursor está en la convención del backend: se compara tras convertir
+            nuevos = timestamps > desde
+            timestamps, temperaturas = timestamps[nuevos], temperaturas[nuevos]
+        cursor = int(timestamps[-1]) if timestamps.size else desde
+        return {'timestamps': timestamps, 'temperaturas': temperaturas}, cursor
+
+    def cerrar(self) -> None:
+        """Cerrar el fichero; no se pueden añadir más muestras."""
+        with self._lock:
+            self._fichero.close()
@@ -0,0 +1,253 @@
+"""
+Agregados de la temperatura ambiente en varias resoluciones.
+Cada muestra actualiza el bucket abierto de cada nivel (1m, 5m, 1h) en
+O(1); los rangos largos se sirven desde el nivel más grueso que da la
+resolución pedida, sin recorrer las muestras originales.
+"""
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from webapp.services.series import columnas_a_historial, epoch_ms_reloj
+
+# Segundos entre registros de /termostato/historial/: limite=60 es una hora
+INTERVALO_HISTORIAL = 60
+
+# (nombre, segundos por bucket, capacidad por defecto).
+# Retención por defecto: 24 horas, 7 días y 30 días
+NIVELES = (('1m', 60, 1440), ('5m', 300, 2016), ('1h', 3600, 720))
+
+# Agregaciones que se pueden componer de forma incremental (p95 no)
+AGREGACIONES_ROLLUP = ('avg', 'min', 'max')
+
+
+# Una columna por agregado del bucket más la posición en el buffer circular
+class _Nivel:  # pylint: disable=too-many-instance-attributes
+    """Buckets cerrados de un nivel en un buffer circular, más el abierto.
+
+    Solo se consultan los buckets cerrados: el abierto sigue cambiando y
+    un cursor sobre él perdería sus muestras siguientes.
+    """
+
+    __slots__ = (
+        'segundos', 'capacidad', '_inicios', '_sumas', '_minimos', '_maximos',
+        '_muestras', '_siguiente', '_cantidad', '_abierto'
+    )
+
+    def __init__(self, segundos: int, capacidad: int) -> None:
+        """Inicializar el nivel vacío."""
+        self.segundos = segundos
+        self.capacidad = capacidad
+        self._inicios = np.zeros(capacidad)
+        self._sumas = np.zeros(capacidad)
+        self._minimos = np.zeros(capacidad)
+        self._maximos = np.zeros(capacidad)
+        self._muestras = np.zeros(capacidad, dtype=np.int64)
+        self._siguiente = 0
+        self._cantidad = 0
+        self._abierto: Optional[list] = None
+
+    def agregar(self, instante: float, valor: float) -> None:
+        """Sumar una muestra al bucket abierto, cerrándolo si cambia de bucket."""
+        inicio = instante // self.segundos * self.segundos
+        abierto = self._abierto
+        if abierto is not None and abierto[0] == inicio:
+            abierto[1] += valor
+            abierto[2] = min(abierto[2], valor)
+            abierto[3] = max(abierto[3], valor)
+            abierto[4] += 1
+            return
+        if abierto is not None:
+            self._cerrar(*abierto)
+        self._abierto = [inicio, valor, valor, valor, 1]
+
+    def _cerrar(self, inicio: float, suma: float, minimo: float, maximo: float, muestras: int) -> None:
+        """Guardar un bucket terminado, sobrescribiendo el más antiguo si está lleno."""
+        i = self._siguiente
+        self._inicios[i] = inicio
+        self._sumas[i] = suma
+        self._minimos[i] = minimo
+        self._maximos[i] = maximo
+        self._muestras[i] = muestras
+        self._siguiente = (i + 1) % self.capacidad
+        self._cantidad = min(self._cantidad + 1, self.capacidad)
+
+    def _orden(self, segundos: float) -> np.ndarray:
+        """Posiciones de los buckets cerrados de los últimos `segundos`, en orden cronológico."""
+        orden = (np.arange(self._cantidad) + self._siguiente - self._cantidad) % self.capacidad
+        if orden.size:
+            fin = self._inicios[orden[-1]] + self.segundos
+            orden = orden[np.searchsorted(self._inicios[orden], fin - segundos):]
+        return orden
+
+    def cubre(self, segundos: float, ahora: float) -> bool:
+        """True si hay un bucket cerrado por cada hueco de los últimos `segundos`.
+
+        Los buckets están alineados a su tamaño y no se repiten: tener los
+        segundos / tamaño del rango implica que no falta ninguno. Un hueco
+        en las muestras (una parada, el backend caído) deja el rango sin
+        cubrir aunque haya buckets más antiguos. El rango acaba en el
+        último bucket cerrado, que debe terminar a menos de un bucket de
+        `ahora`: tras un periodo sin muestras los buckets son de otro rango.
+        """
+        orden = self._orden(segundos)
+        if not orden.size or self._inicios[orden[-1]] + 2 * self.segundos < ahora:
+            return False
+        return len(orden) >= max(1, int(segundos // self.segundos))
+
+    def columnas(self, segundos: float) -> Dict[str, np.ndarray]:
+        """Buckets cerrados de los últimos `segundos`, en orden cronológico."""
+        orden = self._orden(segundos)
+        return {
+            'inicios': self._inicios[orden],
+            'sumas': self._sumas[orden],
+            'min': self._minimos[orden],
+            'max': self._maximos[orden],
+            'muestras': self._muestras[orden],
+        }
+
+
+class RollupsTemperatura:
+    """Niveles de agregación de la temperatura ambiente.
+
+    La memoria es fija (capacidad de cada nivel) y cada muestra cuesta una
+    actualización por nivel. Las muestras deben llegar en orden temporal;
+    las anteriores a la última se ignoran.
+    """
+
+    def __init__(self, capacidades: Optional[Dict[str, int]] = None) -> None:
+        """Inicializar los niveles vacíos.
+
+        Args:
+            capacidades: Buckets retenidos por nivel ('1m', '5m', '1h').
+                Los niveles que no aparecen usan la de NIVELES.
+        """
+        capacidades = capacidades or {}
+        self._niveles: Dict[str, _Nivel] = {
+            nombre: _Nivel(segundos, capacidades.get(nombre, capacidad))
+            for nombre, segundos, capacidad in NIVELES
+        }
+        self._ultimo: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def agregar(self, instante: float, estado: dict) -> None:
+        """Incorporar una muestra de estado a todos los niveles.
+
+        Args:
+            instante: Segundos desde epoch de la muestra.
+            estado: Dict de /termostato/; sin temperatura_ambiente numérica
+                se ignora.
+        """
+        temperatura = estado.get('temperatura_ambiente')
+        if isinstance(temperatura, bool) or not isinstance(temperatura, (int, float)) or math.isnan(temperatura):
+            return
+        with self._lock:
+            if self._ultimo is not None and instante < self._ultimo:
+                return
+            self._ultimo = instante
+            for nivel in self._niveles.values():
+                nivel.agregar(instante, float(temperatura))
+
+    def cargar(self, instantes: np.ndarray, temperaturas: np.ndarray) -> None:
+        """Incorporar muestras guardadas (ej: el registro en disco al arrancar).
+
+        Args:
+            instantes: Segundos desde epoch, crecientes.
+            temperaturas: Temperatura ambiente de cada muestra (NaN = sin dato).
+        """
+        for instante, temperatura in zip(instantes.tolist(), temperaturas.tolist()):
+            self.agregar(instante, {'temperatura_ambiente': temperatura})
+
+    def retencion(self) -> float:
+        """Segundos que abarca el nivel más largo (para cargar lo justo)."""
+        return max(nivel.segundos * nivel.capacidad for nivel in self._niveles.values())
+
+    def elegir_nivel(self, segundos: float, resolucion: float, ahora: Optional[float] = None) -> Optional[str]:
+        """Nivel más grueso con buckets de resolucion o menos que cubre el rango.
+
+        Solo cuentan los niveles que tienen todos los buckets del rango,
+        hasta el presente (ver _Nivel.cubre).
+
+        Args:
+            segundos: Duración del rango pedido.
+            resolucion: Segundos máximos por punto.
+            ahora: Segundos desde epoch de referencia. None = time.time().
+
+        Returns:
+            Nombre del nivel, o None si ninguno tiene datos suficientes.
+        """
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            for nombre, tamano, _ in reversed(NIVELES):
+                if tamano <= resolucion and self._niveles[nombre].cubre(segundos, ahora):
+                    return nombre
+        return None
+
+    def columnas(
+        self,
+        nivel: str,
+        segundos: float,
+        agg: str = 'avg',
+        desde: Optional[int] = None,
+        banda: bool = True
+    ) -> Tuple[Dict[str, np.ndarray], Optional[int]]:
+        """Buckets cerrados de un nivel como columnas del historial.
+
+        Args:
+            nivel: Nombre del nivel (ver elegir_nivel).
+            segundos: Duración del rango, hasta el último bucket cerrado.
+            agg: Valor de temperatura de cada bucket (AGREGACIONES_ROLLUP).
+            desde: Cursor en epoch ms; solo buckets que empiezan después.
+            banda: Incluir min, max y muestras como series.agregar_columnas.
+                False = solo timestamps y temperaturas, como el backend.
+
+        Returns:
+            Tupla (columnas, cursor): 'timestamps' (inicio de cada bucket en
+            epoch ms de la hora de reloj, como los del backend; ver
+            series.epoch_ms_reloj) y 'temperaturas' en orden cronológico,
+            más la banda (ver series.historial_a_columnas), y el epoch en
+            ms del inicio del más reciente (el mismo desde, o None, si no
+            hay ninguno).
+
+        Raises:
+            ValueError: Si nivel o agg no son válidos.
+        """
+        if nivel not in self._niveles:
+            raise ValueError(f"nivel debe ser uno de: {', '.join(self._niveles)}")
+        if agg not in AGREGACIONES_ROLLUP:
+            raise ValueError(f"agg debe ser uno de: {', '.join(AGREGACIONES_ROLLUP)}")
+        with self._lock:
+            buckets = self._niveles[nivel].columnas(segundos)
+
+        timestamps = epoch_ms_reloj(buckets['inicios'])
+        if desde is not None:
+            nuevos = timestamps > desde
+            buckets = {clave: valores[nuevos] for clave, valores in buckets.items()}
+            timestamps = timestamps[nuevos]
+        valores = buckets['sumas'] / buckets['muestras'] if agg == 'avg' else buckets[agg]
+        columnas = {'timestamps': timestamps, 'temperaturas': valores}
+        if banda:
+            columnas.update(min=buckets['min'], max=buckets['max'], muestras=buckets['muestras'])
+        return columnas, int(timestamps[-1]) if timestamps.size else desde
+
+    def historial(
+        self,
+        nivel: str,
+        segundos: float,
+        agg: str = 'avg',
+        desde: Optional[int] = None,
+        banda: bool = True
+    ) -> Tuple[List[dict], Optional[int]]:
+        """Buckets cerrados de un nivel con la forma del historial.
+
+        Como columnas(), pero con registros del más reciente al más antiguo
+        y el inicio de cada bucket como timestamp ISO 8601.
+
+        Raises:
+            ValueError: Si nivel o agg no son válidos.
+        """
+        columnas, cursor = self.columnas(nivel, segundos, agg, desde=desde, banda=banda)
+        return columnas_a_historial(columnas), cursor
@@ -0,0 +1,159 @@
+"""
+Serie temporal en memoria de las muestras de estado del termostato.
+Buffer circular de capacidad fija con una columna array por campo, para
+que todos los navegadores compartan el histórico reciente del servidor.
+"""
+import math
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# Campos numéricos del estado guardados como float64 (NaN = sin dato)
+CAMPOS_NUMERICOS = ('temperatura_ambiente', 'temperatura_deseada', 'carga_bateria')
+
+# Estados del climatizador, codificados por su posición (-1 = desconocido)
+ESTADOS_CLIMATIZADOR = ('apagado', 'encendido', 'enfriando', 'calentando')
+_CODIGO_CLIMATIZADOR = {estado: codigo for codigo, estado in enumerate(ESTADOS_CLIMATIZADOR)}
+
+
+def numero(valor) -> float:
+    """Convertir un campo del backend a float, o NaN si no es numérico."""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        return math.nan
+    return float(valor)
+
+
+def numero_opcional(valor) -> Optional[float]:
+    """Como numero(), pero None si no es numérico o es NaN."""
+    convertido = numero(valor)
+    return None if math.isnan(convertido) else convertido
+
+
+# Un array por campo del estado más los índices del buffer circular
+class SerieEstado:  # pylint: disable=too-many-instance-attributes
+    """Buffer circular de muestras de estado con almacenamiento columnar.
+
+    Cada campo vive en su propio array('d') (o array('b') para el
+    climatizador) preasignado a la capacidad: una muestra ocupa 33 bytes
+    en lugar de un dict por muestra, y agregar no reserva memoria.
+
+    Las muestras deben llegar en orden temporal; las que llegan antes de
+    intervalo_minimo desde la última se descartan, así la capacidad cubre
+    un tiempo mínimo conocido aunque muchos navegadores pidan el estado.
+
+    Attributes:
+        capacidad: Número máximo de muestras; las más antiguas se sobrescriben.
+        intervalo_minimo: Segundos mínimos entre dos muestras guardadas.
+    """
+
+    def __init__(self, capacidad: int = 1800, intervalo_minimo: float = 2.0) -> None:
+        """Inicializar la serie vacía.
+
+        Args:
+            capacidad: Número máximo de muestras (default: 1800, una hora
+                con una muestra cada 2 segundos).
+            intervalo_minimo: Segundos mínimos entre muestras guardadas.
+        """
+        self.capacidad = capacidad
+        self.intervalo_minimo = intervalo_minimo
+        self._instantes = array('d', bytes(8 * capacidad))
+        self._columnas: Dict[str, array] = {
+            campo: array('d', [math.nan]) * capacidad for campo in CAMPOS_NUMERICOS
+        }
+        self._climatizador = array('b', [-1]) * capacidad
+        self._inicio = 0
+        self._cantidad = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Número de muestras guardadas."""
+        return self._cantidad
+
+    def agregar(self, instante: float, estado: dict) -> bool:
+        """Guardar una muestra de estado.
+
+        Args:
+            instante: Segundos desde epoch de la muestra.
+            estado: Dict de /termostato/ (los campos ausentes o no numéricos
+                se guardan como sin dato).
+
+        Returns:
+            True si se guardó, False si se descartó por llegar antes de
+            intervalo_minimo desde la última muestra.
+        """
+        with self._lock:
+            if self._cantidad and instante - self._instante(self._cantidad - 1) < self.intervalo_minimo:
+                return False
+            if self._cantidad < self.capacidad:
+                posicion = (self._inicio + self._cantidad) % self.capacidad
+                self._cantidad += 1
+            else:
+                posicion = self._inicio
+                self._inicio = (self._inicio + 1) % self.capacidad
+            self._instantes[posicion] = instante
+            for campo, columna in self._columnas.items():
+                columna[posicion] = numero(estado.get(campo))
+            self._climatizador[posicion] = _CODIGO_CLIMATIZADOR.get(estado.get('estado_climatizador'), -1)
+            return True
+
+    def ventana(self, segundos: Optional[float] = None, hasta: Optional[float] = None) -> Dict[str, list]:
+        """Muestras de los últimos `segundos`, en formato columnar.
+
+        Args:
+            segundos: Duración de la ventana. None = todas las muestras.
+            hasta: Fin de la ventana en segundos desde epoch. None = la
+                última muestra.
+
+        Returns:
+            Dict con 'timestamps' (epoch en ms) y una lista por campo, en
+            orden cronológico. Los valores sin dato son None.
+        """
+        with self._lock:
+            desde, fin = self._rango(segundos, hasta)
+            instantes = self._copiar(self._instantes, desde, fin)
+            columnas = {campo: self._copiar(c, desde, fin) for campo, c in self._columnas.items()}
+            climatizador = self._copiar(self._climatizador, desde, fin)
+
+        resultado: Dict[str, list] = {'timestamps': [round(t * 1000) for t in instantes]}
+        for campo, valores in columnas.items():
+            resultado[campo] = [None if math.isnan(v) else v for v in valores]
+        resultado['estado_climatizador'] = [
+            ESTADOS_CLIMATIZADOR[c] if c >= 0 else None for c in climatizador
+        ]
+        return resultado
+
+    def _rango(self, segundos: Optional[float], hasta: Optional[float]) -> Tuple[int, int]:
+        """Posiciones lógicas [desde, fin) de la ventana; llamar con el lock tomado."""
+        if not self._cantidad:
+            return 0, 0
+        fin = self._cantidad if hasta is None else self._buscar(hasta, incluir_igual=True)
+        if segundos is None or not fin:
+            return 0, fin
+        referencia = self._instante(fin - 1) if hasta is None else hasta
+        return self._buscar(referencia - segundos, incluir_igual=False), fin
+
+    def _instante(self, indice: int) -> float:
+        """Instante de la muestra en la posición lógica indice (0 = la más antigua)."""
+        return self._instantes[(self._inicio + indice) % self.capacidad]
+
+    def _buscar(self, instante: float, incluir_igual: bool) -> int:
+        """Primera posición lógica con instante posterior (o igual) al dado."""
+        bajo, alto = 0, self._cantidad
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            valor = self._instante(medio)
+            if valor < instante or (incluir_igual and valor == instante):
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo
+
+    def _copiar(self, columna: array, desde: int, hasta: int) -> List:
+        """Copiar las posiciones lógicas [desde, hasta) de una columna."""
+        if desde >= hasta:
+            return []
+        inicio = (self._inicio + desde) % self.capacidad
+        fin = inicio + (hasta - desde)
+        if fin <= self.capacidad:
+            return columna[inicio:fin].tolist()
+        return columna[inicio:].tolist() + columna[:fin - self.capacidad].tolist()
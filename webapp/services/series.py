@@ -0,0 +1,560 @@
+"""
+Operaciones vectorizadas (NumPy) sobre series temporales del historial.
+Convierte los registros del backend a columnas y las reduce en el servidor
+antes de enviarlas al navegador.
+"""
+import time
+import warnings
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from webapp.services.serie_estado import numero
+
+# Mínimo de puntos de una reducción LTTB (primer punto, uno intermedio y último)
+PUNTOS_MINIMOS = 3
+
+# Tamaños de bucket admitidos por agregar_por_bucket(), en segundos
+BUCKETS = {'1m': 60, '5m': 300, '1h': 3600}
+
+# Agregaciones por bucket admitidas
+AGREGACIONES = ('avg', 'min', 'max', 'p95')
+
+# Formatos de respuesta de /api/historial
+FORMATOS_HISTORIAL = ('registros', 'columnas', 'binario')
+
+# Formato binario del historial (little-endian, ver codificar_historial_binario)
+MIMETYPE_BINARIO = 'application/vnd.termostato.historial'
+_MAGIA_BINARIO = b'TH'
+_VERSION_BINARIO = 1
+_CABECERA_BINARIO = np.dtype([
+    ('magia', 'S2'), ('version', 'u1'), ('banda', 'u1'), ('registros', '<u4'), ('cursor', '<f8')
+])
+
+# Columnas extra de los registros agregados por bucket, en formato columnar
+_COLUMNAS_BUCKET = ('min', 'max', 'muestras')
+
+
+def epoch_ms(timestamp: str) -> int:
+    """Convertir un timestamp ISO 8601 a epoch en ms (UTC si trae zona).
+
+    Args:
+        timestamp: Timestamp ISO 8601, o epoch en ms como texto.
+
+    Returns:
+        Epoch en milisegundos.
+
+    Raises:
+        ValueError: Si no es un timestamp válido.
+    """
+    if timestamp.isdigit():
+        return int(timestamp)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        instante = np.datetime64(timestamp, 'ms')
+    if np.isnat(instante):
+        raise ValueError(f'Timestamp vacío: {timestamp!r}')
+    return int(instante.astype(np.int64))
+
+
+def epoch_ms_reloj(instantes: np.ndarray) -> np.ndarray:
+    """Convertir instantes UTC a la convención de los timestamps del backend.
+
+    El backend envía la hora de reloj sin zona horaria y epoch_ms() la
+    codifica como si fuera UTC. Las fuentes locales (registro en disco,
+    rollups) guardan segundos desde epoch reales: se les suma el desfase
+    de la zona horaria del servidor, que se asume la misma que la del
+    backend, para que etiquetas y cursores coincidan con los suyos.
+
+    Args:
+        instantes: Segundos desde epoch (UTC), en orden cronológico.
+
+    Returns:
+        Epoch en ms (int64) de la hora de reloj local, truncado al segundo
+        como los timestamps del backend.
+    """
+    segundos = np.floor(np.asarray(instantes, dtype=np.float64)).astype(np.int64)
+    if not segundos.size:
+        return segundos
+    primero = time.localtime(int(segundos[0])).tm_gmtoff
+    if time.localtime(int(segundos[-1])).tm_gmtoff == primero:
+        return (segundos + primero) * 1000
+    # El rango cruza un cambio de hora: desfase por instante
+    desfases = np.fromiter((time.localtime(t).tm_gmtoff for t in segundos.tolist()), np.int64, segundos.size)
+    return (segundos + desfases) * 1000
+
+
+def filtrar_desde(historial: list, cursor: int) -> Tuple[list, int]:
+    """Registros posteriores a un cursor y el cursor siguiente.
+
+    Args:
+        historial: Registros {timestamp, temperatura} del backend.
+        cursor: Epoch en ms; se conservan los registros estrictamente
+            posteriores.
+
+    Returns:
+        Tupla (registros, cursor): los registros nuevos en su orden
+        original y el epoch en ms del más reciente de ellos (el mismo
+        cursor si no hay ninguno).
+    """
+    if not historial:
+        return historial, cursor
+    timestamps, _ = columnas_historial(historial)
+    nuevos = np.flatnonzero(timestamps > cursor)
+    if nuevos.size == 0:
+        return [], cursor
+    return [historial[i] for i in nuevos], int(timestamps[nuevos].max())
+
+
+def anterior_a(registro: dict, cursor: int) -> bool:
+    """True si el registro no es posterior al cursor (epoch en ms).
+
+    Pensado como parar_flujo al leer el historial del más reciente al más
+    antiguo. Un registro sin timestamp válido no corta la lectura.
+    """
+    try:
+        return epoch_ms(registro['timestamp']) <= cursor
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def ultimo_cursor(historial: list) -> Optional[int]:
+    """Epoch en ms del registro más reciente, o None si no hay registros."""
+    if not historial:
+        return None
+    timestamps, _ = columnas_historial(historial)
+    return int(timestamps.max())
+
+
+def columnas_historial(historial: Iterable[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Convertir registros {timestamp, temperatura} a columnas NumPy.
+
+    Args:
+        historial: Registros del backend con timestamp ISO 8601.
+
+    Returns:
+        Tupla (timestamps, temperaturas): epoch en ms (int64) y
+        temperaturas (float64, NaN si el valor no es numérico), en el
+        orden de los registros.
+    """
+    registros = list(historial)
+    with warnings.catch_warnings():
+        # Los timestamps con zona horaria se convierten a UTC, que es lo buscado
+        warnings.simplefilter('ignore', UserWarning)
+        timestamps = np.array(
+            [r.get('timestamp') for r in registros], dtype='datetime64[ms]'
+        ).astype(np.int64)
+    valores = [r.get('temperatura') for r in registros]
+    try:
+        # Camino rápido: todo numérico o None (None se convierte a NaN)
+        temperaturas = np.array(valores, dtype=np.float64)
+    except (TypeError, ValueError):
+        temperaturas = np.array([numero(v) for v in valores], dtype=np.float64)
+    return timestamps, temperaturas
+
+
+def lttb(x: np.ndarray, y: np.ndarray, puntos: int) -> np.ndarray:
+    """Índices de una reducción Largest-Triangle-Three-Buckets.
+
+    Conserva el primer y el último punto y, de cada uno de los puntos - 2
+    buckets intermedios, el punto que forma el triángulo de mayor área con
+    el punto elegido en el bucket anterior y la media del siguiente. Así se
+    mantienen los picos y valles que una gráfica debe mostrar.
+
+    El área se calcula para todo el bucket a la vez; el bucle es sobre
+    buckets (puntos iteraciones), no sobre registros.
+
+    Args:
+        x: Eje X en orden creciente.
+        y: Valores, sin NaN.
+        puntos: Número de puntos a conservar (>= PUNTOS_MINIMOS).
+
+    Returns:
+        Array de índices crecientes de los puntos conservados. Si la serie
+        tiene puntos o menos, todos sus índices.
+
+    Raises:
+        ValueError: Si puntos es menor que PUNTOS_MINIMOS.
+    """
+    if puntos < PUNTOS_MINIMOS:
+        raise ValueError(f'puntos debe ser al menos {PUNTOS_MINIMOS}')
+    n = len(x)
+    if n <= puntos:
+        return np.arange(n)
+
+    # Relativo al primer punto para no perder precisión con epoch en ms
+    x = np.asarray(x, dtype=np.float64) - float(x[0])
+    y = np.asarray(y, dtype=np.float64)
+    # puntos - 1 límites => puntos - 2 buckets en [1, n - 1)
+    limites = np.linspace(1, n - 1, puntos - 1).astype(np.intp)
+    seleccion = np.empty(puntos, dtype=np.intp)
+    seleccion[0], seleccion[-1] = 0, n - 1
+
+    anterior = 0
+    for i in range(puntos - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        siguiente_fin = limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[fin:siguiente_fin].mean()
+        media_y = y[fin:siguiente_fin].mean()
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        seleccion[i + 1] = anterior
+    return seleccion
+
+
+def reducir_historial(historial: list, puntos: int) -> list:
+    """Reducir un historial a `puntos` registros con LTTB.
+
+    Los registros sin temperatura numérica no son candidatos. Se devuelven
+    los registros originales elegidos, en el mismo orden relativo que en
+    la entrada (el backend los envía del más reciente al más antiguo).
+
+    Args:
+        historial: Registros {timestamp, temperatura} del backend.
+        puntos: Número máximo de registros a devolver.
+
+    Returns:
+        Lista con a lo sumo `puntos` registros del historial.
+
+    Raises:
+        ValueError: Si puntos es menor que PUNTOS_MINIMOS.
+    """
+    if puntos < PUNTOS_MINIMOS:
+        raise ValueError(f'puntos debe ser al menos {PUNTOS_MINIMOS}')
+    if len(historial) <= puntos:
+        return historial
+    timestamps, temperaturas = columnas_historial(historial)
+    validos = np.flatnonzero(~np.isnan(temperaturas))
+    orden = validos[np.argsort(timestamps[validos], kind='stable')]
+    elegidos = orden[lttb(timestamps[orden], temperaturas[orden], puntos)]
+    return [historial[i] for i in np.sort(elegidos)]
+
+
+def agregar_por_bucket(
+    timestamps: np.ndarray,
+    valores: np.ndarray,
+    segundos: int,
+    agregaciones: Sequence[str] = AGREGACIONES
+) -> Dict[str, np.ndarray]:
+    """Agregar una serie en buckets de tiempo alineados a epoch.
+
+    Todo el cálculo es vectorizado: se ordenan los valores por (bucket,
+    valor) una sola vez y de ahí salen mínimo y máximo (extremos de cada
+    tramo), p95 (interpolación lineal dentro del tramo) y media
+    (np.add.reduceat). Los valores NaN se ignoran.
+
+    Args:
+        timestamps: Epoch en ms (int64), en cualquier orden.
+        valores: Valores float64 alineados con timestamps.
+        segundos: Tamaño del bucket.
+        agregaciones: Subconjunto de AGREGACIONES a calcular.
+
+    Returns:
+        Dict con 'timestamps' (inicio de cada bucket en epoch ms, orden
+        creciente), 'muestras' (valores por bucket) y un array por
+        agregación pedida. Los buckets sin valores no aparecen.
+
+    Raises:
+        ValueError: Si alguna agregación no está en AGREGACIONES.
+    """
+    desconocidas = [a for a in agregaciones if a not in AGREGACIONES]
+    if desconocidas:
+        raise ValueError(f"Agregaciones desconocidas: {', '.join(desconocidas)}")
+
+    validos = ~np.isnan(valores)
+    cubos = np.asarray(timestamps)[validos] // (segundos * 1000)
+    valores = np.asarray(valores, dtype=np.float64)[validos]
+    orden = np.lexsort((valores, cubos))
+    cubos, valores = cubos[orden], valores[orden]
+    ids, inicios, muestras = np.unique(cubos, return_index=True, return_counts=True)
+    finales = inicios + muestras - 1
+
+    resultado: Dict[str, np.ndarray] = {
+        'timestamps': ids * (segundos * 1000),
+        'muestras': muestras,
+    }
+    for agregacion in agregaciones:
+        if agregacion == 'min':
+            resultado['min'] = valores[inicios]
+        elif agregacion == 'max':
+            resultado['max'] = valores[finales]
+        elif agregacion == 'avg':
+            resultado['avg'] = np.add.reduceat(valores, inicios) / muestras
+        else:
+            resultado['p95'] = _percentil_95(valores, inicios, muestras)
+    return resultado
+
+
+def _percentil_95(valores: np.ndarray, inicios: np.ndarray, muestras: np.ndarray) -> np.ndarray:
+    """Percentil 95 de cada tramo ordenado, con interpolación lineal (como np.percentile)."""
+    posicion = 0.95 * (muestras - 1)
+    bajo = np.floor(posicion).astype(np.intp)
+    alto = np.ceil(posicion).astype(np.intp)
+    return valores[inicios + bajo] + (valores[inicios + alto] - valores[inicios + bajo]) * (posicion - bajo)
+
+
+def agregar_historial(historial: Iterable[dict], bucket: str, agg: str = 'avg') -> list:
+    """Agregar registros del backend en buckets de tiempo.
+
+    Args:
+        historial: Registros {timestamp, temperatura} del backend.
+        bucket: Clave de BUCKETS ('1m', '5m', '1h').
+        agg: Agregación de la temperatura de cada bucket (AGREGACIONES).
+
+    Returns:
+        Registros {timestamp, temperatura, min, max, muestras}, uno por
+        bucket con datos, del más reciente al más antiguo como el backend.
+        timestamp es el inicio del bucket en ISO 8601 (UTC) y min / max
+        forman la banda de valores del bucket.
+
+    Raises:
+        ValueError: Si bucket o agg no son válidos.
+    """
+    timestamps, temperaturas = columnas_historial(historial)
+    return columnas_a_historial(
+        agregar_columnas({'timestamps': timestamps, 'temperaturas': temperaturas}, bucket, agg)
+    )
+
+
+def agregar_columnas(columnas: Dict[str, np.ndarray], bucket: str, agg: str = 'avg') -> Dict[str, np.ndarray]:
+    """Agregar columnas del historial en buckets de tiempo.
+
+    Args:
+        columnas: Dict con 'timestamps' (epoch ms) y 'temperaturas'.
+        bucket: Clave de BUCKETS ('1m', '5m', '1h').
+        agg: Agregación de la temperatura de cada bucket (AGREGACIONES).
+
+    Returns:
+        Columnas en orden cronológico con el inicio de cada bucket como
+        timestamp, la agregación como temperatura y la banda min, max y
+        muestras (ver historial_a_columnas).
+
+    Raises:
+        ValueError: Si bucket o agg no son válidos.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket debe ser uno de: {', '.join(BUCKETS)}")
+    if agg not in AGREGACIONES:
+        raise ValueError(f"agg debe ser uno de: {', '.join(AGREGACIONES)}")
+    cubos = agregar_por_bucket(columnas['timestamps'], columnas['temperaturas'], BUCKETS[bucket], {agg, 'min', 'max'})
+    return {
+        'timestamps': cubos['timestamps'],
+        'temperaturas': cubos[agg],
+        'min': cubos['min'],
+        'max': cubos['max'],
+        'muestras': cubos['muestras'],
+    }
+
+
+def reducir_columnas(columnas: Dict[str, np.ndarray], puntos: int) -> Dict[str, np.ndarray]:
+    """Reducir columnas del historial a `puntos` filas con LTTB.
+
+    Como reducir_historial, pero sobre columnas en orden cronológico: las
+    filas sin temperatura no son candidatas.
+
+    Args:
+        columnas: Columnas en orden cronológico (ver historial_a_columnas).
+        puntos: Número máximo de filas a devolver.
+
+    Returns:
+        Las mismas columnas con a lo sumo `puntos` filas.
+
+    Raises:
+        ValueError: Si puntos es menor que PUNTOS_MINIMOS.
+    """
+    if puntos < PUNTOS_MINIMOS:
+        raise ValueError(f'puntos debe ser al menos {PUNTOS_MINIMOS}')
+    if len(columnas['timestamps']) <= puntos:
+        return columnas
+    validos = np.flatnonzero(~np.isnan(columnas['temperaturas']))
+    elegidos = validos[lttb(columnas['timestamps'][validos], columnas['temperaturas'][validos], puntos)]
+    return {clave: valores[elegidos] for clave, valores in columnas.items()}
+
+
+def columnas_a_historial(columnas: Dict[str, np.ndarray]) -> list:
+    """Convertir columnas a registros como los del backend.
+
+    Args:
+        columnas: Columnas en orden cronológico (ver historial_a_columnas).
+
+    Returns:
+        Registros {timestamp, temperatura} (más min, max y muestras si hay
+        banda) del más reciente al más antiguo, con timestamp ISO 8601 en
+        segundos y None en las temperaturas sin dato.
+    """
+    listas = columnas_json(columnas)
+    instantes = np.asarray(columnas['timestamps'], dtype=np.int64).astype('datetime64[ms]')
+    timestamps = np.datetime_as_string(instantes, unit='s').tolist()
+    if not all(clave in listas for clave in _COLUMNAS_BUCKET):
+        return [
+            {'timestamp': timestamp, 'temperatura': valor}
+            for timestamp, valor in reversed(list(zip(timestamps, listas['temperaturas'])))
+        ]
+    filas = zip(timestamps, listas['temperaturas'], listas['min'], listas['max'], listas['muestras'])
+    return [
+        {'timestamp': timestamp, 'temperatura': valor, 'min': minimo, 'max': maximo, 'muestras': n}
+        for timestamp, valor, minimo, maximo, n in reversed(list(filas))
+    ]
+
+
+def historial_a_columnas(historial: list) -> Dict[str, np.ndarray]:
+    """Convertir registros a columnas NumPy, del más antiguo al más reciente.
+
+    Es la forma que aceptan columnas_json() y codificar_columnas_binario();
+    las fuentes que ya guardan columnas (registro en disco, rollups) la
+    producen sin pasar por registros.
+
+    Args:
+        historial: Registros {timestamp, temperatura} del backend, o
+            agregados por bucket (con min, max y muestras).
+
+    Returns:
+        Dict con 'timestamps' (epoch en ms, int64), 'temperaturas'
+        (float64, NaN si no es numérica) y, si los registros vienen
+        agregados, 'min', 'max' (float64) y 'muestras' (int64). Los
+        timestamps sin zona horaria se toman como UTC: el epoch representa
+        la hora de reloj del backend y el navegador debe formatearlo en UTC.
+    """
+    timestamps, temperaturas = columnas_historial(historial)
+    orden = np.argsort(timestamps, kind='stable')
+    columnas = {'timestamps': timestamps[orden], 'temperaturas': temperaturas[orden]}
+    if historial and all(clave in historial[0] for clave in _COLUMNAS_BUCKET):
+        registros = [historial[i] for i in orden.tolist()]
+        columnas['min'] = np.array([numero(r['min']) for r in registros], dtype=np.float64)
+        columnas['max'] = np.array([numero(r['max']) for r in registros], dtype=np.float64)
+        columnas['muestras'] = np.array([r['muestras'] for r in registros], dtype=np.int64)
+    return columnas
+
+
+def columnas_json(columnas: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """Columnas NumPy (ver historial_a_columnas) como listas serializables.
+
+    Returns:
+        Las mismas claves con listas; NaN se convierte en None.
+    """
+    resultado = {'timestamps': np.asarray(columnas['timestamps'], dtype=np.int64).tolist()}
+    for clave in ('temperaturas', 'min', 'max'):
+        if clave in columnas:
+            resultado[clave] = _con_nulos(np.asarray(columnas[clave], dtype=np.float64))
+    if 'muestras' in columnas:
+        resultado['muestras'] = np.asarray(columnas['muestras']).tolist()
+    return resultado
+
+
+def historial_columnar(historial: list) -> Dict[str, list]:
+    """Convertir registros a formato columnar, del más antiguo al más reciente.
+
+    Evita repetir los nombres de campo en cada registro y le da al
+    navegador los timestamps ya como números, sin parsear fechas.
+
+    Args:
+        historial: Registros {timestamp, temperatura} del backend, o
+            agregados por bucket (con min, max y muestras).
+
+    Returns:
+        Dict con 'timestamps' (epoch en ms), 'temperaturas' (None si no es
+        numérica) y, si los registros vienen agregados, 'min', 'max' y
+        'muestras' (ver historial_a_columnas).
+    """
+    return columnas_json(historial_a_columnas(historial))
+
+
+def codificar_columnas_binario(columnas: Dict[str, np.ndarray], cursor: Optional[int] = None) -> bytes:
+    """Codificar columnas del historial en un formato binario para typed arrays.
+
+    Distribución (little-endian, n = número de registros)::
+
+        0   2 bytes  b'TH'
+        2   uint8    versión (1)
+        3   uint8    1 si hay banda de bucket (min, max, muestras), si no 0
+        4   uint32   n
+        8   float64  cursor (epoch ms; NaN si no hay)
+        16  float64  timestamps[n] (epoch ms)
+        ..  float32  temperaturas[n] (NaN = sin dato)
+        ..  float32  min[n], float32 max[n], uint32 muestras[n] (solo con banda)
+
+    Cada bloque queda alineado a su tamaño de elemento, así el navegador
+    crea Float64Array / Float32Array directamente sobre el ArrayBuffer. Los
+    arrays se convierten al tipo del formato y se unen con una única copia.
+
+    Args:
+        columnas: Columnas en orden cronológico (ver historial_a_columnas).
+        cursor: Cursor de la respuesta (epoch en ms), o None.
+
+    Returns:
+        Cuerpo binario de la respuesta.
+    """
+    n = len(columnas['timestamps'])
+    banda = n > 0 and all(clave in columnas for clave in _COLUMNAS_BUCKET)
+    cabecera = np.zeros(1, dtype=_CABECERA_BINARIO)
+    cabecera[0] = (_MAGIA_BINARIO, _VERSION_BINARIO, int(banda), n, np.nan if cursor is None else cursor)
+    bloques = [
+        cabecera,
+        np.ascontiguousarray(columnas['timestamps'], dtype='<f8'),
+        np.ascontiguousarray(columnas['temperaturas'], dtype='<f4'),
+    ]
+    if banda:
+        bloques.append(np.ascontiguousarray(columnas['min'], dtype='<f4'))
+        bloques.append(np.ascontiguousarray(columnas['max'], dtype='<f4'))
+        bloques.append(np.ascontiguousarray(columnas['muestras'], dtype='<u4'))
+    return b''.join(memoryview(bloque).cast('B') for bloque in bloques)
+
+
+def codificar_historial_binario(historial: list, cursor: Optional[int] = None) -> bytes:
+    """Codificar registros del historial con codificar_columnas_binario().
+
+    Args:
+        historial: Registros {timestamp, temperatura} del backend, o
+            agregados por bucket.
+        cursor: Cursor de la respuesta (epoch en ms), o None.
+
+    Returns:
+        Cuerpo binario de la respuesta.
+    """
+    return codificar_columnas_binario(historial_a_columnas(historial), cursor)
+
+
+def decodificar_historial_binario(datos: bytes) -> Dict[str, np.ndarray]:
+    """Decodificar el formato de codificar_historial_binario (sin copias).
+
+    Args:
+        datos: Cuerpo binario.
+
+    Returns:
+        Dict con 'cursor' (int o None), 'timestamps', 'temperaturas' y,
+        si hay banda, 'min', 'max' y 'muestras' como vistas NumPy.
+
+    Raises:
+        ValueError: Si la cabecera no es válida o el cuerpo está truncado.
+    """
+    if len(datos) < _CABECERA_BINARIO.itemsize:
+        raise ValueError('Historial binario truncado')
+    cabecera = np.frombuffer(datos, dtype=_CABECERA_BINARIO, count=1)[0]
+    if cabecera['magia'] != _MAGIA_BINARIO or cabecera['version'] != _VERSION_BINARIO:
+        raise ValueError('Cabecera de historial binario no válida')
+    n = int(cabecera['registros'])
+    columnas = [('timestamps', '<f8'), ('temperaturas', '<f4')]
+    if cabecera['banda']:
+        columnas += [('min', '<f4'), ('max', '<f4'), ('muestras', '<u4')]
+    tamano = _CABECERA_BINARIO.itemsize + sum(np.dtype(t).itemsize for _, t in columnas) * n
+    if len(datos) != tamano:
+        raise ValueError('Historial binario truncado')
+
+    cursor = float(cabecera['cursor'])
+    resultado: Dict[str, np.ndarray] = {'cursor': None if np.isnan(cursor) else int(cursor)}
+    desplazamiento = _CABECERA_BINARIO.itemsize
+    for nombre, tipo in columnas:
+        resultado[nombre] = np.frombuffer(datos, dtype=tipo, count=n, offset=desplazamiento)
+        desplazamiento += np.dtype(tipo).itemsize * n
+    return resultado
+
+
+def _con_nulos(valores: np.ndarray) -> list:
+    """Lista de floats con None en lugar de NaN (JSON no admite NaN)."""
+    lista = valores.tolist()
+    for i in np.flatnonzero(np.isnan(valores)).tolist():
+        lista[i] = None
+    return lista
@@ -0,0 +1,241 @@
+"""
+Backend simulado para pruebas de carga sin app_termostato.
+SimuladorApiClient extiende MockApiClient con distribuciones de latencia,
+tasas de error por tipo de excepción y datos del termostato que varían
+con el tiempo de forma coherente entre estado e historial.
+"""
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from webapp.services.api_client import ApiTimeoutError, MockApiClient, tiempo_restante
+from webapp.services.latencias import clave_endpoint
+
+# Período del ciclo diario de temperatura y del ciclo de descarga de batería
+_PERIODO_TEMPERATURA = 24 * 3600
+_PERIODO_BATERIA = 6 * 3600
+
+
+class DistribucionLatencia(ABC):
+    """Distribución de la que se muestrean las latencias simuladas."""
+
+    @abstractmethod
+    def muestra(self, aleatorio: random.Random) -> float:
+        """Devolver una latencia en segundos (>= 0)."""
+
+
+class LatenciaFija(DistribucionLatencia):
+    """Latencia constante."""
+
+    def __init__(self, segundos: float) -> None:
+        """Args: segundos: Latencia de cada respuesta."""
+        self.segundos = segundos
+
+    def muestra(self, aleatorio: random.Random) -> float:
+        """Devolver siempre la misma latencia."""
+        return self.segundos
+
+
+class LatenciaNormal(DistribucionLatencia):
+    """Latencia con distribución normal truncada en 0."""
+
+    def __init__(self, media: float, desvio: float) -> None:
+        """Args: media y desvio en segundos."""
+        self.media = media
+        self.desvio = desvio
+
+    def muestra(self, aleatorio: random.Random) -> float:
+        """Muestrear N(media, desvio) truncada en 0."""
+        return max(0.0, aleatorio.gauss(self.media, self.desvio))
+
+
+class LatenciaColaLarga(DistribucionLatencia):
+    """Latencia log-normal: mediana baja con una cola larga de lentas.
+
+    Con sigma=1 el p99 es unas 10 veces la mediana, similar a un backend
+    con arranques en frío ocasionales.
+    """
+
+    def __init__(self, mediana: float, sigma: float = 1.0) -> None:
+        """Args: mediana en segundos y sigma de la log-normal."""
+        self.mediana = mediana
+        self.sigma = sigma
+
+    def muestra(self, aleatorio: random.Random) -> float:
+        """Muestrear la log-normal de la mediana y sigma configuradas."""
+        return aleatorio.lognormvariate(math.log(self.mediana), self.sigma)
+
+
+def generar_estado(instante: float) -> dict:
+    """Estado del termostato simulado en un instante dado.
+
+    La temperatura ambiente sigue un ciclo diario alrededor de la deseada,
+    el climatizador reacciona a la diferencia y la batería se descarga en
+    diente de sierra. Es determinista: el mismo instante da el mismo estado.
+
+    Args:
+        instante: Segundos desde epoch.
+
+    Returns:
+        Dict con la forma de /termostato/.
+    """
+    deseada = 24.0
+    fase = 2 * math.pi * instante / _PERIODO_TEMPERATURA
+    ambiente = round(deseada + 3.0 * math.sin(fase) + 0.3 * math.sin(17 * fase), 1)
+    if ambiente < deseada - 0.5:
+        climatizador = 'calentando'
+    elif ambiente > deseada + 0.5:
+        climatizador = 'enfriando'
+    else:
+        climatizador = 'encendido'
+    bateria = round(4.2 - 1.2 * ((instante % _PERIODO_BATERIA) / _PERIODO_BATERIA), 2)
+    if bateria >= 3.5:
+        indicador = 'NORMAL'
+    elif bateria >= 3.2:
+        indicador = 'BAJO'
+    else:
+        indicador = 'CRITICO'
+    return {
+        'temperatura_ambiente': ambiente,
+        'temperatura_deseada': deseada,
+        'estado_climatizador': climatizador,
+        'carga_bateria': bateria,
+        'indicador': indicador,
+    }
+
+
+def generar_historial(instante: float, limite: int) -> dict:
+    """Historial simulado coherente con generar_estado().
+
+    Un registro por minuto, del más reciente al más antiguo, como el backend.
+
+    Args:
+        instante: Segundos desde epoch del registro más reciente.
+        limite: Número de registros.
+
+    Returns:
+        Dict con la forma de /termostato/historial/.
+    """
+    base = int(instante // 60) * 60
+    historial = []
+    for i in range(limite):
+        t = base - 60 * i
+        historial.append({
+            # Hora de reloj sin zona horaria, como el backend real
+            'timestamp': datetime.fromtimestamp(t).isoformat(),
+            'temperatura': generar_estado(t)['temperatura_ambiente'],
+        })
+    return {'historial': historial, 'total': limite}
+
+
+# Parámetros de la simulación más los contadores públicos de carga
+class SimuladorApiClient(MockApiClient):  # pylint: disable=too-many-instance-attributes
+    """MockApiClient con latencias, fallos y datos variables en el tiempo.
+
+    Un fallo por timeout retiene al llamador el timeout completo de la
+    petición, igual que un backend colgado, para poder medir el agotamiento
+    de threads. Si el deadline recibido vence antes, se corta en el deadline.
+
+    Attributes:
+        latencia: Distribución de latencias de las respuestas.
+        tasas_error: Probabilidad de cada excepción por petición.
+        en_vuelo: Peticiones en curso en este momento.
+        max_en_vuelo: Máximo de peticiones simultáneas observado.
+        segundos_en_vuelo: Tiempo acumulado de todas las peticiones en curso.
+    """
+
+    def __init__(
+        self,
+        latencia: Optional[DistribucionLatencia] = None,
+        tasas_error: Optional[Dict[type, float]] = None,
+        semilla: Optional[int] = None,
+        reloj: Callable[[], float] = time.time,
+        dormir: Callable[[float], None] = time.sleep
+    ) -> None:
+        """Inicializar el simulador.
+
+        Args:
+            latencia: Distribución de latencias. None = sin latencia.
+            tasas_error: Dict excepción -> probabilidad, ej:
+                {ApiTimeoutError: 0.01, ApiConnectionError: 0.02}.
+            semilla: Semilla del generador aleatorio (reproducible).
+            reloj: Fuente del instante simulado (default: time.time).
+            dormir: Función de espera (inyectable en tests).
+        """
+        super().__init__(mock_data={})
+        self.latencia = latencia or LatenciaFija(0.0)
+        self.tasas_error = tasas_error or {}
+        self.en_vuelo: int = 0
+        self.max_en_vuelo: int = 0
+        self.segundos_en_vuelo: float = 0.0
+        self._aleatorio = random.Random(semilla)
+        self._reloj = reloj
+        self._dormir = dormir
+        self._lock = threading.Lock()
+
+    def get(self, path: str, **kwargs: Any) -> dict:
+        """Simular una petición al backend.
+
+        Args:
+            path: Ruta consultada ('/termostato/', '/termostato/historial/
+                ?limite=N' o '/comprueba/').
+            **kwargs: Se usan timeout (default: 5) y deadline.
+
+        Returns:
+            Dict generado para el instante actual del reloj.
+
+        Raises:
+            ApiError (o subclase): Según tasas_error o raise_error.
+        """
+        with self._lock:
+            self.call_count += 1
+            self.last_path = path
+            self.en_vuelo += 1
+            self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+            latencia = self.latencia.muestra(self._aleatorio)
+            error = self._sortear_error()
+        inicio = time.monotonic()
+        try:
+            if error is ApiTimeoutError:
+                latencia = kwargs.get('timeout', 5)
+            restante = tiempo_restante(kwargs.get('deadline'))
+            if restante is not None and latencia > restante:
+                self._dormir(max(0.0, restante))
+                raise ApiTimeoutError(f"Deadline superado simulando {path}")
+            self._dormir(latencia)
+        finally:
+            with self._lock:
+                self.en_vuelo -= 1
+                self.segundos_en_vuelo += time.monotonic() - inicio
+
+        if self.raise_error is not None:
+            raise self.raise_error(f"Mock error para {path}")
+        if error is not None:
+            raise error(f"Error simulado para {path}")
+        return self._responder(path)
+
+    def _sortear_error(self) -> Optional[type]:
+        """Elegir la excepción a lanzar según tasas_error, o None."""
+        sorteo = self._aleatorio.random()
+        acumulado = 0.0
+        for tipo, probabilidad in self.tasas_error.items():
+            acumulado += probabilidad
+            if sorteo < acumulado:
+                return tipo
+        return None
+
+    def _responder(self, path: str) -> dict:
+        """Generar la respuesta del endpoint para el instante actual."""
+        instante = self._reloj()
+        endpoint = clave_endpoint(path)
+        if endpoint == '/termostato/historial/':
+            limite = int(parse_qs(urlsplit(path).query).get('limite', ['60'])[0])
+            return generar_historial(instante, limite)
+        if endpoint == '/comprueba/':
+            return {'status': 'ok', 'version': 'simulador', 'uptime_seconds': int(instante) % 86400}
+        return generar_estado(instante)
@@ -3,87 +3,553 @@ Servicio de dominio del termostato.
 Encapsula la lógica de negocio: obtención de estado, historial y health check.
 Migra la función obtener_estado_termostato() de webapp/__init__.py.
 """
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
 
 from webapp.cache.cache_interface import Cache
-from webapp.services.api_client import ApiClient, ApiError
+from webapp.services.api_client import ApiClient, ApiError, tiempo_restante
+from webapp.services.estadisticas import EstadisticasEstado
+from webapp.services.indicadores import IndicadoresTendencia, calcular_diferencia
+from webapp.services.poller import Poller
+from webapp.services.registro_disco import RegistroDisco
+from webapp.services.rollups import AGREGACIONES_ROLLUP, INTERVALO_HISTORIAL, RollupsTemperatura
+from webapp.services.serie_estado import SerieEstado
+from webapp.services.series import (
+    AGREGACIONES,
+    BUCKETS,
+    PUNTOS_MINIMOS,
+    agregar_columnas,
+    agregar_historial,
+    anterior_a,
+    columnas_a_historial,
+    epoch_ms,
+    filtrar_desde,
+    historial_a_columnas,
+    reducir_columnas,
+    reducir_historial,
+    ultimo_cursor,
+)
 
 # Clave usada para almacenar el estado en el caché
 _CACHE_KEY_ESTADO = 'estado'
 
+# Partes que puede combinar obtener_panel(), en el orden de la respuesta
+PARTES_PANEL = ('estado', 'historial', 'health')
+
 
-class TermostatoService:
+# Las fuentes de datos son dependencias inyectadas, cada una en su atributo
+class TermostatoService:  # pylint: disable=too-many-instance-attributes
     """Servicio que gestiona los datos del termostato.
 
     Encapsula:
     - Comunicación con la API backend via ApiClient inyectado.
     - Estrategia de caché fallback via Cache inyectado.
     - Lógica de negocio para estado, historial y health.
+    - Refresco del estado en segundo plano (poller) opcional.
 
     Attributes:
         _api_client: Cliente HTTP inyectado.
         _cache: Sistema de caché inyectado.
+        _executor: Pool de threads para las consultas en paralelo del panel.
+        _serie: Serie temporal en memoria de las muestras de estado.
+        _indicadores: Tendencia de la temperatura, actualizada por muestra.
+        _estadisticas: Estadísticas acumuladas de temperatura y batería.
+        _registro: Log en disco de estados (opcional).
+        _rollups: Agregados de la temperatura en 1m, 5m y 1h.
+        _poller: Poller que refresca el estado en caché, o None.
+        _estado_fresco: False si el último refresco del poller falló.
     """
 
-    def __init__(self, api_client: ApiClient, cache: Cache) -> None:
+    # Inyección de dependencias: todas salvo api_client y cache son opcionales
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        api_client: ApiClient,
+        cache: Cache,
+        max_workers: int = 8,
+        serie: Optional[SerieEstado] = None,
+        indicadores: Optional[IndicadoresTendencia] = None,
+        estadisticas: Optional[EstadisticasEstado] = None,
+        registro: Optional[RegistroDisco] = None,
+        rollups: Optional[RollupsTemperatura] = None
+    ) -> None:
         """Inicializar servicio con dependencias inyectadas.
 
         Args:
             api_client: Implementación de ApiClient a usar.
             cache: Implementación de Cache a usar.
+            max_workers: Threads para obtener_panel() (se crean bajo demanda).
+            serie: Serie donde guardar cada estado obtenido del backend.
+                None = una SerieEstado con la capacidad por defecto.
+            indicadores: Tendencia alimentada con las muestras de la serie.
+                None = IndicadoresTendencia con la ventana por defecto.
+            estadisticas: Estadísticas acumuladas de las muestras de la serie.
+                None = EstadisticasEstado con las zonas por defecto.
+            registro: Log en disco de los estados obtenidos, desde el que se
+                sirve el historial cuando cubre el rango pedido. None = el
+                historial siempre se pide al backend.
+            rollups: Niveles de agregación de la temperatura desde los que se
+                sirve el historial cuando cubren el rango. None =
+                RollupsTemperatura con la retención por defecto. Si hay
+                registro, se cargan con sus muestras al arrancar.
         """
         self._api_client = api_client
         self._cache = cache
+        self._serie = serie if serie is not None else SerieEstado()
+        self._indicadores = indicadores if indicadores is not None else IndicadoresTendencia()
+        self._estadisticas = estadisticas if estadisticas is not None else EstadisticasEstado()
+        self._registro = registro
+        self._rollups = rollups if rollups is not None else RollupsTemperatura()
+        if registro is not None:
+            guardadas = registro.leer(desde=time.time() - self._rollups.retencion())
+            self._rollups.cargar(guardadas['instante'], guardadas['temperatura_ambiente'])
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='panel')
+        self._poller: Optional[Poller] = None
+        self._estado_fresco = False
 
-    def obtener_estado(self) -> Tuple[Optional[dict], Optional[str], bool]:
+    def obtener_estado(
+        self, deadline: Optional[float] = None
+    ) -> Tuple[Optional[dict], Optional[str], bool]:
         """Obtener estado completo del termostato con fallback a caché.
 
         Intenta obtener datos frescos del backend. Si falla, devuelve
         la última respuesta válida almacenada en caché.
 
+        Con el poller activo no se consulta al backend: se devuelve lo que
+        el poller dejó en caché, y from_cache indica si su último refresco
+        falló (datos potencialmente obsoletos).
+
+        Args:
+            deadline: Instante límite (time.monotonic()) de la petición
+                entrante. None = sin límite más allá del timeout.
+
         Returns:
             Tupla (datos, timestamp, from_cache) donde:
             - datos: Dict con el estado del termostato, o None si no hay datos.
             - timestamp: ISO timestamp de la última actualización exitosa.
             - from_cache: True si los datos provienen del caché.
         """
-        try:
-            datos = self._api_client.get('/termostato/')
-            timestamp = datetime.utcnow().isoformat()
-            self._cache.set(_CACHE_KEY_ESTADO, (datos, timestamp))
+        if self._poller is None and self.refrescar_estado(deadline=deadline):
+            datos, timestamp = self._cache.get(_CACHE_KEY_ESTADO)
             return datos, timestamp, False
+        cached = self._cache.get(_CACHE_KEY_ESTADO)
+        if cached:
+            datos_cache, timestamp_cache = cached
+            return datos_cache, timestamp_cache, self._poller is None or not self._estado_fresco
+        return None, None, False
+
+    def refrescar_estado(self, deadline: Optional[float] = None) -> bool:
+        """Consultar el estado al backend y guardarlo en caché.
+
+        Args:
+            deadline: Instante límite (time.monotonic()) de la consulta.
+
+        Returns:
+            True si se obtuvo y guardó un estado nuevo, False si el backend falló.
+        """
+        try:
+            datos = self._api_client.get('/termostato/', deadline=deadline)
         except ApiError:
-            cached = self._cache.get(_CACHE_KEY_ESTADO)
-            if cached:
-                datos_cache, timestamp_cache = cached
-                return datos_cache, timestamp_cache, True
-            return None, None, False
+            self._estado_fresco = False
+            return False
+        self._cache.set(_CACHE_KEY_ESTADO, (datos, datetime.utcnow().isoformat()))
+        self._estado_fresco = True
+        self._registrar_muestra(datos, time.time())
+        return True
+
+    def _registrar_muestra(self, datos: dict, instante: float) -> None:
+        """Incorporar un estado recién obtenido a las estructuras derivadas.
+
+        Args:
+            datos: Estado devuelto por el backend.
+            instante: Segundos desde epoch en que se obtuvo.
+        """
+        if self._registro is not None:
+            self._registro.agregar(instante, datos)
+        # Tendencia y estadísticas usan las mismas muestras espaciadas que la
+        # serie: ni la ventana se llena en un segundo con muchos navegadores
+        # ni la media y la EWMA dependen de cuántos están consultando
+        if self._serie.agregar(instante, datos):
+            self._indicadores.agregar(instante, datos)
+            self._estadisticas.agregar(instante, datos)
+            self._rollups.agregar(instante, datos)
+
+    def obtener_estadisticas(self) -> dict:
+        """Estadísticas acumuladas desde el arranque.
+
+        Returns:
+            Dict con 'temperatura' y 'bateria' (ver EstadisticasEstado.instantanea).
+        """
+        return self._estadisticas.instantanea()
+
+    def obtener_indicadores(self) -> Optional[dict]:
+        """Indicadores derivados del último estado en caché.
+
+        Ambos se calculan en O(1): la tendencia se mantiene al llegar cada
+        muestra y la diferencia sale del último estado.
+
+        Returns:
+            Dict con 'tendencia' (ver IndicadoresTendencia.tendencia) y
+            'diferencia' (ver calcular_diferencia), o None si no hay estado
+            con temperaturas numéricas.
+        """
+        cached = self._cache.get(_CACHE_KEY_ESTADO)
+        if not cached:
+            return None
+        datos = cached[0]
+        actual = datos.get('temperatura_ambiente')
+        deseada = datos.get('temperatura_deseada')
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (actual, deseada)):
+            return None
+        return {
+            'tendencia': self._indicadores.tendencia(actual, deseada),
+            'diferencia': calcular_diferencia(actual, deseada),
+        }
+
+    def obtener_serie(self, segundos: Optional[float] = None) -> Dict[str, list]:
+        """Muestras de estado recientes guardadas por el servidor.
+
+        No consulta al backend: devuelve los estados obtenidos hasta ahora
+        (por peticiones de usuarios o por el poller).
+
+        Args:
+            segundos: Duración de la ventana hacia atrás desde la última
+                muestra. None = todas las muestras guardadas.
+
+        Returns:
+            Dict columnar con 'timestamps' (epoch en ms) y una lista por
+            campo (temperatura_ambiente, temperatura_deseada, carga_bateria,
+            estado_climatizador).
+        """
+        return self._serie.ventana(segundos)
+
+    def iniciar_poller(self, intervalo: float) -> Poller:
+        """Refrescar el estado en segundo plano y servirlo solo desde caché.
+
+        El tráfico al backend pasa a ser una consulta por intervalo y por
+        proceso, independiente del número de navegadores. Cada consulta
+        tiene como deadline el propio intervalo, así un backend lento no
+        retrasa la cadencia.
+
+        Args:
+            intervalo: Segundos entre refrescos.
+
+        Returns:
+            El Poller arrancado (la primera consulta es inmediata).
+        """
+        self.detener_poller()
+        self._poller = Poller(
+            lambda: self.refrescar_estado(deadline=time.monotonic() + intervalo),
+            intervalo, nombre='poller-estado'
+        ).iniciar()
+        return self._poller
+
+    def detener_poller(self) -> None:
+        """Detener el poller, si lo hay, y volver a consultar por petición."""
+        if self._poller is not None:
+            self._poller.detener()
+            self._poller = None
+
+    def precalentar(self, conexiones: int = 1) -> None:
+        """Preparar el servicio para la primera petición de un usuario.
+
+        Abre conexiones con el backend y deja el estado en caché, de modo
+        que la primera petición no pague el establecimiento de conexión y
+        tenga un fallback aunque el backend falle. Pensado para ejecutarse
+        en segundo plano durante el arranque.
+
+        Args:
+            conexiones: Conexiones a abrir en el pool del ApiClient.
+        """
+        self._api_client.precalentar(conexiones)
+        self.refrescar_estado()
 
-    def obtener_historial(self, limite: int = 60) -> dict:
+    # Un argumento por parámetro de /api/historial
+    def obtener_historial(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        limite: int = 60,
+        deadline: Optional[float] = None,
+        puntos: Optional[int] = None,
+        bucket: Optional[str] = None,
+        agg: str = 'avg',
+        desde: Optional[str] = None,
+        columnas: bool = False
+    ) -> dict:
         """Obtener historial de temperaturas desde el backend.
 
+        Nunca se devuelven más de limite registros, aunque el backend
+        envíe más.
+
+        Con desde solo se devuelven los registros posteriores al cursor.
+        Como el backend los envía del más reciente al más antiguo, la
+        respuesta se lee de forma incremental y se corta en el primero que
+        no es nuevo: un cliente que ya tiene la ventana descarga solo el
+        delta.
+
+        Sin llamar al backend, el historial se sirve desde los rollups si
+        alguno cubre el rango (limite minutos) con la resolución pedida, o
+        si no desde el registro en disco si sus limite últimas muestras caen
+        en el rango (sin huecos ni paradas que lo alarguen).
+
         Args:
             limite: Número máximo de registros a obtener (default: 60).
+            deadline: Instante límite (time.monotonic()) de la petición entrante.
+            puntos: Si se indica, reducir el historial a ese número de
+                registros con LTTB (ver series.reducir_historial).
+            bucket: Si se indica ('1m', '5m', '1h'), agregar los registros
+                en buckets de ese tamaño (ver series.agregar_historial).
+                Se aplica antes que puntos.
+            agg: Agregación de cada bucket: avg, min, max o p95.
+            desde: Cursor (epoch en ms) o timestamp ISO 8601 de la última
+                lectura. Se aplica antes que bucket y puntos.
+            columnas: Devolver 'columnas' (arrays NumPy en orden
+                cronológico, ver series.historial_a_columnas) en lugar de
+                'historial', para los formatos columnar y binario.
 
         Returns:
-            Dict con 'historial' (lista) y 'total' (int).
+            Dict con 'historial' (lista) o 'columnas', 'total' (int) y
+            'cursor' (epoch en ms del registro más reciente leído, para la
+            siguiente petición con desde; None si no hay registros).
 
         Raises:
-            requests.exceptions.RequestException: Si el backend no responde.
+            ValueError: Si limite, puntos, bucket, agg o desde no son válidos.
+            ApiError: Si el backend no responde o su historial no es válido
+                (ej: un timestamp que no se puede interpretar).
+        """
+        _validar_historial(limite, puntos, bucket, agg)
+        cursor = epoch_ms(desde) if desde is not None else None
+
+        local = self._historial_local(limite, puntos, bucket, agg, cursor)
+        if local is not None:
+            serie, cursor = local
+            if columnas:
+                return {'columnas': serie, 'total': len(serie['timestamps']), 'cursor': cursor}
+            historial = columnas_a_historial(serie)
+            return {'historial': historial, 'total': len(historial), 'cursor': cursor}
+
+        # Los parámetros ya están validados: un ValueError a partir de aquí
+        # viene de datos del backend que no se pueden interpretar
+        try:
+            datos, historial, cursor = self._historial_backend(limite, cursor, deadline)
+            if bucket is not None:
+                historial = agregar_historial(historial, bucket, agg)
+            if puntos is not None and len(historial) > puntos:
+                historial = reducir_historial(historial, puntos)
+            if columnas:
+                return {'columnas': historial_a_columnas(historial), 'total': len(historial), 'cursor': cursor}
+        except ValueError as exc:
+            raise ApiError(f'Historial del backend no válido: {exc}') from exc
+        return _respuesta_backend(datos, historial, cursor)
+
+    def _historial_local(
+        self,
+        limite: int,
+        puntos: Optional[int],
+        bucket: Optional[str],
+        agg: str,
+        cursor: Optional[int]
+    ) -> Optional[Tuple[Dict[str, np.ndarray], Optional[int]]]:
+        """Historial sin llamar al backend: desde los rollups o el registro en disco.
+
+        Returns:
+            Tupla (columnas, cursor) ya agregada por bucket y reducida a
+            puntos, o None si ninguna fuente local cubre el rango.
         """
-        return self._api_client.get(
-            f'/termostato/historial/?limite={limite}',
-            timeout=10
+        rollup = self._historial_rollups(limite, puntos, bucket, agg, cursor)
+        if rollup is not None:
+            # Con bucket los rollups ya devuelven el nivel de ese tamaño
+            serie, cursor = rollup
+            return (reducir_columnas(serie, puntos) if puntos is not None else serie), cursor
+        ahora = time.time()
+        segundos = limite * INTERVALO_HISTORIAL
+        if self._registro is None or not self._registro.cubre(segundos, ahora):
+            return None
+        serie, cursor = self._registro.columnas(limite, desde=cursor, inicio=ahora - segundos)
+        if bucket is not None:
+            serie = agregar_columnas(serie, bucket, agg)
+        if puntos is not None:
+            serie = reducir_columnas(serie, puntos)
+        return serie, cursor
+
+    def _historial_backend(
+        self,
+        limite: int,
+        cursor: Optional[int],
+        deadline: Optional[float]
+    ) -> Tuple[dict, list, Optional[int]]:
+        """Pedir el historial al backend.
+
+        Solo con cursor la respuesta se lee en streaming, cortando en el
+        primer registro que no es nuevo. Sin él no hay corte anticipado
+        posible: el cuerpo se decodifica entero con el codec, más rápido
+        que el parser incremental, y se recorta a limite.
+
+        Returns:
+            Tupla (respuesta del backend, historial, cursor).
+        """
+        opciones: Dict[str, Any] = {}
+        if cursor is not None:
+            opciones = {
+                'clave_flujo': 'historial',
+                'limite_flujo': limite,
+                'parar_flujo': lambda registro: anterior_a(registro, cursor),
+            }
+        datos = self._api_client.get(
+            f'/termostato/historial/?limite={limite}', timeout=10, deadline=deadline, **opciones
         )
+        historial = datos.get('historial', [])
+        if len(historial) > limite:
+            historial = historial[:limite]
+        if cursor is None:
+            return datos, historial, ultimo_cursor(historial)
+        historial, cursor = filtrar_desde(historial, cursor)
+        return datos, historial, cursor
+
+    def _historial_rollups(
+        self,
+        limite: int,
+        puntos: Optional[int],
+        bucket: Optional[str],
+        agg: str,
+        cursor: Optional[int]
+    ) -> Optional[Tuple[Dict[str, np.ndarray], Optional[int]]]:
+        """Historial desde el nivel de rollup más grueso que basta.
+
+        La resolución pedida es el bucket, o el rango entre puntos, o un
+        registro por minuto como el backend; nunca más fina que un minuto,
+        así un nivel devuelve a lo sumo limite registros. Con bucket solo
+        vale el nivel de ese mismo tamaño y una agregación componible (no
+        p95).
 
-    def health_check(self) -> dict:
+        Returns:
+            Tupla (columnas, cursor) como RollupsTemperatura.columnas, o
+            None si ningún nivel cubre el rango sin huecos.
+        """
+        segundos = limite * INTERVALO_HISTORIAL
+        if bucket is not None:
+            if agg not in AGREGACIONES_ROLLUP:
+                return None
+            resolucion = BUCKETS[bucket]
+        elif puntos is not None:
+            resolucion = max(segundos / puntos, INTERVALO_HISTORIAL)
+        else:
+            resolucion = INTERVALO_HISTORIAL
+        nivel = self._rollups.elegir_nivel(segundos, resolucion)
+        if nivel is None or (bucket is not None and nivel != bucket):
+            return None
+        return self._rollups.columnas(
+            nivel, segundos, agg if bucket is not None else 'avg', desde=cursor, banda=bucket is not None
+        )
+
+    def health_check(self, deadline: Optional[float] = None) -> dict:
         """Verificar estado del backend via endpoint /comprueba/.
 
+        Args:
+            deadline: Instante límite (time.monotonic()) de la petición entrante.
+
         Returns:
             Dict con datos del backend: status, version, uptime_seconds.
 
         Raises:
             requests.exceptions.RequestException: Si el backend no responde.
         """
-        return self._api_client.get('/comprueba/', timeout=2)
+        return self._api_client.get('/comprueba/', timeout=2, deadline=deadline)
+
+    def obtener_panel(
+        self,
+        partes: Iterable[str] = PARTES_PANEL,
+        limite: int = 60,
+        deadline: Optional[float] = None
+    ) -> Dict[str, dict]:
+        """Obtener varias partes del dashboard en paralelo.
+
+        Cada parte se consulta en su propio thread, así la latencia total
+        es la de la parte más lenta y no la suma. El fallo de una parte no
+        afecta a las demás: cada una indica su propio success.
+
+        Args:
+            partes: Subconjunto de PARTES_PANEL a obtener.
+            limite: Registros de historial (si se pide 'historial').
+            deadline: Instante límite (time.monotonic()) de la petición
+                entrante. Las partes que no terminen a tiempo se devuelven
+                como fallidas.
+
+        Returns:
+            Dict parte -> resultado. Cada resultado tiene success y, según
+            la parte, data / timestamp / from_cache (estado), historial /
+            total (historial), backend (health) o error.
+
+        Raises:
+            ValueError: Si alguna parte no está en PARTES_PANEL, o si se
+                pide el historial con limite menor que 1.
+        """
+        consultas: Dict[str, Callable[[], dict]] = {
+            'estado': lambda: self._parte_estado(deadline),
+            'historial': lambda: self._parte_historial(limite, deadline),
+            'health': lambda: {'success': True, 'backend': self.health_check(deadline=deadline)},
+        }
+        partes = list(dict.fromkeys(partes))
+        desconocidas = [parte for parte in partes if parte not in consultas]
+        if desconocidas:
+            raise ValueError(f"Partes desconocidas: {', '.join(desconocidas)}")
+        if 'historial' in partes and limite < 1:
+            raise ValueError('limite debe ser al menos 1')
+
+        futuros = {parte: self._executor.submit(consultas[parte]) for parte in partes}
+        restante = tiempo_restante(deadline)
+        wait(futuros.values(), timeout=None if restante is None else max(0.0, restante))
+
+        return {parte: _resultado_parte(futuro) for parte, futuro in futuros.items()}
+
+    def _parte_estado(self, deadline: Optional[float]) -> dict:
+        """Parte 'estado' del panel, con el mismo fallback a caché."""
+        datos, timestamp, from_cache = self.obtener_estado(deadline=deadline)
+        if datos is None:
+            return {'success': False, 'error': 'No se pudo conectar con la API del termostato'}
+        return {'success': True, 'data': datos, 'timestamp': timestamp, 'from_cache': from_cache}
+
+    def _parte_historial(self, limite: int, deadline: Optional[float]) -> dict:
+        """Parte 'historial' del panel."""
+        datos = self.obtener_historial(limite=limite, deadline=deadline)
+        return {
+            'success': True,
+            'historial': datos.get('historial', []),
+            'total': datos.get('total', 0),
+        }
+
+
+def _resultado_parte(futuro: Future) -> dict:
+    """Resultado de una parte del panel, o su fallo si no terminó o el backend falló."""
+    if not futuro.done():
+        futuro.cancel()
+        return {'success': False, 'error': 'Deadline superado'}
+    if isinstance(futuro.exception(), ApiError):
+        return {'success': False, 'error': str(futuro.exception())}
+    return futuro.result()
+
+
+def _respuesta_backend(datos: dict, historial: list, cursor: Optional[int]) -> dict:
+    """Respuesta de obtener_historial con el historial ya filtrado y reducido."""
+    if historial is not datos.get('historial') or 'total' not in datos:
+        # Historial filtrado o reducido, o lectura cortada antes de 'total'
+        datos = {**datos, 'historial': historial, 'total': len(historial)}
+    return {**datos, 'cursor': cursor}
+
+
+def _validar_historial(limite: int, puntos: Optional[int], bucket: Optional[str], agg: str) -> None:
+    """Validar los parámetros de obtener_historial antes de consultar ninguna fuente.
+
+    Raises:
+        ValueError: Si limite, puntos, bucket o agg no son válidos.
+    """
+    if limite < 1:
+        raise ValueError('limite debe ser al menos 1')
+    if puntos is not None and puntos < PUNTOS_MINIMOS:
+        raise ValueError(f'puntos debe ser al menos {PUNTOS_MINIMOS}')
+    if bucket is not None and bucket not in BUCKETS:
+        raise ValueError(f"bucket debe ser uno de: {', '.join(BUCKETS)}")
+    if agg not in AGREGACIONES:
+        raise ValueError(f"agg debe ser uno de: {', '.join(AGREGACIONES)}")
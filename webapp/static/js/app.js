@@ -21,7 +21,7 @@ import { actualizarIndicadorTendencia } from './tendencia.js';
 import { actualizarDiferencia } from './diferencia.js';
 import { actualizarGraficaTemperatura, cambiarRangoGrafica } from './graficas/temperatura.js';
 import { actualizarGraficaClimatizador } from './graficas/climatizador.js';
-import { inicializarSelectorRango } from './historial.js';
+import { inicializarSelectorRango, sembrarHistoricoServidor } from './historial.js';
 
 let intervalId = null;
 let timestampIntervalId = null;
@@ -29,8 +29,9 @@ let timestampIntervalId = null;
 /**
  * Procesa y muestra los datos recibidos de la API
  * @param {Object} datosOriginales - Datos originales de la API
+ * @param {Object|null} [indicadores] - Tendencia y diferencia del servidor
  */
-function procesarDatosRecibidos(datosOriginales) {
+function procesarDatosRecibidos(datosOriginales, indicadores) {
     const validacion = validarDatos(datosOriginales);
     const datos = validacion.datos;
 
@@ -55,12 +56,14 @@ function procesarDatosRecibidos(datosOriginales) {
         actualizarIndicadorTendencia(
             datosOriginales.temperatura_ambiente,
             datosOriginales.temperatura_deseada,
-            datosOriginales.estado_climatizador
+            datosOriginales.estado_climatizador,
+            indicadores ? indicadores.tendencia : null
         );
         // WT-11: Actualizar indicador de diferencia
         actualizarDiferencia(
             datosOriginales.temperatura_ambiente,
-            datosOriginales.temperatura_deseada
+            datosOriginales.temperatura_deseada,
+            indicadores ? indicadores.diferencia : null
         );
     }
 }
@@ -85,7 +88,7 @@ async function actualizarDatos() {
         const resultado = await obtenerEstado();
 
         if (resultado.success) {
-            procesarDatosRecibidos(resultado.data);
+            procesarDatosRecibidos(resultado.data, resultado.indicadores);
             setUltimaActualizacion(Date.now());
             actualizarEstadoConexion(resultado.from_cache ? 'offline' : 'online');
             actualizarTimestamp();
@@ -133,10 +136,13 @@ function inicializarDiferencia() {
 /**
  * Inicia el ciclo de actualizacion automatica
  */
-function iniciarActualizacion() {
+async function iniciarActualizacion() {
     // Inicializar boton de cerrar del banner
     inicializarBannerCerrar();
 
+    // Pestana nueva: partir de la serie del servidor en lugar de vacio
+    await sembrarHistoricoServidor();
+
     // Verificar conexion inmediatamente al iniciar
     actualizarDatos();
 
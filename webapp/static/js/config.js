@@ -14,11 +14,13 @@ export const CLIMATIZADOR_KEY = 'climatizador_historico';
 export const RANGO_PREFERENCIA_KEY = 'grafica_rango_preferido';
 
 // WT-15: Rangos de tiempo disponibles para graficas
+// puntos: reduccion LTTB en el servidor para rangos con mas registros que pixeles
+// bucket: agregacion en el servidor (media por bucket, con banda min / max)
 export const RANGOS_TIEMPO = {
     '5min': { label: '5 min', ms: 5 * 60 * 1000, usaAPI: false },
     '1h': { label: '1 hora', ms: 60 * 60 * 1000, usaAPI: true, limite: 60 },
-    '6h': { label: '6 horas', ms: 6 * 60 * 60 * 1000, usaAPI: true, limite: 360 },
-    '24h': { label: '24 horas', ms: 24 * 60 * 60 * 1000, usaAPI: true, limite: 1440 }
+    '6h': { label: '6 horas', ms: 6 * 60 * 60 * 1000, usaAPI: true, limite: 360, puntos: 240 },
+    '24h': { label: '24 horas', ms: 24 * 60 * 60 * 1000, usaAPI: true, limite: 1440, bucket: '5m' }
 };
 
 // WT-22: Configuracion de reintentos
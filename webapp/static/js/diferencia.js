@@ -7,29 +7,38 @@
  * Calcula la diferencia y determina el estado
  * @param {number} tempActual - Temperatura ambiente actual
  * @param {number} tempDeseada - Temperatura objetivo
+ * @param {Object|null} [servidor] - Diferencia ya calculada en /api/estado
+ *     ({diferencia, absoluta, estado, porcentaje})
  * @returns {Object} { diferencia, diffAbsoluta, estado, porcentaje, texto }
  */
-function calcularDiferencia(tempActual, tempDeseada) {
-    const diferencia = tempActual - tempDeseada;
-    const diffAbsoluta = Math.abs(diferencia);
-
-    // Determinar estado: frio (actual < deseada), ok (cerca), calor (actual > deseada)
-    let estado;
-    if (diffAbsoluta <= 0.5) {
-        estado = 'ok';
-    } else if (diferencia < 0) {
-        estado = 'frio';  // Actual esta por debajo de deseada
+function calcularDiferencia(tempActual, tempDeseada, servidor) {
+    let diferencia, diffAbsoluta, estado, porcentaje;
+    if (servidor) {
+        diferencia = servidor.diferencia;
+        diffAbsoluta = servidor.absoluta;
+        estado = servidor.estado;
+        porcentaje = servidor.porcentaje;
     } else {
-        estado = 'calor'; // Actual esta por encima de deseada
-    }
+        diferencia = tempActual - tempDeseada;
+        diffAbsoluta = Math.abs(diferencia);
 
-    // Calcular porcentaje para la barra (max 5C de diferencia = 0%)
-    const maxDiff = 5;
-    const porcentaje = Math.max(0, Math.min(100, (1 - diffAbsoluta / maxDiff) * 100));
+        // Determinar estado: frio (actual < deseada), ok (cerca), calor (actual > deseada)
+        if (diffAbsoluta <= 0.5) {
+            estado = 'ok';
+        } else if (diferencia < 0) {
+            estado = 'frio';  // Actual esta por debajo de deseada
+        } else {
+            estado = 'calor'; // Actual esta por encima de deseada
+        }
+
+        // Calcular porcentaje para la barra (max 5C de diferencia = 0%)
+        const maxDiff = 5;
+        porcentaje = Math.max(0, Math.min(100, (1 - diffAbsoluta / maxDiff) * 100));
+    }
 
     // Generar texto descriptivo
     let texto;
-    if (diffAbsoluta <= 0.5) {
+    if (estado === 'ok') {
         texto = 'Temperatura en objetivo';
     } else if (diferencia < 0) {
         texto = '+' + diffAbsoluta.toFixed(1) + '\u00B0C para alcanzar objetivo';
@@ -50,9 +59,10 @@ function calcularDiferencia(tempActual, tempDeseada) {
  * Actualiza el indicador de diferencia en el DOM
  * @param {number} tempActual - Temperatura ambiente actual
  * @param {number} tempDeseada - Temperatura objetivo
+ * @param {Object|null} [diferenciaServidor] - Diferencia de /api/estado
  */
-export function actualizarDiferencia(tempActual, tempDeseada) {
-    const resultado = calcularDiferencia(tempActual, tempDeseada);
+export function actualizarDiferencia(tempActual, tempDeseada, diferenciaServidor) {
+    const resultado = calcularDiferencia(tempActual, tempDeseada, diferenciaServidor);
 
     // Actualizar texto
     const textoEl = document.getElementById('diferencia-texto');
@@ -272,7 +272,7 @@ export async function recargarHistorialAPI() {
     if (!usandoHistorialAPI || !rangoActualConfig) return;
 
     try {
-        const historial = await obtenerHistorialAPI(rangoActualConfig.limite);
+        const historial = await obtenerHistorialAPI(rangoActualConfig.limite, rangoActualConfig);
         if (historial && historial.length > 0) {
             renderizarGrafica(historial);
         }
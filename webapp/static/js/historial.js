@@ -2,7 +2,13 @@
  * Modulo de historial de temperatura (WT-15)
  * Maneja la obtencion de datos historicos desde la API
  */
-import { RANGOS_TIEMPO, RANGO_PREFERENCIA_KEY } from './config.js';
+import {
+    RANGOS_TIEMPO,
+    RANGO_PREFERENCIA_KEY,
+    TEMPERATURA_KEY,
+    CLIMATIZADOR_KEY,
+    VENTANA_TIEMPO_MS
+} from './config.js';
 
 let rangoActual = '5min';
 
@@ -29,42 +35,225 @@ export function setRangoActual(rango) {
     }
 }
 
+// Historial ya descargado por URL, para pedir solo los registros nuevos.
+// Acotado a las ultimas consultas; se descarta una entrada cuando su
+// cursor falla o cuando ya paso una ventana entera desde la descarga
+const historialDescargado = new Map();
+const MAX_HISTORIALES_DESCARGADOS = 4;
+
+/**
+ * Historial descargado para una URL si aun sirve para pedir el delta
+ * @param {string} url - URL de la consulta
+ * @returns {Object|null} Entrada {historial, cursor, ventanaMs, descargado} o null
+ */
+function historialPrevio(url) {
+    const previo = historialDescargado.get(url);
+    if (!previo) return null;
+    if (typeof previo.cursor !== 'number' || Date.now() - previo.descargado > previo.ventanaMs) {
+        // Toda la ventana ha cambiado: el delta seria la consulta completa
+        historialDescargado.delete(url);
+        return null;
+    }
+    return previo;
+}
+
+/**
+ * Guarda el historial de una URL descartando la consulta mas antigua
+ * @param {string} url - URL de la consulta
+ * @param {Object} entrada - {historial, cursor, ventanaMs}
+ */
+function guardarHistorial(url, entrada) {
+    historialDescargado.delete(url);
+    historialDescargado.set(url, Object.assign({ descargado: Date.now() }, entrada));
+    if (historialDescargado.size > MAX_HISTORIALES_DESCARGADOS) {
+        historialDescargado.delete(historialDescargado.keys().next().value);
+    }
+}
+
+// Etiquetas del eje X; un formateador reutilizado es mucho mas barato
+// que toLocaleTimeString() por punto. El backend envia la hora de reloj
+// sin zona horaria y el servidor la codifica como UTC: se formatea en UTC
+// para mostrar esa misma hora en cualquier zona del navegador
+const formatoHora = new Intl.DateTimeFormat('es-ES', { hour: '2-digit', minute: '2-digit', timeZone: 'UTC' });
+
+/**
+ * Etiqueta de hora del eje X para un timestamp del historial
+ * @param {number} ms - Epoch en ms de /api/historial (hora de reloj como UTC)
+ * @returns {string} Hora 'HH:MM' tal como la envia el backend
+ */
+export function etiquetaHora(ms) {
+    return formatoHora.format(ms);
+}
+
+/**
+ * Construye la URL de /api/historial (formato binario)
+ * @param {number} limite - Numero maximo de registros
+ * @param {Object} [opciones] - Parametros opcionales (puntos, bucket, agg)
+ * @returns {string} URL con los parametros definidos
+ */
+function construirUrlHistorial(limite, opciones) {
+    let url = '/api/historial?formato=binario&limite=' + limite;
+    ['puntos', 'bucket', 'agg'].forEach(function(clave) {
+        if (opciones && opciones[clave]) {
+            url += '&' + clave + '=' + opciones[clave];
+        }
+    });
+    return url;
+}
+
+/**
+ * Decodifica el historial binario de /api/historial?formato=binario
+ * Cabecera de 16 bytes little-endian: 'TH', version, banda, n (uint32),
+ * cursor (float64); despues timestamps Float64Array(n), temperaturas
+ * Float32Array(n) y, con banda, min / max Float32Array(n) y muestras
+ * Uint32Array(n). Los arrays son vistas sobre el buffer, sin copia.
+ * @param {ArrayBuffer} buffer - Cuerpo de la respuesta
+ * @returns {Object} {cursor, timestamps, temperaturas, min?, max?, muestras?}
+ * @throws {Error} Si la cabecera no es valida
+ */
+export function decodificarHistorialBinario(buffer) {
+    const vista = new DataView(buffer);
+    if (vista.getUint8(0) !== 0x54 || vista.getUint8(1) !== 0x48 || vista.getUint8(2) !== 1) {
+        throw new Error('Cabecera de historial binario no valida');
+    }
+    const banda = vista.getUint8(3) === 1;
+    const n = vista.getUint32(4, true);
+    const cursor = vista.getFloat64(8, true);
+    let desplazamiento = 16;
+    const columna = function(Tipo) {
+        const array = new Tipo(buffer, desplazamiento, n);
+        desplazamiento += Tipo.BYTES_PER_ELEMENT * n;
+        return array;
+    };
+    const datos = {
+        cursor: isNaN(cursor) ? null : cursor,
+        timestamps: columna(Float64Array),
+        temperaturas: columna(Float32Array)
+    };
+    if (banda) {
+        datos.min = columna(Float32Array);
+        datos.max = columna(Float32Array);
+        datos.muestras = columna(Uint32Array);
+    }
+    return datos;
+}
+
+/**
+ * Valor float32 a numero de grafica: 2 decimales, null si no hay dato
+ * @param {number} valor - Valor leido de un Float32Array
+ * @returns {number|null} Valor redondeado o null
+ */
+function valorGrafica(valor) {
+    return isNaN(valor) ? null : Math.round(valor * 100) / 100;
+}
+
+/**
+ * Transforma el historial decodificado al formato de grafica
+ * Las columnas ya vienen de mas antiguo a mas reciente y los timestamps
+ * en epoch ms: no hace falta ordenar ni parsear fechas.
+ * @param {Object} data - Resultado de decodificarHistorialBinario()
+ * @returns {Array} Registros de grafica de mas antiguo a mas reciente
+ */
+function transformarHistorial(data) {
+    return Array.from(data.timestamps, function(ms, i) {
+        return {
+            temperatura: valorGrafica(data.temperaturas[i]),
+            timestamp: etiquetaHora(ms),
+            fecha_completa: ms,
+            // Banda del bucket (solo con opciones.bucket)
+            min: data.min ? valorGrafica(data.min[i]) : undefined,
+            max: data.max ? valorGrafica(data.max[i]) : undefined
+        };
+    });
+}
+
 /**
  * Obtiene el historial de temperaturas desde la API
+ * Tras la primera descarga de una consulta solo pide los registros
+ * posteriores al cursor y los agrega, manteniendo la misma ventana.
+ * Las consultas con bucket se piden completas (el ultimo bucket cambia).
  * @param {number} limite - Numero maximo de registros
+ * @param {Object} [opciones] - Reduccion en el servidor
+ * @param {number} [opciones.puntos] - Reducir con LTTB a este numero de puntos
+ * @param {string} [opciones.bucket] - Agregar en buckets de 1m, 5m o 1h
+ * @param {string} [opciones.agg] - Agregacion por bucket (avg, min, max, p95)
  * @returns {Promise<Array>} Array con datos del historial
  */
-export async function obtenerHistorialAPI(limite) {
+export async function obtenerHistorialAPI(limite, opciones) {
+    const url = construirUrlHistorial(limite, opciones);
     try {
-        const response = await fetch('/api/historial?limite=' + limite);
-        const data = await response.json();
-
-        if (data.success && data.historial) {
-            // Transformar formato de API a formato de grafica
-            const historial = data.historial.map(function(item) {
-                const fecha = new Date(item.timestamp);
-                return {
-                    temperatura: item.temperatura,
-                    timestamp: fecha.toLocaleTimeString('es-ES', {
-                        hour: '2-digit',
-                        minute: '2-digit'
-                    }),
-                    fecha_completa: item.timestamp
-                };
-            });
-            // Ordenar de mas antiguo a mas reciente (la API viene al reves)
-            historial.sort(function(a, b) {
-                return new Date(a.fecha_completa) - new Date(b.fecha_completa);
+        const conBucket = Boolean(opciones && opciones.bucket);
+        const previo = conBucket ? null : historialPrevio(url);
+        const incremental = previo !== null;
+        const response = await fetch(incremental ? url + '&desde=' + previo.cursor : url);
+        if (!response.ok) {
+            // Los errores llegan en JSON con success=false; la siguiente
+            // consulta se pide completa
+            historialDescargado.delete(url);
+            return [];
+        }
+        const data = decodificarHistorialBinario(await response.arrayBuffer());
+        let historial = transformarHistorial(data);
+        let ventanaMs = 0;
+        if (incremental) {
+            ventanaMs = previo.ventanaMs;
+            historial = previo.historial.concat(historial);
+            const ultimo = historial[historial.length - 1].fecha_completa;
+            historial = historial.filter(function(d) {
+                return d.fecha_completa >= ultimo - ventanaMs;
             });
-            return historial;
+        } else if (historial.length > 0) {
+            ventanaMs = historial[historial.length - 1].fecha_completa - historial[0].fecha_completa;
         }
-        return [];
+        if (!conBucket) {
+            guardarHistorial(url, { historial: historial, cursor: data.cursor, ventanaMs: ventanaMs });
+        }
+        return historial;
     } catch (error) {
+        historialDescargado.delete(url);
         console.error('Error obteniendo historial:', error);
         return [];
     }
 }
 
+/**
+ * Rellena el historico local de 5 minutos con la serie del servidor
+ * Solo si el navegador no tiene datos propios (pestana nueva)
+ * @returns {Promise<void>}
+ */
+export async function sembrarHistoricoServidor() {
+    if (localStorage.getItem(TEMPERATURA_KEY) || localStorage.getItem(CLIMATIZADOR_KEY)) {
+        return;
+    }
+    try {
+        const response = await fetch('/api/serie?ventana=' + VENTANA_TIEMPO_MS / 1000);
+        const data = await response.json();
+        if (!data.success || !data.total) return;
+
+        const valoresClimatizador = { 'apagado': 0, 'enfriando': 1, 'calentando': 2 };
+        const temperaturas = [];
+        const estados = [];
+        data.timestamps.forEach(function(ms, i) {
+            const fecha = new Date(ms);
+            const base = {
+                timestamp: fecha.toLocaleTimeString('es-ES'),
+                fecha_completa: fecha.toISOString()
+            };
+            if (data.temperatura_ambiente[i] !== null) {
+                temperaturas.push(Object.assign({ temperatura: data.temperatura_ambiente[i] }, base));
+            }
+            const estado = data.estado_climatizador[i];
+            if (estado !== null) {
+                estados.push(Object.assign({ estado: estado, valor: valoresClimatizador[estado] || 0 }, base));
+            }
+        });
+        localStorage.setItem(TEMPERATURA_KEY, JSON.stringify(temperaturas));
+        localStorage.setItem(CLIMATIZADOR_KEY, JSON.stringify(estados));
+    } catch (error) {
+        console.error('Error obteniendo serie del servidor:', error);
+    }
+}
+
 /**
  * Muestra u oculta el indicador de carga
  * @param {boolean} mostrar - True para mostrar, false para ocultar
@@ -124,7 +313,7 @@ export function inicializarSelectorRango(callbackCambioRango) {
             if (callbackCambioRango) {
                 if (config.usaAPI) {
                     mostrarCargando(true);
-                    const historial = await obtenerHistorialAPI(config.limite);
+                    const historial = await obtenerHistorialAPI(config.limite, config);
                     mostrarCargando(false);
                     callbackCambioRango(nuevoRango, historial);
                 } else {
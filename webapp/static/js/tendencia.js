@@ -136,15 +136,17 @@ function generarTextoTendencia(tempActual, tempDeseada, estadoClimatizador, dire
  * @param {number} tempActual - Temperatura actual
  * @param {number} tempDeseada - Temperatura objetivo
  * @param {string} estadoClimatizador - Estado del climatizador
+ * @param {Object|null} [tendenciaServidor] - Tendencia de /api/estado; sin
+ *     ella (ej: al iniciar con valores del DOM) se calcula del historico local
  */
-export function actualizarIndicadorTendencia(tempActual, tempDeseada, estadoClimatizador) {
+export function actualizarIndicadorTendencia(tempActual, tempDeseada, estadoClimatizador, tendenciaServidor) {
     const flechaEl = document.getElementById('tendencia-flecha');
     const iconoEl = document.getElementById('tendencia-icono');
     const textoEl = document.getElementById('tendencia-texto');
 
     if (!flechaEl || !iconoEl || !textoEl) return;
 
-    const tendencia = calcularTendencia(tempActual, tempDeseada);
+    const tendencia = tendenciaServidor || calcularTendencia(tempActual, tempDeseada);
 
     actualizarFlechaTendencia(flechaEl, tendencia);
     actualizarIconoClimatizador(iconoEl, estadoClimatizador);